@@ -0,0 +1,324 @@
+"""
+Mikrobenchmarks för kärnan, körbara utan nätverk, yt-dlp eller FFmpeg.
+
+Mäter:
+- utdatavägen från en yt-dlp-process (OutputParser, _on_output_received och _on_events_parsed),
+- DownloadJob.to_dict/from_dict,
+- export_jobs/import_jobs med 1k, 10k och 100k jobb,
+- utdelningen i start_next_jobs_in_queue med stora köer,
+- uppdateringar av tabellerna i MainWindow med många rader.
+
+Varje fall körs flera gånger och den bästa tiden sparas. Resultaten läggs till i en JSONL-fil
+(standard benchmarks/results.jsonl) tillsammans med commit och Python-version, och jämförs med den
+senaste körningen från en annan commit; fall som blivit långsammare än --threshold markeras.
+
+Körs med:  python benchmarks/bench_core.py [--quick] [--filter TEXT] [--results FIL] [--no-save]
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtCore import QObject, QProcess, QStandardPaths, pyqtSignal
+from PyQt6.QtWidgets import QApplication
+
+QStandardPaths.setTestModeEnabled(True)
+
+from yt_dlp_gui_app.core.config import ConfigManager
+from yt_dlp_gui_app.core.download_archive import DownloadArchive
+from yt_dlp_gui_app.core.info_cache import InfoCache
+from yt_dlp_gui_app.core.job_manager import JobManager
+from yt_dlp_gui_app.core.job_store import JobStore
+from yt_dlp_gui_app.core.log_store import JobLogStore
+from yt_dlp_gui_app.core.models import DownloadJob, JobStatus
+from yt_dlp_gui_app.core.negative_cache import NegativeCache
+from yt_dlp_gui_app.core.output_parser import OutputParser
+from yt_dlp_gui_app.core.ui_bridge import UIBridge
+
+DEFAULT_RESULTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results.jsonl")
+CHUNK_SIZE = 4096 # Ungefär vad QProcess levererar per readyRead under en snabb nedladdning
+HOSTS = [f"https://site{i}.example/watch/" for i in range(20)]
+
+class FakeRunner(QObject):
+    """Ersätter YtDlpRunner så att utdelningen kan mätas utan att några processer startas."""
+    process_started = pyqtSignal(str)
+    process_finished = pyqtSignal(str, int, QProcess.ExitStatus)
+    output_received = pyqtSignal(str, str)
+    events_parsed = pyqtSignal(str, list)
+    error_occurred = pyqtSignal(str, QProcess.ProcessError)
+
+    def __init__(self, job: DownloadJob):
+        super().__init__()
+        self.job = job
+
+    def start(self) -> None:
+        pass
+
+    def cancel(self) -> None:
+        pass
+
+    def set_rate_limit(self, rate_limit) -> None:
+        pass
+
+class Workspace:
+    """En JobManager med alla filer i en temporär katalog och utan externa processer."""
+
+    def __init__(self, ffmpeg_path: str | None = None):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.config_manager = ConfigManager()
+        config = self.config_manager.get_config()
+        config.yt_dlp_path = sys.executable
+        config.ffmpeg_path = ffmpeg_path
+        config.prefetch_metadata = False
+        config.expand_playlists = False
+        config.max_parallel_downloads = 8
+        config.max_downloads_per_host = 2
+        path = lambda name: os.path.join(self.tmp.name, name)
+        self.job_manager = JobManager(self.config_manager, job_store=JobStore(":memory:"), log_store=JobLogStore(path("logs")),
+                                      info_cache=InfoCache(path("info")), download_archive=DownloadArchive(path("archive.txt")),
+                                      negative_cache=NegativeCache(path("negative.json")))
+        self.job_manager._create_runner = lambda job, yt_dlp_path, info_json_path: FakeRunner(job)
+
+    def close(self) -> None:
+        self.job_manager.shutdown()
+        self.tmp.cleanup()
+
+def make_jobs(count: int, status: JobStatus = JobStatus.STATUS_WAITING) -> List[DownloadJob]:
+    return [DownloadJob(url=f"{HOSTS[i % len(HOSTS)]}{i}", title=f"Video {i}", status=status,
+                        output_path="/tmp/nedladdningar", args_list=["-f", "bestvideo+bestaudio/best", "--write-thumbnail"])
+            for i in range(count)]
+
+def make_output(lines: int) -> bytes:
+    """Utdata från en fragmentbaserad nedladdning, med förloppsrader från --progress-template."""
+    out = ["[youtube] dQw4w9WgXcQ: Downloading webpage", "[download] Destination: Läten från fjällen.f137.mp4"]
+    total = 250_000_000
+    for i in range(lines):
+        done = total * i // lines
+        out.append(f"[ytdlpgui-progress] downloading|{done}|{total}|NA|{4_500_000.0 + i}|{(total - done) // 4_500_000}")
+        if i % 50 == 0:
+            out.append(f"[download] Got fragment {i // 50} of {lines // 50}")
+    out.append('[Merger] Merging formats into "Läten från fjällen.mp4"')
+    return ("\n".join(out) + "\n").encode("utf-8")
+
+def measure(setup: Callable[[], object], run: Callable[[object], None], rounds: int,
+            teardown: Callable[[object], None] = lambda state: None) -> float:
+    """Bästa tiden i sekunder över rounds körningar; setup och teardown räknas inte."""
+    best = float("inf")
+    for _ in range(rounds):
+        state = setup()
+        start = time.perf_counter()
+        run(state)
+        best = min(best, time.perf_counter() - start)
+        teardown(state)
+    return best
+
+def bench_output_pipeline(sizes: List[int]) -> Dict[str, tuple]:
+    results = {}
+    for lines in sizes:
+        data = make_output(lines)
+        chunks = [data[i:i + CHUNK_SIZE] for i in range(0, len(data), CHUNK_SIZE)]
+
+        def setup():
+            workspace = Workspace()
+            manager = workspace.job_manager
+            job = make_jobs(1)[0]
+            manager.registry.add(job, "queue")
+            runner = FakeRunner(job)
+            manager.active_runners[job.id] = runner
+            return workspace, manager, job, OutputParser()
+
+        def run(state):
+            _, manager, job, parser = state
+            # Samma väg som YtDlpRunner._emit_parsed följd av JobManagers slottar.
+            for chunk in chunks:
+                log_text, events = parser.feed(chunk)
+                if log_text:
+                    manager._on_output_received(job.id, log_text)
+                if events:
+                    manager._on_events_parsed(job.id, events)
+
+        results[f"output_pipeline[{lines}]"] = (measure(setup, run, 5, lambda state: state[0].close()), data.count(b"\n"), "rad")
+    return results
+
+def bench_serialization(count: int) -> Dict[str, tuple]:
+    jobs = make_jobs(count)
+    dicts = [job.to_dict() for job in jobs]
+    return {
+        f"to_dict[{count}]": (measure(lambda: jobs, lambda js: [job.to_dict() for job in js], 5), count, "jobb"),
+        f"from_dict[{count}]": (measure(lambda: dicts, lambda ds: [DownloadJob.from_dict(d) for d in ds], 5), count, "jobb"),
+    }
+
+def bench_export_import(sizes: List[int]) -> Dict[str, tuple]:
+    results = {}
+    for count in sizes:
+        rounds = 3 if count <= 10_000 else 1
+
+        def setup_export():
+            workspace = Workspace()
+            history = make_jobs(count, JobStatus.STATUS_COMPLETED)
+            workspace.job_manager.registry.reset([], history)
+            return workspace
+
+        def run_export(workspace):
+            workspace.job_manager.export_jobs(os.path.join(workspace.tmp.name, "export.json"))
+
+        results[f"export_jobs[{count}]"] = (measure(setup_export, run_export, rounds, Workspace.close), count, "jobb")
+
+        def setup_import():
+            workspace = setup_export()
+            run_export(workspace)
+            workspace.job_manager.registry.reset([], [])
+            return workspace
+
+        def run_import(workspace):
+            workspace.job_manager.import_jobs(os.path.join(workspace.tmp.name, "export.json"))
+
+        results[f"import_jobs[{count}]"] = (measure(setup_import, run_import, rounds, Workspace.close), count, "jobb")
+    return results
+
+def bench_dispatch(sizes: List[int], dispatched: int = 1000) -> Dict[str, tuple]:
+    """Tiden för att avsluta och ersätta dispatched jobb när kön innehåller size väntande jobb."""
+    results = {}
+    for size in sizes:
+        def setup():
+            workspace = Workspace()
+            manager = workspace.job_manager
+            manager.registry.reset(make_jobs(size), [])
+            manager.ready_queue.rebuild(manager.queue)
+            return workspace
+
+        def run(workspace):
+            manager = workspace.job_manager
+            manager.start_next_jobs_in_queue()
+            for _ in range(dispatched):
+                job_id = next(iter(manager.active_runners))
+                manager._on_process_finished(job_id, 0, QProcess.ExitStatus.NormalExit)
+
+        results[f"dispatch[{size}]"] = (measure(setup, run, 3, Workspace.close), dispatched, "jobb")
+    return results
+
+def bench_window(app: QApplication, sizes: List[int]) -> Dict[str, tuple]:
+    from yt_dlp_gui_app.ui.main_window import MainWindow
+    results = {}
+    for rows in sizes:
+        def setup():
+            # ffmpeg-sökvägen måste finnas, annars visar fönstret en varningsdialog.
+            workspace = Workspace(ffmpeg_path=sys.executable)
+            ui_bridge = UIBridge(workspace.job_manager, workspace.config_manager)
+            window = MainWindow(ui_bridge, workspace.config_manager)
+            window.show()
+            workspace.job_manager.registry.reset(make_jobs(rows, JobStatus.STATUS_RUNNING), [])
+            app.processEvents()
+            return workspace, ui_bridge, window
+
+        def teardown(state):
+            workspace, ui_bridge, window = state
+            window.close()
+            window.deleteLater()
+            logging.getLogger().removeHandler(next(h for h in logging.getLogger().handlers if h.parent() is ui_bridge))
+            app.processEvents()
+            workspace.close()
+
+        def run_refresh(state):
+            _, _, window = state
+            window.update_queue_view()
+            app.processEvents()
+
+        def run_progress(state):
+            workspace, ui_bridge, window = state
+            manager = workspace.job_manager
+            for job in manager.queue:
+                job.progress += 1.0
+                manager.job_updated.emit(job.id)
+            ui_bridge.update_batcher.flush()
+            app.processEvents()
+
+        results[f"window_refresh[{rows}]"] = (measure(setup, run_refresh, 3, teardown), rows, "rad")
+        def setup_progress():
+            state = setup()
+            run_refresh(state)
+            return state
+
+        results[f"window_progress_tick[{rows}]"] = (measure(setup_progress, run_progress, 3, teardown), rows, "rad")
+    return results
+
+def git_commit() -> str:
+    root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=root, capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=root, capture_output=True, text=True).stdout.strip()
+        return f"{commit}-dirty" if dirty else commit
+    except (OSError, subprocess.CalledProcessError):
+        return "okänd"
+
+def load_previous(path: str, commit: str) -> dict | None:
+    """Den senaste körningen från en annan commit än den nuvarande."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            runs = [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return None
+    return next((run for run in reversed(runs) if run.get("commit") != commit), None)
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="hoppa över de största storlekarna")
+    parser.add_argument("--filter", default="", help="kör bara fall vars namn innehåller texten")
+    parser.add_argument("--results", default=DEFAULT_RESULTS)
+    parser.add_argument("--no-save", action="store_true")
+    parser.add_argument("--threshold", type=float, default=1.2, help="kvot mot förra körningen som räknas som försämring")
+    options = parser.parse_args()
+
+    logging.disable(logging.CRITICAL) # Loggning per jobb skulle annars dominera mätningarna
+    app = QApplication.instance() or QApplication([])
+    large = [] if options.quick else [100_000]
+    suites = [
+        ("output_pipeline", lambda: bench_output_pipeline([10_000, 100_000])),
+        ("serialization", lambda: bench_serialization(10_000)),
+        ("export_import", lambda: bench_export_import([1_000, 10_000] + large)),
+        ("dispatch", lambda: bench_dispatch([10_000] + large)),
+        ("window", lambda: bench_window(app, [1_000, 10_000])),
+    ]
+    commit = git_commit()
+    previous = load_previous(options.results, commit)
+    results = {}
+    regressions = []
+    print(f"{'fall':<30} {'bästa (ms)':>11} {'µs/enhet':>10} {'förra':>11} {'kvot':>6}")
+    for suite, run_suite in suites:
+        if options.filter and options.filter not in suite:
+            continue
+        for name, (seconds, count, unit) in run_suite().items():
+            results[name] = {"seconds": seconds, "count": count, "unit": unit}
+            before = (previous or {}).get("results", {}).get(name)
+            ratio = seconds / before["seconds"] if before else None
+            marker = ""
+            if ratio is not None and ratio > options.threshold:
+                regressions.append(name)
+                marker = "  <-- långsammare"
+            print(f"{name:<30} {seconds * 1000:>11.1f} {seconds / count * 1e6:>10.2f} "
+                  f"{(before['seconds'] * 1000 if before else float('nan')):>11.1f} {(ratio or float('nan')):>6.2f}{marker}")
+
+    if previous:
+        print(f"\nJämfört med {previous['commit']} ({previous['timestamp']}).")
+    if not options.no_save:
+        record = {"commit": commit, "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+                  "platform": platform.platform(), "results": results}
+        with open(options.results, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+        print(f"Resultaten sparades i {options.results}.")
+    if regressions:
+        print(f"{len(regressions)} fall är mer än {options.threshold:.2f} gånger långsammare: {', '.join(regressions)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
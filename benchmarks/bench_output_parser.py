@@ -0,0 +1,74 @@
+"""
+Mäter hur många rader per sekund utdatatolken hanterar.
+
+Jämför den inkrementella OutputParser med den tidigare metoden, där varje
+inläst bit avkodades separat och kördes mot alla reguljära uttryck. Den tidigare
+metoden hittade bara första träffen per bit och missade rader som delades mellan
+två läsningar, så den gör mindre arbete än tolken men ger inte korrekta värden.
+
+Körs med:  python benchmarks/bench_output_parser.py
+"""
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from yt_dlp_gui_app.core.output_parser import OutputParser
+
+CHUNK_SIZE = 4096
+
+def make_output(lines: int) -> bytes:
+    """Bygger realistisk utdata från en fragmentbaserad nedladdning."""
+    out = [
+        "[youtube] dQw4w9WgXcQ: Downloading webpage",
+        "[info] dQw4w9WgXcQ: Downloading 1 format(s): 137+140",
+        "[info] Writing video thumbnail 0 to: Läten från fjällen.webp",
+        "[download] Destination: Läten från fjällen.f137.mp4",
+    ]
+    total = 250_000_000
+    for i in range(lines):
+        done = total * i // lines
+        out.append(f"[ytdlpgui-progress] downloading|{done}|{total}|NA|{4_500_000.0 + i}|{(total - done) // 4_500_000}")
+    out.append('[Merger] Merging formats into "Läten från fjällen.mp4"')
+    return ("\n".join(out) + "\n").encode("utf-8")
+
+def legacy_parse(chunk: bytes) -> None:
+    """Den tidigare tolkningen i JobManager._on_output_received."""
+    output = chunk.decode('utf-8', errors='ignore')
+    re.search(r'\[download\]\s+([\d.]+)%', output)
+    (re.search(r'\[Merger\] Merging formats into "(.*)"', output) or
+     re.search(r'\[ExtractAudio\] Destination: (.*)', output) or
+     re.search(r'\[download\] Destination: (.*)', output))
+    re.search(r'Writing thumbnail to: (.*)', output)
+    re.search(r'Duration:\s*([\d:.]+)', output)
+
+def bench(name: str, data: bytes, line_count: int, func) -> float:
+    chunks = [data[i:i + CHUNK_SIZE] for i in range(0, len(data), CHUNK_SIZE)]
+    start = time.perf_counter()
+    func(chunks)
+    elapsed = time.perf_counter() - start
+    rate = line_count / elapsed
+    print(f"{name:<28} {line_count:>9} rader  {elapsed * 1000:8.1f} ms  {rate:>12,.0f} rader/s")
+    return rate
+
+def run_parser(chunks) -> None:
+    parser = OutputParser()
+    for chunk in chunks:
+        parser.feed(chunk)
+    parser.finish()
+
+def run_legacy(chunks) -> None:
+    for chunk in chunks:
+        legacy_parse(chunk)
+
+def main() -> None:
+    for lines in (10_000, 100_000):
+        data = make_output(lines)
+        line_count = data.count(b"\n")
+        bench("OutputParser", data, line_count, run_parser)
+        bench("tidigare (första träff/bit)", data, line_count, run_legacy)
+
+if __name__ == "__main__":
+    main()
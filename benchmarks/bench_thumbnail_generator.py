@@ -0,0 +1,88 @@
+"""
+Mäter tiden per fil för att ta fram en miniatyr med FFmpeg.
+
+Jämför de tidigare argumenten (-ss 5 och full avkodning) med snabbläget i
+ThumbnailGenerator, som söker till närmaste nyckelbildruta, bara avkodar
+nyckelbildrutor och väljer tidpunkten utifrån videons längd.
+
+Utan egna filer skapas testvideor med FFmpeg:s testsrc i en temporär mapp.
+
+Körs med:  python benchmarks/bench_thumbnail_generator.py [--ffmpeg SÖKVÄG] [VIDEO ...]
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from yt_dlp_gui_app.core.thumbnail_generator import build_ffmpeg_args, pick_timestamp
+
+ROUNDS = 5
+
+def legacy_args(video_path: str, output_path: str) -> list[str]:
+    """De tidigare argumenten i ThumbnailGenerator.generate."""
+    return ['-ss', '5', '-i', video_path, '-vframes', '1', '-q:v', '3', '-vf', 'scale=128:-1', '-y', output_path]
+
+def probe_duration(ffmpeg: str, video_path: str) -> float | None:
+    ffprobe = os.path.join(os.path.dirname(ffmpeg), "ffprobe") if os.path.dirname(ffmpeg) else shutil.which("ffprobe")
+    if not ffprobe:
+        return None
+    result = subprocess.run([ffprobe, '-v', 'error', '-show_entries', 'format=duration', '-of', 'csv=p=0', video_path],
+                            capture_output=True, text=True)
+    try:
+        return float(result.stdout.strip())
+    except ValueError:
+        return None
+
+def make_videos(ffmpeg: str, directory: str) -> list[str]:
+    """Skapar en lång och en kort testvideo med glesa nyckelbildrutor."""
+    videos = []
+    for name, seconds in (("long_1080p.mp4", 120), ("short_3s.mp4", 3)):
+        path = os.path.join(directory, name)
+        subprocess.run([ffmpeg, '-v', 'error', '-f', 'lavfi', '-i', f'testsrc2=size=1920x1080:rate=30:duration={seconds}',
+                        '-c:v', 'libx264', '-preset', 'ultrafast', '-g', '300', '-y', path], check=True)
+        videos.append(path)
+    return videos
+
+def bench(ffmpeg: str, args: list[str]) -> tuple[float, bool]:
+    """Returnerar bästa tiden i millisekunder och om en bild skapades."""
+    best = float("inf")
+    ok = False
+    for _ in range(ROUNDS):
+        if os.path.exists(args[-1]):
+            os.remove(args[-1])
+        start = time.perf_counter()
+        result = subprocess.run([ffmpeg, '-v', 'error'] + args, capture_output=True)
+        best = min(best, (time.perf_counter() - start) * 1000)
+        ok = result.returncode == 0 and os.path.exists(args[-1]) and os.path.getsize(args[-1]) > 0
+    return best, ok
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--ffmpeg", default=shutil.which("ffmpeg"))
+    parser.add_argument("videos", nargs="*")
+    options = parser.parse_args()
+    if not options.ffmpeg:
+        print("FFmpeg hittades inte; ange --ffmpeg SÖKVÄG.")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        videos = options.videos or make_videos(options.ffmpeg, tmp)
+        output = os.path.join(tmp, "thumb.jpg")
+        print(f"{'fil':<30} {'tidigare (ms)':>14} {'snabb (ms)':>12} {'faktor':>8}")
+        for video in videos:
+            legacy_ms, legacy_ok = bench(options.ffmpeg, legacy_args(video, output))
+            timestamp = pick_timestamp(probe_duration(options.ffmpeg, video))
+            fast_ms, fast_ok = bench(options.ffmpeg, build_ffmpeg_args(video, output, timestamp))
+            name = os.path.basename(video)[:30]
+            legacy_text = f"{legacy_ms:.1f}" if legacy_ok else "ingen bild"
+            fast_text = f"{fast_ms:.1f}" if fast_ok else "ingen bild"
+            factor = f"{legacy_ms / fast_ms:.1f}x" if legacy_ok and fast_ok else "-"
+            print(f"{name:<30} {legacy_text:>14} {fast_text:>12} {factor:>8}")
+
+if __name__ == "__main__":
+    main()
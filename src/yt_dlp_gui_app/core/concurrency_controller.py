@@ -0,0 +1,113 @@
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, List, Optional, Tuple
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class ConcurrencyDecision:
+    """En ändring av antalet nedladdningsplatser och skälet till den."""
+    timestamp: float
+    limit: int
+    reason: str
+
+class AdaptiveConcurrency(QObject):
+    """
+    Styr antalet samtidiga nedladdningar med AIMD utifrån uppmätt genomströmning och felfrekvens.
+
+    Vid varje utvärdering gäller, i tur och ordning:
+    - misslyckas minst error_threshold av jobben som avslutats sedan förra utvärderingen halveras antalet platser;
+    - gav förra ökningen inte minst min_gain högre total hastighet tas platsen bort igen och
+      nya ökningar väntar cooldown_evaluations utvärderingar;
+    - används alla platser medan jobb väntar läggs en plats till.
+    Antalet hålls mellan min_limit och max_limit.
+    """
+    limit_changed = pyqtSignal(int, str)  # antal platser, skäl
+
+    def __init__(self, min_limit: int = 1, max_limit: int = 8, initial: int = 3, parent: QObject | None = None,
+                 sample: Optional[Callable[[], Tuple[float, int, int]]] = None, interval_ms: int = 10000,
+                 error_threshold: float = 0.3, min_gain: float = 0.05, cooldown_evaluations: int = 6):
+        super().__init__(parent)
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = self._clamp(initial)
+        self.error_threshold = error_threshold
+        self.min_gain = min_gain
+        self.cooldown_evaluations = cooldown_evaluations
+        self.history: Deque[ConcurrencyDecision] = deque(maxlen=20)
+        # Ger (total hastighet i byte/s, aktiva jobb, väntande jobb).
+        self._sample = sample
+        self._succeeded = 0
+        self._failed = 0
+        self._baseline: Optional[float] = None  # Hastigheten före den senaste ökningen
+        self._cooldown = 0
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self._on_timeout)
+
+    def _clamp(self, limit: int) -> int:
+        return min(self.max_limit, max(self.min_limit, limit))
+
+    def start(self, initial: Optional[int] = None) -> None:
+        """Startar utvärderingarna, med initial som första antal platser om det anges."""
+        if initial is not None:
+            self.limit = self._clamp(initial)
+        self.timer.start()
+
+    def stop(self) -> None:
+        self.timer.stop()
+
+    def set_bounds(self, min_limit: int, max_limit: int) -> None:
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        clamped = self._clamp(self.limit)
+        if clamped != self.limit:
+            self._change(clamped, "nya gränser i inställningarna")
+
+    def record_outcome(self, success: bool) -> None:
+        """Räknar ett avslutat jobb; avbrutna jobb ska inte räknas."""
+        if success:
+            self._succeeded += 1
+        else:
+            self._failed += 1
+
+    def _on_timeout(self) -> None:
+        if self._sample is not None:
+            self.evaluate(*self._sample())
+
+    def evaluate(self, throughput: float, active: int, waiting: int) -> None:
+        """Fattar ett beslut utifrån hastigheten just nu och jobben som avslutats sedan förra gången."""
+        succeeded, failed = self._succeeded, self._failed
+        self._succeeded = self._failed = 0
+        finished = succeeded + failed
+        baseline, self._baseline = self._baseline, None
+        if self._cooldown:
+            self._cooldown -= 1
+
+        if failed and failed / finished >= self.error_threshold:
+            self._change(self._clamp(self.limit // 2), f"{failed} av {finished} jobb misslyckades")
+        elif baseline is not None and throughput < baseline * (1 + self.min_gain):
+            self._cooldown = self.cooldown_evaluations
+            self._change(self._clamp(self.limit - 1),
+                         f"ökningen gav ingen högre hastighet ({_format_speed(throughput)} mot {_format_speed(baseline)})")
+        elif not self._cooldown and active >= self.limit and waiting and self.limit < self.max_limit:
+            self._baseline = throughput
+            self._change(self.limit + 1, f"alla platser används och {waiting} jobb väntar ({_format_speed(throughput)})")
+
+    def _change(self, limit: int, reason: str) -> None:
+        if limit == self.limit:
+            return
+        logger.info(f"Antal nedladdningsplatser ändras från {self.limit} till {limit}: {reason}")
+        self.limit = limit
+        self.history.append(ConcurrencyDecision(time.time(), limit, reason))
+        self.limit_changed.emit(limit, reason)
+
+    def describe_history(self) -> List[str]:
+        return [f"{time.strftime('%H:%M:%S', time.localtime(d.timestamp))}  {d.limit} platser: {d.reason}"
+                for d in self.history]
+
+def _format_speed(bytes_per_second: float) -> str:
+    return f"{bytes_per_second / (1024 * 1024):.1f} MiB/s"
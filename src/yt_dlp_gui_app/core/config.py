@@ -3,7 +3,7 @@ import logging
 import os
 import shlex
 from dataclasses import dataclass, field, fields, asdict
-from typing import List, Optional
+from typing import Dict, List, Optional
 from PyQt6.QtCore import QObject, pyqtSignal, QStandardPaths
 
 logger = logging.getLogger(__name__)
@@ -16,9 +16,37 @@ class AppConfig:
     ffmpeg_path: Optional[str] = None # NYTT FÄLT
     theme: str = "default"
     max_parallel_downloads: int = 3
+    adaptive_concurrency: bool = False # Anpassa antalet platser efter uppmätt hastighet och fel
+    adaptive_min_downloads: int = 1
+    adaptive_max_downloads: int = 8
+    fair_share_by: str = "host" # Grupper som delar platserna rättvist: "host", "output_path" eller "none"
+    max_downloads_per_host: int = 0 # 0 = ingen gräns per webbplats
+    host_download_limits: Dict[str, int] = field(default_factory=dict) # Undantag per webbplats, t.ex. {"vimeo.com": 1}
+    bandwidth_limit_kib: int = 0 # Total bandbredd i KiB/s som delas mellan aktiva jobb; 0 = obegränsad
+    runner_backend: str = "subprocess" # "subprocess" startar yt-dlp per jobb, "worker_pool" kör jobben i långlivade Python-processer
+    max_parallel_thumbnails: int = 2
+    thumbnail_cache_max_mb: int = 32 # De minst nyligen använda miniatyrerna i cachen tas bort över gränsen
+    expand_playlists: bool = True # Dela upp spellistor och kanaler i ett jobb per video
+    prefetch_metadata: bool = True # Hämta titel och längd för köade jobb innan nedladdningen startar
+    max_parallel_prefetches: int = 2
+    skip_archived_downloads: bool = False # Starta inte yt-dlp för videor som redan laddats ner med samma inställningar
+    auto_retry: bool = True # Försök igen automatiskt efter tillfälliga fel, med växande väntetid per webbplats
+    retry_max_attempts: int = 3
+    retry_base_delay_s: float = 5.0
+    retry_max_delay_s: float = 300.0
+    negative_cache_ttl_hours: float = 168.0 # Hur länge permanenta fel hindrar nya försök; 0 = tills användaren försöker igen
+    info_cache_ttl_hours: float = 3.0 # 0 stänger av cachen av info-JSON
+    info_cache_max_mb: int = 64
     last_output_dir: Optional[str] = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.DownloadLocation)
     save_queue_on_exit: bool = True
     default_args: List[str] = field(default_factory=list)
+    metrics_interval_s: int = 0 # Skriv metrics.prom och metrics.json så här ofta; 0 = av
+    metrics_dir: Optional[str] = None # Katalog för mätvärdesfilerna; None = programmets datakatalog
+    ui_update_hz: int = 10 # Högsta antal uppdateringar av jobbtabellerna per sekund
+    http_api_enabled: bool = False # Lokalt HTTP/JSON-API på 127.0.0.1, se core.http_api
+    http_api_port: int = 8765
+    http_api_token: Optional[str] = None # Krävs som "Authorization: Bearer <token>"; skapas när API:t aktiveras
+    http_api_output_roots: List[str] = field(default_factory=list) # Kataloger utöver standardkatalogen där API:t får spara
 
     # Nedladdningsalternativ
     download_format: str = "bestvideo+bestaudio/best"
@@ -29,6 +57,25 @@ class AppConfig:
     write_subs: bool = False
     sub_langs: str = "en,sv"
 
+def build_download_args(config: AppConfig) -> List[str]:
+    """yt-dlp-argumenten för ett nytt jobb enligt nedladdningsalternativen, utan dubbletter."""
+    args = []
+    if config.download_format: args.extend(["-f", config.download_format])
+    if config.write_thumbnail: args.append("--write-thumbnail")
+    if config.embed_thumbnail: args.append("--embed-thumbnail")
+    if config.extract_audio:
+        args.append("-x")
+        if config.audio_format: args.extend(["--audio-format", config.audio_format])
+    if config.write_subs:
+        args.append("--write-subs")
+        if config.sub_langs: args.extend(["--sub-langs", config.sub_langs])
+    args.extend(config.default_args)
+    unique_args = []
+    for arg in args:
+        if arg not in unique_args:
+            unique_args.append(arg)
+    return unique_args
+
 class ConfigManager(QObject):
     """Hanterar laddning och sparande av applikationskonfiguration."""
     config_changed = pyqtSignal()
@@ -0,0 +1,203 @@
+import cProfile
+import io
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import traceback
+import tracemalloc
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Deque, List, Optional
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+logger = logging.getLogger(__name__)
+
+# Miljövariabel som slår på mätningar från start, t.ex. YTDLPGUI_DIAGNOSTICS=cprofile,tracemalloc
+DIAGNOSTICS_ENV = "YTDLPGUI_DIAGNOSTICS"
+
+# Sökvägar i stackar som pekar på programmets egen kod, och den här modulen som inte ska pekas ut.
+_PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_THIS_FILE = os.path.abspath(__file__)
+
+@dataclass
+class Stall:
+    """Ett tillfälle då event-loopen inte hann köra på duration_ms millisekunder."""
+    timestamp: float
+    duration_ms: float
+    location: str # Innersta funktionen i programmets egen kod när loopen stod still
+    stack: str
+
+def _describe_stack(frame) -> tuple[str, str]:
+    """Returnerar (plats, stack) för en ram; platsen är den innersta ramen i programmets kod."""
+    entries = traceback.extract_stack(frame)
+    location = "okänd plats"
+    for entry in reversed(entries):
+        path = os.path.abspath(entry.filename)
+        if path.startswith(_PACKAGE_DIR) and path != _THIS_FILE:
+            location = f"{entry.name} ({os.path.relpath(path, _PACKAGE_DIR)}:{entry.lineno})"
+            break
+    else:
+        if entries:
+            location = f"{entries[-1].name} ({os.path.basename(entries[-1].filename)}:{entries[-1].lineno})"
+    return location, "".join(traceback.format_list(entries[-25:]))
+
+class Diagnostics(QObject):
+    """
+    Mäter hur sent event-loopen hinner köra en pulstimer och registrerar frysningar längre än threshold_ms.
+
+    Medan GUI-tråden står still tar en vakttråd en kopia av dess stack, så att frysningen kan knytas till
+    den slot eller funktion som körde. Dessutom kan cProfile och tracemalloc slås på och av; rapporterna
+    skrivs till reports_dir.
+    """
+    stall_detected = pyqtSignal(float, str) # längd i ms, plats
+
+    def __init__(self, reports_dir: str, parent: QObject | None = None, interval_ms: int = 100, threshold_ms: int = 250):
+        super().__init__(parent)
+        self.reports_dir = reports_dir
+        self.interval_ms = interval_ms
+        self.threshold_ms = threshold_ms
+        self.stalls: Deque[Stall] = deque(maxlen=200)
+        self.max_lateness_ms = 0.0
+        self._main_thread_id = threading.get_ident()
+        self._lock = threading.Lock()
+        self._last_beat = time.monotonic()
+        self._captured: Optional[tuple[str, str]] = None
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self._on_heartbeat)
+        self._profiler: Optional[cProfile.Profile] = None
+
+    def start(self) -> None:
+        self._last_beat = time.monotonic()
+        self.timer.start()
+        if self._watchdog is None:
+            self._stop.clear()
+            self._watchdog = threading.Thread(target=self._watch, name="event-loop-watchdog", daemon=True)
+            self._watchdog.start()
+
+    def stop(self) -> None:
+        self.timer.stop()
+        self._stop.set()
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1.0)
+            self._watchdog = None
+
+    def _on_heartbeat(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            lateness_ms = (now - self._last_beat) * 1000 - self.interval_ms
+            self._last_beat = now
+            captured, self._captured = self._captured, None
+        self.max_lateness_ms = max(self.max_lateness_ms, lateness_ms)
+        if lateness_ms >= self.threshold_ms:
+            location, stack = captured or ("okänd plats", "")
+            self.stalls.append(Stall(time.time(), lateness_ms, location, stack))
+            logger.warning(f"Event-loopen stod still i {lateness_ms:.0f} ms, i {location}.")
+            self.stall_detected.emit(lateness_ms, location)
+
+    def _watch(self) -> None:
+        """Vakttråd: tar GUI-trådens stack en gång per frysning, medan frysningen pågår."""
+        poll = max(0.01, self.threshold_ms / 4000)
+        while not self._stop.wait(poll):
+            with self._lock:
+                overdue = (time.monotonic() - self._last_beat) * 1000 - self.interval_ms
+                if overdue < self.threshold_ms or self._captured is not None:
+                    continue
+            frame = sys._current_frames().get(self._main_thread_id)
+            if frame is None:
+                continue
+            captured = _describe_stack(frame)
+            with self._lock:
+                self._captured = captured
+
+    def _report_path(self, prefix: str, extension: str) -> str:
+        os.makedirs(self.reports_dir, exist_ok=True)
+        return os.path.join(self.reports_dir, f"{prefix}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{extension}")
+
+    def write_stall_report(self) -> str:
+        """Skriver de registrerade frysningarna, längst först, och returnerar sökvägen."""
+        path = self._report_path("stalls", "txt")
+        lines = [f"Pulsintervall {self.interval_ms} ms, gräns {self.threshold_ms} ms, "
+                 f"största fördröjning {self.max_lateness_ms:.0f} ms, {len(self.stalls)} frysningar.\n"]
+        for stall in sorted(self.stalls, key=lambda s: s.duration_ms, reverse=True):
+            when = datetime.fromtimestamp(stall.timestamp).strftime('%H:%M:%S')
+            lines.append(f"\n{when}  {stall.duration_ms:.0f} ms  {stall.location}\n{stall.stack}")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.writelines(lines)
+        logger.info(f"Rapport över frysningar sparad i {path}.")
+        return path
+
+    @property
+    def profiling(self) -> bool:
+        return self._profiler is not None
+
+    def start_profiling(self) -> None:
+        """Startar cProfile för GUI-tråden."""
+        if self._profiler is None:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+            logger.info("cProfile har startats.")
+
+    def stop_profiling(self) -> Optional[str]:
+        """Stoppar cProfile och skriver dels en .prof-fil, dels en textsammanfattning. Returnerar textfilens sökväg."""
+        if self._profiler is None:
+            return None
+        profiler, self._profiler = self._profiler, None
+        profiler.disable()
+        path = self._report_path("profile", "prof")
+        profiler.dump_stats(path)
+        summary = io.StringIO()
+        pstats.Stats(profiler, stream=summary).sort_stats(pstats.SortKey.CUMULATIVE).print_stats(40)
+        text_path = f"{os.path.splitext(path)[0]}.txt"
+        with open(text_path, 'w', encoding='utf-8') as f:
+            f.write(summary.getvalue())
+        logger.info(f"cProfile-rapport sparad i {text_path}.")
+        return text_path
+
+    @property
+    def tracing_memory(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start_tracemalloc(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(25)
+            logger.info("tracemalloc har startats.")
+
+    def stop_tracemalloc(self) -> Optional[str]:
+        """Skriver de rader som har allokerat mest minne sedan starten och stoppar tracemalloc."""
+        if not tracemalloc.is_tracing():
+            return None
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        path = self._report_path("tracemalloc", "txt")
+        lines = [f"Spårat minne nu {current / 1024:.0f} KiB, högst {peak / 1024:.0f} KiB.\n\n"]
+        lines += [f"{stat}\n" for stat in snapshot.statistics("lineno")[:40]]
+        with open(path, 'w', encoding='utf-8') as f:
+            f.writelines(lines)
+        logger.info(f"tracemalloc-rapport sparad i {path}.")
+        return path
+
+    def apply_environment(self, value: Optional[str] = None) -> List[str]:
+        """Startar de mätningar som anges i YTDLPGUI_DIAGNOSTICS och returnerar deras namn."""
+        value = os.environ.get(DIAGNOSTICS_ENV, "") if value is None else value
+        enabled = [name.strip().lower() for name in value.split(",") if name.strip()]
+        if "cprofile" in enabled:
+            self.start_profiling()
+        if "tracemalloc" in enabled:
+            self.start_tracemalloc()
+        return enabled
+
+    def shutdown(self) -> None:
+        """Stoppar övervakningen och skriver rapporter för mätningar som fortfarande pågår."""
+        self.stop()
+        self.stop_profiling()
+        self.stop_tracemalloc()
+        if self.stalls:
+            self.write_stall_report()
@@ -0,0 +1,72 @@
+import logging
+import os
+from typing import Iterable, Optional, Set
+from yt_dlp_gui_app.core.url_utils import youtube_video_id
+
+logger = logging.getLogger(__name__)
+
+def archive_key(url: str, info: Optional[dict] = None, variant: Optional[str] = None) -> Optional[str]:
+    """
+    Returnerar arkivnyckeln "<extraktor> <video-id>" på samma form som yt-dlp:s --download-archive,
+    från info-JSON om den finns, annars från URL:en. None om videon inte kan identifieras i förväg.
+    Med en variant (se yt_dlp_args.output_variant) blir den ett tredje fält, så att samma video
+    som ljud, i ett annat format eller i en annan katalog räknas som en egen nedladdning.
+    """
+    if info and info.get("id") and (info.get("extractor_key") or info.get("extractor")):
+        extractor = (info.get("extractor_key") or info["extractor"]).lower()
+        key = f"{extractor} {info['id']}"
+    else:
+        video_id = youtube_video_id(url)
+        key = f"youtube {video_id}" if video_id else None
+    return f"{key} {variant}" if key and variant else key
+
+class DownloadArchive:
+    """
+    Index över färdiga nedladdningar, en rad per video och variant. Raderna börjar som i yt-dlp:s
+    --download-archive men har varianten som tredje fält. Uppslagningar görs i en mängd i minnet.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._keys: Set[str] = set()
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key: Optional[str]) -> bool:
+        return key is not None and key in self._keys
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._keys = {line.strip() for line in f if line.strip()}
+            logger.info(f"Läste {len(self._keys)} poster från nedladdningsarkivet {self.path}.")
+        except FileNotFoundError:
+            self._keys = set()
+        except OSError as e:
+            logger.error(f"Kunde inte läsa nedladdningsarkivet {self.path}: {e}")
+
+    def add(self, key: Optional[str]) -> None:
+        if key is None or key in self._keys:
+            return
+        self._keys.add(key)
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(f"{key}\n")
+        except OSError as e:
+            logger.error(f"Kunde inte skriva till nedladdningsarkivet {self.path}: {e}")
+
+    def rebuild(self, keys: Iterable[str]) -> int:
+        """Ersätter arkivet med de givna nycklarna och returnerar antalet poster."""
+        self._keys = {key for key in keys if key}
+        tmp_path = f"{self.path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.writelines(f"{key}\n" for key in sorted(self._keys))
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error(f"Kunde inte bygga om nedladdningsarkivet {self.path}: {e}")
+        return len(self._keys)
@@ -0,0 +1,179 @@
+import logging
+import os
+import signal
+import socket
+import sys
+import threading
+from typing import List, Optional, TextIO
+from PyQt6.QtCore import QObject, QSocketNotifier, QTimer, pyqtSignal
+from yt_dlp_gui_app.core.config import ConfigManager, build_download_args
+from yt_dlp_gui_app.core.job_manager import JobManager
+from yt_dlp_gui_app.core.models import DownloadJob
+
+logger = logging.getLogger(__name__)
+
+# Underkatalog i spoolkatalogen dit färdiglästa filer flyttas.
+SPOOL_DONE_DIR = "done"
+
+def parse_url_lines(lines) -> List[str]:
+    """URL:er ur textrader; tomma rader och rader som börjar med # hoppas över, flera URL:er per rad tillåts."""
+    urls = []
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            urls.extend(line.split())
+    return urls
+
+class HeadlessService(QObject):
+    """
+    Kör JobManager utan fönster, under QCoreApplication. Nya URL:er läses från filer i en spoolkatalog
+    och/eller från stdin, en per rad. Spoolfiler flyttas till underkatalogen done/ när de har lästs;
+    den som skriver filerna bör skapa dem under ett namn som börjar med punkt eller slutar med .tmp
+    och sedan byta namn, så att halvskrivna filer inte läses.
+
+    SIGTERM och SIGINT sparar kön i jobbdatabasen och avslutar; jobb som avbryts börjar om som
+    väntande vid nästa start.
+    """
+    stopped = pyqtSignal()
+    urls_received = pyqtSignal(list) # Skickas från läsartråden för stdin
+    stdin_closed = pyqtSignal()
+
+    def __init__(self, job_manager: JobManager, config_manager: ConfigManager, spool_dir: Optional[str] = None,
+                 output_dir: Optional[str] = None, read_stdin: bool = False, exit_when_idle: bool = False,
+                 poll_interval_ms: int = 1000, parent: QObject | None = None):
+        super().__init__(parent)
+        self.job_manager = job_manager
+        self.config_manager = config_manager
+        self.spool_dir = spool_dir
+        self.output_dir = output_dir
+        self.read_stdin = read_stdin
+        self.exit_when_idle = exit_when_idle
+        self._stdin_open = read_stdin
+        self._stopping = False
+        self.poll_timer = QTimer(self)
+        self.poll_timer.setInterval(poll_interval_ms)
+        self.poll_timer.timeout.connect(self._on_poll)
+        self.urls_received.connect(self.add_urls)
+        self.stdin_closed.connect(self._on_stdin_closed)
+        self._signal_sockets: Optional[tuple[socket.socket, socket.socket]] = None
+        self._signal_notifier: Optional[QSocketNotifier] = None
+
+    def start(self, stdin: Optional[TextIO] = None) -> None:
+        if self.spool_dir:
+            os.makedirs(os.path.join(self.spool_dir, SPOOL_DONE_DIR), exist_ok=True)
+            logger.info(f"Läser URL:er från spoolkatalogen {self.spool_dir}.")
+        if self.read_stdin:
+            threading.Thread(target=self._read_stdin, args=(stdin or sys.stdin,), name="headless-stdin", daemon=True).start()
+            logger.info("Läser URL:er från stdin.")
+        self.poll_timer.start()
+        self._on_poll()
+
+    def add_urls(self, urls: List[str]) -> None:
+        if self._stopping or not urls:
+            return
+        config = self.config_manager.get_config()
+        output_dir = self.output_dir or config.last_output_dir
+        args = build_download_args(config)
+        for url in urls:
+            self.job_manager.add_job(DownloadJob(url=url, output_path=output_dir, args_list=list(args)))
+        logger.info(f"Lade till {len(urls)} nya jobb i kön, sparas i {output_dir}.")
+
+    def scan_spool(self) -> int:
+        """Läser alla färdiga filer i spoolkatalogen och returnerar antalet URL:er."""
+        if not self.spool_dir:
+            return 0
+        try:
+            names = sorted(os.listdir(self.spool_dir))
+        except OSError as e:
+            logger.error(f"Kunde inte läsa spoolkatalogen {self.spool_dir}: {e}")
+            return 0
+        count = 0
+        for name in names:
+            path = os.path.join(self.spool_dir, name)
+            if name.startswith(".") or name.endswith(".tmp") or not os.path.isfile(path):
+                continue
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    urls = parse_url_lines(f)
+                os.replace(path, os.path.join(self.spool_dir, SPOOL_DONE_DIR, name))
+            except (OSError, UnicodeDecodeError) as e:
+                logger.error(f"Kunde inte läsa spoolfilen {path}: {e}")
+                continue
+            self.add_urls(urls)
+            count += len(urls)
+        return count
+
+    def _read_stdin(self, stream: TextIO) -> None:
+        """Läsartråd: skickar varje rad med URL:er till huvudtråden via en signal."""
+        try:
+            for line in stream:
+                urls = parse_url_lines([line])
+                if urls:
+                    self.urls_received.emit(urls)
+        except (OSError, ValueError) as e:
+            logger.error(f"Kunde inte läsa från stdin: {e}")
+        self.stdin_closed.emit()
+
+    def _on_stdin_closed(self) -> None:
+        self._stdin_open = False
+        logger.info("stdin har stängts.")
+        self._on_poll()
+
+    def _on_poll(self) -> None:
+        if self._stopping:
+            return
+        self.scan_spool()
+        if self.exit_when_idle and self.is_idle():
+            self.stop("alla jobb är klara")
+
+    def is_idle(self) -> bool:
+        """Sant när inga nya URL:er kan komma från stdin och kön är tom."""
+        return not self._stdin_open and not self.job_manager.queue and not self.job_manager.active_runners
+
+    def install_signal_handlers(self) -> None:
+        """
+        Python kör signalhanterare först när tolken får tillbaka kontrollen, vilket inte sker medan Qt:s
+        event-loop väntar. Signalen skrivs därför även till ett socketpar som väcker loopen.
+        """
+        reader, writer = socket.socketpair()
+        reader.setblocking(False)
+        writer.setblocking(False)
+        signal.set_wakeup_fd(writer.fileno())
+        self._signal_sockets = (reader, writer)
+        self._signal_notifier = QSocketNotifier(reader.fileno(), QSocketNotifier.Type.Read, self)
+        self._signal_notifier.activated.connect(self._drain_signal_socket)
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, self._on_signal)
+
+    def _drain_signal_socket(self) -> None:
+        try:
+            while self._signal_sockets[0].recv(64):
+                pass
+        except BlockingIOError:
+            pass
+
+    def _on_signal(self, signum, frame) -> None:
+        self.stop(f"fick {signal.Signals(signum).name}")
+
+    def stop(self, reason: str) -> None:
+        """Slutar ta emot nya URL:er, sparar kön och ber event-loopen att avsluta."""
+        if self._stopping:
+            return
+        self._stopping = True
+        logger.info(f"Avslutar ({reason}); {len(self.job_manager.active_runners)} aktiva och "
+                    f"{len(self.job_manager.queue)} köade jobb sparas.")
+        self.poll_timer.stop()
+        self.job_manager.save_jobs()
+        self.job_manager.shutdown()
+        self.stopped.emit()
+
+    def close(self) -> None:
+        """Återställer signalhanteringen efter att event-loopen har avslutats."""
+        if self._signal_sockets is not None:
+            self._signal_notifier.setEnabled(False)
+            signal.set_wakeup_fd(-1)
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                signal.signal(signum, signal.SIG_DFL)
+            for sock in self._signal_sockets:
+                sock.close()
+            self._signal_sockets = None
@@ -0,0 +1,381 @@
+import dataclasses
+import hmac
+import json
+import logging
+import os
+import secrets
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+from PyQt6.QtCore import QObject, QTimer
+from PyQt6.QtNetwork import QHostAddress, QTcpServer, QTcpSocket
+from yt_dlp_gui_app.core.config import AppConfig, ConfigManager, build_download_args
+from yt_dlp_gui_app.core.job_manager import JobManager
+from yt_dlp_gui_app.core.job_registry import JobRegistry
+from yt_dlp_gui_app.core.models import DownloadJob, JobPriority
+from yt_dlp_gui_app.core.update_batcher import JobUpdateBatcher
+
+logger = logging.getLogger(__name__)
+
+MAX_REQUEST_BYTES = 1024 * 1024
+KEEPALIVE_INTERVAL_MS = 15000 # Kommentarrader som håller SSE-anslutningar öppna genom proxyer
+# Nedladdningsalternativ som kan ändras per anrop; resten av argumenten tas från konfigurationen.
+JOB_OPTIONS = ("download_format", "write_thumbnail", "embed_thumbnail", "extract_audio", "audio_format", "write_subs", "sub_langs")
+# Extra yt-dlp-flaggor som får skickas i "args". Bara flaggor utan värde; fria argument som --exec
+# eller --output skulle låta den som når API:t köra kommandon eller skriva var som helst. Av samma
+# skäl måste "output_dir" ligga i standardkatalogen eller i en av http_api_output_roots.
+ALLOWED_ARGS = ("--no-mtime", "--no-playlist", "--yes-playlist", "--restrict-filenames", "--no-overwrites",
+                "--force-overwrites", "--no-part", "--embed-metadata", "--embed-chapters", "--write-description",
+                "--write-info-json", "--prefer-free-formats")
+# Host-huvuden som accepteras; allt annat kan vara en webbsida som använder DNS-rebinding.
+ALLOWED_HOSTS = ("127.0.0.1", "localhost")
+_REASONS = {200: "OK", 201: "Created", 202: "Accepted", 400: "Bad Request", 401: "Unauthorized", 403: "Forbidden",
+            404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large", 415: "Unsupported Media Type"}
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+@dataclass
+class HttpRequest:
+    method: str
+    path: str
+    query: Dict[str, str]
+    headers: Dict[str, str] # Namnen i gemener
+    body: bytes
+
+    def json(self) -> dict:
+        try:
+            data = json.loads(self.body or b"{}")
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise HttpError(400, f"Ogiltig JSON: {e}")
+        if not isinstance(data, dict):
+            raise HttpError(400, "Kroppen ska vara ett JSON-objekt.")
+        return data
+
+def parse_request(data: bytes) -> Optional[HttpRequest]:
+    """Tolkar en HTTP/1.1-förfrågan, eller returnerar None om den inte har tagits emot helt ännu."""
+    header_end = data.find(b"\r\n\r\n")
+    if header_end < 0:
+        if len(data) > MAX_REQUEST_BYTES:
+            raise HttpError(413, "Förfrågan är för stor.")
+        return None
+    try:
+        request_line, *header_lines = data[:header_end].decode("iso-8859-1").split("\r\n")
+        method, target, _ = request_line.split(" ", 2)
+    except ValueError:
+        raise HttpError(400, "Ogiltig förfrågan.")
+    headers = {}
+    for line in header_lines:
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length", "0"))
+    except ValueError:
+        raise HttpError(400, "Ogiltig Content-Length.")
+    if length > MAX_REQUEST_BYTES:
+        raise HttpError(413, "Förfrågan är för stor.")
+    body = data[header_end + 4:]
+    if len(body) < length:
+        return None
+    url = urlsplit(target)
+    query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+    return HttpRequest(method.upper(), url.path.rstrip("/") or "/", query, headers, bytes(body[:length]))
+
+def job_to_json(job: DownloadJob, container: Optional[str]) -> dict:
+    data = job.to_dict()
+    data["container"] = container
+    return data
+
+class HttpApiServer(QObject):
+    """
+    Ett lokalt HTTP/JSON-API framför JobManager, så att andra program kan lägga till och styra nedladdningar.
+    Lyssnar bara på 127.0.0.1 och kräver alltid "Authorization: Bearer <http_api_token>"; en token skapas
+    när API:t aktiveras utan en. Förfrågningar med ett Origin-huvud eller ett annat Host än 127.0.0.1/localhost
+    avvisas, och POST/DELETE kräver "Content-Type: application/json", så att webbsidor i en webbläsare inte
+    kan nå API:t.
+
+      GET    /api/jobs                 kö och historik (?container=queue|history, ?status=STATUS_...)
+      POST   /api/jobs                 {"urls": [...], "output_dir": ..., "priority": "urgent|normal|bulk",
+                                        "options": {"download_format": ..., ...}, "args": [<ALLOWED_ARGS>]}
+      GET    /api/jobs/<id>
+      POST   /api/jobs/<id>/cancel
+      POST   /api/jobs/<id>/retry
+      DELETE /api/jobs/<id>
+      GET    /api/metrics
+      GET    /api/events               Server-Sent Events: "jobs" med ändrade jobb i batchar och "counts"
+    """
+
+    def __init__(self, job_manager: JobManager, config_manager: ConfigManager, parent: QObject | None = None):
+        super().__init__(parent)
+        self.job_manager = job_manager
+        self.config_manager = config_manager
+        self.server = QTcpServer(self)
+        self.server.newConnection.connect(self._on_new_connection)
+        self._buffers: Dict[QTcpSocket, bytearray] = {}
+        self._continued: set[QTcpSocket] = set()
+        self._streams: List[QTcpSocket] = []
+        # Samma takt som listorna i fönstret, så att ett jobb som ändras ofta skickas högst en gång per batch.
+        self.batcher = JobUpdateBatcher(config_manager.get_config().ui_update_hz, self)
+        self.batcher.jobs_updated.connect(self._broadcast_jobs)
+        self.job_manager.job_updated.connect(self.batcher.mark_dirty)
+        self.counts_timer = QTimer(self)
+        self.counts_timer.setSingleShot(True)
+        self.counts_timer.setInterval(self.batcher.flush_timer.interval())
+        self.counts_timer.timeout.connect(self._broadcast_counts)
+        self.job_manager.queue_changed.connect(self._on_containers_changed)
+        self.job_manager.history_changed.connect(self._on_containers_changed)
+        self.keepalive_timer = QTimer(self)
+        self.keepalive_timer.setInterval(KEEPALIVE_INTERVAL_MS)
+        self.keepalive_timer.timeout.connect(lambda: self._write_to_streams(b": keepalive\n\n"))
+        self.config_manager.config_changed.connect(self.apply_config)
+
+    @property
+    def port(self) -> int:
+        return self.server.serverPort() if self.server.isListening() else 0
+
+    def apply_config(self) -> None:
+        """Startar, stoppar eller flyttar servern enligt konfigurationen."""
+        config = self.config_manager.get_config()
+        self.batcher.set_rate(config.ui_update_hz)
+        self.counts_timer.setInterval(self.batcher.flush_timer.interval())
+        if not config.http_api_enabled:
+            self.stop()
+            return
+        if not config.http_api_token:
+            config.http_api_token = secrets.token_urlsafe(32)
+            logger.info("Skapade en token för HTTP-API:t; den visas under Inställningar och sparas som http_api_token i konfigurationen.")
+            self.config_manager.save_config()
+        if self.port != config.http_api_port:
+            self.stop()
+            self.start(config.http_api_port)
+
+    def start(self, port: int = 0) -> bool:
+        """Lyssnar på 127.0.0.1:port; port 0 väljer en ledig port."""
+        if not self.server.listen(QHostAddress(QHostAddress.SpecialAddress.LocalHost), port):
+            logger.error(f"Kunde inte starta HTTP-API:t på port {port}: {self.server.errorString()}")
+            return False
+        self.keepalive_timer.start()
+        logger.info(f"HTTP-API:t lyssnar på http://127.0.0.1:{self.port}/api/.")
+        return True
+
+    def stop(self) -> None:
+        if not self.server.isListening():
+            return
+        self.server.close()
+        self.keepalive_timer.stop()
+        for socket in list(self._buffers) + self._streams:
+            socket.disconnectFromHost()
+        self._buffers.clear()
+        self._streams.clear()
+        logger.info("HTTP-API:t har stoppats.")
+
+    def _on_new_connection(self) -> None:
+        while self.server.hasPendingConnections():
+            socket = self.server.nextPendingConnection()
+            self._buffers[socket] = bytearray()
+            socket.readyRead.connect(lambda s=socket: self._on_ready_read(s))
+            socket.disconnected.connect(lambda s=socket: self._on_disconnected(s))
+
+    def _on_disconnected(self, socket: QTcpSocket) -> None:
+        self._buffers.pop(socket, None)
+        self._continued.discard(socket)
+        if socket in self._streams:
+            self._streams.remove(socket)
+        socket.deleteLater()
+
+    def _on_ready_read(self, socket: QTcpSocket) -> None:
+        if socket not in self._buffers:
+            socket.readAll() # Förfrågan är redan besvarad; en anslutning hanterar bara en förfrågan.
+            return
+        buffer = self._buffers[socket]
+        buffer += socket.readAll().data()
+        try:
+            request = parse_request(bytes(buffer))
+            if request is None:
+                # curl väntar på "100 Continue" innan större kroppar skickas.
+                if b"\r\n\r\n" in buffer and b"100-continue" in buffer.lower() and socket not in self._continued:
+                    self._continued.add(socket)
+                    socket.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+                return
+            del self._buffers[socket]
+            self._check_origin(request)
+            self._authorize(request)
+            self._check_content_type(request)
+            if request.method == "GET" and request.path == "/api/events":
+                self._open_stream(socket)
+                return
+            status, payload = self._route(request)
+        except HttpError as e:
+            self._buffers.pop(socket, None)
+            status, payload = e.status, {"error": str(e)}
+        except Exception as e:
+            logger.error(f"Fel i HTTP-API:t: {e}", exc_info=True)
+            status, payload = 500, {"error": "Internt fel."}
+        self._respond(socket, status, payload)
+
+    @staticmethod
+    def _check_origin(request: HttpRequest) -> None:
+        """Webbläsare skickar Origin vid anrop från en webbsida; andra klienter gör det inte."""
+        if "origin" in request.headers:
+            raise HttpError(403, "Anrop från webbsidor är inte tillåtna.")
+        host, _, port = request.headers.get("host", "").partition(":")
+        if host.lower() not in ALLOWED_HOSTS or (port and not port.isdigit()):
+            raise HttpError(403, "Host ska vara 127.0.0.1 eller localhost.")
+
+    def _authorize(self, request: HttpRequest) -> None:
+        token = self.config_manager.get_config().http_api_token
+        if not token:
+            raise HttpError(401, "HTTP-API:t har ingen token.")
+        given = request.headers.get("authorization", "").removeprefix("Bearer ").strip()
+        if not hmac.compare_digest(given.encode(), token.encode()):
+            raise HttpError(401, "Saknar eller fel token.")
+
+    @staticmethod
+    def _check_content_type(request: HttpRequest) -> None:
+        # Kräver att en webbläsare gör en CORS-förfrågan först, som aldrig besvaras.
+        if request.method in ("POST", "DELETE") and \
+                request.headers.get("content-type", "").partition(";")[0].strip().lower() != "application/json":
+            raise HttpError(415, "Content-Type ska vara application/json.")
+
+    def _respond(self, socket: QTcpSocket, status: int, payload: dict) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        head = (f"HTTP/1.1 {status} {_REASONS.get(status, 'Internal Server Error')}\r\n"
+                f"Content-Type: application/json; charset=utf-8\r\nContent-Length: {len(body)}\r\n"
+                f"Connection: close\r\n\r\n")
+        socket.write(head.encode("ascii") + body)
+        socket.disconnectFromHost()
+
+    def _route(self, request: HttpRequest) -> tuple[int, dict]:
+        parts = request.path.strip("/").split("/")
+        if parts[:1] != ["api"]:
+            raise HttpError(404, f"Okänd sökväg {request.path}.")
+        parts = parts[1:]
+        if parts == ["jobs"]:
+            if request.method == "GET":
+                return 200, self._list_jobs(request.query)
+            if request.method == "POST":
+                return 201, self._submit(request.json())
+        elif parts == ["metrics"] and request.method == "GET":
+            return 200, self.job_manager.metrics_snapshot()
+        elif len(parts) >= 2 and parts[0] == "jobs":
+            job_id = parts[1]
+            job = self.job_manager.get_job(job_id)
+            if job is None:
+                raise HttpError(404, f"Jobbet {job_id} finns inte.")
+            action = parts[2:]
+            if action == [] and request.method == "GET":
+                return 200, job_to_json(job, self._container_of(job_id))
+            if action == [] and request.method == "DELETE":
+                self.job_manager.remove_job(job_id)
+                if self.job_manager.get_job(job_id) is not None:
+                    raise HttpError(400, "Jobb som körs måste avbrytas innan de tas bort.")
+                return 200, {"removed": job_id}
+            if action == ["cancel"] and request.method == "POST":
+                self.job_manager.cancel_job(job_id)
+                return 202, job_to_json(job, self._container_of(job_id))
+            if action == ["retry"] and request.method == "POST":
+                if self._container_of(job_id) != JobRegistry.HISTORY:
+                    raise HttpError(400, "Bara avslutade jobb kan försökas igen.")
+                self.job_manager.retry_job(job_id)
+                return 202, job_to_json(job, self._container_of(job_id))
+        else:
+            raise HttpError(404, f"Okänd sökväg {request.path}.")
+        raise HttpError(405, f"{request.method} stöds inte för {request.path}.")
+
+    def _container_of(self, job_id: str) -> Optional[str]:
+        return self.job_manager.registry.container_of(job_id)
+
+    def _list_jobs(self, query: Dict[str, str]) -> dict:
+        containers = (("queue", self.job_manager.queue), ("history", self.job_manager.history))
+        wanted = query.get("container")
+        status = query.get("status")
+        return {name: [job_to_json(job, name) for job in jobs if status is None or job.status.name == status]
+                for name, jobs in containers if wanted in (None, name)}
+
+    def _submit(self, data: dict) -> dict:
+        urls = data.get("urls", [data["url"]] if "url" in data else [])
+        if not isinstance(urls, list) or not urls or not all(isinstance(url, str) and url.strip() for url in urls):
+            raise HttpError(400, "Ange \"urls\" som en lista med minst en URL.")
+        options = data.get("options", {})
+        unknown = set(options) - set(JOB_OPTIONS) if isinstance(options, dict) else {"options"}
+        if unknown:
+            raise HttpError(400, f"Okända alternativ: {', '.join(sorted(unknown))}.")
+        extra_args = data.get("args", [])
+        if not isinstance(extra_args, list) or not all(isinstance(arg, str) for arg in extra_args):
+            raise HttpError(400, "\"args\" ska vara en lista med strängar.")
+        forbidden = [arg for arg in extra_args if arg not in ALLOWED_ARGS]
+        if forbidden:
+            raise HttpError(400, f"Argument som inte är tillåtna: {', '.join(forbidden)}.")
+        try:
+            priority = JobPriority[f"PRIORITY_{data.get('priority', 'normal').upper()}"]
+        except (KeyError, AttributeError):
+            raise HttpError(400, "\"priority\" ska vara urgent, normal eller bulk.")
+        config = self.config_manager.get_config()
+        args = build_download_args(dataclasses.replace(config, **options)) + extra_args
+        output_dir = data.get("output_dir") or config.last_output_dir
+        if not isinstance(output_dir, str) or not os.path.isdir(output_dir):
+            raise HttpError(400, "\"output_dir\" finns inte eller är inte en katalog.")
+        if not self._is_allowed_output_dir(output_dir, config):
+            raise HttpError(400, "\"output_dir\" ligger utanför standardkatalogen och http_api_output_roots.")
+        job_ids = []
+        for url in urls:
+            job = DownloadJob(url=url.strip(), output_path=output_dir, args_list=list(args), priority=priority)
+            self.job_manager.add_job(job)
+            job_ids.append(job.id)
+        logger.info(f"HTTP-API:t lade till {len(job_ids)} jobb i kön.")
+        return {"job_ids": job_ids}
+
+    @staticmethod
+    def _is_allowed_output_dir(output_dir: str, config: AppConfig) -> bool:
+        """Sant om katalogen, efter att symboliska länkar följts, ligger i en av de tillåtna katalogerna."""
+        path = os.path.realpath(output_dir)
+        for root in [config.last_output_dir, *config.http_api_output_roots]:
+            if not root:
+                continue
+            root = os.path.realpath(root)
+            try:
+                if os.path.commonpath([path, root]) == root:
+                    return True
+            except ValueError: # Olika enheter på Windows
+                continue
+        return False
+
+    def _open_stream(self, socket: QTcpSocket) -> None:
+        socket.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream; charset=utf-8\r\n"
+                     b"Cache-Control: no-cache\r\nConnection: keep-alive\r\n\r\n")
+        socket.write(self._event("counts", self._counts()))
+        self._streams.append(socket)
+        logger.debug(f"Ny prenumerant på händelser ({len(self._streams)} totalt).")
+
+    @staticmethod
+    def _event(name: str, payload: dict) -> bytes:
+        return f"event: {name}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n".encode("utf-8")
+
+    def _write_to_streams(self, data: bytes) -> None:
+        for socket in self._streams:
+            socket.write(data)
+
+    def _counts(self) -> dict:
+        return {"queue": len(self.job_manager.queue), "history": len(self.job_manager.history),
+                "active": len(self.job_manager.active_runners)}
+
+    def _on_containers_changed(self) -> None:
+        if self._streams and not self.counts_timer.isActive():
+            self.counts_timer.start()
+
+    def _broadcast_counts(self) -> None:
+        self._write_to_streams(self._event("counts", self._counts()))
+
+    def _broadcast_jobs(self, job_ids: List[str]) -> None:
+        if not self._streams:
+            return
+        jobs = []
+        for job_id in job_ids:
+            job = self.job_manager.get_job(job_id)
+            if job is not None:
+                jobs.append(job_to_json(job, self._container_of(job_id)))
+        if jobs:
+            # Serialiseras en gång per batch och skickas sedan till alla prenumeranter.
+            self._write_to_streams(self._event("jobs", {"jobs": jobs}))
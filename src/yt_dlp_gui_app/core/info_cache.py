@@ -0,0 +1,121 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Optional
+from yt_dlp_gui_app.core.url_utils import normalize_url
+
+logger = logging.getLogger(__name__)
+
+class InfoCache:
+    """
+    Diskcache för yt-dlp:s info-JSON, nyckad på normaliserad URL eller video-id.
+    Ett jobb med en giltig post startas med --load-info-json, så att yt-dlp slipper hämta
+    webbsidor och API-svar på nytt. Poster äldre än ttl_seconds används inte (direktlänkarna
+    till formaten slutar gälla efter några timmar) och de minst nyligen använda tas bort
+    när cachen överskrider max_bytes.
+    """
+
+    def __init__(self, cache_dir: str, ttl_seconds: float = 3 * 3600, max_bytes: int = 64 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        # sökväg -> (storlek, skapad); ordningen är LRU-ordningen, äldst först.
+        self._entries: "OrderedDict[str, tuple[int, float]]" = OrderedDict()
+        self._total_bytes = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self._scan()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def _scan(self) -> None:
+        """Läser in befintliga poster; senaste användning sparas som filens åtkomsttid."""
+        found = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".info.json"):
+                stat = entry.stat()
+                found.append((stat.st_atime, entry.path, stat.st_size, stat.st_mtime))
+        for _, path, size, created in sorted(found):
+            self._entries[path] = (size, created)
+            self._total_bytes += size
+
+    def path_for(self, url: str) -> str:
+        key = hashlib.sha1(normalize_url(url).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.info.json")
+
+    def get(self, url: str) -> Optional[str]:
+        """Returnerar sökvägen till en giltig info-JSON för URL:en, eller None."""
+        path = self.path_for(url)
+        entry = self._entries.get(path)
+        if entry is None:
+            return None
+        size, created = entry
+        if time.time() - created > self.ttl_seconds or not os.path.exists(path):
+            self._remove(path)
+            return None
+        self._entries.move_to_end(path)
+        try:
+            os.utime(path, (time.time(), created))
+        except OSError:
+            pass
+        return path
+
+    def load(self, url: str) -> Optional[dict]:
+        """Returnerar den cachade info-JSON:en som dict, eller None."""
+        path = self.get(url)
+        if path is None:
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ogiltig post i info-cachen för {url}: {e}")
+            self._remove(path)
+            return None
+
+    def put(self, url: str, info_json: bytes) -> Optional[str]:
+        """Sparar info-JSON för URL:en och returnerar sökvägen."""
+        path = self.path_for(url)
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(info_json)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Kunde inte spara info-JSON för {url}: {e}")
+            return None
+        if path in self._entries:
+            self._total_bytes -= self._entries.pop(path)[0]
+        self._entries[path] = (len(info_json), time.time())
+        self._total_bytes += len(info_json)
+        self._evict()
+        return path
+
+    def invalidate(self, url: str) -> None:
+        """Tar bort posten, t.ex. när en nedladdning med den cachade informationen har misslyckats."""
+        path = self.path_for(url)
+        if path in self._entries:
+            self._remove(path)
+            logger.info(f"Info-cachen för {url} ogiltigförklarades.")
+
+    def _remove(self, path: str) -> None:
+        entry = self._entries.pop(path, None)
+        if entry:
+            self._total_bytes -= entry[0]
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Kunde inte ta bort {path} ur info-cachen: {e}")
+
+    def _evict(self) -> None:
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            self._remove(next(iter(self._entries)))
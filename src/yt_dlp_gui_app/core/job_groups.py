@@ -0,0 +1,62 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from yt_dlp_gui_app.core.job_registry import JobRegistry
+from yt_dlp_gui_app.core.models import SUCCESS_STATUSES, DownloadJob, JobStatus
+
+def make_child_jobs(parent: DownloadJob, entries: List[dict]) -> List[DownloadJob]:
+    """Skapar ett jobb per post i en expanderad spellista, med förälderns inställningar."""
+    children = []
+    for entry in entries:
+        child = DownloadJob(url=entry["url"], args_list=list(parent.args_list), output_path=parent.output_path,
+                            duration=entry.get("duration"), parent_id=parent.id, priority=parent.priority)
+        if entry.get("title"):
+            child.title = entry["title"]
+        if entry.get("is_playlist"):
+            child.status = JobStatus.STATUS_EXPANDING
+        children.append(child)
+    return children
+
+class JobGroups:
+    """
+    Håller reda på vilka jobb som skapats ur en expanderad spellista eller kanal
+    och räknar fram gruppens sammanlagda förlopp och slutstatus.
+    """
+
+    def __init__(self) -> None:
+        self._children: Dict[str, List[str]] = {}
+
+    def __contains__(self, parent_id: str) -> bool:
+        return parent_id in self._children
+
+    def add(self, parent_id: str, child_ids: Iterable[str]) -> None:
+        self._children.setdefault(parent_id, []).extend(child_ids)
+
+    def children(self, parent_id: str) -> List[str]:
+        return list(self._children.get(parent_id, []))
+
+    def discard(self, parent_id: str) -> None:
+        self._children.pop(parent_id, None)
+
+    def rebuild(self, jobs: Iterable[DownloadJob]) -> None:
+        """Bygger om grupperna från jobbens parent_id, t.ex. efter inläsning."""
+        self._children.clear()
+        for job in jobs:
+            if job.parent_id:
+                self._children.setdefault(job.parent_id, []).append(job.id)
+
+    def summarize(self, parent_id: str, registry: JobRegistry) -> Tuple[float, Optional[JobStatus]]:
+        """
+        Returnerar (förlopp, slutstatus) för gruppen. Slutstatus är None så länge något barn
+        ligger kvar i kön; barn som har flyttats till historiken räknas som klara.
+        """
+        children = [job for job in map(registry.get, self._children.get(parent_id, [])) if job]
+        if not children:
+            return 0.0, JobStatus.STATUS_CANCELLED # Inget har laddats ner
+        finished = {job.id for job in children if registry.container_of(job.id) == JobRegistry.HISTORY}
+        progress = (100.0 * len(finished) + sum(job.progress for job in children if job.id not in finished)) / len(children)
+        if len(finished) < len(children):
+            return progress, None
+        if all(job.status in SUCCESS_STATUSES for job in children):
+            return 100.0, JobStatus.STATUS_COMPLETED
+        if any(job.status.name.startswith("STATUS_ERROR") for job in children):
+            return progress, JobStatus.STATUS_ERROR_PROCESS
+        return progress, JobStatus.STATUS_CANCELLED
@@ -1,144 +1,723 @@
 import json
 import logging
 import os
-import re
+import time
+from collections import Counter
+from functools import partial
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Set
 from PyQt6.QtCore import QObject, pyqtSignal, QProcess, QTimer, QStandardPaths
+from yt_dlp_gui_app.core.concurrency_controller import AdaptiveConcurrency
 from yt_dlp_gui_app.core.config import ConfigManager
-from yt_dlp_gui_app.core.models import DownloadJob, JobStatus
+from yt_dlp_gui_app.core.download_archive import DownloadArchive, archive_key
+from yt_dlp_gui_app.core.info_cache import InfoCache
+from yt_dlp_gui_app.core.job_groups import JobGroups, make_child_jobs
+from yt_dlp_gui_app.core.job_registry import JobRegistry
+from yt_dlp_gui_app.core.job_store import JobStore
+from yt_dlp_gui_app.core.log_store import JobLogStore
+from yt_dlp_gui_app.core.metadata_prefetcher import MetadataPrefetcher
+from yt_dlp_gui_app.core.metrics import (
+    PHASE_DOWNLOAD_DONE, PHASE_FINISHED, PHASE_FIRST_BYTE, PHASE_POSTPROCESS, PHASE_QUEUED, PHASE_STARTED,
+    MetricsCollector, TransferTracker, write_metrics,
+)
+from yt_dlp_gui_app.core.negative_cache import NegativeCache
+from yt_dlp_gui_app.core.models import SUCCESS_STATUSES, DownloadJob, JobPriority, JobStatus
+from yt_dlp_gui_app.core.output_parser import EventKind, OutputEvent
+from yt_dlp_gui_app.core.retry_policy import ErrorClass, HostBackoff, RetryPolicy, classify_error
+from yt_dlp_gui_app.core.scheduler import ReadyQueue, bandwidth_share
 from yt_dlp_gui_app.core.yt_dlp_runner import YtDlpRunner
+from yt_dlp_gui_app.core.yt_dlp_worker_pool import WorkerRunner, YtDlpWorkerPool
 from yt_dlp_gui_app.core.thumbnail_generator import ThumbnailGenerator
+from yt_dlp_gui_app.core.thumbnail_cache import ThumbnailCache
+from yt_dlp_gui_app.core.url_utils import host_key, is_playlist_url
+from yt_dlp_gui_app.core.yt_dlp_args import has_extraction_args, output_variant, selects_playlist_entries
+from yt_dlp_gui_app.core.thumbnail_pool import PRIORITY_NORMAL, ThumbnailPool
 
 logger = logging.getLogger(__name__)
 
+def has_own_rate_limit(job: DownloadJob) -> bool:
+    """Jobb med en egen --limit-rate bland argumenten räknas inte in i bandbreddsbudgeten."""
+    return "--limit-rate" in job.args_list or "-r" in job.args_list
+
 class JobManager(QObject):
     """Hanterar kön, historiken och körningen av nedladdningsjobb."""
     queue_changed = pyqtSignal()
     history_changed = pyqtSignal()
     job_updated = pyqtSignal(str)
     active_jobs_count_changed = pyqtSignal(int)
+    thumbnail_progress_changed = pyqtSignal(int, int) # klara, totalt
+    concurrency_changed = pyqtSignal(int, str) # antal platser, skäl
 
-    def __init__(self, config_manager: ConfigManager, parent: QObject | None = None):
+    def __init__(self, config_manager: ConfigManager, parent: QObject | None = None,
+                 job_store: JobStore | None = None, log_store: JobLogStore | None = None,
+                 info_cache: InfoCache | None = None, download_archive: DownloadArchive | None = None,
+                 negative_cache: NegativeCache | None = None, thumbnail_cache: ThumbnailCache | None = None):
         super().__init__(parent)
         self.config_manager = config_manager
-        self.queue: List[DownloadJob] = []
-        self.history: List[DownloadJob] = []
-        self.active_runners: Dict[str, YtDlpRunner] = {}
-        self.active_thumbnail_generators: Dict[str, ThumbnailGenerator] = {}
+        config = config_manager.get_config()
+        self.job_store = job_store or JobStore(self.get_jobs_path("jobs.db"))
+        self.log_store = log_store or JobLogStore(self.get_jobs_path("logs"))
+        if info_cache is None:
+            info_cache = InfoCache(self.get_jobs_path("info_cache"), config.info_cache_ttl_hours * 3600,
+                                   config.info_cache_max_mb * 1024 * 1024)
+        self.info_cache = info_cache
+        if download_archive is None:
+            download_archive = DownloadArchive(self.get_jobs_path("download_archive.txt"))
+        self.download_archive = download_archive
+        if negative_cache is None:
+            negative_cache = NegativeCache(self.get_jobs_path("negative_cache.json"), config.negative_cache_ttl_hours * 3600)
+        self.negative_cache = negative_cache
+        # Felrader per körande jobb, som klassas när jobbet misslyckas.
+        self._errors: Dict[str, List[str]] = {}
+        # Tillfälliga fel ger en växande väntetid per webbplats; jobben väntar i kön med STATUS_RETRY_SCHEDULED.
+        self.host_backoff = HostBackoff()
+        self.retry_timer = QTimer(self)
+        self.retry_timer.setSingleShot(True)
+        self.retry_timer.timeout.connect(self._on_retry_timer)
+        # Arkivnyckel per körande jobb, och väntande dubbletter som följer ett körande jobb med samma video.
+        self._archive_keys: Dict[str, str] = {}
+        self._coalesced: Dict[str, str] = {}
+        self._retried: Set[str] = set() # Jobb som användaren har försökt igen; de kontrolleras inte mot arkivet
+        # Jobb som startades med cachad info-JSON; misslyckas de tas posten bort.
+        self._jobs_using_info_cache: set[str] = set()
+        self._already_downloaded: set[str] = set()
+        self.registry = JobRegistry()
+        self.groups = JobGroups()
+        self.active_runners: Dict[str, YtDlpRunner | WorkerRunner] = {}
+        # Alternativ körning i långlivade processer med yt_dlp redan importerat; se runner_backend.
+        self.worker_pool = YtDlpWorkerPool(config.max_parallel_downloads, self)
+        if config.runner_backend == "worker_pool":
+            self.worker_pool.prewarm()
+        # Genererade miniatyrer sparas nyckade på videofilens identitet, så att samma fil aldrig körs genom FFmpeg två gånger.
+        if thumbnail_cache is None:
+            thumbnail_cache = ThumbnailCache(self.get_jobs_path("thumbnail_cache"), config.thumbnail_cache_max_mb * 1024 * 1024)
+        self.thumbnail_cache = thumbnail_cache
+        self.thumbnail_pool = ThumbnailPool(config.max_parallel_thumbnails, self,
+                                            partial(ThumbnailGenerator, cache=self.thumbnail_cache))
+        self.thumbnail_pool.thumbnail_generated.connect(self._on_thumbnail_generated)
+        self.thumbnail_pool.generation_failed.connect(self._on_thumbnail_failed)
+        self.thumbnail_pool.progress_changed.connect(self.thumbnail_progress_changed)
+        # Metadata för väntande jobb hämtas i förväg, med ett eget tak för antalet processer.
+        self.metadata_prefetcher = MetadataPrefetcher(config.max_parallel_prefetches, self, self.info_cache)
+        self.metadata_prefetcher.metadata_ready.connect(self._on_metadata_ready)
+        self.metadata_prefetcher.prefetch_failed.connect(self._on_prefetch_failed)
         
-        self.queue_check_timer = QTimer(self)
-        self.queue_check_timer.timeout.connect(self.start_next_jobs_in_queue)
-        self.queue_check_timer.start(1000)
+        # Väntande jobb delas ut från ReadyQueue så fort något händer som kan frigöra
+        # eller fylla en plats, i stället för att kön avsöks en gång per sekund.
+        # Kön delar platserna rättvist mellan prioriteter och grupper (se fair_share_by),
+        # och grupperas per webbplats så att jobb från en mättad webbplats kan hoppas över.
+        self.ready_queue = ReadyQueue(self._fair_share_key, lambda job: host_key(job.url))
+        self._fair_share_by = config.fair_share_by
+        self.dispatch_latency_ms = 0.0
+        self._dispatch_requested_at: float | None = None
+        self.dispatch_timer = QTimer(self)
+        self.dispatch_timer.setSingleShot(True)
+        self.dispatch_timer.setInterval(0)
+        self.dispatch_timer.timeout.connect(self.start_next_jobs_in_queue)
+
+        # I automatiskt läge styrs antalet platser av uppmätt hastighet och felfrekvens i stället för max_parallel_downloads.
+        self.concurrency = AdaptiveConcurrency(config.adaptive_min_downloads, config.adaptive_max_downloads,
+                                               config.max_parallel_downloads, self, sample=self._sample_throughput)
+        self.concurrency.limit_changed.connect(self._on_concurrency_changed)
+        if config.adaptive_concurrency:
+            self.concurrency.start()
+        self.config_manager.config_changed.connect(self.request_dispatch)
+        self.config_manager.config_changed.connect(self._on_config_changed)
+
+        # Fastider och överföring per jobb sammanställs, och skrivs till metrics.prom/metrics.json med metrics_interval_s.
+        self.metrics = MetricsCollector()
+        self._transfers: Dict[str, TransferTracker] = {}
+        self.active_jobs_count_changed.connect(self._update_slot_metrics)
+        self._update_slot_metrics()
+        self.metrics_timer = QTimer(self)
+        self.metrics_timer.timeout.connect(self.export_metrics)
+        self._update_metrics_timer()
+
+        # Journalen viks in i ögonblicksbilden periodiskt i bakgrunden.
+        self.compaction_timer = QTimer(self)
+        self.compaction_timer.timeout.connect(self.job_store.compact_in_background)
+        self.compaction_timer.start(30000)
+
+    @property
+    def queue(self) -> List[DownloadJob]:
+        return self.registry.queue
+
+    @property
+    def history(self) -> List[DownloadJob]:
+        return self.registry.history
 
     def add_job(self, job: DownloadJob) -> None:
         logger.info(f"Lägger till jobb {job.id} ({job.url}) i kön.")
-        self.queue.append(job)
+        config = self.config_manager.get_config()
+        if config.expand_playlists and config.yt_dlp_path and is_playlist_url(job.url) and not selects_playlist_entries(job.args_list):
+            # Spellistor och kanaler löses först upp i enskilda jobb, som sedan fördelas över alla platser.
+            job.status = JobStatus.STATUS_EXPANDING
+        self.registry.add(job, JobRegistry.QUEUE)
         self.queue_changed.emit()
-        self.save_jobs()
+        self._persist_job(job, JobStore.QUEUE)
+        self._enqueue(job)
+
+    def _enqueue(self, job: DownloadJob) -> None:
+        """Gör ett nytt jobb redo: spellistor skickas till expansion, övriga till utdelningen."""
+        job.timings.setdefault(PHASE_QUEUED, time.time())
+        if job.status == JobStatus.STATUS_EXPANDING:
+            self.metadata_prefetcher.submit(job, self.config_manager.get_config().yt_dlp_path, first=True)
+            return
+        self.ready_queue.push(job)
+        self.request_dispatch()
+        self._prefetch_metadata([job])
+
+    def _prefetch_metadata(self, jobs: List[DownloadJob]) -> None:
+        config = self.config_manager.get_config()
+        if not (config.prefetch_metadata and config.yt_dlp_path):
+            return
+        for job in jobs:
+            if job.status == JobStatus.STATUS_WAITING and job.duration is None:
+                self.metadata_prefetcher.submit(job, config.yt_dlp_path)
+
+    def _on_metadata_ready(self, job_id: str, metadata: dict) -> None:
+        job = self.get_job_from_queue(job_id)
+        if not job or job.status not in (JobStatus.STATUS_WAITING, JobStatus.STATUS_EXPANDING):
+            return
+        if metadata.get("title") and job.title == "N/A":
+            job.title = metadata["title"]
+        entries = metadata.get("entries")
+        if entries and not selects_playlist_entries(job.args_list) and \
+                (job.status == JobStatus.STATUS_EXPANDING or self.config_manager.get_config().expand_playlists):
+            self._expand_job(job, entries)
+            return
+        if entries is not None:
+            # En tom spellista, eller en där jobbets argument väljer poster, laddas ner av en enda yt-dlp-process.
+            logger.info(f"Jobb {job_id} expanderas inte ({len(entries)} poster); hela URL:en laddas ner av ett jobb.")
+        if metadata.get("duration") and not job.duration:
+            job.duration = metadata["duration"]
+        job.filesize_estimate = metadata.get("filesize_estimate")
+        job.format_id = metadata.get("format_id")
+        logger.info(f"Hämtade metadata för jobb {job_id}: {job.title} ({job.duration})")
+        if job.status == JobStatus.STATUS_EXPANDING:
+            # URL:en såg ut som en spellista men var en enskild video, eller expanderas inte.
+            job.status = JobStatus.STATUS_WAITING
+            self.ready_queue.push(job)
+            self.request_dispatch()
+        self.job_updated.emit(job_id)
+        self._persist_job(job, JobStore.QUEUE)
+
+    def _on_prefetch_failed(self, job_id: str, error: str) -> None:
+        # Inte allvarligt: nedladdningen tar fram samma uppgifter när den körs.
+        logger.warning(f"Kunde inte hämta metadata för jobb {job_id}: {error}")
+        job = self.get_job_from_queue(job_id)
+        if job and job.status == JobStatus.STATUS_EXPANDING:
+            # Utan expansion laddas hela URL:en ner av en enda yt-dlp-process, som tidigare.
+            job.status = JobStatus.STATUS_WAITING
+            self.ready_queue.push(job)
+            self.job_updated.emit(job_id)
+            self._persist_job(job, JobStore.QUEUE)
+            self.request_dispatch()
+
+    def _expand_job(self, parent: DownloadJob, entries: List[dict]) -> None:
+        """Ersätter en spellista med ett jobb per post, placerade direkt efter föräldern i kön."""
+        self.ready_queue.discard(parent.id)
+        children = make_child_jobs(parent, entries)
+        parent.status = JobStatus.STATUS_GROUP
+        parent.progress = 0.0
+        row = self.registry.row_of(parent.id)
+        for offset, child in enumerate(children, start=1):
+            self.registry.add(child, JobRegistry.QUEUE, row + offset)
+        self.groups.add(parent.id, [child.id for child in children])
+        logger.info(f"Spellistan {parent.url} expanderades till {len(children)} jobb.")
+        self.queue_changed.emit()
+        self._persist_job(parent, JobStore.QUEUE)
+        for child in children:
+            self._persist_job(child, JobStore.QUEUE)
+            self._enqueue(child)
+        self._update_group(parent.id)
+
+    def _update_group(self, parent_id: str) -> None:
+        """Räknar om gruppens förlopp och flyttar den till historiken när alla dess jobb är klara."""
+        parent = self.get_job_from_queue(parent_id)
+        if not parent or parent.status != JobStatus.STATUS_GROUP:
+            return
+        parent.progress, final_status = self.groups.summarize(parent_id, self.registry)
+        if final_status is None:
+            self.job_updated.emit(parent_id)
+            return
+        parent.status = final_status
+        self._move_job_to_history(parent)
+
+    def _on_config_changed(self) -> None:
+        config = self.config_manager.get_config()
+        if config.fair_share_by != self._fair_share_by:
+            self._fair_share_by = config.fair_share_by
+            self.ready_queue.rebuild(self.queue)
+        self.info_cache.ttl_seconds = config.info_cache_ttl_hours * 3600
+        self.info_cache.max_bytes = config.info_cache_max_mb * 1024 * 1024
+        self.thumbnail_cache.max_bytes = config.thumbnail_cache_max_mb * 1024 * 1024
+        self.negative_cache.ttl_seconds = config.negative_cache_ttl_hours * 3600
+        self.thumbnail_pool.set_max_concurrent(config.max_parallel_thumbnails)
+        self.metadata_prefetcher.set_max_concurrent(config.max_parallel_prefetches)
+        self.concurrency.set_bounds(config.adaptive_min_downloads, config.adaptive_max_downloads)
+        if config.adaptive_concurrency and not self.concurrency.timer.isActive():
+            self.concurrency.start(config.max_parallel_downloads)
+        elif not config.adaptive_concurrency:
+            self.concurrency.stop()
+        self.worker_pool.set_max_workers(self._max_concurrent())
+        self._update_slot_metrics()
+        self._update_metrics_timer()
+        if config.runner_backend == "worker_pool":
+            self.worker_pool.prewarm()
+        if not config.prefetch_metadata:
+            # Expansioner av spellistor fortsätter; bara förhämtningen för vanliga jobb avbryts.
+            for job in self.queue:
+                if job.status == JobStatus.STATUS_WAITING:
+                    self.metadata_prefetcher.cancel(job.id)
+
+    def request_dispatch(self) -> None:
+        """Begär att lediga platser fylls vid nästa varv i event-loopen. Flera begäranden slås ihop."""
+        if self._dispatch_requested_at is None:
+            self._dispatch_requested_at = time.perf_counter()
+        self.dispatch_timer.start()
 
     def start_next_jobs_in_queue(self) -> None:
-        max_concurrent = self.config_manager.get_config().max_parallel_downloads
+        if self._dispatch_requested_at is not None:
+            # Tiden från att en plats kunde fyllas till att utdelningen kördes.
+            self.dispatch_latency_ms = (time.perf_counter() - self._dispatch_requested_at) * 1000
+            self._dispatch_requested_at = None
+        max_concurrent = self._max_concurrent()
         while len(self.active_runners) < max_concurrent:
             next_job = self._get_next_waiting_job()
             if next_job: self._start_job(next_job)
             else: break
+        self._rebalance_bandwidth()
+
+    def _fair_share_key(self, job: DownloadJob) -> str:
+        """Gruppen som jobbet delar platser inom, enligt fair_share_by."""
+        if self._fair_share_by == "host":
+            return host_key(job.url)
+        if self._fair_share_by == "output_path":
+            return job.output_path or ""
+        return ""
+
+    def set_priority(self, job_ids: List[str], priority: JobPriority) -> None:
+        """Ändrar prioriteten för köade jobb; jobb i en spellista följer med sin förälder."""
+        changed = False
+        for job_id in job_ids:
+            for id_ in [job_id] + self.groups.children(job_id):
+                job = self.get_job_from_queue(id_)
+                if job and job.priority != priority:
+                    job.priority = priority
+                    self._persist_job(job, JobStore.QUEUE)
+                    self.job_updated.emit(job.id)
+                    changed = True
+        if changed:
+            logger.info(f"Prioriteten ändrades till {priority.name} för {len(job_ids)} jobb.")
+            self.ready_queue.rebuild(self.queue)
+            self.request_dispatch()
+
+    def move_jobs(self, job_ids: List[str], row: int) -> None:
+        """Flyttar köade jobb så att de hamnar före raden row; startordningen inom en grupp följer kön."""
+        jobs = [job for job in (self.get_job_from_queue(job_id) for job_id in job_ids) if job]
+        if not jobs:
+            return
+        moved = {job.id for job in jobs}
+        queue = self.queue
+        anchor = next((job for job in queue[max(0, row):] if job.id not in moved), None)
+        # Varje jobb flyttas för sig, så att vyerna får en radflytt i stället för att läsa om hela kön.
+        for job in jobs:
+            self.registry.move_before(job.id, anchor.id if anchor else None)
+        self.ready_queue.rebuild(self.queue)
+        if self._persistence_enabled():
+            self.job_store.resequence(self.queue, JobStore.QUEUE)
+        self.queue_changed.emit()
+
+    def _max_concurrent(self) -> int:
+        config = self.config_manager.get_config()
+        return self.concurrency.limit if config.adaptive_concurrency else config.max_parallel_downloads
+
+    def _sample_throughput(self) -> tuple[float, int, int]:
+        """Total hastighet för de aktiva jobben enligt det tolkade förloppet, antal aktiva och antal väntande."""
+        throughput = sum(runner.job.speed or 0.0 for runner in self.active_runners.values())
+        return throughput, len(self.active_runners), len(self.ready_queue)
+
+    def _on_concurrency_changed(self, limit: int, reason: str) -> None:
+        # Vid en minskning får körande jobb bli klara; platserna fylls bara upp till den nya gränsen.
+        self.worker_pool.set_max_workers(limit)
+        self._update_slot_metrics()
+        self.concurrency_changed.emit(limit, reason)
+        self.request_dispatch()
 
     def _get_next_waiting_job(self) -> DownloadJob | None:
-        return next((job for job in self.queue if job.status == JobStatus.STATUS_WAITING), None)
+        return self.ready_queue.pop_next(self._saturated_hosts() | self.host_backoff.blocked_hosts())
+
+    def _host_limit(self, host: str) -> int:
+        config = self.config_manager.get_config()
+        return config.host_download_limits.get(host, config.max_downloads_per_host)
+
+    def _saturated_hosts(self) -> set[str]:
+        """Webbplatser som redan har så många aktiva jobb som de får ha."""
+        active = Counter(host_key(runner.job.url) for runner in self.active_runners.values())
+        return {host for host, count in active.items() if 0 < self._host_limit(host) <= count}
+
+    def _rate_limit_for_new_job(self) -> int | None:
+        """
+        Ett nytt jobbs del av bandbreddsbudgeten. Körande yt-dlp-processer kan inte få en ny gräns,
+        så budgeten delas med det antal jobb som förväntas köra samtidigt när kön är full.
+        """
+        config = self.config_manager.get_config()
+        expected = min(self._max_concurrent(), len(self.active_runners) + 1 + len(self.ready_queue))
+        return bandwidth_share(config.bandwidth_limit_kib * 1024, expected)
+
+    def _rebalance_bandwidth(self) -> None:
+        """Delar budgeten lika mellan de aktiva jobben; gäller direkt för jobb i arbetsprocesserna."""
+        share = bandwidth_share(self.config_manager.get_config().bandwidth_limit_kib * 1024, len(self.active_runners))
+        for runner in self.active_runners.values():
+            if not has_own_rate_limit(runner.job):
+                runner.set_rate_limit(share)
 
     def _start_job(self, job: DownloadJob) -> None:
         yt_dlp_path = self.config_manager.get_config().yt_dlp_path
         if not yt_dlp_path:
             logger.error("Kan inte starta jobb, sökväg till yt-dlp saknas.")
             job.status = JobStatus.STATUS_ERROR_STARTFAIL
-            job.log += "Fel: Sökväg till yt-dlp är inte konfigurerad.\n"
+            self.append_log(job, "Fel: Sökväg till yt-dlp är inte konfigurerad.\n")
+            self.log_store.close(job.id)
             self._move_job_to_history(job)
             return
+        key = self._archive_key(job)
+        if self._handle_known_failure(job) or self._handle_duplicate(job, key):
+            return
         logger.info(f"Försöker starta jobb {job.id}.")
+        self.metadata_prefetcher.cancel(job.id)
+        if key:
+            self._archive_keys[job.id] = key
         job.status = JobStatus.STATUS_STARTING
+        # Ett nytt försök mäts från början, men kötiden räknas från när jobbet först köades.
+        job.timings = {phase: at for phase, at in job.timings.items() if phase == PHASE_QUEUED}
+        job.timings[PHASE_STARTED] = time.time()
+        self.metrics.record_started(job)
+        self._transfers[job.id] = TransferTracker()
         self.job_updated.emit(job.id)
-        runner = YtDlpRunner(job, yt_dlp_path)
+        self._persist_job(job, JobStore.QUEUE)
+        # Info-JSON i cachen är hämtad utan cookies, proxy och inloggning och kan då ha andra format,
+        # eller formatlänkar signerade för en annan IP-adress; sådana jobb extraherar själva.
+        info_json_path = None if has_extraction_args(job.args_list) else self.info_cache.get(job.url)
+        if info_json_path:
+            logger.info(f"Jobb {job.id} startas med cachad info-JSON: {info_json_path}")
+            self._jobs_using_info_cache.add(job.id)
+        runner = self._create_runner(job, yt_dlp_path, info_json_path)
         runner.process_started.connect(self._on_process_started)
         runner.process_finished.connect(self._on_process_finished)
         runner.output_received.connect(self._on_output_received)
+        runner.events_parsed.connect(self._on_events_parsed)
         runner.error_occurred.connect(self._on_process_error)
         self.active_runners[job.id] = runner
         self.active_jobs_count_changed.emit(len(self.active_runners))
         runner.start()
 
+    def _create_runner(self, job: DownloadJob, yt_dlp_path: str, info_json_path: str | None) -> YtDlpRunner | WorkerRunner:
+        rate_limit = None if has_own_rate_limit(job) else self._rate_limit_for_new_job()
+        if self.config_manager.get_config().runner_backend == "worker_pool":
+            if self.worker_pool.available:
+                return WorkerRunner(job, self.worker_pool, info_json_path=info_json_path, rate_limit=rate_limit)
+            logger.warning(f"Arbetsprocesserna är inte tillgängliga ({self.worker_pool.error}); jobb {job.id} körs med yt-dlp-programmet.")
+        return YtDlpRunner(job, yt_dlp_path, info_json_path=info_json_path, rate_limit=rate_limit)
+
+    def shutdown(self) -> None:
+        """Avslutar arbetsprocesserna och skriver de sista mätvärdena när programmet stängs."""
+        self.worker_pool.shutdown()
+        if self.metrics_timer.isActive():
+            self.export_metrics()
+
+    def _video_key(self, job: DownloadJob) -> str | None:
+        # Nyckeln tas från URL:en om möjligt och annars från cachad info-JSON.
+        return archive_key(job.url) or archive_key(job.url, self.info_cache.load(job.url))
+
+    def _archive_key(self, job: DownloadJob) -> str | None:
+        """Videons nyckel med jobbets utdatavariant, så att t.ex. ljud och video arkiveras var för sig."""
+        variant = output_variant(job.args_list, job.output_path)
+        return archive_key(job.url, variant=variant) or archive_key(job.url, self.info_cache.load(job.url), variant)
+
+    def _handle_duplicate(self, job: DownloadJob, key: str | None) -> bool:
+        """
+        Hindrar att en process startas för en video som redan är nedladdad eller laddas ner just nu.
+        Returnerar True om jobbet har tagits om hand.
+        """
+        if key is None:
+            return False
+        if job.id in self._retried:
+            # "Försök igen" laddar alltid ner på nytt.
+            self._retried.discard(job.id)
+            return False
+        if self.config_manager.get_config().skip_archived_downloads and key in self.download_archive:
+            logger.info(f"Jobb {job.id} ({key}) finns redan i nedladdningsarkivet; ingen process startas.")
+            job.status = JobStatus.STATUS_ALREADY_DOWNLOADED
+            job.progress = 100.0
+            self.append_log(job, f"Videon ({key}) finns redan i nedladdningsarkivet.\n")
+            self.log_store.close(job.id)
+            self._move_job_to_history(job)
+            return True
+        leader_id = next((job_id for job_id, running_key in self._archive_keys.items() if running_key == key), None)
+        if leader_id:
+            logger.info(f"Jobb {job.id} väntar på jobb {leader_id}, som redan laddar ner {key}.")
+            self._coalesced[job.id] = leader_id
+            self.append_log(job, f"Samma video laddas redan ner av jobb {leader_id}; väntar på resultatet.\n")
+            return True
+        return False
+
+    def _handle_known_failure(self, job: DownloadJob) -> bool:
+        """Startar inte videor som nyligen misslyckades med ett permanent fel. Returnerar True om jobbet har tagits om hand."""
+        reason = self.negative_cache.reason_for(self._video_key(job) or job.url)
+        if reason is None:
+            return False
+        logger.info(f"Jobb {job.id} startas inte: videon misslyckades tidigare med ett permanent fel ({reason}).")
+        job.status = JobStatus.STATUS_ERROR_PERMANENT
+        job.last_error = reason
+        self.append_log(job, f"Videon misslyckades tidigare med ett permanent fel: {reason}. Välj \"Försök igen\" för att ändå ladda ner den.\n")
+        self.log_store.close(job.id)
+        self._move_job_to_history(job)
+        return True
+
+    def _retry_policy(self) -> RetryPolicy:
+        config = self.config_manager.get_config()
+        return RetryPolicy(config.retry_max_attempts, config.retry_base_delay_s, config.retry_max_delay_s)
+
+    def _handle_failure(self, job: DownloadJob) -> bool:
+        """
+        Klassar ett misslyckat jobb utifrån dess felrader. Permanenta fel sparas i cachen över permanenta fel;
+        tillfälliga fel schemaläggs för ett nytt försök. Returnerar True om jobbet ligger kvar i kön.
+        """
+        verdict = classify_error(self._errors.pop(job.id, []))
+        job.last_error = verdict.reason
+        host = host_key(job.url)
+        if verdict.error_class == ErrorClass.PERMANENT:
+            job.status = JobStatus.STATUS_ERROR_PERMANENT
+            self.negative_cache.add(self._video_key(job) or job.url, verdict.reason)
+            self.append_log(job, f"Permanent fel ({verdict.reason}); jobbet försöks inte igen automatiskt.\n")
+            return False
+        policy = self._retry_policy()
+        if (verdict.error_class != ErrorClass.TRANSIENT or not self.config_manager.get_config().auto_retry
+                or job.attempts >= policy.max_retries):
+            return False
+        job.attempts += 1
+        job.retry_at = self.host_backoff.failure(host, policy)
+        job.status = JobStatus.STATUS_RETRY_SCHEDULED
+        job.progress = 0.0
+        delay = job.retry_at - time.time()
+        logger.info(f"Jobb {job.id} misslyckades tillfälligt ({verdict.reason}); försök {job.attempts} av {policy.max_retries} om {delay:.0f} s.")
+        self.append_log(job, f"Tillfälligt fel ({verdict.reason}); nytt försök ({job.attempts} av {policy.max_retries}) om {delay:.0f} s.\n")
+        self.job_updated.emit(job.id)
+        self._persist_job(job, JobStore.QUEUE)
+        self._schedule_retry_timer()
+        return True
+
+    def _schedule_retry_timer(self) -> None:
+        """Ställer timern till nästa schemalagda försök eller nästa webbplats vars väntetid löper ut."""
+        times = [job.retry_at for job in self.queue if job.status == JobStatus.STATUS_RETRY_SCHEDULED and job.retry_at]
+        expiry = self.host_backoff.next_expiry()
+        if expiry is not None:
+            times.append(expiry)
+        if not times:
+            self.retry_timer.stop()
+            return
+        self.retry_timer.start(max(0, int((min(times) - time.time()) * 1000)))
+
+    def _on_retry_timer(self) -> None:
+        now = time.time()
+        for job in self.queue:
+            if job.status == JobStatus.STATUS_RETRY_SCHEDULED and (job.retry_at or 0) <= now:
+                job.status = JobStatus.STATUS_WAITING
+                job.retry_at = None
+                self.ready_queue.push(job)
+                self.job_updated.emit(job.id)
+                self._persist_job(job, JobStore.QUEUE)
+        self._schedule_retry_timer()
+        self.request_dispatch()
+
+    def _finish_archived(self, job: DownloadJob) -> None:
+        """Arkiverar ett avslutat jobb och avgör dubbletterna som väntade på det."""
+        key = self._archive_keys.pop(job.id, None)
+        if key and job.status in SUCCESS_STATUSES:
+            self.download_archive.add(key)
+        for follower_id in [f for f, leader_id in self._coalesced.items() if leader_id == job.id]:
+            del self._coalesced[follower_id]
+            follower = self.get_job_from_queue(follower_id)
+            if not follower:
+                continue
+            if job.status in SUCCESS_STATUSES:
+                follower.status = JobStatus.STATUS_ALREADY_DOWNLOADED
+                follower.progress = 100.0
+                follower.final_filename = job.final_filename
+                follower.thumbnail_path = job.thumbnail_path
+                if follower.title == "N/A":
+                    follower.title = job.title
+                self.append_log(follower, f"Laddades ner av jobb {job.id}.\n")
+                self.log_store.close(follower_id)
+                self._move_job_to_history(follower)
+            else:
+                # Det första försöket misslyckades; dubbletten får göra ett eget.
+                self.ready_queue.push(follower)
+                self.request_dispatch()
+
+    def rebuild_download_archive(self) -> int:
+        """Bygger om nedladdningsarkivet från de lyckade jobben i historiken."""
+        count = self.download_archive.rebuild(
+            self._archive_key(job) for job in self.history if job.status in SUCCESS_STATUSES)
+        logger.info(f"Nedladdningsarkivet byggdes om med {count} poster från historiken.")
+        return count
+
     def cancel_job(self, job_id: str) -> None:
         if job_id in self.active_runners:
             logger.info(f"Avbryter aktivt jobb {job_id}.")
             job = self.active_runners[job_id].job
             job.status = JobStatus.STATUS_CANCELLING
             self.job_updated.emit(job.id)
+            self._persist_job(job, JobStore.QUEUE)
             self.active_runners[job_id].cancel()
         else:
             job = self.get_job_from_queue(job_id)
-            if job and job.status == JobStatus.STATUS_WAITING:
+            if job and job.status in (JobStatus.STATUS_WAITING, JobStatus.STATUS_EXPANDING, JobStatus.STATUS_RETRY_SCHEDULED):
                 logger.info(f"Avbryter väntande jobb {job_id}.")
                 job.status = JobStatus.STATUS_CANCELLED
+                self.ready_queue.discard(job_id)
+                self._coalesced.pop(job_id, None)
+                self.metadata_prefetcher.cancel(job_id)
                 self._move_job_to_history(job)
+            elif job and job.status == JobStatus.STATUS_GROUP:
+                logger.info(f"Avbryter alla jobb i spellistan {job_id}.")
+                for child_id in self.groups.children(job_id):
+                    self.cancel_job(child_id)
 
     def _move_job_to_history(self, job: DownloadJob) -> None:
-        if job in self.queue:
-            self.queue.remove(job)
-            self.history.insert(0, job)
+        if self.registry.container_of(job.id) == JobRegistry.QUEUE:
+            self.registry.move(job.id, JobRegistry.HISTORY, 0)
             self.queue_changed.emit()
             self.history_changed.emit()
-            self.save_jobs()
+            self._persist_job(job, JobStore.HISTORY)
             logger.info(f"Jobb {job.id} flyttat till historik med status {job.status.name}.")
+            if job.parent_id:
+                self._update_group(job.parent_id)
 
     def _on_process_started(self, job_id: str) -> None:
         job = self.active_runners[job_id].job
         job.status = JobStatus.STATUS_RUNNING
         self.job_updated.emit(job_id)
+        self._persist_job(job, JobStore.QUEUE)
 
     def _on_output_received(self, job_id: str, output: str) -> None:
+        if job_id not in self.active_runners: return
+        self.append_log(self.active_runners[job_id].job, output)
+
+    def _on_events_parsed(self, job_id: str, events: List[OutputEvent]) -> None:
+        """Uppdaterar jobbet från de strukturerade händelser som YtDlpRunner har tolkat."""
         if job_id not in self.active_runners: return
         job = self.active_runners[job_id].job
-        job.log += output
-        
-        progress_match = re.search(r'\[download\]\s+([\d.]+)%', output)
-        if progress_match: job.progress = float(progress_match.group(1))
-        
-        final_file_match = (
-            re.search(r'\[Merger\] Merging formats into "(.*)"', output) or
-            re.search(r'\[ExtractAudio\] Destination: (.*)', output) or
-            re.search(r'\[download\] Destination: (.*)', output)
-        )
-        if final_file_match:
-            job.final_filename = os.path.basename(final_file_match.group(1).strip())
-        
-        thumb_match = re.search(r'Writing thumbnail to: (.*)', output)
-        if thumb_match:
-            thumb_path = thumb_match.group(1).strip()
-            if not os.path.isabs(thumb_path) and job.output_path:
-                job.thumbnail_path = os.path.join(job.output_path, thumb_path)
-            else:
-                job.thumbnail_path = thumb_path
-            logger.info(f"Hittade miniatyrbild för jobb {job.id}: {job.thumbnail_path}")
-
-        # **FIX:** Mer robust logik för att hitta videolängd.
-        if not job.duration:
-            duration_match = re.search(r'Duration:\s*([\d:.]+)', output)
-            if duration_match:
-                job.duration = duration_match.group(1).strip().split('.')[0] # Ta bort millisekunder
+        for event in events:
+            kind = event.kind
+            if kind == EventKind.PROGRESS:
+                record = event.progress
+                self._record_transfer(job, record)
+                if record.percent is not None: job.progress = record.percent
+                if record.downloaded_bytes is not None: job.downloaded_bytes = record.downloaded_bytes
+                if record.total_bytes is not None: job.total_bytes = record.total_bytes
+                job.speed = record.speed
+                job.eta = record.eta
+            elif kind in (EventKind.DESTINATION, EventKind.EXTRACT_AUDIO):
+                job.final_filename = os.path.basename(event.value)
+            elif kind == EventKind.MERGING:
+                if event.value:
+                    job.final_filename = os.path.basename(event.value)
+                self._mark_postprocess(job)
+                self._set_phase(job, JobStatus.STATUS_MERGING)
+            elif kind == EventKind.POSTPROCESSING:
+                self._mark_postprocess(job)
+                self._set_phase(job, JobStatus.STATUS_POSTPROCESSING)
+            elif kind == EventKind.ALREADY_DOWNLOADED:
+                self._already_downloaded.add(job_id)
+                if event.value:
+                    job.final_filename = os.path.basename(event.value)
+            elif kind == EventKind.THUMBNAIL:
+                thumb_path = event.value
+                if not os.path.isabs(thumb_path) and job.output_path:
+                    job.thumbnail_path = os.path.join(job.output_path, thumb_path)
+                else:
+                    job.thumbnail_path = thumb_path
+                logger.info(f"Hittade miniatyrbild för jobb {job.id}: {job.thumbnail_path}")
+            elif kind == EventKind.ERROR:
+                self._errors.setdefault(job_id, []).append(event.value)
+            elif kind == EventKind.DURATION and not job.duration:
+                job.duration = event.value
                 logger.info(f"Hittade längd för jobb {job.id}: {job.duration}")
 
         if job.title == "N/A" and job.final_filename:
             job.title = os.path.splitext(job.final_filename)[0]
 
         self.job_updated.emit(job.id)
+        if job.parent_id:
+            self._update_group(job.parent_id)
+
+    def _record_transfer(self, job: DownloadJob, record) -> None:
+        tracker = self._transfers.get(job.id)
+        if tracker is None:
+            return
+        tracker.update(record)
+        now = time.time()
+        if tracker.bytes_transferred > 0:
+            job.timings.setdefault(PHASE_FIRST_BYTE, now)
+        if record.status == "finished":
+            # Gäller den sista filen när video och ljud hämtas var för sig.
+            job.timings[PHASE_DOWNLOAD_DONE] = now
+
+    def _mark_postprocess(self, job: DownloadJob) -> None:
+        now = time.time()
+        job.timings.setdefault(PHASE_DOWNLOAD_DONE, now)
+        job.timings.setdefault(PHASE_POSTPROCESS, now)
+
+    def _record_finished(self, job: DownloadJob) -> None:
+        """Avslutar mätningen av ett körande jobb och räknar in det i sammanställningen."""
+        now = time.time()
+        job.timings[PHASE_FINISHED] = now
+        tracker = self._transfers.pop(job.id, None)
+        if tracker is not None:
+            job.bytes_transferred = tracker.bytes_transferred or None
+            job.peak_speed = tracker.peak_speed
+            first_byte = job.timings.get(PHASE_FIRST_BYTE)
+            elapsed = job.timings.get(PHASE_DOWNLOAD_DONE, now) - first_byte if first_byte else 0.0
+            job.avg_speed = tracker.bytes_transferred / elapsed if elapsed > 0 else None
+        self.metrics.record_finished(job)
+
+    def _update_slot_metrics(self, *args) -> None:
+        self.metrics.update_slots(len(self.active_runners), self._max_concurrent())
+
+    def _update_metrics_timer(self) -> None:
+        interval = self.config_manager.get_config().metrics_interval_s
+        if interval > 0:
+            self.metrics_timer.start(interval * 1000)
+        else:
+            self.metrics_timer.stop()
+
+    def metrics_snapshot(self) -> dict:
+        return self.metrics.snapshot(len(self.active_runners), len(self.ready_queue))
+
+    def export_metrics(self) -> None:
+        """Skriver mätvärdena i Prometheus textformat och som JSON."""
+        write_metrics(self.config_manager.get_config().metrics_dir or self.get_jobs_path("metrics"), self.metrics_snapshot())
+
+    def _set_phase(self, job: DownloadJob, status: JobStatus) -> None:
+        """Byter fas för ett körande jobb, utan att skriva över en pågående avbrytning."""
+        if job.status != JobStatus.STATUS_CANCELLING and job.status != status:
+            job.status = status
+            self._persist_job(job, JobStore.QUEUE)
 
     def _on_process_finished(self, job_id: str, exit_code: int, exit_status: QProcess.ExitStatus) -> None:
         if job_id not in self.active_runners:
             logger.warning(f"Fick 'finished' signal för okänt jobb: {job_id}")
             return
+        self._dispatch_requested_at = time.perf_counter()
         runner = self.active_runners.pop(job_id)
+        self._dispose_later(runner)
         self.active_jobs_count_changed.emit(len(self.active_runners))
         job = runner.job
+        already_downloaded = job_id in self._already_downloaded
+        self._already_downloaded.discard(job_id)
         if job.status == JobStatus.STATUS_CANCELLING:
             job.status = JobStatus.STATUS_CANCELLED
         elif exit_code == 0 and exit_status == QProcess.ExitStatus.NormalExit:
@@ -146,56 +725,91 @@ class JobManager(QObject):
             job.progress = 100.0
         else:
             job.status = JobStatus.STATUS_ERROR_PROCESS
-            if "already been downloaded" in job.log:
+            if already_downloaded:
                 job.status = JobStatus.STATUS_ALREADY_DOWNLOADED
             elif exit_status == QProcess.ExitStatus.CrashExit:
                 job.status = JobStatus.STATUS_ERROR_CRASH
-        
+        if job.status in SUCCESS_STATUSES:
+            self.host_backoff.success(host_key(job.url))
+        retrying = job.status.name.startswith("STATUS_ERROR") and self._handle_failure(job)
+        self._record_finished(job)
+        self._errors.pop(job_id, None)
+        self.log_store.close(job_id)
+        if job.status != JobStatus.STATUS_CANCELLED:
+            self.concurrency.record_outcome(job.status in SUCCESS_STATUSES)
+        self._release_info_cache(job)
+        self._finish_archived(job)
+        if retrying:
+            self.start_next_jobs_in_queue()
+            return
+
         self._move_job_to_history(job)
         self._generate_thumbnail_if_needed(job)
         self.start_next_jobs_in_queue()
 
-    def _generate_thumbnail_if_needed(self, job: DownloadJob):
+    def _dispose_later(self, obj: QObject) -> None:
+        """Låter Qt ta bort objektet senare, eftersom vi kan befinna oss i en av dess egna signaler."""
+        obj.setParent(self)
+        obj.deleteLater()
+
+    def _generate_thumbnail_if_needed(self, job: DownloadJob, priority: int = PRIORITY_NORMAL):
         if job.status in (JobStatus.STATUS_COMPLETED, JobStatus.STATUS_ALREADY_DOWNLOADED) and not job.thumbnail_path:
             ffmpeg_path = self.config_manager.get_config().ffmpeg_path
             if ffmpeg_path and os.path.exists(ffmpeg_path):
-                logger.info(f"Ingen miniatyrbild hittades för jobb {job.id}, försöker generera med FFmpeg.")
-                generator = ThumbnailGenerator(job, ffmpeg_path)
-                generator.thumbnail_generated.connect(self._on_thumbnail_generated)
-                generator.generation_failed.connect(self._on_thumbnail_failed)
-                self.active_thumbnail_generators[job.id] = generator
-                generator.generate()
+                if self.thumbnail_pool.submit(job, ffmpeg_path, priority):
+                    logger.info(f"Ingen miniatyrbild hittades för jobb {job.id}, köar generering med FFmpeg.")
             else:
                 logger.warning(f"Kan inte generera miniatyrbild för jobb {job.id}: FFmpeg-sökväg saknas eller är ogiltig.")
 
-    def trigger_thumbnail_generation(self, job_id: str):
+    def trigger_thumbnail_generation(self, job_id: str, priority: int = PRIORITY_NORMAL):
         job = self.get_job_from_history(job_id)
         if job:
-            self._generate_thumbnail_if_needed(job)
+            self._generate_thumbnail_if_needed(job, priority)
         else:
             logger.warning(f"Kunde inte trigga thumbnail-generering för obefintligt jobb {job_id}")
 
+    def prioritize_thumbnails(self, job_ids: List[str]) -> None:
+        self.thumbnail_pool.prioritize(job_ids)
+
+    def cancel_thumbnail_generation(self) -> None:
+        self.thumbnail_pool.cancel_all()
+
     def _on_thumbnail_generated(self, job_id: str, thumbnail_path: str):
         job = self.get_job_from_history(job_id)
         if job:
             job.thumbnail_path = thumbnail_path
             self.job_updated.emit(job_id)
-            self.save_jobs()
-        self.active_thumbnail_generators.pop(job_id, None)
+            self._persist_job(job, JobStore.HISTORY)
 
     def _on_thumbnail_failed(self, job_id: str):
         logger.warning(f"Misslyckades med att generera miniatyrbild för jobb {job_id}.")
-        self.active_thumbnail_generators.pop(job_id, None)
 
     def _on_process_error(self, job_id: str, error: QProcess.ProcessError) -> None:
         if job_id not in self.active_runners: return
+        self._dispatch_requested_at = time.perf_counter()
         runner = self.active_runners.pop(job_id)
+        self._dispose_later(runner)
         self.active_jobs_count_changed.emit(len(self.active_runners))
         job = runner.job
         job.status = JobStatus.STATUS_ERROR_STARTFAIL
-        job.log += f"Processfel: {error.name} - {runner.process.errorString()}\n"
+        self.append_log(job, f"Processfel: {error.name} - {runner.error_string()}\n")
+        self.log_store.close(job_id)
+        self._already_downloaded.discard(job_id)
+        self._errors.pop(job_id, None)
+        self._record_finished(job)
+        self._release_info_cache(job)
+        self._finish_archived(job)
         self._move_job_to_history(job)
-        self.start_next_jobs_in_queue()
+        # Via event-loopen: FailedToStart kommer synkront från start(), och en direkt utdelning skulle
+        # annars rekursera en nivå per köat jobb när yt-dlp saknas.
+        self.request_dispatch()
+
+    def _release_info_cache(self, job: DownloadJob) -> None:
+        """Tar bort cachad info-JSON som ett misslyckat jobb startades med; den kan vara inaktuell."""
+        if job.id in self._jobs_using_info_cache:
+            self._jobs_using_info_cache.discard(job.id)
+            if job.status.name.startswith("STATUS_ERROR") or job.status == JobStatus.STATUS_RETRY_SCHEDULED:
+                self.info_cache.invalidate(job.url)
 
     def retry_job(self, job_id: str) -> None:
         job_to_retry = self.get_job_from_history(job_id)
@@ -203,68 +817,162 @@ class JobManager(QObject):
             logger.info(f"Försöker jobb {job_id} igen.")
             job_to_retry.status = JobStatus.STATUS_WAITING
             job_to_retry.progress = 0.0
-            job_to_retry.log = ""
+            # Ett manuellt försök gäller även videor med permanenta fel eller i arkivet och börjar om räkningen av omförsök.
+            self.negative_cache.discard(self._video_key(job_to_retry) or job_to_retry.url)
+            self._retried.add(job_id)
+            job_to_retry.attempts = 0
+            job_to_retry.retry_at = None
+            job_to_retry.last_error = None
+            job_to_retry.timings = {PHASE_QUEUED: time.time()}
+            self.log_store.delete(job_id)
+            job_to_retry.log_ref = None
             job_to_retry.added_time = datetime.now().isoformat()
             job_to_retry.thumbnail_path = None
-            self.history.remove(job_to_retry)
-            self.queue.append(job_to_retry)
+            self.registry.move(job_id, JobRegistry.QUEUE)
+            self.ready_queue.push(job_to_retry)
             self.history_changed.emit()
             self.queue_changed.emit()
-            self.save_jobs()
+            self._persist_job(job_to_retry, JobStore.QUEUE)
             self.start_next_jobs_in_queue()
 
+    def get_job(self, job_id: str) -> DownloadJob | None:
+        return self.registry.get(job_id)
+
+    def get_job_location(self, job_id: str) -> tuple[str, int] | None:
+        """Returnerar (behållare, rad) för jobbet, där behållaren är JobRegistry.QUEUE eller HISTORY."""
+        return self.registry.location_of(job_id)
+
     def get_job_from_queue(self, job_id: str) -> DownloadJob | None:
-        return next((j for j in self.queue if j.id == job_id), None)
+        return self.registry.get(job_id) if self.registry.container_of(job_id) == JobRegistry.QUEUE else None
         
     def get_job_from_history(self, job_id: str) -> DownloadJob | None:
-        return next((j for j in self.history if j.id == job_id), None)
+        return self.registry.get(job_id) if self.registry.container_of(job_id) == JobRegistry.HISTORY else None
+
+    def append_log(self, job: DownloadJob, text: str) -> None:
+        """Skriver text till jobbets logg i JobLogStore."""
+        self.log_store.append(job.id, text)
+        job.log_ref = JobLogStore.log_ref_for(job.id)
+
+    def get_job_log(self, job_id: str) -> str:
+        """Läser hela loggen för ett jobb från disk."""
+        return self.log_store.read(job_id)
+
+    def get_job_log_tail(self, job_id: str) -> str | None:
+        """Returnerar slutet av loggen från minnet för ett jobb som körs, eller None om jobbet inte körs."""
+        return self.log_store.tail(job_id) if job_id in self.active_runners else None
+
+    def _adopt_legacy_logs(self, jobs: List[DownloadJob]) -> None:
+        """Flyttar loggar från äldre sparade jobb, där loggen låg i jobbet, till JobLogStore."""
+        for job in jobs:
+            if job.legacy_log:
+                self.log_store.delete(job.id)
+                self.append_log(job, job.legacy_log)
+                self.log_store.close(job.id)
+                job.legacy_log = ""
 
     def clear_history(self) -> None:
-        self.history.clear()
+        self.thumbnail_pool.cancel_all()
+        for job in self.registry.clear(JobRegistry.HISTORY):
+            self.log_store.delete(job.id)
         self.history_changed.emit()
-        self.save_jobs()
+        if self._persistence_enabled():
+            self.job_store.clear(JobStore.HISTORY)
 
     def remove_job(self, job_id: str) -> None:
         job_q = self.get_job_from_queue(job_id)
-        if job_q and job_q.status == JobStatus.STATUS_WAITING:
-            self.queue.remove(job_q)
+        if job_q and job_q.status in (JobStatus.STATUS_WAITING, JobStatus.STATUS_RETRY_SCHEDULED):
+            self.registry.remove(job_id)
+            self.ready_queue.discard(job_id)
+            self._coalesced.pop(job_id, None)
+            self._retried.discard(job_id)
+            self.metadata_prefetcher.cancel(job_id)
             self.queue_changed.emit()
-            self.save_jobs()
+            self._delete_persisted_job(job_id)
+            self.log_store.delete(job_id)
         else:
             job_h = self.get_job_from_history(job_id)
             if job_h:
-                self.history.remove(job_h)
+                self.thumbnail_pool.cancel(job_id)
+                self.registry.remove(job_id)
                 self.history_changed.emit()
-                self.save_jobs()
+                self._delete_persisted_job(job_id)
+                self.log_store.delete(job_id)
     
     def get_jobs_path(self, filename: str = "jobs.json") -> str:
         app_data_path = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.AppDataLocation)
         return f"{app_data_path}/{filename}"
 
+    def _persistence_enabled(self) -> bool:
+        return bool(self.config_manager.get_config().save_queue_on_exit)
+
+    def _persist_job(self, job: DownloadJob, container: str) -> None:
+        """Sparar endast det ändrade jobbet i stället för hela kön och historiken."""
+        if self._persistence_enabled():
+            self.job_store.save_job(job, container)
+
+    def _delete_persisted_job(self, job_id: str) -> None:
+        if self._persistence_enabled():
+            self.job_store.delete_job(job_id)
+
     def save_jobs(self) -> None:
-        if not self.config_manager.get_config().save_queue_on_exit: return
-        self.export_jobs(self.get_jobs_path())
+        if not self._persistence_enabled(): return
+        self.job_store.sync(self.queue, self.history)
+        self.job_store.compact()
 
     def load_jobs(self) -> None:
+        legacy_path = self.get_jobs_path()
+        if self.job_store.is_empty() and os.path.exists(legacy_path):
+            self._migrate_legacy_jobs(legacy_path)
+        self.registry.reset(*self.job_store.load_jobs())
+        self._adopt_legacy_logs(self.queue + self.history)
+        for job in self.queue:
+            if job.status in (JobStatus.STATUS_GROUP, JobStatus.STATUS_EXPANDING):
+                continue
+            if job.status not in [JobStatus.STATUS_COMPLETED, JobStatus.STATUS_CANCELLED] and not job.status.name.startswith("STATUS_ERROR"):
+                 job.status = JobStatus.STATUS_WAITING
+                 job.progress = 0.0
+        self.save_jobs()
+        self._restore_queue()
+
+    def _restore_queue(self) -> None:
+        """Bygger upp utdelning, grupper och väntande expansioner efter inläsning eller import."""
+        self.ready_queue.rebuild(self.queue)
+        self.groups.rebuild(self.queue + self.history)
+        self.queue_changed.emit()
+        self.history_changed.emit()
+        for job in list(self.queue):
+            if job.status == JobStatus.STATUS_EXPANDING:
+                self._enqueue(job)
+            elif job.status == JobStatus.STATUS_GROUP:
+                self._update_group(job.id)
+        self.start_next_jobs_in_queue()
+        self._prefetch_metadata(self.queue)
+
+    def _migrate_legacy_jobs(self, legacy_path: str) -> None:
+        """Importerar en gammal jobs.json till databasen en gång och döper om filen."""
         try:
-            self.import_jobs(self.get_jobs_path())
-            for job in self.queue:
-                if job.status not in [JobStatus.STATUS_COMPLETED, JobStatus.STATUS_CANCELLED] and not job.status.name.startswith("STATUS_ERROR"):
-                     job.status = JobStatus.STATUS_WAITING
-                     job.progress = 0.0
-            self.queue_changed.emit()
-            self.history_changed.emit()
-            self.start_next_jobs_in_queue()
-        except FileNotFoundError:
-            logger.info("Jobb-filen hittades inte, startar med tom kö/historik.")
-        except (json.JSONDecodeError, TypeError) as e:
-            logger.error(f"Fel vid laddning av jobb: {e}")
+            with open(legacy_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            queue = [DownloadJob.from_dict(d) for d in data.get("queue", [])]
+            history = [DownloadJob.from_dict(d) for d in data.get("history", [])]
+            self._adopt_legacy_logs(queue + history)
+        except (IOError, json.JSONDecodeError, TypeError, AttributeError) as e:
+            logger.error(f"Kunde inte migrera jobb från {legacy_path}: {e}")
+            return
+        self.job_store.replace_all(queue, history)
+        os.replace(legacy_path, f"{legacy_path}.migrated")
+        logger.info(f"Migrerade {len(queue)} köade och {len(history)} historiska jobb från {legacy_path} till databasen.")
 
     def export_jobs(self, file_path: str) -> None:
         data = {"queue": [job.to_dict() for job in self.queue], "history": [job.to_dict() for job in self.history]}
+        # Skriv till en temporär fil och byt sedan namn, så att ett avbrott aldrig lämnar en halvskriven fil.
+        tmp_path = f"{file_path}.tmp"
         try:
-            with open(file_path, 'w', encoding='utf-8') as f:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
                 json.dump(data, f, indent=4)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, file_path)
             logger.info(f"Kö och historik exporterad till {file_path}.")
         except IOError as e:
             logger.error(f"Kunde inte exportera jobb till {file_path}: {e}")
@@ -272,9 +980,11 @@ class JobManager(QObject):
     def import_jobs(self, file_path: str) -> None:
         with open(file_path, 'r', encoding='utf-8') as f:
             data = json.load(f)
-            self.queue = [DownloadJob.from_dict(d) for d in data.get("queue", [])]
-            self.history = [DownloadJob.from_dict(d) for d in data.get("history", [])]
+            self.metadata_prefetcher.cancel_all()
+            self.registry.reset([DownloadJob.from_dict(d) for d in data.get("queue", [])],
+                                [DownloadJob.from_dict(d) for d in data.get("history", [])])
             logger.info(f"Importerade {len(self.queue)} jobb till kön och {len(self.history)} till historiken från {file_path}.")
-        self.queue_changed.emit()
-        self.history_changed.emit()
-        self.start_next_jobs_in_queue()
+        self._adopt_legacy_logs(self.queue + self.history)
+        if self._persistence_enabled():
+            self.job_store.replace_all(self.queue, self.history)
+        self._restore_queue()
@@ -0,0 +1,196 @@
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from yt_dlp_gui_app.core.models import DownloadJob
+
+@dataclass(frozen=True)
+class RegistryChange:
+    """En strukturell ändring i en behållare, meddelad efter att den har gjorts."""
+    kind: str # JobRegistry.INSERTED, REMOVED, MOVED eller RESET
+    container: str
+    row: int = -1
+    to_row: int = -1 # Ny rad för MOVED
+    job_id: str = ""
+
+class JobRegistry:
+    """
+    Centralt register över alla jobb i kön och historiken.
+    Håller index från jobb-id till jobb, till behållare (kö/historik) och till rad i behållaren,
+    så att uppslagningar kostar O(1) i stället för en genomsökning av listorna.
+
+    Raden sparas som rad + förskjutning per behållare. Att lägga till eller ta bort först i en
+    behållare, som när avslutade jobb hamnar överst i historiken, ändrar bara förskjutningen.
+    Efter ändringar mitt i en behållare stämmer nycklarna först fram till ändringen; resten rättas
+    lat från den punkten och bara så långt som en uppslagning behöver.
+    """
+    QUEUE = "queue"
+    HISTORY = "history"
+    INSERTED = "inserted"
+    REMOVED = "removed"
+    MOVED = "moved"
+    RESET = "reset"
+
+    def __init__(self) -> None:
+        self._lists: Dict[str, List[DownloadJob]] = {self.QUEUE: [], self.HISTORY: []}
+        self._jobs: Dict[str, DownloadJob] = {}
+        self._containers: Dict[str, str] = {}
+        self._keys: Dict[str, int] = {} # jobb-id -> rad + _offset[behållare]
+        self._offset: Dict[str, int] = {self.QUEUE: 0, self.HISTORY: 0}
+        self._valid: Dict[str, int] = {self.QUEUE: 0, self.HISTORY: 0} # Antal rader först vars nycklar stämmer
+        self._listeners: List[Callable[[RegistryChange], None]] = []
+
+    @property
+    def queue(self) -> List[DownloadJob]:
+        return self._lists[self.QUEUE]
+
+    @property
+    def history(self) -> List[DownloadJob]:
+        return self._lists[self.HISTORY]
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def __contains__(self, job_id: str) -> bool:
+        return job_id in self._jobs
+
+    def get(self, job_id: str) -> Optional[DownloadJob]:
+        return self._jobs.get(job_id)
+
+    def container_of(self, job_id: str) -> Optional[str]:
+        return self._containers.get(job_id)
+
+    def row_of(self, job_id: str) -> Optional[int]:
+        """Returnerar jobbets rad i sin behållare."""
+        container = self._containers.get(job_id)
+        return self._row_in(container, job_id) if container else None
+
+    def location_of(self, job_id: str) -> Optional[Tuple[str, int]]:
+        """Returnerar (behållare, rad) för jobbet, eller None om det inte finns."""
+        row = self.row_of(job_id)
+        return (self._containers[job_id], row) if row is not None else None
+
+    def add_listener(self, listener: Callable[[RegistryChange], None]) -> None:
+        """Registrerar en mottagare av radändringar, t.ex. en tabellmodell som vill slippa läsa om allt."""
+        self._listeners.append(listener)
+
+    def _notify(self, kind: str, container: str, row: int = -1, to_row: int = -1, job_id: str = "") -> None:
+        change = RegistryChange(kind, container, row, to_row, job_id)
+        for listener in self._listeners:
+            listener(change)
+
+    def add(self, job: DownloadJob, container: str, index: Optional[int] = None) -> None:
+        if job.id in self._jobs:
+            self.remove(job.id)
+        row = self._insert(job, container, index)
+        self._notify(self.INSERTED, container, row, job_id=job.id)
+
+    def _insert(self, job: DownloadJob, container: str, index: Optional[int]) -> int:
+        jobs = self._lists[container]
+        if index is None or index >= len(jobs):
+            # Att lägga till sist flyttar inga andra rader.
+            index = len(jobs)
+            if self._valid[container] == index:
+                self._valid[container] += 1
+            jobs.append(job)
+        elif index == 0:
+            # Övriga rader flyttas ett steg genom att förskjutningen minskar.
+            self._offset[container] -= 1
+            self._valid[container] += 1
+            jobs.insert(0, job)
+        else:
+            self._valid[container] = min(self._valid[container], index)
+            jobs.insert(index, job)
+        self._keys[job.id] = index + self._offset[container]
+        self._jobs[job.id] = job
+        self._containers[job.id] = container
+        return index
+
+    def move(self, job_id: str, container: str, index: Optional[int] = None) -> Optional[DownloadJob]:
+        """Flyttar jobbet till raden index i behållaren, räknat efter att jobbet har tagits bort."""
+        source = self._containers.get(job_id)
+        if source != container:
+            job = self.remove(job_id)
+            if job:
+                self.add(job, container, index)
+            return job
+        row, job = self._take(job_id)
+        to_row = self._insert(job, container, index)
+        if to_row != row:
+            self._notify(self.MOVED, container, row, to_row, job_id)
+        return job
+
+    def move_before(self, job_id: str, anchor_id: Optional[str]) -> Optional[DownloadJob]:
+        """Flyttar jobbet inom sin behållare till raden före anchor_id, eller sist om anchor_id är None."""
+        container = self._containers.get(job_id)
+        if container is None or job_id == anchor_id:
+            return None
+        row, job = self._take(job_id)
+        index = self.row_of(anchor_id) if anchor_id in self._jobs else None
+        to_row = self._insert(job, container, index)
+        if to_row != row:
+            self._notify(self.MOVED, container, row, to_row, job_id)
+        return job
+
+    def remove(self, job_id: str) -> Optional[DownloadJob]:
+        container = self._containers.get(job_id)
+        if container is None:
+            return None
+        row, job = self._take(job_id)
+        self._notify(self.REMOVED, container, row, job_id=job_id)
+        return job
+
+    def _take(self, job_id: str) -> Tuple[int, DownloadJob]:
+        container = self._containers[job_id]
+        row = self._row_in(container, job_id)
+        del self._lists[container][row]
+        if row == 0:
+            self._offset[container] += 1
+            self._valid[container] = max(0, self._valid[container] - 1)
+        else:
+            self._valid[container] = min(self._valid[container], row)
+        del self._keys[job_id]
+        del self._containers[job_id]
+        return row, self._jobs.pop(job_id)
+
+    def _row_in(self, container: str, job_id: str) -> int:
+        jobs = self._lists[container]
+        job = self._jobs[job_id]
+        offset = self._offset[container]
+        row = self._keys[job_id] - offset
+        if 0 <= row < len(jobs) and jobs[row] is job:
+            return row
+        # Nyckeln är inaktuell efter en ändring längre fram i behållaren; rätta nycklarna fram till jobbet.
+        for row in range(self._valid[container], len(jobs)):
+            self._keys[jobs[row].id] = row + offset
+            if jobs[row] is job:
+                self._valid[container] = row + 1
+                return row
+        raise KeyError(job_id)
+
+    def clear(self, container: str) -> List[DownloadJob]:
+        """Tömmer en behållare och returnerar jobben som togs bort."""
+        removed = self._clear(container)
+        self._notify(self.RESET, container)
+        return removed
+
+    def _clear(self, container: str) -> List[DownloadJob]:
+        removed = self._lists[container]
+        for job in removed:
+            self._jobs.pop(job.id, None)
+            self._containers.pop(job.id, None)
+            self._keys.pop(job.id, None)
+        self._lists[container] = []
+        self._offset[container] = 0
+        self._valid[container] = 0
+        return removed
+
+    def reset(self, queue: Iterable[DownloadJob], history: Iterable[DownloadJob]) -> None:
+        """Ersätter hela innehållet, t.ex. efter inläsning eller import."""
+        self._clear(self.QUEUE)
+        self._clear(self.HISTORY)
+        for container, jobs in ((self.QUEUE, queue), (self.HISTORY, history)):
+            for job in jobs:
+                if job.id in self._jobs:
+                    self._take(job.id)
+                self._insert(job, container, None)
+        self._notify(self.RESET, self.QUEUE)
+        self._notify(self.RESET, self.HISTORY)
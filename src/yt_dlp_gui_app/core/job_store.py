@@ -0,0 +1,232 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Tuple
+from PyQt6.QtCore import QThreadPool
+from yt_dlp_gui_app.core.models import DownloadJob, JobStatus
+
+logger = logging.getLogger(__name__)
+
+class JobStore:
+    """
+    SQLite-baserad lagring av kö och historik.
+    Databasen körs i WAL-läge och endast rader som faktiskt har ändrats skrivs.
+
+    Varje ändring läggs först till i en journal (en liten INSERT per ändring).
+    Journalen viks in i ögonblicksbilden i tabellen `jobs` av compact(),
+    som körs vid start och periodiskt i bakgrunden.
+    """
+    QUEUE = "queue"
+    HISTORY = "history"
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(db_path, timeout=10)
+        self._compact_lock = threading.Lock()
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+        # id -> (behållare, ordningsnummer, hash av senast skrivna data)
+        self._written: Dict[str, Tuple[str, int, int]] = {}
+        row = self.conn.execute(
+            "SELECT MAX(COALESCE((SELECT MAX(seq) FROM jobs), 0), COALESCE((SELECT MAX(seq) FROM journal), 0))").fetchone()
+        self._next_seq = row[0] + 1
+
+    def _create_schema(self) -> None:
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    container TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    url TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    data TEXT NOT NULL
+                )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_container_seq ON jobs (container, seq)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_url ON jobs (url)")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS journal (
+                    entry INTEGER PRIMARY KEY AUTOINCREMENT,
+                    op TEXT NOT NULL,
+                    id TEXT,
+                    container TEXT,
+                    seq INTEGER,
+                    url TEXT,
+                    status TEXT,
+                    data TEXT
+                )
+            """)
+
+    def _row_for(self, job: DownloadJob, container: str) -> Tuple[str, str, int, str, str, str] | None:
+        """Bygger en rad för jobbet, eller None om raden redan är skriven oförändrad."""
+        data = json.dumps(job.to_dict(), ensure_ascii=False)
+        data_hash = hash(data)
+        written = self._written.get(job.id)
+        if written and written[0] == container:
+            if written[2] == data_hash:
+                return None
+            seq = written[1]
+        else:
+            # Ny rad eller flytt mellan kö och historik hamnar sist i ordningen.
+            seq = self._next_seq
+            self._next_seq += 1
+        self._written[job.id] = (container, seq, data_hash)
+        return (job.id, container, seq, job.url, job.status.name, data)
+
+    def _append(self, entries: List[Tuple]) -> None:
+        """Lägger till poster (op, id, behållare, seq, url, status, data) sist i journalen."""
+        if not entries:
+            return
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO journal (op, id, container, seq, url, status, data) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                entries)
+
+    def save_job(self, job: DownloadJob, container: str) -> None:
+        """Journalför ett enskilt jobb om det har ändrats sedan det senast skrevs."""
+        row = self._row_for(job, container)
+        if row:
+            self._append([("put",) + row])
+
+    def sync(self, queue: Iterable[DownloadJob], history: Iterable[DownloadJob]) -> None:
+        """Journalför alla ändrade jobb i en enda transaktion."""
+        rows = [r for r in (self._row_for(job, self.QUEUE) for job in queue) if r]
+        # Historiken visas nyast först, så den skrivs baklänges för att nya rader ska hamna överst.
+        rows += [r for r in (self._row_for(job, self.HISTORY) for job in reversed(list(history))) if r]
+        self._append([("put",) + row for row in rows])
+        if rows:
+            logger.debug(f"Journalförde {len(rows)} ändrade jobb i {self.db_path}.")
+
+    def resequence(self, jobs: List[DownloadJob], container: str) -> None:
+        """Skriver om ordningen för jobben i behållaren, t.ex. efter att kön har sorterats om."""
+        rows = []
+        for job in jobs:
+            self._written.pop(job.id, None)
+            rows.append(self._row_for(job, container))
+        self._append([("put",) + row for row in rows])
+
+    def replace_all(self, queue: List[DownloadJob], history: List[DownloadJob]) -> None:
+        """Ersätter hela innehållet i databasen, t.ex. vid import av en sparad kö."""
+        with self.conn:
+            self.conn.execute("DELETE FROM jobs")
+            self.conn.execute("DELETE FROM journal")
+        self._written.clear()
+        self.sync(queue, history)
+        self.compact()
+
+    def delete_job(self, job_id: str) -> None:
+        self._append([("delete", job_id, None, None, None, None, None)])
+        self._written.pop(job_id, None)
+
+    def clear(self, container: str) -> None:
+        self._append([("clear", None, container, None, None, None, None)])
+        self._written = {k: v for k, v in self._written.items() if v[0] != container}
+
+    def is_empty(self) -> bool:
+        return (self.conn.execute("SELECT 1 FROM jobs LIMIT 1").fetchone() is None
+                and self.conn.execute("SELECT 1 FROM journal LIMIT 1").fetchone() is None)
+
+    def journal_length(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM journal").fetchone()[0]
+
+    def compact(self) -> None:
+        """Viker in journalen i ögonblicksbilden i en enda transaktion."""
+        with self._compact_lock:
+            self._compact(self.conn)
+
+    def compact_in_background(self) -> None:
+        """Kör compact() i en trådpool med en egen anslutning så att GUI-tråden inte blockeras."""
+        if self.db_path == ":memory:":
+            self.compact()
+            return
+        if self._compact_lock.locked():
+            return
+        QThreadPool.globalInstance().start(self._compact_with_own_connection)
+
+    def _compact_with_own_connection(self) -> None:
+        if not self._compact_lock.acquire(blocking=False):
+            return
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            try:
+                self._compact(conn)
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.error(f"Komprimering av jobbjournalen misslyckades: {e}")
+        finally:
+            self._compact_lock.release()
+
+    @staticmethod
+    def _compact(conn: sqlite3.Connection) -> None:
+        # Ett avbrott mitt i lämnar antingen den gamla eller den nya ögonblicksbilden intakt.
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            entries = conn.execute(
+                "SELECT entry, op, id, container, seq, url, status, data FROM journal ORDER BY entry").fetchall()
+            if not entries:
+                return
+            for _, op, job_id, container, seq, url, status, data in entries:
+                if op == "put":
+                    conn.execute("""
+                        INSERT INTO jobs (id, container, seq, url, status, data) VALUES (?, ?, ?, ?, ?, ?)
+                        ON CONFLICT(id) DO UPDATE SET
+                            container = excluded.container, seq = excluded.seq, url = excluded.url,
+                            status = excluded.status, data = excluded.data
+                    """, (job_id, container, seq, url, status, data))
+                elif op == "delete":
+                    conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+                elif op == "clear":
+                    conn.execute("DELETE FROM jobs WHERE container = ?", (container,))
+            conn.execute("DELETE FROM journal WHERE entry <= ?", (entries[-1][0],))
+        logger.debug(f"Vek in {len(entries)} journalposter i ögonblicksbilden.")
+
+    def _jobs_from_rows(self, rows: Iterable[Tuple[str, str, int, str]]) -> List[DownloadJob]:
+        jobs = []
+        for job_id, container, seq, data in rows:
+            try:
+                job = DownloadJob.from_dict(json.loads(data))
+            except (json.JSONDecodeError, TypeError) as e:
+                logger.error(f"Kunde inte läsa jobb {job_id} från databasen: {e}")
+                continue
+            self._written[job.id] = (container, seq, hash(data))
+            jobs.append(job)
+        return jobs
+
+    def load_jobs(self) -> Tuple[List[DownloadJob], List[DownloadJob]]:
+        """Spelar upp journalen över ögonblicksbilden och läser kö (äldst först) och historik (nyast först)."""
+        self.compact()
+        queue = self._jobs_from_rows(self.conn.execute(
+            "SELECT id, container, seq, data FROM jobs WHERE container = ? ORDER BY seq ASC", (self.QUEUE,)))
+        history = self._jobs_from_rows(self.conn.execute(
+            "SELECT id, container, seq, data FROM jobs WHERE container = ? ORDER BY seq DESC", (self.HISTORY,)))
+        logger.info(f"Läste {len(queue)} jobb i kön och {len(history)} i historiken från {self.db_path}.")
+        return queue, history
+
+    # Uppslagningarna nedan går mot ögonblicksbilden, så journalen viks in först.
+
+    def get_job(self, job_id: str) -> DownloadJob | None:
+        self.compact()
+        row = self.conn.execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return DownloadJob.from_dict(json.loads(row[0])) if row else None
+
+    def find_by_status(self, status: JobStatus) -> List[DownloadJob]:
+        self.compact()
+        rows = self.conn.execute("SELECT data FROM jobs WHERE status = ? ORDER BY seq", (status.name,))
+        return [DownloadJob.from_dict(json.loads(data)) for (data,) in rows]
+
+    def find_by_url(self, url: str) -> List[DownloadJob]:
+        self.compact()
+        rows = self.conn.execute("SELECT data FROM jobs WHERE url = ? ORDER BY seq", (url,))
+        return [DownloadJob.from_dict(json.loads(data)) for (data,) in rows]
+
+    def close(self) -> None:
+        self.compact()
+        self.conn.close()
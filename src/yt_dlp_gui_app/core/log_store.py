@@ -0,0 +1,97 @@
+import gzip
+import logging
+import os
+from collections import deque
+from typing import Deque, Dict, List
+
+logger = logging.getLogger(__name__)
+
+class JobLogStore:
+    """
+    Lagrar loggen för varje jobb utanför DownloadJob.
+    Ett begränsat svansfönster hålls i minnet för visning under körning, medan
+    hela loggen skrivs som gzip-komprimerade segment till disk och läses först när den behövs.
+    """
+
+    def __init__(self, log_dir: str, tail_chars: int = 16 * 1024, segment_size: int = 64 * 1024):
+        self.log_dir = log_dir
+        self.tail_chars = tail_chars
+        self.segment_size = segment_size
+        self._tails: Dict[str, Deque[str]] = {}
+        self._tail_sizes: Dict[str, int] = {}
+        self._pending: Dict[str, List[str]] = {}
+        self._pending_sizes: Dict[str, int] = {}
+        os.makedirs(self.log_dir, exist_ok=True)
+
+    @staticmethod
+    def log_ref_for(job_id: str) -> str:
+        """Referensen som sparas i DownloadJob.log_ref."""
+        return f"{job_id}.log.gz"
+
+    def _path(self, job_id: str) -> str:
+        return os.path.join(self.log_dir, self.log_ref_for(job_id))
+
+    def append(self, job_id: str, text: str) -> None:
+        """Lägger till text i jobbets logg. Minnesanvändningen per jobb är konstant."""
+        if not text:
+            return
+        tail = self._tails.setdefault(job_id, deque())
+        tail.append(text)
+        size = self._tail_sizes.get(job_id, 0) + len(text)
+        while size > self.tail_chars and len(tail) > 1:
+            size -= len(tail.popleft())
+        self._tail_sizes[job_id] = size
+
+        self._pending.setdefault(job_id, []).append(text)
+        pending_size = self._pending_sizes.get(job_id, 0) + len(text)
+        self._pending_sizes[job_id] = pending_size
+        if pending_size >= self.segment_size:
+            self.flush(job_id)
+
+    def flush(self, job_id: str) -> None:
+        """Skriver väntande text som ett nytt komprimerat segment."""
+        chunks = self._pending.pop(job_id, None)
+        self._pending_sizes.pop(job_id, None)
+        if not chunks:
+            return
+        try:
+            # Flera gzip-segment efter varandra är en giltig gzip-fil.
+            with open(self._path(job_id), 'ab') as f:
+                f.write(gzip.compress("".join(chunks).encode('utf-8'), compresslevel=6))
+        except OSError as e:
+            logger.error(f"Kunde inte skriva loggsegment för jobb {job_id}: {e}")
+
+    def close(self, job_id: str) -> None:
+        """Skriver kvarvarande text och släpper minnet för ett avslutat jobb."""
+        self.flush(job_id)
+        self._tails.pop(job_id, None)
+        self._tail_sizes.pop(job_id, None)
+
+    def tail(self, job_id: str) -> str:
+        """Returnerar den senaste delen av loggen från minnet."""
+        return "".join(self._tails.get(job_id, ()))
+
+    def read(self, job_id: str) -> str:
+        """Läser hela loggen: segmenten på disk följt av text som ännu inte skrivits."""
+        text = ""
+        path = self._path(job_id)
+        if os.path.exists(path):
+            try:
+                with gzip.open(path, 'rt', encoding='utf-8', errors='replace') as f:
+                    text = f.read()
+            except (OSError, EOFError) as e:
+                logger.error(f"Kunde inte läsa loggen för jobb {job_id}: {e}")
+        return text + "".join(self._pending.get(job_id, ()))
+
+    def delete(self, job_id: str) -> None:
+        """Tar bort jobbets logg från minnet och disken."""
+        self._pending.pop(job_id, None)
+        self._pending_sizes.pop(job_id, None)
+        self._tails.pop(job_id, None)
+        self._tail_sizes.pop(job_id, None)
+        try:
+            os.remove(self._path(job_id))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.error(f"Kunde inte ta bort loggen för jobb {job_id}: {e}")
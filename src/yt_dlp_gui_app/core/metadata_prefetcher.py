@@ -0,0 +1,181 @@
+import json
+import logging
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from PyQt6.QtCore import QObject, QProcess, QTimer, pyqtSignal
+from yt_dlp_gui_app.core.info_cache import InfoCache
+from yt_dlp_gui_app.core.models import DownloadJob
+from yt_dlp_gui_app.core.yt_dlp_args import extraction_args, has_extraction_args
+
+logger = logging.getLogger(__name__)
+
+PREFETCH_ARGS = ["--dump-single-json", "--skip-download", "--flat-playlist", "--no-warnings"]
+
+def format_duration(seconds: Optional[float]) -> Optional[str]:
+    """Formaterar sekunder som "HH:MM:SS", samma form som längden från FFmpeg."""
+    if seconds is None:
+        return None
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+def extract_entries(info: dict) -> Optional[List[dict]]:
+    """Returnerar posterna i en platt extraherad spellista, eller None om info inte är en spellista."""
+    if info.get("_type") not in ("playlist", "multi_video"):
+        return None
+    entries = []
+    for entry in info.get("entries") or []:
+        url = entry.get("url") or entry.get("webpage_url") if entry else None
+        if not url:
+            continue
+        entries.append({
+            "url": url,
+            "title": entry.get("title"),
+            "duration": format_duration(entry.get("duration")),
+            "is_playlist": entry.get("_type") == "playlist",
+        })
+    return entries
+
+def extract_metadata(info: dict) -> dict:
+    """Plockar ut de fält som visas för ett köat jobb ur yt-dlp:s info-JSON."""
+    formats = info.get("requested_formats") or [info]
+    sizes = [f.get("filesize") or f.get("filesize_approx") for f in formats]
+    return {
+        "title": info.get("title"),
+        "duration": format_duration(info.get("duration")),
+        "filesize_estimate": sum(sizes) if sizes and all(sizes) else None,
+        "format_id": info.get("format_id"),
+        "entries": extract_entries(info),
+    }
+
+def prefetch_args(job: DownloadJob) -> List[str]:
+    """
+    Argument för att hämta metadata utan att ladda ner. Jobbets argument för inloggning, cookies, proxy
+    och extraktorer följer med, liksom formatvalet i -f; utdata- och efterbehandlingsflaggor gör det inte.
+    """
+    args = PREFETCH_ARGS + extraction_args(job.args_list)
+    if "--no-playlist" in job.args_list:
+        args.append("--no-playlist") # Ger videon i stället för spellistan för t.ex. watch?v=...&list=...
+    if "-f" in job.args_list:
+        index = job.args_list.index("-f")
+        if index + 1 < len(job.args_list):
+            args += ["-f", job.args_list[index + 1]]
+    return args + [job.url]
+
+class MetadataPrefetcher(QObject):
+    """
+    Hämtar titel, längd, beräknad filstorlek och valda format för väntande jobb innan de laddas ner.
+    Kör `yt-dlp --dump-single-json --skip-download` med ett eget tak för samtidiga processer,
+    oberoende av max_parallel_downloads. Jobben hämtas i den ordning de köades.
+    Med en InfoCache sparas info-JSON för enskilda videor, och en giltig post besvarar
+    senare begäranden för samma URL utan att yt-dlp startas. Cachen gäller bara jobb utan
+    argument som påverkar extraktionen (cookies, proxy, inloggning), eftersom den är nycklad på URL:en.
+    """
+    metadata_ready = pyqtSignal(str, dict)  # job_id, metadata
+    prefetch_failed = pyqtSignal(str, str)  # job_id, felmeddelande
+
+    def __init__(self, max_concurrent: int = 2, parent: QObject | None = None, info_cache: Optional[InfoCache] = None):
+        super().__init__(parent)
+        self.max_concurrent = max(1, max_concurrent)
+        self.info_cache = info_cache
+        self.yt_dlp_path: Optional[str] = None
+        self._pending: "OrderedDict[str, DownloadJob]" = OrderedDict()
+        self.active: Dict[str, QProcess] = {}
+        self._active_jobs: Dict[str, DownloadJob] = {}
+
+    def __contains__(self, job_id: str) -> bool:
+        return job_id in self._pending or job_id in self.active
+
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def set_max_concurrent(self, max_concurrent: int) -> None:
+        self.max_concurrent = max(1, max_concurrent)
+        self._start_next()
+
+    def submit(self, job: DownloadJob, yt_dlp_path: str, first: bool = False) -> bool:
+        """
+        Köar en metadatahämtning. Returnerar False om jobbet redan är köat eller hämtas.
+        Med first=True hamnar jobbet först i kön, t.ex. för spellistor som väntar på att expanderas.
+        """
+        if job.id in self.active:
+            return False
+        info = self.info_cache.load(job.url) if self._uses_info_cache(job) else None
+        if info is not None:
+            # Svaret levereras asynkront, precis som när yt-dlp körs.
+            metadata = extract_metadata(info)
+            QTimer.singleShot(0, lambda: self.metadata_ready.emit(job.id, metadata))
+            return True
+        self.yt_dlp_path = yt_dlp_path
+        queued = job.id in self._pending
+        self._pending[job.id] = job
+        if first:
+            self._pending.move_to_end(job.id, last=False)
+        if queued:
+            return False
+        self._start_next()
+        return True
+
+    def _uses_info_cache(self, job: DownloadJob) -> bool:
+        return self.info_cache is not None and not has_extraction_args(job.args_list)
+
+    def cancel(self, job_id: str) -> None:
+        """Avbryter hämtningen, t.ex. när nedladdningen startar eller jobbet tas bort."""
+        self._pending.pop(job_id, None)
+        process = self.active.pop(job_id, None)
+        self._active_jobs.pop(job_id, None)
+        if process:
+            process.finished.disconnect()
+            process.errorOccurred.disconnect()
+            process.kill()
+            process.waitForFinished(1000)
+            process.deleteLater()
+            self._start_next()
+
+    def cancel_all(self) -> None:
+        for job_id in list(self._pending) + list(self.active):
+            self.cancel(job_id)
+
+    def _start_next(self) -> None:
+        while len(self.active) < self.max_concurrent and self._pending:
+            job_id, job = self._pending.popitem(last=False)
+            process = QProcess(self)
+            process.finished.connect(lambda exit_code, exit_status, job_id=job_id: self._on_finished(job_id, exit_code))
+            process.errorOccurred.connect(lambda error, job_id=job_id: self._on_error(job_id, error))
+            self.active[job_id] = process
+            self._active_jobs[job_id] = job
+            logger.debug(f"Hämtar metadata för jobb {job_id}.")
+            process.start(self.yt_dlp_path, prefetch_args(job))
+
+    def _release(self, job_id: str) -> Optional[QProcess]:
+        process = self.active.pop(job_id, None)
+        if process:
+            # Vi befinner oss i en av processens egna signaler.
+            process.deleteLater()
+        return process
+
+    def _on_finished(self, job_id: str, exit_code: int) -> None:
+        job = self._active_jobs.pop(job_id, None)
+        process = self._release(job_id)
+        if process is None:
+            return
+        if exit_code == 0:
+            try:
+                raw = process.readAllStandardOutput().data()
+                metadata = extract_metadata(json.loads(raw))
+                if self._uses_info_cache(job) and metadata["entries"] is None:
+                    # Endast enskilda videor cachas; spellistor expanderas och laddas inte ner som de är.
+                    self.info_cache.put(job.url, raw)
+                self.metadata_ready.emit(job_id, metadata)
+            except (ValueError, AttributeError) as e:
+                self.prefetch_failed.emit(job_id, f"Ogiltig JSON från yt-dlp: {e}")
+        else:
+            error = process.readAllStandardError().data().decode('utf-8', errors='replace').strip()
+            self.prefetch_failed.emit(job_id, error or f"yt-dlp avslutades med kod {exit_code}")
+        self._start_next()
+
+    def _on_error(self, job_id: str, error: QProcess.ProcessError) -> None:
+        # Vid andra fel följer även finished, som hanterar resten.
+        if error == QProcess.ProcessError.FailedToStart and self._release(job_id):
+            self._active_jobs.pop(job_id, None)
+            self.prefetch_failed.emit(job_id, f"Kunde inte starta yt-dlp: {error.name}")
+            self._start_next()
@@ -0,0 +1,177 @@
+import json
+import logging
+import math
+import os
+import time
+from collections import Counter, deque
+from typing import Callable, Deque, Dict, List, Optional
+from yt_dlp_gui_app.core.models import DownloadJob
+from yt_dlp_gui_app.core.output_parser import ProgressRecord
+
+logger = logging.getLogger(__name__)
+
+# Faser som ett jobb får en tidpunkt (epoch) för i DownloadJob.timings, i den ordning de inträffar.
+PHASE_QUEUED = "queued"
+PHASE_STARTED = "started"
+PHASE_FIRST_BYTE = "first_byte"
+PHASE_DOWNLOAD_DONE = "download_done"
+PHASE_POSTPROCESS = "postprocess"
+PHASE_FINISHED = "finished"
+PHASES = (PHASE_QUEUED, PHASE_STARTED, PHASE_FIRST_BYTE, PHASE_DOWNLOAD_DONE, PHASE_POSTPROCESS, PHASE_FINISHED)
+
+# Prefix för alla mätvärden i Prometheus-formatet.
+METRIC_PREFIX = "ytdlpgui"
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    """Percentil med närmaste rang, eller None för en tom lista."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+class TransferTracker:
+    """Summerar överförda byte och högsta hastighet för ett körande jobb ur dess förloppshändelser."""
+
+    def __init__(self) -> None:
+        self._completed_files = 0
+        self._current = 0
+        self.peak_speed: Optional[float] = None
+
+    @property
+    def bytes_transferred(self) -> int:
+        return self._completed_files + self._current
+
+    def update(self, record: ProgressRecord) -> None:
+        if record.downloaded_bytes is not None:
+            # Räknaren börjar om när nästa fil hämtas, t.ex. ljudspåret efter videon.
+            if record.downloaded_bytes < self._current:
+                self._completed_files += self._current
+            self._current = record.downloaded_bytes
+        if record.speed:
+            self.peak_speed = max(self.peak_speed or 0.0, record.speed)
+
+def phase_duration(job: DownloadJob, start: str, end: str) -> Optional[float]:
+    if start in job.timings and end in job.timings:
+        return max(0.0, job.timings[end] - job.timings[start])
+    return None
+
+class MetricsCollector:
+    """
+    Sammanställer mätvärden över avslutade jobb: antal per status, jobb per timme, överförda byte,
+    percentiler för kötid, nedladdningstid och efterbearbetning samt hur stor del av platserna som används.
+    Percentilerna räknas över de senaste window jobben.
+    """
+
+    def __init__(self, window: int = 1000, clock: Callable[[], float] = time.time):
+        self._clock = clock
+        self.started_at = clock()
+        self.finished_by_status: Counter = Counter()
+        self.bytes_total = 0
+        self._finish_times: Deque[float] = deque()
+        self._queue_waits: Deque[float] = deque(maxlen=window)
+        self._download_times: Deque[float] = deque(maxlen=window)
+        self._postprocess_times: Deque[float] = deque(maxlen=window)
+        self._avg_speeds: Deque[float] = deque(maxlen=window)
+        # Platser som används och finns, integrerade över tiden.
+        self._busy_slot_seconds = 0.0
+        self._capacity_seconds = 0.0
+        self._active = 0
+        self._capacity = 0
+        self._slots_since = self.started_at
+
+    def update_slots(self, active: int, capacity: int) -> None:
+        """Anropas när antalet aktiva jobb eller platser ändras."""
+        self._accumulate_slots()
+        self._active, self._capacity = active, capacity
+
+    def _accumulate_slots(self) -> None:
+        now = self._clock()
+        elapsed = now - self._slots_since
+        self._busy_slot_seconds += elapsed * min(self._active, self._capacity)
+        self._capacity_seconds += elapsed * self._capacity
+        self._slots_since = now
+
+    def record_started(self, job: DownloadJob) -> None:
+        wait = phase_duration(job, PHASE_QUEUED, PHASE_STARTED)
+        if wait is not None:
+            self._queue_waits.append(wait)
+
+    def record_finished(self, job: DownloadJob) -> None:
+        self.finished_by_status[job.status.name.removeprefix("STATUS_").lower()] += 1
+        self.bytes_total += job.bytes_transferred or 0
+        self._finish_times.append(job.timings.get(PHASE_FINISHED, self._clock()))
+        download = phase_duration(job, PHASE_FIRST_BYTE, PHASE_DOWNLOAD_DONE)
+        if download is not None:
+            self._download_times.append(download)
+        postprocess = phase_duration(job, PHASE_POSTPROCESS, PHASE_FINISHED)
+        if postprocess is not None:
+            self._postprocess_times.append(postprocess)
+        if job.avg_speed:
+            self._avg_speeds.append(job.avg_speed)
+
+    def jobs_last_hour(self) -> int:
+        cutoff = self._clock() - 3600
+        while self._finish_times and self._finish_times[0] < cutoff:
+            self._finish_times.popleft()
+        return len(self._finish_times)
+
+    def snapshot(self, active: int, waiting: int) -> dict:
+        """Alla mätvärden som en dict, med antalet aktiva och väntande jobb just nu."""
+        self._accumulate_slots()
+        quantiles = lambda values: {"p50": percentile(list(values), 0.5), "p95": percentile(list(values), 0.95)}
+        return {
+            "timestamp": self._clock(),
+            "uptime_seconds": self._clock() - self.started_at,
+            "jobs_active": active,
+            "jobs_waiting": waiting,
+            "slots": self._capacity,
+            "slot_utilization": self._busy_slot_seconds / self._capacity_seconds if self._capacity_seconds else 0.0,
+            "jobs_finished": dict(self.finished_by_status),
+            "jobs_per_hour": self.jobs_last_hour(),
+            "bytes_downloaded": self.bytes_total,
+            "queue_wait_seconds": quantiles(self._queue_waits),
+            "download_seconds": quantiles(self._download_times),
+            "postprocess_seconds": quantiles(self._postprocess_times),
+            "average_speed_bytes": quantiles(self._avg_speeds),
+        }
+
+def to_prometheus(snapshot: dict) -> str:
+    """Formaterar en ögonblicksbild i Prometheus textformat, t.ex. för node_exporters textfile-insamlare."""
+    lines = []
+
+    def metric(name: str, kind: str, help_text: str, samples: Dict[str, float]) -> None:
+        lines.append(f"# HELP {METRIC_PREFIX}_{name} {help_text}")
+        lines.append(f"# TYPE {METRIC_PREFIX}_{name} {kind}")
+        for labels, value in samples.items():
+            if value is not None:
+                lines.append(f"{METRIC_PREFIX}_{name}{labels} {value}")
+
+    metric("jobs_active", "gauge", "Jobb som laddas ner just nu.", {"": snapshot["jobs_active"]})
+    metric("jobs_waiting", "gauge", "Jobb som väntar på en plats.", {"": snapshot["jobs_waiting"]})
+    metric("download_slots", "gauge", "Antal nedladdningsplatser.", {"": snapshot["slots"]})
+    metric("slot_utilization_ratio", "gauge", "Andel av platserna som har använts sedan start.", {"": snapshot["slot_utilization"]})
+    metric("jobs_finished_total", "counter", "Avslutade jobb per status.",
+           {f'{{status="{status}"}}': count for status, count in sorted(snapshot["jobs_finished"].items())})
+    metric("jobs_per_hour", "gauge", "Jobb som avslutats den senaste timmen.", {"": snapshot["jobs_per_hour"]})
+    metric("downloaded_bytes_total", "counter", "Överförda byte för avslutade jobb.", {"": snapshot["bytes_downloaded"]})
+    for name, help_text in (("queue_wait_seconds", "Tid från köad till start."),
+                            ("download_seconds", "Tid från första byte till färdig nedladdning."),
+                            ("postprocess_seconds", "Tid för sammanslagning och efterbearbetning."),
+                            ("average_speed_bytes", "Genomsnittlig hastighet per jobb i byte/s.")):
+        values = snapshot[name]
+        metric(name, "summary", help_text,
+               {'{quantile="0.5"}': values["p50"], '{quantile="0.95"}': values["p95"]})
+    return "\n".join(lines) + "\n"
+
+def write_metrics(directory: str, snapshot: dict) -> None:
+    """Skriver metrics.prom och metrics.json i katalogen; filerna byts ut i ett steg så att läsare aldrig ser halva filer."""
+    try:
+        os.makedirs(directory, exist_ok=True)
+        for filename, content in (("metrics.prom", to_prometheus(snapshot)),
+                                  ("metrics.json", json.dumps(snapshot, indent=2))):
+            path = os.path.join(directory, filename)
+            with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+                f.write(content)
+            os.replace(f"{path}.tmp", path)
+    except OSError as e:
+        logger.error(f"Kunde inte skriva mätvärden till {directory}: {e}")
@@ -2,7 +2,7 @@ import uuid
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum, auto
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 class JobStatus(Enum):
     """Enumeration för status på ett nedladdningsjobb."""
@@ -20,6 +20,25 @@ class JobStatus(Enum):
     STATUS_ALREADY_DOWNLOADED = auto()
     STATUS_MERGING = auto()
     STATUS_POSTPROCESSING = auto()
+    STATUS_EXPANDING = auto() # Spellistan eller kanalen löses upp i enskilda jobb
+    STATUS_GROUP = auto() # Förälder till jobben från en expanderad spellista
+    STATUS_RETRY_SCHEDULED = auto() # Misslyckades med ett tillfälligt fel och försöks igen efter en väntetid
+    STATUS_ERROR_PERMANENT = auto() # Misslyckades med ett fel som inte går över, t.ex. privat video
+
+class JobPriority(Enum):
+    """Prioritetsklass för ett köat jobb; ett lägre värde startas före ett högre."""
+    PRIORITY_URGENT = 0
+    PRIORITY_NORMAL = 1
+    PRIORITY_BULK = 2
+
+PRIORITY_LABELS = {
+    JobPriority.PRIORITY_URGENT: "Brådskande",
+    JobPriority.PRIORITY_NORMAL: "Normal",
+    JobPriority.PRIORITY_BULK: "Bulk",
+}
+
+# Statusar där videon finns nedladdad.
+SUCCESS_STATUSES = (JobStatus.STATUS_COMPLETED, JobStatus.STATUS_ALREADY_DOWNLOADED)
 
 @dataclass
 class DownloadJob:
@@ -38,7 +57,25 @@ class DownloadJob:
     final_filename: Optional[str] = None
     thumbnail_path: Optional[str] = None
     duration: Optional[str] = None # NYTT FÄLT
-    log: str = ""
+    downloaded_bytes: Optional[int] = None
+    total_bytes: Optional[int] = None
+    speed: Optional[float] = None # byte/s
+    eta: Optional[int] = None # sekunder
+    filesize_estimate: Optional[int] = None # byte, från metadatahämtningen
+    format_id: Optional[str] = None # t.ex. "137+140"
+    parent_id: Optional[str] = None # Spellistejobbet som jobbet expanderades ur
+    priority: JobPriority = JobPriority.PRIORITY_NORMAL
+    attempts: int = 0 # Automatiska omförsök efter tillfälliga fel
+    retry_at: Optional[float] = None # Tidpunkt (epoch) för nästa försök när status är STATUS_RETRY_SCHEDULED
+    last_error: Optional[str] = None
+    # Tidpunkter (epoch) per fas, se core.metrics.PHASES, och överföringen enligt förloppet.
+    timings: Dict[str, float] = field(default_factory=dict)
+    bytes_transferred: Optional[int] = None
+    avg_speed: Optional[float] = None # byte/s från första byte till färdig nedladdning
+    peak_speed: Optional[float] = None
+    log_ref: Optional[str] = None
+    # Logg från äldre sparade filer där hela loggen låg i jobbet. Flyttas till JobLogStore vid inläsning.
+    legacy_log: str = field(default="", repr=False, compare=False)
 
     def to_dict(self) -> dict:
         """Serialiserar objektet till en dictionary för JSON-lagring."""
@@ -54,7 +91,22 @@ class DownloadJob:
             "final_filename": self.final_filename,
             "thumbnail_path": self.thumbnail_path,
             "duration": self.duration, # NYTT FÄLT
-            "log": self.log,
+            "downloaded_bytes": self.downloaded_bytes,
+            "total_bytes": self.total_bytes,
+            "speed": self.speed,
+            "eta": self.eta,
+            "filesize_estimate": self.filesize_estimate,
+            "format_id": self.format_id,
+            "parent_id": self.parent_id,
+            "priority": self.priority.name,
+            "attempts": self.attempts,
+            "retry_at": self.retry_at,
+            "last_error": self.last_error,
+            "timings": self.timings,
+            "bytes_transferred": self.bytes_transferred,
+            "avg_speed": self.avg_speed,
+            "peak_speed": self.peak_speed,
+            "log_ref": self.log_ref,
         }
 
     @classmethod
@@ -65,6 +117,10 @@ class DownloadJob:
             status = JobStatus[status_name]
         except KeyError:
             status = JobStatus.STATUS_WAITING
+        try:
+            priority = JobPriority[data.get("priority", "PRIORITY_NORMAL")]
+        except KeyError:
+            priority = JobPriority.PRIORITY_NORMAL
         
         return cls(
             id=data.get("id", str(uuid.uuid4())),
@@ -78,5 +134,21 @@ class DownloadJob:
             final_filename=data.get("final_filename"),
             thumbnail_path=data.get("thumbnail_path"),
             duration=data.get("duration"), # NYTT FÄLT
-            log=data.get("log", ""),
+            downloaded_bytes=data.get("downloaded_bytes"),
+            total_bytes=data.get("total_bytes"),
+            speed=data.get("speed"),
+            eta=data.get("eta"),
+            filesize_estimate=data.get("filesize_estimate"),
+            format_id=data.get("format_id"),
+            parent_id=data.get("parent_id"),
+            priority=priority,
+            attempts=data.get("attempts", 0),
+            retry_at=data.get("retry_at"),
+            last_error=data.get("last_error"),
+            timings=data.get("timings") or {},
+            bytes_transferred=data.get("bytes_transferred"),
+            avg_speed=data.get("avg_speed"),
+            peak_speed=data.get("peak_speed"),
+            log_ref=data.get("log_ref"),
+            legacy_log=data.get("log", ""),
         )
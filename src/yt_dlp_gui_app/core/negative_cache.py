@@ -0,0 +1,67 @@
+import json
+import logging
+import os
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class NegativeCache:
+    """
+    Videor som har misslyckats med ett permanent fel (privat, borttagen, URL som inte stöds),
+    så att de inte laddas ner igen förrän posterna blir för gamla eller användaren själv försöker igen.
+    Sparas som en JSON-fil med skäl och tidpunkt per nyckel.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = 7 * 24 * 3600):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[str, dict] = {}
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Optional[str]) -> bool:
+        return self.reason_for(key) is not None
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._entries = json.load(f)
+        except FileNotFoundError:
+            self._entries = {}
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"Kunde inte läsa cachen över permanenta fel {self.path}: {e}")
+            self._entries = {}
+
+    def _save(self) -> None:
+        tmp_path = f"{self.path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error(f"Kunde inte spara cachen över permanenta fel {self.path}: {e}")
+
+    def reason_for(self, key: Optional[str]) -> Optional[str]:
+        """Skälet till att videon misslyckades, eller None om den inte finns i cachen eller posten är för gammal."""
+        entry = self._entries.get(key) if key else None
+        if entry is None:
+            return None
+        if self.ttl_seconds > 0 and time.time() - entry["time"] > self.ttl_seconds:
+            self.discard(key)
+            return None
+        return entry["reason"]
+
+    def add(self, key: Optional[str], reason: str) -> None:
+        if not key:
+            return
+        self._entries[key] = {"reason": reason, "time": time.time()}
+        self._save()
+
+    def discard(self, key: Optional[str]) -> None:
+        if key in self._entries:
+            del self._entries[key]
+            self._save()
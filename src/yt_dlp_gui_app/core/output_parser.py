@@ -0,0 +1,207 @@
+import codecs
+import re
+from dataclasses import dataclass
+from enum import Enum, auto
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Markörer för maskinläsbara förloppsrader som yt-dlp skriver via --progress-template.
+PROGRESS_MARKER = "ytdlpgui-progress"
+POSTPROCESS_MARKER = "ytdlpgui-postprocess"
+
+# Argument som läggs till varje yt-dlp-anrop så att förloppet kommer som en rad per uppdatering.
+PROGRESS_ARGS = [
+    "--newline",
+    "--progress-template",
+    f"download:[{PROGRESS_MARKER}] %(progress.status)s|%(progress.downloaded_bytes)s|%(progress.total_bytes)s"
+    f"|%(progress.total_bytes_estimate)s|%(progress.speed)s|%(progress.eta)s",
+    "--progress-template",
+    f"postprocess:[{POSTPROCESS_MARKER}] %(progress.status)s|%(progress.postprocessor)s",
+]
+
+class EventKind(Enum):
+    """Typ av händelse som tolkats ur yt-dlp:s utdata."""
+    PROGRESS = auto()
+    DESTINATION = auto()
+    MERGING = auto()
+    EXTRACT_AUDIO = auto()
+    POSTPROCESSING = auto()
+    THUMBNAIL = auto()
+    DURATION = auto()
+    ALREADY_DOWNLOADED = auto()
+    ERROR = auto()
+
+@dataclass
+class ProgressRecord:
+    """Ett strukturerat förloppsvärde från --progress-template."""
+    status: str
+    downloaded_bytes: Optional[int] = None
+    total_bytes: Optional[int] = None
+    speed: Optional[float] = None
+    eta: Optional[int] = None
+    percent: Optional[float] = None
+
+@dataclass
+class OutputEvent:
+    """En händelse som tolkats ur en rad utdata."""
+    kind: EventKind
+    value: Optional[str] = None
+    progress: Optional[ProgressRecord] = None
+
+# Prefix för förloppsraderna, som är nästan all utdata under en nedladdning.
+_PROGRESS_PREFIX = f"[{PROGRESS_MARKER}]"
+
+_LEGACY_PERCENT_RE = re.compile(r'\s+([\d.]+)%')
+_MERGER_RE = re.compile(r'Merging formats into "(.*)"')
+_THUMBNAIL_RE = re.compile(r'Writing (?:video )?thumbnail(?: \S+)? to: (.*)')
+_DURATION_RE = re.compile(r'Duration:\s*([\d:.]+)')
+
+def _to_int(value: str) -> Optional[int]:
+    try:
+        return int(float(value))
+    except ValueError:
+        return None
+
+def _to_float(value: str) -> Optional[float]:
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+def _parse_progress(body: str) -> Optional[OutputEvent]:
+    parts = body.split("|")
+    if len(parts) != 6:
+        return None
+    status, downloaded, total, estimate, speed, eta = parts
+    record = ProgressRecord(
+        status=status,
+        downloaded_bytes=_to_int(downloaded),
+        total_bytes=_to_int(total) or _to_int(estimate),
+        speed=_to_float(speed),
+        eta=_to_int(eta),
+    )
+    if record.downloaded_bytes is not None and record.total_bytes:
+        record.percent = min(100.0, record.downloaded_bytes * 100.0 / record.total_bytes)
+    elif status == "finished":
+        record.percent = 100.0
+    return OutputEvent(EventKind.PROGRESS, progress=record)
+
+def _parse_postprocess(body: str) -> Optional[OutputEvent]:
+    status, _, postprocessor = body.partition("|")
+    if status != "started":
+        return None
+    if postprocessor == "Merger":
+        return OutputEvent(EventKind.MERGING)
+    return OutputEvent(EventKind.POSTPROCESSING, value=postprocessor)
+
+def _parse_download(body: str) -> Optional[OutputEvent]:
+    if body.startswith("Destination: "):
+        return OutputEvent(EventKind.DESTINATION, value=body[len("Destination: "):].strip())
+    if body.endswith("has already been downloaded"):
+        return OutputEvent(EventKind.ALREADY_DOWNLOADED, value=body[:-len("has already been downloaded")].strip())
+    # Äldre yt-dlp utan stöd för --progress-template skriver förloppet som text.
+    match = _LEGACY_PERCENT_RE.match(" " + body)
+    if match:
+        return OutputEvent(EventKind.PROGRESS, progress=ProgressRecord(status="downloading", percent=float(match.group(1))))
+    return None
+
+def _parse_merger(body: str) -> Optional[OutputEvent]:
+    match = _MERGER_RE.match(body)
+    return OutputEvent(EventKind.MERGING, value=match.group(1).strip()) if match else None
+
+def _parse_extract_audio(body: str) -> Optional[OutputEvent]:
+    if body.startswith("Destination: "):
+        return OutputEvent(EventKind.EXTRACT_AUDIO, value=body[len("Destination: "):].strip())
+    return None
+
+# Rader på formen "[tagg] text" skickas direkt till tolken för taggen i stället för att prövas mot alla mönster.
+_TAG_PARSERS: Dict[str, Callable[[str], Optional[OutputEvent]]] = {
+    PROGRESS_MARKER: _parse_progress,
+    POSTPROCESS_MARKER: _parse_postprocess,
+    "download": _parse_download,
+    "Merger": _parse_merger,
+    "ExtractAudio": _parse_extract_audio,
+}
+
+def parse_line(line: str) -> Optional[OutputEvent]:
+    """Tolkar en hel rad utdata till en händelse, eller None om raden saknar intresse."""
+    if line.startswith("["):
+        end = line.find("]")
+        if end > 0:
+            parser = _TAG_PARSERS.get(line[1:end])
+            body = line[end + 1:].strip()
+            if parser:
+                event = parser(body)
+                if event:
+                    return event
+            if "thumbnail" in body:
+                match = _THUMBNAIL_RE.search(body)
+                if match:
+                    return OutputEvent(EventKind.THUMBNAIL, value=match.group(1).strip())
+        return None
+    if line.startswith("ERROR:"):
+        return OutputEvent(EventKind.ERROR, value=line[len("ERROR:"):].strip())
+    if "Duration:" in line:
+        match = _DURATION_RE.search(line)
+        if match:
+            return OutputEvent(EventKind.DURATION, value=match.group(1).strip().split('.')[0]) # Ta bort millisekunder
+    return None
+
+class OutputParser:
+    """
+    Inkrementell tolk för en utdataström från yt-dlp.
+    Avkodar bytes med en inkrementell UTF-8-avkodare, så att tecken som delas mellan två läsningar
+    inte förstörs, och tolkar endast hela rader.
+    """
+
+    def __init__(self) -> None:
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self._partial = ""
+
+    def feed(self, data: bytes) -> Tuple[str, List[OutputEvent]]:
+        """Matar in nya bytes. Returnerar loggtext för alla hela rader och de händelser som hittades."""
+        text = self._partial + self._decoder.decode(data)
+        cut = max(text.rfind("\n"), text.rfind("\r")) + 1
+        self._partial = text[cut:]
+        return self._parse(text[:cut])
+
+    def finish(self) -> Tuple[str, List[OutputEvent]]:
+        """Tolkar det som finns kvar när strömmen har stängts."""
+        text = self._partial + self._decoder.decode(b"", final=True)
+        self._partial = ""
+        if text and not text.endswith(("\n", "\r")):
+            text += "\n"
+        return self._parse(text)
+
+    @staticmethod
+    def _parse(text: str) -> Tuple[str, List[OutputEvent]]:
+        if not text:
+            return "", []
+        events: List[OutputEvent] = []
+        log_lines = []
+        # Bara det senaste förloppet i en följd av förloppsrader behöver visas, så förloppsraderna
+        # tolkas inte förrän följden tar slut.
+        pending = None
+
+        def add(event: OutputEvent) -> None:
+            if event.kind == EventKind.PROGRESS and events and events[-1].kind == EventKind.PROGRESS:
+                events[-1] = event
+            else:
+                events.append(event)
+
+        for line in text.splitlines():
+            # Snabbväg: en giltig förloppsrad har exakt sex fält och är bara brus i loggen.
+            if line.startswith(_PROGRESS_PREFIX) and line.count("|") == 5:
+                pending = line
+                continue
+            event = parse_line(line)
+            if event:
+                if pending is not None and event.kind != EventKind.PROGRESS:
+                    add(_parse_progress(pending[len(_PROGRESS_PREFIX):].strip()))
+                pending = None
+                add(event)
+            if line:
+                log_lines.append(line)
+        if pending is not None:
+            add(_parse_progress(pending[len(_PROGRESS_PREFIX):].strip()))
+        log_text = "\n".join(log_lines) + "\n" if log_lines else ""
+        return log_text, events
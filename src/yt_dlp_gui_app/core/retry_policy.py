@@ -0,0 +1,90 @@
+import random
+import re
+import time
+from dataclasses import dataclass
+from enum import Enum, auto
+from typing import Callable, Dict, Iterable, Optional, Set
+
+class ErrorClass(Enum):
+    """Hur ett misslyckat jobb ska hanteras."""
+    TRANSIENT = auto() # Kan lyckas vid ett nytt försök, t.ex. HTTP 429/5xx eller tidsgräns
+    PERMANENT = auto() # Lyckas inte utan att något ändras, t.ex. privat eller borttagen video
+    UNKNOWN = auto()
+
+@dataclass
+class ErrorVerdict:
+    error_class: ErrorClass
+    reason: str
+
+# Mönstren prövas mot yt-dlp:s felrader; permanenta fel går före, eftersom t.ex. en borttagen
+# video kan ge både "HTTP Error 410" och ett följdfel om nätverket.
+_PERMANENT_PATTERNS = [
+    (re.compile(r"private video|video is private", re.I), "privat video"),
+    (re.compile(r"video unavailable|has been removed|no longer available|account .* terminated", re.I), "videon är borttagen"),
+    (re.compile(r"unsupported url|is not a valid url", re.I), "URL:en stöds inte"),
+    (re.compile(r"members[- ]only|join this channel|sign in to confirm your age|requires payment", re.I), "kräver inloggning eller medlemskap"),
+    (re.compile(r"not available in your country|geo.?restrict", re.I), "inte tillgänglig i landet"),
+    (re.compile(r"copyright", re.I), "borttagen av upphovsrättsskäl"),
+    (re.compile(r"HTTP Error (404|410)\b"), "HTTP {0}"),
+]
+_TRANSIENT_PATTERNS = [
+    (re.compile(r"HTTP Error (429)\b|too many requests", re.I), "HTTP 429"),
+    (re.compile(r"HTTP Error (5\d\d)\b"), "HTTP {0}"),
+    (re.compile(r"timed? ?out", re.I), "tidsgränsen överskreds"),
+    (re.compile(r"fragment", re.I), "fragment kunde inte hämtas"),
+    (re.compile(r"connection (reset|refused|aborted)|remote end closed|incompleteread|broken pipe", re.I), "anslutningen bröts"),
+    (re.compile(r"temporary failure in name resolution|name or service not known|getaddrinfo failed", re.I), "namnuppslagningen misslyckades"),
+]
+
+def classify_error(errors: Iterable[str]) -> ErrorVerdict:
+    """Klassar ett misslyckat jobb utifrån dess felrader (texten efter "ERROR:")."""
+    messages = [message for message in errors if message]
+    for patterns, error_class in ((_PERMANENT_PATTERNS, ErrorClass.PERMANENT), (_TRANSIENT_PATTERNS, ErrorClass.TRANSIENT)):
+        for message in reversed(messages):
+            for pattern, reason in patterns:
+                match = pattern.search(message)
+                if match:
+                    return ErrorVerdict(error_class, reason.format(*match.groups()))
+    return ErrorVerdict(ErrorClass.UNKNOWN, messages[-1] if messages else "okänt fel")
+
+@dataclass
+class RetryPolicy:
+    """Hur många gånger och hur tätt tillfälliga fel försöks igen."""
+    max_retries: int = 3
+    base_delay: float = 5.0 # sekunder
+    max_delay: float = 300.0
+
+    def delay(self, failures: int, rand: Callable[[], float] = random.random) -> float:
+        """
+        Väntetid efter failures fel i rad: exponentiellt växande upp till max_delay, med
+        slumpmässig spridning över den övre halvan så att många jobb inte försöker samtidigt.
+        """
+        ceiling = min(self.max_delay, self.base_delay * 2 ** max(0, failures - 1))
+        return ceiling / 2 + rand() * ceiling / 2
+
+class HostBackoff:
+    """Väntetider per webbplats efter tillfälliga fel; inga jobb startas mot webbplatsen under tiden."""
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self._clock = clock
+        self._failures: Dict[str, int] = {}
+        self._until: Dict[str, float] = {}
+
+    def failure(self, host: str, policy: RetryPolicy) -> float:
+        """Registrerar ett tillfälligt fel och returnerar tidpunkten då webbplatsen får användas igen."""
+        self._failures[host] = self._failures.get(host, 0) + 1
+        until = max(self._until.get(host, 0.0), self._clock() + policy.delay(self._failures[host]))
+        self._until[host] = until
+        return until
+
+    def success(self, host: str) -> None:
+        self._failures.pop(host, None)
+        self._until.pop(host, None)
+
+    def blocked_hosts(self) -> Set[str]:
+        now = self._clock()
+        return {host for host, until in self._until.items() if until > now}
+
+    def next_expiry(self) -> Optional[float]:
+        now = self._clock()
+        return min((until for until in self._until.values() if until > now), default=None)
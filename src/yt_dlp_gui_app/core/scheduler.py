@@ -0,0 +1,135 @@
+import itertools
+from collections import deque
+from typing import Callable, Container, Deque, Dict, Iterable, Optional, Set, Tuple
+from yt_dlp_gui_app.core.models import DownloadJob, JobPriority, JobStatus
+
+def parse_host_limits(text: str) -> Dict[str, int]:
+    """Tolkar gränser per webbplats på formen "youtube.com=2, vimeo.com=1"."""
+    limits = {}
+    for part in text.replace(";", ",").split(","):
+        host, sep, value = part.partition("=")
+        host = host.strip().lower().removeprefix("www.")
+        if sep and host and value.strip().isdigit():
+            limits[host] = int(value.strip())
+    return limits
+
+def format_host_limits(limits: Dict[str, int]) -> str:
+    return ", ".join(f"{host}={limit}" for host, limit in sorted(limits.items()))
+
+def bandwidth_share(budget: int, jobs: int) -> Optional[int]:
+    """Lika stor del av bandbreddsbudgeten (byte/s) per jobb, eller None om budgeten är obegränsad."""
+    if budget <= 0:
+        return None
+    return max(1024, budget // max(1, jobs))
+
+# Vikter för andelsschemaläggningen: en grupp får starta jobb i proportion till sin vikt.
+PRIORITY_WEIGHTS = {
+    JobPriority.PRIORITY_URGENT: 16,
+    JobPriority.PRIORITY_NORMAL: 4,
+    JobPriority.PRIORITY_BULK: 1,
+}
+
+class _Share:
+    """En grupp väntande jobb med samma prioritet och andelsnyckel, uppdelade per webbplats."""
+    __slots__ = ("pass_value", "stride", "flows")
+
+    def __init__(self, pass_value: float, stride: float) -> None:
+        self.pass_value = pass_value
+        self.stride = stride
+        self.flows: Dict[str, Deque[Tuple[int, DownloadJob]]] = {}
+
+class ReadyQueue:
+    """
+    Kö av väntande jobb, fördelade med stride-schemaläggning mellan grupper.
+
+    Jobben delas in i grupper efter prioritet och en andelsnyckel (share_of, t.ex. webbplats eller
+    utdatamapp). Varje grupp har ett passvärde som ökar med 1/vikt för varje jobb den startar, och
+    nästa jobb tas från gruppen med lägst passvärde. En grupp som får väntande jobb igen börjar på
+    den aktuella virtuella tiden, så ett brådskande jobb som läggs till efter tusentals bulkjobb
+    startas vid nästa lediga plats, medan bulkjobben ändå får sin andel. Inom en grupp startas
+    jobben i den ordning de köades.
+
+    Varje grupp är dessutom uppdelad per webbplats (host_of), så att pop_next kan hoppa över
+    webbplatser som har nått sin gräns utan att ordningen går förlorad.
+    Borttagning sker lat: ett jobb som inte längre väntar hoppas över när det plockas fram.
+    """
+
+    def __init__(self, share_of: Callable[[DownloadJob], str] = lambda job: "",
+                 host_of: Callable[[DownloadJob], str] = lambda job: "") -> None:
+        self._share_of = share_of
+        self._host_of = host_of
+        self._shares: Dict[Tuple[int, str], _Share] = {}
+        self._ids: Set[str] = set()
+        self._counter = itertools.count()
+        self._virtual_time = 0.0
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, job_id: str) -> bool:
+        return job_id in self._ids
+
+    def push(self, job: DownloadJob) -> None:
+        if job.id in self._ids:
+            return
+        self._ids.add(job.id)
+        key = (job.priority.value, self._share_of(job))
+        share = self._shares.get(key)
+        if share is None:
+            share = self._shares[key] = _Share(self._virtual_time, 1.0 / PRIORITY_WEIGHTS[job.priority])
+        share.flows.setdefault(self._host_of(job), deque()).append((next(self._counter), job))
+
+    def discard(self, job_id: str) -> None:
+        self._ids.discard(job_id)
+
+    def _head(self, share: _Share, host: str) -> Optional[Tuple[int, DownloadJob]]:
+        """Första giltiga jobbet i flödet; inaktuella poster före det tas bort."""
+        ready = share.flows[host]
+        while ready:
+            job = ready[0][1]
+            if job.id in self._ids and job.status == JobStatus.STATUS_WAITING:
+                return ready[0]
+            ready.popleft()
+            self._ids.discard(job.id)
+        del share.flows[host]
+        return None
+
+    def pop_next(self, blocked: Container[str] = ()) -> DownloadJob | None:
+        """
+        Returnerar nästa jobb enligt schemaläggningen bland webbplatser som inte finns i blocked,
+        eller None om inget sådant jobb väntar. Kostar O(antal grupper och webbplatser).
+        """
+        best = None
+        for key, share in list(self._shares.items()):
+            for host in list(share.flows):
+                if host in blocked:
+                    continue
+                head = self._head(share, host)
+                if head:
+                    # Lika passvärden avgörs av prioriteten och sedan av köordningen.
+                    candidate = (share.pass_value, key[0], head[0], key, host)
+                    if best is None or candidate < best:
+                        best = candidate
+            if not share.flows:
+                del self._shares[key]
+        if best is None:
+            return None
+        pass_value, _, _, key, host = best
+        share = self._shares[key]
+        _, job = share.flows[host].popleft()
+        if not share.flows[host]:
+            del share.flows[host]
+        if not share.flows:
+            del self._shares[key]
+        self._ids.discard(job.id)
+        self._virtual_time = max(self._virtual_time, pass_value)
+        share.pass_value = pass_value + share.stride
+        return job
+
+    def rebuild(self, jobs: Iterable[DownloadJob]) -> None:
+        """Bygger om kön i den givna ordningen, t.ex. efter inläsning, import eller omsortering."""
+        self._shares.clear()
+        self._ids.clear()
+        for job in jobs:
+            if job.status == JobStatus.STATUS_WAITING:
+                self.push(job)
@@ -0,0 +1,97 @@
+import hashlib
+import logging
+import os
+from collections import OrderedDict
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+def file_identity(path: str) -> Optional[str]:
+    """Returnerar en nyckel för filens identitet (sökväg, storlek och ändringstid), eller None om filen saknas."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return hashlib.sha1(f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}".encode("utf-8")).hexdigest()
+
+class ThumbnailCache:
+    """
+    Diskcache för genererade miniatyrer, nyckad på videofilens identitet (sökväg, storlek och ändringstid),
+    så att samma fil aldrig körs genom FFmpeg två gånger. De minst nyligen använda miniatyrerna tas bort
+    när cachen överskrider max_bytes; jobben pekar på sidofilen bredvid videon och påverkas inte.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 32 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        # sökväg -> storlek; ordningen är LRU-ordningen, äldst först.
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self._scan()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def _scan(self) -> None:
+        """Läser in befintliga miniatyrer; senaste användning sparas som filens åtkomsttid."""
+        found = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".jpg"):
+                stat = entry.stat()
+                found.append((stat.st_atime, entry.path, stat.st_size))
+        for _, path, size in sorted(found):
+            self._entries[path] = size
+            self._total_bytes += size
+        self._evict()
+
+    def path_for(self, video_path: str) -> Optional[str]:
+        """Returnerar cachesökvägen för videofilen, eller None om filen saknas."""
+        identity = file_identity(video_path)
+        return os.path.join(self.cache_dir, f"{identity}.jpg") if identity else None
+
+    def get(self, video_path: str) -> Optional[str]:
+        """Returnerar en tidigare genererad miniatyr för videofilen, eller None."""
+        path = self.path_for(video_path)
+        if path is None or path not in self._entries:
+            return None
+        if not os.path.exists(path):
+            self._remove(path)
+            return None
+        self._entries.move_to_end(path)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+
+    def put(self, path: str) -> None:
+        """Registrerar en nyss genererad miniatyr i cachen."""
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return
+        if path in self._entries:
+            self._total_bytes -= self._entries.pop(path)
+        self._entries[path] = size
+        self._total_bytes += size
+        self._evict()
+
+    def _remove(self, path: str) -> None:
+        size = self._entries.pop(path, None)
+        if size is not None:
+            self._total_bytes -= size
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Kunde inte ta bort {path} ur miniatyrcachen: {e}")
+
+    def _evict(self) -> None:
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            self._remove(next(iter(self._entries)))
@@ -1,23 +1,73 @@
 import logging
 import os
+import shutil
+from typing import List, Optional
 from PyQt6.QtCore import QObject, QProcess, pyqtSignal
 from yt_dlp_gui_app.core.models import DownloadJob
+from yt_dlp_gui_app.core.thumbnail_cache import ThumbnailCache, file_identity
 
 logger = logging.getLogger(__name__)
 
+# Tidpunkt som används när videons längd är okänd.
+FALLBACK_TIMESTAMP = 5.0
+
+def parse_duration(duration: Optional[str]) -> Optional[float]:
+    """Tolkar en längd på formen "SS", "MM:SS" eller "HH:MM:SS" till sekunder."""
+    if not duration:
+        return None
+    seconds = 0.0
+    try:
+        for part in duration.strip().split(":"):
+            seconds = seconds * 60 + float(part)
+    except ValueError:
+        return None
+    return seconds if seconds > 0 else None
+
+def pick_timestamp(duration: Optional[float]) -> float:
+    """
+    Väljer tidpunkten för miniatyren utifrån videons längd: 10 % in, men aldrig efter mitten.
+    Korta klipp får då en bildruta i stället för en svart eller saknad bild.
+    """
+    if duration is None:
+        return FALLBACK_TIMESTAMP
+    return round(min(max(duration * 0.1, 1.0), duration / 2), 3)
+
+def build_ffmpeg_args(video_path: str, output_path: str, timestamp: float, keyframes_only: bool = True) -> List[str]:
+    """Bygger FFmpeg-argumenten för en miniatyr."""
+    # -ss före -i söker till närmaste nyckelbildruta i stället för att avkoda fram till tidpunkten.
+    args = ['-ss', f"{timestamp:g}", '-i', video_path]
+    if keyframes_only:
+        # Avkoda endast nyckelbildrutor; den första efter sökningen blir miniatyren.
+        args = ['-skip_frame', 'nokey'] + args
+    return args + [
+        '-frames:v', '1',       # Extrahera en bildruta
+        '-q:v', '3',            # Bildkvalitet (1-5, lägre är bättre)
+        '-vf', 'scale=128:-1',  # Skala bredden till 128px, behåll proportioner
+        '-y',                   # Skriv över befintlig fil
+        output_path,
+    ]
+
 class ThumbnailGenerator(QObject):
     """
     Använder FFmpeg för att generera en miniatyrbild från en videofil.
+    Söker först till närmaste nyckelbildruta och avkodar bara nyckelbildrutor; misslyckas det
+    görs ett nytt försök med full avkodning. Med en cache återanvänds tidigare genererade
+    miniatyrer för samma fil utan att FFmpeg startas. Miniatyren kopieras till "<video>.jpg" bredvid
+    videon och jobbet pekar dit, så att den finns kvar när cachen rensas.
     """
     thumbnail_generated = pyqtSignal(str, str)  # job_id, thumbnail_path
     generation_failed = pyqtSignal(str)      # job_id
 
-    def __init__(self, job: DownloadJob, ffmpeg_path: str, parent: QObject | None = None):
+    def __init__(self, job: DownloadJob, ffmpeg_path: str, parent: QObject | None = None, cache: Optional[ThumbnailCache] = None):
         super().__init__(parent)
         self.job = job
         self.ffmpeg_path = ffmpeg_path
-        self.process = QProcess()
+        self.cache = cache
+        self.keyframes_only = True
+        self.cache_path: Optional[str] = None
+        self.process = QProcess(self)
         self.process.finished.connect(self._on_finished)
+        self.process.errorOccurred.connect(self._on_error)
 
     def generate(self) -> None:
         """Startar FFmpeg-processen för att skapa en miniatyrbild."""
@@ -26,36 +76,73 @@ class ThumbnailGenerator(QObject):
             self.generation_failed.emit(self.job.id)
             return
 
-        video_path = os.path.join(self.job.output_path, self.job.final_filename)
-        if not os.path.exists(video_path):
-            logger.warning(f"Videofil hittades inte för att generera miniatyrbild: {video_path}")
+        self.video_path = os.path.join(self.job.output_path, self.job.final_filename)
+        if not os.path.exists(self.video_path):
+            logger.warning(f"Videofil hittades inte för att generera miniatyrbild: {self.video_path}")
             self.generation_failed.emit(self.job.id)
             return
-            
-        base_filename, _ = os.path.splitext(video_path)
-        self.thumbnail_path = f"{base_filename}.jpg"
-
-        # **FIX:** Ändrat från '-ss 10%' till '-ss 5' för bättre kompatibilitet.
-        # Tar en bildruta 5 sekunder in i videon.
-        args = [
-            '-ss', '5',         # Sök till 5 sekunder in i videon
-            '-i', video_path,   # Indatafil
-            '-vframes', '1',    # Extrahera en bildruta
-            '-q:v', '3',        # Bildkvalitet (1-5, lägre är bättre)
-            '-vf', 'scale=128:-1', # Skala bredden till 128px, behåll proportioner
-            '-y',               # Skriv över befintlig fil
-            self.thumbnail_path
-        ]
 
+        base_filename, _ = os.path.splitext(self.video_path)
+        self.sidecar_path = f"{base_filename}.jpg"
+        self.thumbnail_path = self.sidecar_path
+
+        if self.cache is not None:
+            cached = self.cache.get(self.video_path)
+            if cached:
+                logger.info(f"Miniatyrbild för jobb {self.job.id} hämtades från cachen: {cached}")
+                self.thumbnail_generated.emit(self.job.id, self._copy_to_sidecar(cached))
+                return
+            self.cache_path = self.cache.path_for(self.video_path)
+            if self.cache_path:
+                self.thumbnail_path = self.cache_path
+
+        self.timestamp = pick_timestamp(parse_duration(self.job.duration))
+        self._start_ffmpeg()
+
+    def _copy_to_sidecar(self, cache_path: str) -> str:
+        """Kopierar miniatyren från cachen till sidofilen; går det inte används cachefilen."""
+        try:
+            shutil.copyfile(cache_path, self.sidecar_path)
+        except OSError as e:
+            logger.warning(f"Kunde inte skriva miniatyrbilden {self.sidecar_path}: {e}")
+            return cache_path
+        return self.sidecar_path
+
+    def _start_ffmpeg(self) -> None:
+        args = build_ffmpeg_args(self.video_path, self.thumbnail_path, self.timestamp, self.keyframes_only)
         logger.info(f"Genererar miniatyrbild för jobb {self.job.id} med kommandot: {self.ffmpeg_path} {' '.join(args)}")
         self.process.start(self.ffmpeg_path, args)
 
+    def cancel(self) -> None:
+        """Avbryter en pågående FFmpeg-process utan att några signaler skickas."""
+        self.process.finished.disconnect(self._on_finished)
+        self.process.errorOccurred.disconnect(self._on_error)
+        if self.process.state() != QProcess.ProcessState.NotRunning:
+            self.process.kill()
+            self.process.waitForFinished(1000)
+
+    def _on_error(self, error: QProcess.ProcessError) -> None:
+        """FFmpeg som saknas eller inte är körbar ger bara FailedToStart och aldrig finished."""
+        if error == QProcess.ProcessError.FailedToStart:
+            logger.error(f"Kunde inte starta FFmpeg ({self.ffmpeg_path}) för jobb {self.job.id}: {self.process.errorString()}")
+            self.generation_failed.emit(self.job.id)
+
     def _on_finished(self, exit_code: int, exit_status: QProcess.ExitStatus) -> None:
         """Körs när FFmpeg-processen är klar."""
         if exit_code == 0 and os.path.exists(self.thumbnail_path):
-            logger.info(f"Miniatyrbild genererad för jobb {self.job.id}: {self.thumbnail_path}")
-            self.thumbnail_generated.emit(self.job.id, self.thumbnail_path)
-        else:
-            error_output = self.process.readAllStandardError().data().decode('utf-8', errors='ignore')
-            logger.error(f"Misslyckades med att generera miniatyrbild för jobb {self.job.id}. Fel: {error_output}")
-            self.generation_failed.emit(self.job.id)
+            path = self.thumbnail_path
+            if self.thumbnail_path == self.cache_path:
+                path = self._copy_to_sidecar(self.cache_path)
+                self.cache.put(self.cache_path)
+            logger.info(f"Miniatyrbild genererad för jobb {self.job.id}: {path}")
+            self.thumbnail_generated.emit(self.job.id, path)
+            return
+        error_output = self.process.readAllStandardError().data().decode('utf-8', errors='ignore')
+        if self.keyframes_only:
+            # Vissa format saknar användbara nyckelbildrutor efter tidpunkten; avkoda allt i stället.
+            logger.warning(f"Snabb miniatyrgenerering misslyckades för jobb {self.job.id}, försöker med full avkodning.")
+            self.keyframes_only = False
+            self._start_ffmpeg()
+            return
+        logger.error(f"Misslyckades med att generera miniatyrbild för jobb {self.job.id}. Fel: {error_output}")
+        self.generation_failed.emit(self.job.id)
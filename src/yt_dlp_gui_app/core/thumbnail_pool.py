@@ -0,0 +1,155 @@
+import heapq
+import itertools
+import logging
+from typing import Callable, Dict, Iterable, List, Tuple
+from PyQt6.QtCore import QObject, pyqtSignal
+from yt_dlp_gui_app.core.models import DownloadJob
+from yt_dlp_gui_app.core.thumbnail_generator import ThumbnailGenerator
+
+logger = logging.getLogger(__name__)
+
+# Lägre värde körs först.
+PRIORITY_VISIBLE = 0
+PRIORITY_NORMAL = 1
+
+class ThumbnailPool(QObject):
+    """
+    Kör miniatyrgenereringar med ett tak för hur många FFmpeg-processer som får köras samtidigt.
+    Jobb för synliga rader går före övriga, upprepade begäranden för samma jobb slås ihop
+    och väntande eller pågående generering kan avbrytas.
+    """
+    thumbnail_generated = pyqtSignal(str, str)  # job_id, thumbnail_path
+    generation_failed = pyqtSignal(str)          # job_id
+    progress_changed = pyqtSignal(int, int)      # klara, totalt i den pågående omgången
+
+    def __init__(self, max_concurrent: int = 2, parent: QObject | None = None,
+                 generator_factory: Callable[[DownloadJob, str], ThumbnailGenerator] = ThumbnailGenerator):
+        super().__init__(parent)
+        self.max_concurrent = max(1, max_concurrent)
+        self.generator_factory = generator_factory
+        self.active: Dict[str, ThumbnailGenerator] = {}
+        # Väntande jobb ligger i en heap; ändrad prioritet eller avbrott hanteras lat via _pending.
+        self._heap: List[Tuple[int, int, str]] = []
+        self._pending: Dict[str, Tuple[int, int, DownloadJob, str]] = {}
+        self._counter = itertools.count()
+        self._starting = False
+        self.done = 0
+        self.total = 0
+
+    def __contains__(self, job_id: str) -> bool:
+        return job_id in self._pending or job_id in self.active
+
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def set_max_concurrent(self, max_concurrent: int) -> None:
+        self.max_concurrent = max(1, max_concurrent)
+        self._start_next()
+
+    def submit(self, job: DownloadJob, ffmpeg_path: str, priority: int = PRIORITY_NORMAL) -> bool:
+        """Lägger ett jobb i kön. Returnerar False om jobbet redan väntar eller genereras."""
+        if job.id in self.active:
+            return False
+        if job.id in self._pending:
+            self._reprioritize(job.id, priority)
+            return False
+        self._push(job, ffmpeg_path, priority)
+        self.total += 1
+        self._emit_progress()
+        self._start_next()
+        return True
+
+    def prioritize(self, job_ids: Iterable[str]) -> None:
+        """Flyttar väntande jobb, t.ex. för rader som syns i tabellen, före övriga."""
+        for job_id in job_ids:
+            self._reprioritize(job_id, PRIORITY_VISIBLE)
+
+    def cancel(self, job_id: str) -> bool:
+        if self._pending.pop(job_id, None):
+            self._count_done()
+            return True
+        generator = self.active.pop(job_id, None)
+        if generator:
+            generator.cancel()
+            self._dispose_later(generator)
+            self._count_done()
+            self._start_next()
+            return True
+        return False
+
+    def cancel_all(self) -> None:
+        for job_id in list(self._pending) + list(self.active):
+            self.cancel(job_id)
+        logger.info("Alla miniatyrgenereringar avbröts.")
+
+    def _push(self, job: DownloadJob, ffmpeg_path: str, priority: int) -> None:
+        seq = next(self._counter)
+        self._pending[job.id] = (priority, seq, job, ffmpeg_path)
+        heapq.heappush(self._heap, (priority, seq, job.id))
+
+    def _reprioritize(self, job_id: str, priority: int) -> None:
+        entry = self._pending.get(job_id)
+        if entry and priority < entry[0]:
+            self._push(entry[2], entry[3], priority)
+
+    def _pop_next(self) -> Tuple[DownloadJob, str] | None:
+        while self._heap:
+            priority, seq, job_id = heapq.heappop(self._heap)
+            entry = self._pending.get(job_id)
+            # Poster som avbrutits eller ersatts av en med högre prioritet hoppas över.
+            if entry and entry[:2] == (priority, seq):
+                del self._pending[job_id]
+                return entry[2], entry[3]
+        return None
+
+    def _start_next(self) -> None:
+        # generate() kan misslyckas direkt och då anropa oss igen via signalen; slingan nedan tar över.
+        if self._starting:
+            return
+        self._starting = True
+        try:
+            while len(self.active) < self.max_concurrent:
+                next_job = self._pop_next()
+                if next_job is None:
+                    break
+                job, ffmpeg_path = next_job
+                generator = self.generator_factory(job, ffmpeg_path)
+                generator.thumbnail_generated.connect(self._on_generated)
+                generator.generation_failed.connect(self._on_failed)
+                self.active[job.id] = generator
+                generator.generate()
+        finally:
+            self._starting = False
+
+    def _on_generated(self, job_id: str, thumbnail_path: str) -> None:
+        if self._release(job_id):
+            self.thumbnail_generated.emit(job_id, thumbnail_path)
+            self._start_next()
+
+    def _on_failed(self, job_id: str) -> None:
+        if self._release(job_id):
+            self.generation_failed.emit(job_id)
+            self._start_next()
+
+    def _release(self, job_id: str) -> bool:
+        generator = self.active.pop(job_id, None)
+        if generator is None:
+            return False
+        self._dispose_later(generator)
+        self._count_done()
+        return True
+
+    def _count_done(self) -> None:
+        self.done += 1
+        self._emit_progress()
+        if not self._pending and not self.active:
+            # Omgången är klar; nästa begäran börjar räkna från noll.
+            self.done = self.total = 0
+
+    def _emit_progress(self) -> None:
+        self.progress_changed.emit(self.done, self.total)
+
+    def _dispose_later(self, generator: ThumbnailGenerator) -> None:
+        """Låter Qt ta bort generatorn senare, eftersom vi kan befinna oss i en av dess egna signaler."""
+        generator.setParent(self)
+        generator.deleteLater()
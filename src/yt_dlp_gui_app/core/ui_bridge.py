@@ -1,8 +1,12 @@
 import logging
+from typing import Callable
 from PyQt6.QtCore import QObject, pyqtSignal
-from yt_dlp_gui_app.core.config import ConfigManager
+from yt_dlp_gui_app.core.config import ConfigManager, build_download_args
 from yt_dlp_gui_app.core.job_manager import JobManager
-from yt_dlp_gui_app.core.models import DownloadJob
+from yt_dlp_gui_app.core.job_registry import RegistryChange
+from yt_dlp_gui_app.core.models import DownloadJob, JobPriority
+from yt_dlp_gui_app.core.thumbnail_pool import PRIORITY_NORMAL
+from yt_dlp_gui_app.core.update_batcher import JobUpdateBatcher
 
 logger = logging.getLogger(__name__)
 
@@ -10,48 +14,46 @@ class UIBridge(QObject):
     """Fungerar som en brygga mellan UI-komponenter och kärnlogiken."""
     queue_changed = pyqtSignal()
     history_changed = pyqtSignal()
-    job_updated = pyqtSignal(str)
+    jobs_updated = pyqtSignal(list) # Batch av jobb-id:n, högst config.ui_update_hz gånger per sekund
     config_changed = pyqtSignal()
     log_message = pyqtSignal(str, str)
     active_jobs_count_changed = pyqtSignal(int) # NY SIGNAL
+    thumbnail_progress_changed = pyqtSignal(int, int) # klara, totalt
+    concurrency_changed = pyqtSignal(int, str) # antal platser, skäl
 
     def __init__(self, job_manager: JobManager, config_manager: ConfigManager, parent: QObject | None = None):
         super().__init__(parent)
         self.job_manager = job_manager
         self.config_manager = config_manager
+        self.update_batcher = JobUpdateBatcher(config_manager.get_config().ui_update_hz, self)
         self._connect_signals()
 
     def _connect_signals(self) -> None:
         self.job_manager.queue_changed.connect(self.queue_changed)
         self.job_manager.history_changed.connect(self.history_changed)
-        self.job_manager.job_updated.connect(self.job_updated)
+        self.job_manager.job_updated.connect(self.update_batcher.mark_dirty)
+        self.update_batcher.jobs_updated.connect(self.jobs_updated)
         self.job_manager.active_jobs_count_changed.connect(self.active_jobs_count_changed) # Koppla signalen
+        self.job_manager.thumbnail_progress_changed.connect(self.thumbnail_progress_changed)
+        self.job_manager.concurrency_changed.connect(self.concurrency_changed)
         self.config_manager.config_changed.connect(self.config_changed)
+        self.config_manager.config_changed.connect(self._on_config_changed)
         log_handler = QtLogHandler(self)
         log_handler.message_written.connect(self.on_log_message)
         logging.getLogger().addHandler(log_handler)
 
+    def _on_config_changed(self) -> None:
+        self.update_batcher.set_rate(self.config_manager.get_config().ui_update_hz)
+
+    def set_updates_paused(self, paused: bool) -> None:
+        """Pausar jobbuppdateringar till UI:t, t.ex. medan fönstret är minimerat eller dolt."""
+        self.update_batcher.set_paused(paused)
+
     def on_log_message(self, level: str, message: str) -> None:
         self.log_message.emit(level, message)
 
     def _build_args_from_config(self) -> list[str]:
-        config = self.config_manager.get_config()
-        args = []
-        if config.download_format: args.extend(["-f", config.download_format])
-        if config.write_thumbnail: args.append("--write-thumbnail")
-        if config.embed_thumbnail: args.append("--embed-thumbnail")
-        if config.extract_audio:
-            args.append("-x")
-            if config.audio_format: args.extend(["--audio-format", config.audio_format])
-        if config.write_subs:
-            args.append("--write-subs")
-            if config.sub_langs: args.extend(["--sub-langs", config.sub_langs])
-        args.extend(config.default_args)
-        unique_args = []
-        for arg in args:
-            if arg not in unique_args:
-                unique_args.append(arg)
-        return unique_args
+        return build_download_args(self.config_manager.get_config())
 
     def add_new_download(self, url: str, output_path: str) -> None:
         if not url.strip():
@@ -73,20 +75,52 @@ class UIBridge(QObject):
         except Exception as e:
             logger.error(f"Kunde inte importera kö från {path}: {e}")
 
-    def trigger_thumbnail_generation(self, job_id: str):
-        self.job_manager.trigger_thumbnail_generation(job_id)
+    def trigger_thumbnail_generation(self, job_id: str, priority: int = PRIORITY_NORMAL):
+        self.job_manager.trigger_thumbnail_generation(job_id, priority)
+
+    def prioritize_thumbnails(self, job_ids: list[str]) -> None:
+        self.job_manager.prioritize_thumbnails(job_ids)
+
+    def cancel_thumbnail_generation(self) -> None:
+        self.job_manager.cancel_thumbnail_generation()
+
+    def set_priority(self, job_ids: list[str], priority: JobPriority) -> None:
+        self.job_manager.set_priority(job_ids, priority)
+
+    def move_jobs(self, job_ids: list[str], row: int) -> None:
+        self.job_manager.move_jobs(job_ids, row)
+
+    def concurrency_limit(self) -> int | None:
+        """Antalet platser i automatiskt läge, annars None."""
+        if not self.config_manager.get_config().adaptive_concurrency:
+            return None
+        return self.job_manager.concurrency.limit
+
+    def concurrency_history(self) -> list[str]:
+        return self.job_manager.concurrency.describe_history()
+
+    def rebuild_download_archive(self) -> int:
+        return self.job_manager.rebuild_download_archive()
 
     def retry_job(self, job_id: str) -> None:
         self.job_manager.retry_job(job_id)
 
+    def get_job_log(self, job_id: str) -> str:
+        return self.job_manager.get_job_log(job_id)
+
+    def get_job_log_tail(self, job_id: str) -> str | None:
+        return self.job_manager.get_job_log_tail(job_id)
+
     def cancel_job(self, job_id: str) -> None: self.job_manager.cancel_job(job_id)
     def remove_job(self, job_id: str) -> None: self.job_manager.remove_job(job_id)
     def clear_history(self) -> None: self.job_manager.clear_history()
     def get_queue(self) -> list[DownloadJob]: return self.job_manager.queue
     def get_history(self) -> list[DownloadJob]: return self.job_manager.history
-    def get_job(self, job_id: str) -> DownloadJob | None:
-        job = self.job_manager.get_job_from_queue(job_id)
-        return job if job else self.job_manager.get_job_from_history(job_id)
+    def get_job(self, job_id: str) -> DownloadJob | None: return self.job_manager.get_job(job_id)
+    def get_job_location(self, job_id: str) -> tuple[str, int] | None:
+        return self.job_manager.get_job_location(job_id)
+    def add_registry_listener(self, listener: Callable[[RegistryChange], None]) -> None:
+        self.job_manager.registry.add_listener(listener)
 
 class QtLogHandler(logging.Handler, QObject):
     message_written = pyqtSignal(str, str)
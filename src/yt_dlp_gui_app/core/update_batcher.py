@@ -0,0 +1,59 @@
+import logging
+from typing import Dict
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+logger = logging.getLogger(__name__)
+
+class JobUpdateBatcher(QObject):
+    """
+    Samlar jobb-id:n som har ändrats och skickar dem vidare som en enda batch i en begränsad takt.
+    Ett jobb som ändras flera gånger mellan två utskick skickas bara en gång.
+    Utskicken kan pausas, t.ex. när fönstret är minimerat; ändringarna samlas då tills pausen hävs.
+    """
+    jobs_updated = pyqtSignal(list)
+
+    def __init__(self, rate_hz: int = 10, parent: QObject | None = None):
+        super().__init__(parent)
+        # dict i stället för set så att ordningen jobben ändrades i behålls.
+        self._dirty: Dict[str, None] = {}
+        self._paused = False
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setSingleShot(True)
+        self.flush_timer.timeout.connect(self.flush)
+        self.set_rate(rate_hz)
+
+    @property
+    def paused(self) -> bool:
+        return self._paused
+
+    def set_rate(self, rate_hz: int) -> None:
+        """Sätter hur många gånger per sekund ändringar som mest skickas ut."""
+        rate_hz = max(1, int(rate_hz))
+        self.flush_timer.setInterval(1000 // rate_hz)
+
+    def mark_dirty(self, job_id: str) -> None:
+        self._dirty[job_id] = None
+        if not self._paused and not self.flush_timer.isActive():
+            self.flush_timer.start()
+
+    def pending(self) -> list[str]:
+        return list(self._dirty)
+
+    def set_paused(self, paused: bool) -> None:
+        if paused == self._paused:
+            return
+        self._paused = paused
+        if paused:
+            self.flush_timer.stop()
+        else:
+            # Visa det senaste läget direkt när fönstret blir synligt igen.
+            self.flush()
+        logger.debug(f"Uppdateringar av jobb {'pausade' if paused else 'återupptagna'}.")
+
+    def flush(self) -> None:
+        self.flush_timer.stop()
+        if self._paused or not self._dirty:
+            return
+        job_ids = list(self._dirty)
+        self._dirty.clear()
+        self.jobs_updated.emit(job_ids)
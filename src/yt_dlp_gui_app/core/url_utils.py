@@ -0,0 +1,66 @@
+from typing import Optional
+from urllib.parse import parse_qs, parse_qsl, urlencode, urlparse, urlunparse
+
+# Sökvägar som brukar peka på en spellista eller kanal snarare än en enskild video.
+_PLAYLIST_PATH_PREFIXES = ("/playlist", "/channel/", "/c/", "/user/", "/@")
+_PLAYLIST_PATH_PARTS = ("/playlists", "/sets/", "/album/", "/videos")
+
+def is_playlist_url(url: str) -> bool:
+    """Gissar utifrån URL:en om den pekar på en spellista eller kanal som bör expanderas."""
+    parsed = urlparse(url.strip())
+    if not parsed.netloc:
+        return False
+    if "list" in parse_qs(parsed.query):
+        return True
+    path = parsed.path
+    return path.startswith(_PLAYLIST_PATH_PREFIXES) or any(part in path for part in _PLAYLIST_PATH_PARTS)
+
+# Frågeparametrar som inte påverkar vilket innehåll URL:en pekar på.
+_IGNORED_QUERY_PARAMS = {"feature", "si", "pp", "t", "start", "ab_channel", "fbclid", "gclid"}
+_YOUTUBE_HOSTS = {"youtube.com", "m.youtube.com", "music.youtube.com", "youtu.be", "youtube-nocookie.com"}
+
+# Andranivådomäner under landskoder, t.ex. bbc.co.uk, där webbplatsen är de tre sista leden.
+_SECOND_LEVEL_LABELS = {"co", "com", "org", "net", "ac", "gov", "edu", "ne", "or"}
+
+def host_key(url: str) -> str:
+    """
+    Returnerar webbplatsen som en URL hör till, t.ex. "youtube.com" för både youtu.be och m.youtube.com.
+    Används för att begränsa antalet samtidiga nedladdningar per webbplats.
+    """
+    host = urlparse(url.strip()).hostname or ""
+    if host.removeprefix("www.") in _YOUTUBE_HOSTS:
+        return "youtube.com"
+    labels = host.split(".")
+    if len(labels) >= 3 and labels[-2] in _SECOND_LEVEL_LABELS and len(labels[-1]) == 2:
+        return ".".join(labels[-3:])
+    return ".".join(labels[-2:])
+
+def youtube_video_id(url: str) -> Optional[str]:
+    """Returnerar video-id för en YouTube-URL till en enskild video, annars None."""
+    parsed = urlparse(url.strip())
+    host = parsed.netloc.lower().removeprefix("www.")
+    if host not in _YOUTUBE_HOSTS:
+        return None
+    if host == "youtu.be":
+        return parsed.path.strip("/").split("/")[0] or None
+    if parsed.path == "/watch":
+        return parse_qs(parsed.query).get("v", [None])[0]
+    for prefix in ("/shorts/", "/embed/", "/live/", "/v/"):
+        if parsed.path.startswith(prefix):
+            return parsed.path[len(prefix):].split("/")[0] or None
+    return None
+
+def normalize_url(url: str) -> str:
+    """
+    Normaliserar en URL till en nyckel för cachning, så att varianter av samma adress ger samma nyckel:
+    YouTube-videor nycklas på video-id, övriga på värd, sökväg och sorterade frågeparametrar utan spårning.
+    """
+    video_id = youtube_video_id(url)
+    if video_id:
+        return f"youtube:{video_id}"
+    parsed = urlparse(url.strip())
+    host = parsed.netloc.lower().removeprefix("www.")
+    query = sorted((key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+                   if key not in _IGNORED_QUERY_PARAMS and not key.startswith("utm_"))
+    path = parsed.path.rstrip("/") or "/"
+    return urlunparse(("https" if parsed.scheme in ("http", "https") else parsed.scheme, host, path, "", urlencode(query), ""))
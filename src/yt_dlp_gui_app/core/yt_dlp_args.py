@@ -0,0 +1,87 @@
+import hashlib
+import json
+import os
+from typing import Iterable, List, Optional
+
+# Flaggor som påverkar vad extraktionen ser: inloggning, cookies, nätverk och geografisk kringgång.
+# Utan dem kan metadata hämtas anonymt från fel IP-adress och skilja sig från det nedladdningen får.
+_EXTRACTION_OPTIONS = {
+    "--cookies", "--cookies-from-browser", "--proxy", "--geo-verification-proxy", "--xff",
+    "--geo-bypass-country", "--geo-bypass-ip-block", "--source-address", "--impersonate", "--extractor-args",
+    "-u", "--username", "-p", "--password", "-2", "--twofactor", "--video-password", "--netrc-location",
+    "--netrc-cmd", "--ap-mso", "--ap-username", "--ap-password", "--client-certificate",
+    "--client-certificate-key", "--client-certificate-password", "--add-header", "--user-agent", "--referer",
+}
+_EXTRACTION_SWITCHES = {
+    "-n", "--netrc", "--geo-bypass", "--no-geo-bypass", "-4", "--force-ipv4", "-6", "--force-ipv6",
+    "--no-check-certificates", "--prefer-insecure", "--legacy-server-connect",
+}
+
+def _flag(arg: str) -> str:
+    """Flaggan i "--flagga=värde"."""
+    return arg.split("=", 1)[0] if arg.startswith("--") else arg
+
+def extraction_args(args: Iterable[str]) -> List[str]:
+    """Plockar ut de argument, med värden, som påverkar extraktionen av info-JSON."""
+    args = list(args)
+    picked = []
+    index = 0
+    while index < len(args):
+        arg = args[index]
+        flag = _flag(arg)
+        if flag in _EXTRACTION_OPTIONS:
+            if flag != arg: # --flagga=värde
+                picked.append(arg)
+            else:
+                picked += args[index:index + 2]
+                index += 1
+        elif flag in _EXTRACTION_SWITCHES:
+            picked.append(arg)
+        index += 1
+    return picked
+
+def has_extraction_args(args: Iterable[str]) -> bool:
+    return any(_flag(arg) in _EXTRACTION_OPTIONS or _flag(arg) in _EXTRACTION_SWITCHES for arg in args)
+
+# Flaggor som väljer ut poster i en spellista. En spellista med någon av dem laddas ner av en enda
+# yt-dlp-process i stället för att delas upp i ett jobb per post, som annars skulle hämta alla poster.
+_PLAYLIST_SELECTION_FLAGS = {
+    "--no-playlist", "-I", "--playlist-items", "--playlist-start", "--playlist-end", "--playlist-reverse",
+    "--playlist-random", "--max-downloads", "--match-filter", "--match-filters", "--break-match-filter",
+    "--break-match-filters", "--break-on-existing",
+}
+
+def selects_playlist_entries(args: Iterable[str]) -> bool:
+    return any(_flag(arg) in _PLAYLIST_SELECTION_FLAGS for arg in args)
+
+# Flaggor som inte påverkar vilka filer en nedladdning ger, förutom de för extraktionen ovan.
+_NEUTRAL_OPTIONS = {
+    "-r", "--limit-rate", "-R", "--retries", "--fragment-retries", "--extractor-retries", "--socket-timeout",
+    "--sleep-interval", "--min-sleep-interval", "--max-sleep-interval", "--sleep-requests", "-N",
+    "--concurrent-fragments", "--progress-template",
+}
+_NEUTRAL_SWITCHES = {
+    "--newline", "--no-progress", "--progress", "-q", "--quiet", "-v", "--verbose", "--no-warnings",
+    "-i", "--ignore-errors", "--no-mtime", "--console-title",
+}
+
+def output_variant(args: Iterable[str], output_path: Optional[str]) -> str:
+    """
+    Kort kontrollsumma över utdatakatalogen och de argument som påverkar vilka filer som skapas,
+    t.ex. format, ljudextraktion, undertexter och filnamnsmall. Samma video med en annan variant
+    räknas som en annan nedladdning.
+    """
+    args = list(args)
+    kept = []
+    index = 0
+    while index < len(args):
+        arg = args[index]
+        flag = _flag(arg)
+        if flag in _EXTRACTION_OPTIONS or flag in _NEUTRAL_OPTIONS:
+            if flag == arg:
+                index += 1 # Värdet hoppas också över
+        elif flag not in _EXTRACTION_SWITCHES and flag not in _NEUTRAL_SWITCHES:
+            kept.append(arg)
+        index += 1
+    path = os.path.normcase(os.path.abspath(output_path)) if output_path else ""
+    return hashlib.sha1(json.dumps([path, kept]).encode("utf-8")).hexdigest()[:12]
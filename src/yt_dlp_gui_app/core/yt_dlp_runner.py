@@ -1,6 +1,7 @@
 import logging
 from PyQt6.QtCore import QObject, QProcess, pyqtSignal
 from yt_dlp_gui_app.core.models import DownloadJob, JobStatus
+from yt_dlp_gui_app.core.output_parser import OutputParser, PROGRESS_ARGS
 
 logger = logging.getLogger(__name__)
 
@@ -12,14 +13,23 @@ class YtDlpRunner(QObject):
     # Signaler för att kommunicera med JobManager
     process_started = pyqtSignal(str)  # job_id
     process_finished = pyqtSignal(str, int, QProcess.ExitStatus)  # job_id, exit_code, exit_status
-    output_received = pyqtSignal(str, str)  # job_id, output_data
+    output_received = pyqtSignal(str, str)  # job_id, output_data (hela rader)
+    events_parsed = pyqtSignal(str, list)  # job_id, list[OutputEvent]
     error_occurred = pyqtSignal(str, QProcess.ProcessError) # job_id, error
 
-    def __init__(self, job: DownloadJob, yt_dlp_path: str, parent: QObject | None = None):
+    def __init__(self, job: DownloadJob, yt_dlp_path: str, parent: QObject | None = None,
+                 info_json_path: str | None = None, rate_limit: int | None = None):
         super().__init__(parent)
         self.job = job
         self.yt_dlp_path = yt_dlp_path
-        self.process = QProcess()
+        # Cachad info-JSON; yt-dlp hoppar då över extraktionen och laddar ner direkt.
+        self.info_json_path = info_json_path
+        # Jobbets del av bandbreddsbudgeten i byte/s, skickas som --limit-rate.
+        self.rate_limit = rate_limit
+        self.process = QProcess(self)
+        # En tolk per ström, eftersom rader och tecken kan delas mellan läsningar i varje ström för sig.
+        self._stdout_parser = OutputParser()
+        self._stderr_parser = OutputParser()
         self._setup_signals()
 
     def _setup_signals(self) -> None:
@@ -35,16 +45,18 @@ class YtDlpRunner(QObject):
         if not self.yt_dlp_path:
             logger.error(f"yt-dlp sökväg är inte satt för jobb {self.job.id}")
             self.job.status = JobStatus.STATUS_ERROR_STARTFAIL
-            self.job.log += "Fel: Sökväg till yt-dlp är inte konfigurerad.\n"
+            self.output_received.emit(self.job.id, "Fel: Sökväg till yt-dlp är inte konfigurerad.\n")
             # Manuell emit eftersom processen aldrig startar
             self.process_finished.emit(self.job.id, -1, QProcess.ExitStatus.CrashExit)
             return
 
         command = self.yt_dlp_path
-        args = self.job.args_list + [self.job.url]
+        source = ["--load-info-json", self.info_json_path] if self.info_json_path else [self.job.url]
+        limit = ["--limit-rate", str(self.rate_limit)] if self.rate_limit else []
+        args = PROGRESS_ARGS + self.job.args_list + limit + source
         
         logger.info(f"Startar process för jobb {self.job.id}: '{command}' med argument {args}")
-        self.job.log += f"Kommando: {command} {' '.join(args)}\n\n"
+        self.output_received.emit(self.job.id, f"Kommando: {command} {' '.join(args)}\n\n")
         
         if self.job.output_path:
             self.process.setWorkingDirectory(self.job.output_path)
@@ -57,29 +69,43 @@ class YtDlpRunner(QObject):
             logger.info(f"Avbryter process för jobb {self.job.id}")
             self.process.kill() # Använd kill för att säkerställa att processen avslutas
 
+    def set_rate_limit(self, rate_limit: int | None) -> None:
+        """En körande yt-dlp-process kan inte få en ny gräns; den nya gäller bara om processen inte har startat."""
+        if self.process.state() == QProcess.ProcessState.NotRunning:
+            self.rate_limit = rate_limit
+
+    def error_string(self) -> str:
+        return self.process.errorString()
+
     def _on_started(self) -> None:
         """Hanterar när processen har startat."""
         logger.info(f"Process startad för jobb {self.job.id} med PID {self.process.processId()}")
         self.process_started.emit(self.job.id)
 
+    def _emit_parsed(self, parsed: tuple) -> None:
+        log_text, events = parsed
+        if log_text:
+            self.output_received.emit(self.job.id, log_text)
+        if events:
+            self.events_parsed.emit(self.job.id, events)
+
     def _on_ready_read_stdout(self) -> None:
         """Läser data från stdout."""
-        output = self.process.readAllStandardOutput().data().decode('utf-8', errors='ignore')
-        self.output_received.emit(self.job.id, output)
+        self._emit_parsed(self._stdout_parser.feed(self.process.readAllStandardOutput().data()))
 
     def _on_ready_read_stderr(self) -> None:
         """Läser data från stderr."""
-        error_output = self.process.readAllStandardError().data().decode('utf-8', errors='ignore')
-        self.output_received.emit(self.job.id, error_output)
+        self._emit_parsed(self._stderr_parser.feed(self.process.readAllStandardError().data()))
 
     def _on_finished(self, exit_code: int, exit_status: QProcess.ExitStatus) -> None:
         """Hanterar när processen har avslutats."""
         logger.info(f"Process för jobb {self.job.id} avslutad. Kod: {exit_code}, Status: {exit_status.name}")
-        # Läs eventuell kvarvarande output
-        remaining_output = self.process.readAll().data().decode('utf-8', errors='ignore')
-        if remaining_output:
-            self.output_received.emit(self.job.id, remaining_output)
-            
+        # Läs eventuell kvarvarande output, inklusive en sista rad utan radbrytning
+        self._emit_parsed(self._stdout_parser.feed(self.process.readAllStandardOutput().data()))
+        self._emit_parsed(self._stderr_parser.feed(self.process.readAllStandardError().data()))
+        self._emit_parsed(self._stdout_parser.finish())
+        self._emit_parsed(self._stderr_parser.finish())
+
         self.process_finished.emit(self.job.id, exit_code, exit_status)
 
     def _on_error(self, error: QProcess.ProcessError) -> None:
@@ -0,0 +1,169 @@
+"""
+Långlivad arbetsprocess för YtDlpWorkerPool.
+
+Processen importerar yt_dlp en gång och kör sedan ett jobb i taget, så att varje nedladdning
+slipper starta en ny tolk och importera alla extraktorer. Protokollet är en JSON-rad per
+meddelande: jobb och ändrade hastighetsgränser läses från stdin och händelser skrivs till
+stdout. Det som Python-koden skriver till stdout eller stderr medan ett jobb körs skickas
+som loggrader för jobbet, så att ordningen mot jobbets övriga händelser bevaras.
+
+Skriptet importerar inget från resten av paketet och startas direkt:  python yt_dlp_worker.py
+"""
+import io
+import json
+import os
+import queue
+import sys
+import threading
+import traceback
+from typing import Callable, Dict, Optional
+
+# Fält ur yt-dlp:s progress_hooks som skickas vidare; info_dict är för stor och behövs inte.
+PROGRESS_FIELDS = ("status", "downloaded_bytes", "total_bytes", "total_bytes_estimate", "speed", "eta", "filename")
+
+class _HookLogger:
+    """Loggobjekt för YoutubeDL som skickar varje meddelande som en loggrad för jobbet."""
+
+    def __init__(self, send: Callable[[dict], None], job_id: str):
+        self._send = send
+        self._job_id = job_id
+
+    def _log(self, message: str) -> None:
+        self._send({"type": "log", "job_id": self._job_id, "text": f"{message}\n"})
+
+    debug = info = warning = error = _log
+
+class _CurrentJob:
+    """Det körande jobbets YoutubeDL, så att hastighetsgränsen kan ändras medan jobbet pågår."""
+
+    def __init__(self) -> None:
+        self.job_id: Optional[str] = None
+        self.ydl = None
+        # Gränser som kom innan jobbets YoutubeDL skapades; de används när det skapas.
+        self._pending: Dict[str, Optional[int]] = {}
+        self._lock = threading.Lock()
+
+    def set_rate_limit(self, job_id: str, rate_limit: Optional[int]) -> None:
+        with self._lock:
+            if self.ydl is not None and job_id == self.job_id:
+                # Nedladdarna läser params["ratelimit"] för varje block, så ändringen gäller direkt.
+                self.ydl.params["ratelimit"] = rate_limit
+            else:
+                self._pending[job_id] = rate_limit
+
+    def attach(self, job_id: str, ydl) -> None:
+        with self._lock:
+            if job_id in self._pending:
+                ydl.params["ratelimit"] = self._pending.pop(job_id)
+            self.ydl = ydl
+
+    def detach(self) -> None:
+        with self._lock:
+            # Ett meddelande till ett jobb som redan har avslutats ignoreras.
+            self._pending.pop(self.job_id, None)
+            self.job_id, self.ydl = None, None
+
+class _LogStream(io.TextIOBase):
+    """Ersätter sys.stdout och sys.stderr; text från ett körande jobb blir loggrader för jobbet."""
+
+    def __init__(self, send: Callable[[dict], None], current: _CurrentJob, fallback):
+        self._send = send
+        self._current = current
+        self._fallback = fallback
+
+    def write(self, text: str) -> int:
+        job_id = self._current.job_id
+        if job_id is None:
+            self._fallback.write(text)
+        elif text:
+            self._send({"type": "log", "job_id": job_id, "text": text})
+        return len(text)
+
+    def flush(self) -> None:
+        self._fallback.flush()
+
+def run_job(yt_dlp, request: dict, send: Callable[[dict], None], current: Optional[_CurrentJob] = None) -> int:
+    """Kör ett jobb med yt-dlp i den här processen och returnerar dess avslutningskod."""
+    job_id = request["job_id"]
+    send({"type": "started", "job_id": job_id})
+    if current is not None:
+        current.job_id = job_id
+
+    def on_progress(d: dict) -> None:
+        send({"type": "progress", "job_id": job_id, **{key: d.get(key) for key in PROGRESS_FIELDS}})
+
+    def on_postprocess(d: dict) -> None:
+        send({"type": "postprocess", "job_id": job_id, "status": d.get("status"), "postprocessor": d.get("postprocessor")})
+
+    try:
+        if request.get("cwd"):
+            os.chdir(request["cwd"])
+        _, opts, urls, ydl_opts = yt_dlp.parse_options(request["args"])
+        ydl_opts.update({
+            "logger": _HookLogger(send, job_id),
+            "noprogress": True,
+            "progress_hooks": [on_progress],
+            "postprocessor_hooks": [on_postprocess],
+        })
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            if current is not None:
+                current.attach(job_id, ydl)
+            if opts.load_info_filename:
+                return ydl.download_with_info_file(opts.load_info_filename)
+            return ydl.download(urls)
+    except SystemExit as e:
+        # parse_options avslutar vid ogiltiga argument, precis som yt-dlp-programmet.
+        return e.code if isinstance(e.code, int) else 2
+    except yt_dlp.utils.DownloadError:
+        # Felet har redan loggats via loggobjektet.
+        return 1
+    except Exception:
+        send({"type": "log", "job_id": job_id, "text": traceback.format_exc()})
+        return 1
+    finally:
+        if current is not None:
+            current.detach()
+
+def _read_requests(requests: "queue.Queue[Optional[dict]]", current: _CurrentJob) -> None:
+    """Läser stdin i en egen tråd, så att hastighetsgränsen kan ändras medan ett jobb körs."""
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        message = json.loads(line)
+        if message.get("type") == "rate_limit":
+            current.set_rate_limit(message.get("job_id"), message.get("rate_limit"))
+        else:
+            requests.put(message)
+    requests.put(None)
+
+def main() -> int:
+    # Protokollet får en egen kopia av stdout; allt annat som skrivs dit hamnar i stderr.
+    protocol = os.fdopen(os.dup(sys.stdout.fileno()), "w", encoding="utf-8", buffering=1)
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    # yt-dlp kan anropa krokarna från flera trådar, t.ex. vid parallella fragment.
+    lock = threading.Lock()
+
+    def send(message: dict) -> None:
+        line = json.dumps(message) + "\n"
+        with lock:
+            protocol.write(line)
+
+    current = _CurrentJob()
+    sys.stdout = sys.stderr = _LogStream(send, current, sys.__stderr__)
+
+    try:
+        import yt_dlp
+    except ImportError as e:
+        send({"type": "fatal", "error": f"Python-paketet yt_dlp kunde inte importeras: {e}"})
+        return 1
+    send({"type": "ready", "version": yt_dlp.version.__version__})
+
+    requests: "queue.Queue[Optional[dict]]" = queue.Queue()
+    threading.Thread(target=_read_requests, args=(requests, current), daemon=True).start()
+    while (request := requests.get()) is not None:
+        exit_code = run_job(yt_dlp, request, send, current)
+        send({"type": "finished", "job_id": request["job_id"], "exit_code": exit_code or 0})
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,293 @@
+import importlib.util
+import json
+import logging
+import sys
+from collections import deque
+from typing import Deque, List, Optional
+from PyQt6.QtCore import QObject, QProcess, QTimer, pyqtSignal
+from yt_dlp_gui_app.core import yt_dlp_worker
+from yt_dlp_gui_app.core.models import DownloadJob
+from yt_dlp_gui_app.core.output_parser import EventKind, OutputEvent, OutputParser, ProgressRecord
+
+logger = logging.getLogger(__name__)
+
+# Arbetsprocessen startas som ett fristående skript, så att paketet inte behöver finnas på sys.path.
+WORKER_COMMAND = [sys.executable, yt_dlp_worker.__file__]
+
+def worker_pool_available() -> bool:
+    """Arbetsprocesserna kräver en Python-tolk med yt_dlp installerat, vilket en fryst app saknar."""
+    return not getattr(sys, "frozen", False) and importlib.util.find_spec("yt_dlp") is not None
+
+def progress_event(message: dict) -> OutputEvent:
+    """Gör om ett meddelande från progress_hooks till samma händelse som --progress-template ger."""
+    record = ProgressRecord(
+        status=message.get("status") or "",
+        downloaded_bytes=message.get("downloaded_bytes"),
+        total_bytes=message.get("total_bytes") or message.get("total_bytes_estimate"),
+        speed=message.get("speed"),
+        eta=message.get("eta"),
+    )
+    if record.downloaded_bytes is not None and record.total_bytes:
+        record.percent = min(100.0, record.downloaded_bytes * 100.0 / record.total_bytes)
+    elif record.status == "finished":
+        record.percent = 100.0
+    return OutputEvent(EventKind.PROGRESS, progress=record)
+
+def postprocess_event(message: dict) -> Optional[OutputEvent]:
+    if message.get("status") != "started":
+        return None
+    if message.get("postprocessor") == "Merger":
+        return OutputEvent(EventKind.MERGING)
+    return OutputEvent(EventKind.POSTPROCESSING, value=message.get("postprocessor"))
+
+class WorkerRunner(QObject):
+    """
+    Kör ett jobb i en av YtDlpWorkerPools arbetsprocesser i stället för i en egen yt-dlp-process.
+    Har samma signaler som YtDlpRunner, så att JobManager kan använda båda.
+    """
+    process_started = pyqtSignal(str)  # job_id
+    process_finished = pyqtSignal(str, int, QProcess.ExitStatus)  # job_id, exit_code, exit_status
+    output_received = pyqtSignal(str, str)  # job_id, output_data (hela rader)
+    events_parsed = pyqtSignal(str, list)  # job_id, list[OutputEvent]
+    error_occurred = pyqtSignal(str, QProcess.ProcessError) # job_id, error
+
+    def __init__(self, job: DownloadJob, pool: "YtDlpWorkerPool", parent: QObject | None = None,
+                 info_json_path: str | None = None, rate_limit: int | None = None):
+        super().__init__(parent)
+        self.job = job
+        self.pool = pool
+        self.info_json_path = info_json_path
+        self.rate_limit = rate_limit
+        self._error_string = ""
+        # Loggmeddelanden från yt-dlp tolkas som vanliga utdatarader; stderr kommer från t.ex. FFmpeg.
+        self._log_parser = OutputParser()
+        self._stderr_parser = OutputParser()
+
+    def request(self) -> dict:
+        source = ["--load-info-json", self.info_json_path] if self.info_json_path else [self.job.url]
+        limit = ["--limit-rate", str(self.rate_limit)] if self.rate_limit else []
+        return {"job_id": self.job.id, "args": self.job.args_list + limit + source, "cwd": self.job.output_path}
+
+    def start(self) -> None:
+        logger.info(f"Köar jobb {self.job.id} i arbetsprocesserna med argument {self.request()['args']}")
+        self.output_received.emit(self.job.id, f"Arbetsprocess: yt_dlp {' '.join(self.request()['args'])}\n\n")
+        self.pool.submit(self)
+
+    def cancel(self) -> None:
+        logger.info(f"Avbryter jobb {self.job.id} i arbetsprocesserna")
+        self.pool.cancel(self)
+
+    def set_rate_limit(self, rate_limit: int | None) -> None:
+        """Ändrar hastighetsgränsen (byte/s), även medan jobbet körs."""
+        if rate_limit != self.rate_limit:
+            self.rate_limit = rate_limit
+            self.pool.set_rate_limit(self)
+
+    def error_string(self) -> str:
+        return self._error_string
+
+    def _emit_parsed(self, parsed: tuple) -> None:
+        log_text, events = parsed
+        if log_text:
+            self.output_received.emit(self.job.id, log_text)
+        if events:
+            self.events_parsed.emit(self.job.id, events)
+
+    def _on_message(self, message: dict) -> None:
+        kind = message["type"]
+        if kind == "started":
+            self.process_started.emit(self.job.id)
+        elif kind == "log":
+            self._emit_parsed(self._log_parser.feed(message["text"].encode("utf-8")))
+        elif kind == "progress":
+            self.events_parsed.emit(self.job.id, [progress_event(message)])
+        elif kind == "postprocess":
+            event = postprocess_event(message)
+            if event:
+                self.events_parsed.emit(self.job.id, [event])
+
+    def _on_stderr(self, data: bytes) -> None:
+        self._emit_parsed(self._stderr_parser.feed(data))
+
+    def _finish(self, exit_code: int, exit_status: QProcess.ExitStatus) -> None:
+        self._emit_parsed(self._log_parser.finish())
+        self._emit_parsed(self._stderr_parser.finish())
+        logger.info(f"Jobb {self.job.id} i arbetsprocess avslutat. Kod: {exit_code}, Status: {exit_status.name}")
+        self.process_finished.emit(self.job.id, exit_code, exit_status)
+
+    def _fail(self, error_string: str) -> None:
+        self._error_string = error_string
+        logger.error(f"Jobb {self.job.id} kunde inte köras i en arbetsprocess: {error_string}")
+        self.error_occurred.emit(self.job.id, QProcess.ProcessError.FailedToStart)
+
+class _Worker:
+    """En arbetsprocess och jobbet den kör just nu."""
+
+    def __init__(self, process: QProcess):
+        self.process = process
+        self.ready = False
+        self.runner: Optional[WorkerRunner] = None
+        self.buffer = b""
+
+class YtDlpWorkerPool(QObject):
+    """
+    En pool av långlivade Python-processer som har importerat yt_dlp en gång och kör ett jobb i taget.
+    Jämfört med att starta yt-dlp-programmet för varje jobb slipper korta klipp och ljudjobb vänta
+    på tolkens uppstart och importen av extraktorerna. Förloppet kommer från yt-dlp:s progress_hooks
+    i stället för att tolkas ur utdatan. Ett avbrutet jobb avslutar sin arbetsprocess, som ersätts
+    av en ny när den behövs.
+
+    Observera att poolen använder Python-paketet yt_dlp, inte programmet i yt_dlp_path.
+    """
+    worker_count_changed = pyqtSignal(int)
+
+    def __init__(self, max_workers: int = 3, parent: QObject | None = None, command: Optional[List[str]] = None):
+        super().__init__(parent)
+        self.max_workers = max(1, max_workers)
+        self.command = command or WORKER_COMMAND
+        self.available = command is not None or worker_pool_available()
+        self.error: Optional[str] = None if self.available else "Python-paketet yt_dlp är inte installerat för den här tolken."
+        self.workers: List[_Worker] = []
+        self._waiting: Deque[WorkerRunner] = deque()
+        self._shutting_down = False
+
+    def submit(self, runner: WorkerRunner) -> None:
+        if not self.available:
+            runner._fail(self.error or "Arbetsprocesserna är inte tillgängliga.")
+            return
+        self._waiting.append(runner)
+        self._dispatch()
+
+    def cancel(self, runner: WorkerRunner) -> None:
+        if runner in self._waiting:
+            self._waiting.remove(runner)
+            # Asynkront, precis som när en process avslutas.
+            QTimer.singleShot(0, lambda: runner._finish(-1, QProcess.ExitStatus.CrashExit))
+            return
+        for worker in self.workers:
+            if worker.runner is runner:
+                # yt-dlp kan inte avbrytas mitt i ett jobb; processen avslutas och ersätts vid behov.
+                worker.process.kill()
+
+    def set_rate_limit(self, runner: WorkerRunner) -> None:
+        for worker in self.workers:
+            if worker.runner is runner:
+                message = {"type": "rate_limit", "job_id": runner.job.id, "rate_limit": runner.rate_limit}
+                worker.process.write((json.dumps(message) + "\n").encode("utf-8"))
+
+    def prewarm(self) -> None:
+        """Startar arbetsprocesser i förväg, så att de första jobben inte väntar på importen av yt_dlp."""
+        while self.available and not self._shutting_down and len(self.workers) < self.max_workers:
+            self._spawn()
+
+    def set_max_workers(self, max_workers: int) -> None:
+        self.max_workers = max(1, max_workers)
+        for worker in [w for w in self.workers if w.runner is None][:max(0, len(self.workers) - self.max_workers)]:
+            self._stop(worker)
+        self._dispatch()
+
+    def shutdown(self) -> None:
+        """Avslutar alla arbetsprocesser, t.ex. när programmet stängs."""
+        self._shutting_down = True
+        for worker in list(self.workers):
+            self._stop(worker)
+            if not worker.process.waitForFinished(1000):
+                worker.process.kill()
+                worker.process.waitForFinished(1000)
+
+    def _stop(self, worker: _Worker) -> None:
+        # Processen avslutas själv när stdin stängs.
+        worker.process.closeWriteChannel()
+
+    def _dispatch(self) -> None:
+        if self._shutting_down:
+            return
+        for worker in self.workers:
+            if not self._waiting:
+                return
+            if worker.ready and worker.runner is None and worker.process.state() == QProcess.ProcessState.Running:
+                self._assign(worker, self._waiting.popleft())
+        starting = sum(1 for w in self.workers if not w.ready)
+        while self.available and len(self._waiting) > starting and len(self.workers) < self.max_workers:
+            self._spawn()
+            starting += 1
+
+    def _assign(self, worker: _Worker, runner: WorkerRunner) -> None:
+        worker.runner = runner
+        worker.process.write((json.dumps(runner.request()) + "\n").encode("utf-8"))
+
+    def _spawn(self) -> None:
+        process = QProcess(self)
+        worker = _Worker(process)
+        process.readyReadStandardOutput.connect(lambda: self._on_stdout(worker))
+        process.readyReadStandardError.connect(lambda: self._on_stderr(worker))
+        process.finished.connect(lambda exit_code, exit_status: self._on_worker_finished(worker, exit_code, exit_status))
+        process.errorOccurred.connect(lambda error: self._on_worker_error(worker, error))
+        self.workers.append(worker)
+        logger.info(f"Startar arbetsprocess för yt-dlp: {self.command}")
+        process.start(self.command[0], self.command[1:])
+        self.worker_count_changed.emit(len(self.workers))
+
+    def _on_stdout(self, worker: _Worker) -> None:
+        worker.buffer += worker.process.readAllStandardOutput().data()
+        *lines, worker.buffer = worker.buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                self._on_message(worker, json.loads(line))
+
+    def _on_message(self, worker: _Worker, message: dict) -> None:
+        kind = message["type"]
+        if kind == "ready":
+            logger.info(f"Arbetsprocess {worker.process.processId()} redo med yt_dlp {message.get('version')}.")
+            worker.ready = True
+            self._dispatch()
+        elif kind == "fatal":
+            logger.error(f"Arbetsprocessen kunde inte starta: {message['error']}")
+            self.available = False
+            self.error = message["error"]
+        elif kind == "finished":
+            runner, worker.runner = worker.runner, None
+            if runner is not None:
+                runner._finish(message["exit_code"], QProcess.ExitStatus.NormalExit)
+            self._dispatch()
+        elif worker.runner is not None:
+            worker.runner._on_message(message)
+
+    def _on_stderr(self, worker: _Worker) -> None:
+        data = worker.process.readAllStandardError().data()
+        if worker.runner is not None:
+            worker.runner._on_stderr(data)
+        else:
+            logger.debug(f"Arbetsprocess {worker.process.processId()}: {data.decode('utf-8', errors='replace').strip()}")
+
+    def _remove(self, worker: _Worker) -> None:
+        if worker in self.workers:
+            self.workers.remove(worker)
+            # Vi befinner oss i en av processens egna signaler.
+            worker.process.deleteLater()
+            self.worker_count_changed.emit(len(self.workers))
+
+    def _on_worker_finished(self, worker: _Worker, exit_code: int, exit_status: QProcess.ExitStatus) -> None:
+        self._on_stdout(worker)
+        self._remove(worker)
+        runner, worker.runner = worker.runner, None
+        if runner is not None:
+            # Arbetsprocessen dog eller avbröts mitt i jobbet.
+            runner._finish(exit_code, QProcess.ExitStatus.CrashExit)
+        if self.available:
+            self._dispatch()
+        else:
+            self._fail_waiting()
+
+    def _on_worker_error(self, worker: _Worker, error: QProcess.ProcessError) -> None:
+        # Vid andra fel följer även finished, som hanterar resten.
+        if error == QProcess.ProcessError.FailedToStart:
+            self.available = False
+            self.error = f"Arbetsprocessen kunde inte startas: {worker.process.errorString()}"
+            logger.error(self.error)
+            self._remove(worker)
+            self._fail_waiting()
+
+    def _fail_waiting(self) -> None:
+        while self._waiting:
+            self._waiting.popleft()._fail(self.error or "Arbetsprocesserna är inte tillgängliga.")
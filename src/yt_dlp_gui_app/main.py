@@ -1,10 +1,11 @@
+import argparse
 import sys
 import logging
-from PyQt6.QtWidgets import QApplication
-from yt_dlp_gui_app.ui.main_window import MainWindow
+from PyQt6.QtCore import QCoreApplication, QStandardPaths, Qt
 from yt_dlp_gui_app.core.config import ConfigManager
+from yt_dlp_gui_app.core.diagnostics import Diagnostics
+from yt_dlp_gui_app.core.http_api import HttpApiServer
 from yt_dlp_gui_app.core.job_manager import JobManager
-from yt_dlp_gui_app.core.ui_bridge import UIBridge
 
 # --- Grundläggande loggningskonfiguration ---
 logging.basicConfig(
@@ -14,17 +15,69 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def parse_arguments(argv: list[str]) -> tuple[argparse.Namespace, list[str]]:
+    """Tolkar programmets egna flaggor; resten lämnas åt Qt."""
+    parser = argparse.ArgumentParser(prog="yt-dlp-gui")
+    parser.add_argument("--headless", action="store_true", help="kör nedladdningarna utan fönster")
+    parser.add_argument("--spool-dir", help="katalog där filer med en URL per rad läses in (med --headless)")
+    parser.add_argument("--stdin", action="store_true", help="läs URL:er från stdin (med --headless)")
+    parser.add_argument("--output-dir", help="katalog för nedladdningarna (med --headless)")
+    parser.add_argument("--exit-when-idle", action="store_true", help="avsluta när kön är tom och stdin har stängts")
+    options, qt_args = parser.parse_known_args(argv[1:])
+    return options, argv[:1] + qt_args
+
+def run_headless(options: argparse.Namespace, qt_args: list[str]) -> int:
+    """Kör nedladdningarna under QCoreApplication; QtWidgets läses aldrig in."""
+    from yt_dlp_gui_app.core.headless import HeadlessService
+
+    app = QCoreApplication(qt_args)
+    app.setOrganizationName("YtDlpGUI")
+    app.setApplicationName("YtDlpGUI")
+
+    config_manager = ConfigManager()
+    config_manager.load_config()
+    job_manager = JobManager(config_manager)
+    http_api = HttpApiServer(job_manager, config_manager)
+    service = HeadlessService(job_manager, config_manager, spool_dir=options.spool_dir, output_dir=options.output_dir,
+                              read_stdin=options.stdin, exit_when_idle=options.exit_when_idle)
+    # Köad koppling: en signal som kommer innan app.exec() har startat skulle annars inte avsluta loopen.
+    service.stopped.connect(app.quit, Qt.ConnectionType.QueuedConnection)
+    service.install_signal_handlers()
+    job_manager.load_jobs()
+    http_api.apply_config()
+    service.start()
+    logger.info("Körs utan fönster. Avsluta med SIGTERM eller Ctrl+C.")
+
+    exit_code = app.exec()
+    http_api.stop()
+    service.close()
+    logger.info("Applikationen stängs ner.")
+    return exit_code
+
 def main() -> None:
     """
     Applikationens huvudfunktion.
-    Initialiserar QApplication, kärnkomponenter och huvudfönstret.
+    Initialiserar QApplication, kärnkomponenter och huvudfönstret, eller kör utan fönster med --headless.
     """
     logger.info("Applikationen startar...")
+    options, qt_args = parse_arguments(sys.argv)
+    if options.headless:
+        sys.exit(run_headless(options, qt_args))
+
+    from PyQt6.QtWidgets import QApplication
+    from yt_dlp_gui_app.core.ui_bridge import UIBridge
+    from yt_dlp_gui_app.ui.main_window import MainWindow
 
-    app = QApplication(sys.argv)
+    app = QApplication(qt_args)
     app.setOrganizationName("YtDlpGUI")
     app.setApplicationName("YtDlpGUI")
 
+    # Frysningar i event-loopen mäts alltid; profilering kan slås på med YTDLPGUI_DIAGNOSTICS eller i menyn.
+    app_data_path = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.AppDataLocation)
+    diagnostics = Diagnostics(f"{app_data_path}/diagnostics")
+    diagnostics.apply_environment()
+    diagnostics.start()
+
     # --- Initialisera kärnkomponenter ---
     config_manager = ConfigManager()
     config_manager.load_config()
@@ -34,16 +87,21 @@ def main() -> None:
     ui_bridge = UIBridge(job_manager, config_manager)
 
     # --- Initialisera huvudfönstret ---
-    window = MainWindow(ui_bridge, config_manager)
+    window = MainWindow(ui_bridge, config_manager, diagnostics)
     window.show()
 
     logger.info("Huvudfönstret har visats. Startar event-loopen.")
     
     # Ladda jobb efter att fönstret har skapats för att säkerställa att signaler är anslutna
     job_manager.load_jobs()
+    http_api = HttpApiServer(job_manager, config_manager)
+    http_api.apply_config()
 
     try:
-        sys.exit(app.exec())
+        exit_code = app.exec()
+        http_api.stop()
+        diagnostics.shutdown()
+        sys.exit(exit_code)
     except SystemExit:
         logger.info("Applikationen stängs ner.")
     except Exception as e:
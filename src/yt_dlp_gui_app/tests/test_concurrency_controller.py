@@ -0,0 +1,44 @@
+from yt_dlp_gui_app.core.concurrency_controller import AdaptiveConcurrency
+
+MIB = 1024 * 1024
+
+def test_additive_increase_and_revert(qapp):
+    """Testar att en plats läggs till när alla används och tas bort igen om hastigheten inte ökade."""
+    controller = AdaptiveConcurrency(min_limit=1, max_limit=4, initial=2, cooldown_evaluations=2)
+    changes = []
+    controller.limit_changed.connect(lambda limit, reason: changes.append(limit))
+
+    controller.evaluate(throughput=4 * MIB, active=2, waiting=5)
+    assert controller.limit == 3
+    controller.evaluate(throughput=6 * MIB, active=3, waiting=4)
+    assert controller.limit == 4
+    controller.evaluate(throughput=6.1 * MIB, active=4, waiting=3)
+    assert controller.limit == 3
+    # Under vänteperioden görs inga nya ökningar.
+    controller.evaluate(throughput=6 * MIB, active=3, waiting=3)
+    assert controller.limit == 3
+    controller.evaluate(throughput=6 * MIB, active=3, waiting=3)
+    assert controller.limit == 4
+    assert changes == [3, 4, 3, 4]
+    assert len(controller.describe_history()) == 4
+
+def test_multiplicative_decrease_on_errors(qapp):
+    """Testar att antalet platser halveras när många jobb misslyckas, inom gränserna."""
+    controller = AdaptiveConcurrency(min_limit=2, max_limit=8, initial=8)
+    for success in (True, False, False):
+        controller.record_outcome(success)
+    controller.evaluate(throughput=MIB, active=8, waiting=10)
+    assert controller.limit == 4
+    assert "2 av 3 jobb misslyckades" in controller.history[-1].reason
+    controller.record_outcome(False)
+    controller.evaluate(throughput=MIB, active=4, waiting=10)
+    controller.record_outcome(False)
+    controller.evaluate(throughput=MIB, active=2, waiting=10)
+    assert controller.limit == 2
+
+def test_no_increase_without_demand(qapp):
+    """Testar att inga platser läggs till när inga jobb väntar eller platserna inte används."""
+    controller = AdaptiveConcurrency(min_limit=1, max_limit=8, initial=3)
+    controller.evaluate(throughput=MIB, active=3, waiting=0)
+    controller.evaluate(throughput=MIB, active=1, waiting=5)
+    assert controller.limit == 3 and not controller.history
@@ -0,0 +1,39 @@
+import os
+import time
+from yt_dlp_gui_app.core.diagnostics import Diagnostics
+
+def block_event_loop(seconds: float) -> None:
+    time.sleep(seconds)
+
+def build_strings() -> list:
+    return [str(i) * 10 for i in range(1000)]
+
+def test_stall_is_recorded_with_location(qtbot, tmp_path):
+    """Testar att en blockerad event-loop registreras som en frysning med funktionen som körde."""
+    diagnostics = Diagnostics(str(tmp_path), interval_ms=20, threshold_ms=100)
+    diagnostics.start()
+    try:
+        qtbot.wait(60)
+        with qtbot.waitSignal(diagnostics.stall_detected, timeout=2000):
+            block_event_loop(0.3)
+    finally:
+        diagnostics.stop()
+    stall = diagnostics.stalls[-1]
+    assert stall.duration_ms >= 200
+    assert stall.location.startswith("block_event_loop (tests")
+    report = open(diagnostics.write_stall_report(), encoding="utf-8").read()
+    assert "block_event_loop" in report
+
+def test_profiling_and_tracemalloc_reports(qapp, tmp_path):
+    """Testar att cProfile och tracemalloc kan slås på från miljövariabeln och skriver rapporter."""
+    diagnostics = Diagnostics(str(tmp_path))
+    assert diagnostics.apply_environment("cProfile, tracemalloc") == ["cprofile", "tracemalloc"]
+    assert diagnostics.profiling and diagnostics.tracing_memory
+    data = build_strings()
+    profile_path = diagnostics.stop_profiling()
+    memory_path = diagnostics.stop_tracemalloc()
+    assert not diagnostics.profiling and not diagnostics.tracing_memory
+    assert "build_strings" in open(profile_path, encoding="utf-8").read()
+    assert os.path.exists(profile_path.replace(".txt", ".prof"))
+    assert "test_diagnostics.py" in open(memory_path, encoding="utf-8").read()
+    assert data
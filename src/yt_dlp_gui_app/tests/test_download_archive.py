@@ -0,0 +1,24 @@
+from yt_dlp_gui_app.core.download_archive import DownloadArchive, archive_key
+
+def test_archive_key():
+    """Testar att nycklarna har samma form som yt-dlp:s --download-archive."""
+    assert archive_key("https://youtu.be/abc") == "youtube abc"
+    assert archive_key("https://vimeo.com/123", {"id": "123", "extractor_key": "Vimeo"}) == "vimeo 123"
+    assert archive_key("https://example.com/video") is None
+    assert archive_key("https://youtu.be/abc", variant="0123abcd") == "youtube abc 0123abcd"
+    assert archive_key("https://example.com/video", variant="0123abcd") is None
+
+def test_archive_is_persisted_and_rebuilt(tmp_path):
+    """Testar att arkivet sparas rad för rad och kan byggas om."""
+    path = tmp_path / "archive.txt"
+    path.write_text("youtube old\n", encoding="utf-8")
+    archive = DownloadArchive(str(path))
+    assert "youtube old" in archive
+    archive.add("youtube abc")
+    archive.add("youtube abc")
+    assert path.read_text(encoding="utf-8") == "youtube old\nyoutube abc\n"
+    assert "youtube abc" in DownloadArchive(str(path))
+
+    assert archive.rebuild(["vimeo 1", None, "youtube abc"]) == 2
+    assert "youtube old" not in archive
+    assert path.read_text(encoding="utf-8") == "vimeo 1\nyoutube abc\n"
@@ -0,0 +1,84 @@
+import io
+import os
+import signal
+import subprocess
+import sys
+import threading
+import pytest
+from unittest.mock import MagicMock
+from yt_dlp_gui_app.core.config import AppConfig
+from yt_dlp_gui_app.core.headless import SPOOL_DONE_DIR, HeadlessService, parse_url_lines
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture
+def service(qapp, tmp_path):
+    """En HeadlessService med en mockad JobManager och en tom kö."""
+    job_manager = MagicMock()
+    job_manager.queue = []
+    job_manager.active_runners = {}
+    config_manager = MagicMock()
+    config_manager.get_config.return_value = AppConfig(last_output_dir=str(tmp_path / "nedladdningar"))
+    return HeadlessService(job_manager, config_manager, spool_dir=str(tmp_path / "spool"), poll_interval_ms=50)
+
+def added_urls(service: HeadlessService) -> list[str]:
+    return [call.args[0].url for call in service.job_manager.add_job.call_args_list]
+
+def test_parse_url_lines_skips_comments_and_blank_lines():
+    """Testar att kommentarer och tomma rader hoppas över och att en rad kan innehålla flera URL:er."""
+    assert parse_url_lines(["# kommentar\n", "\n", " https://a.example/1 \n", "https://b.example/2 https://b.example/3"]) == \
+        ["https://a.example/1", "https://b.example/2", "https://b.example/3"]
+
+def test_spool_files_are_queued_and_moved(service: HeadlessService, tmp_path):
+    """Testar att färdiga spoolfiler blir jobb med konfigurationens argument och flyttas, medan .tmp-filer väntar."""
+    service.start()
+    spool = tmp_path / "spool"
+    (spool / "a.txt").write_text("https://a.example/1\nhttps://a.example/2\n", encoding="utf-8")
+    (spool / "b.txt.tmp").write_text("https://b.example/1\n", encoding="utf-8")
+    assert service.scan_spool() == 2
+    assert added_urls(service) == ["https://a.example/1", "https://a.example/2"]
+    job = service.job_manager.add_job.call_args.args[0]
+    assert job.output_path == str(tmp_path / "nedladdningar")
+    assert job.args_list[:2] == ["-f", "bestvideo+bestaudio/best"]
+    assert (spool / SPOOL_DONE_DIR / "a.txt").exists() and not (spool / "a.txt").exists()
+    assert (spool / "b.txt.tmp").exists()
+    service.poll_timer.stop()
+
+def test_stdin_urls_are_queued_and_service_stops_when_idle(service: HeadlessService, qtbot):
+    """Testar att URL:er från stdin köas och att tjänsten sparar och avslutar när stdin stängs och kön är tom."""
+    service.read_stdin = True
+    service._stdin_open = True
+    service.exit_when_idle = True
+    with qtbot.waitSignal(service.stopped, timeout=2000):
+        service.start(io.StringIO("https://c.example/1\n# hoppas över\nhttps://c.example/2\n"))
+    assert added_urls(service) == ["https://c.example/1", "https://c.example/2"]
+    service.job_manager.save_jobs.assert_called_once()
+    service.job_manager.shutdown.assert_called_once()
+    assert not service.poll_timer.isActive()
+
+@pytest.mark.skipif(sys.platform == "win32", reason="SIGTERM kan inte skickas till en process på Windows")
+def test_headless_process_exits_cleanly_on_sigterm_without_qtwidgets(tmp_path):
+    """Testar att --headless körs utan QtWidgets, läser spoolkatalogen och avslutar med kod 0 på SIGTERM."""
+    env = dict(os.environ, HOME=str(tmp_path), XDG_DATA_HOME=str(tmp_path / "data"), XDG_CONFIG_HOME=str(tmp_path / "config"),
+               PYTHONPATH=SRC_DIR, QT_QPA_PLATFORM="offscreen")
+    script = ("import sys, runpy; sys.argv = ['yt-dlp-gui'] + sys.argv[1:]\n"
+              "import atexit; atexit.register(lambda: sys.stderr.write(f\"QtWidgets={'PyQt6.QtWidgets' in sys.modules}\\n\"))\n"
+              "runpy.run_module('yt_dlp_gui_app.main', run_name='__main__')")
+    spool = tmp_path / "spool"
+    process = subprocess.Popen([sys.executable, "-c", script, "--headless", "--spool-dir", str(spool)],
+                               env=env, stderr=subprocess.PIPE, text=True)
+    watchdog = threading.Timer(30, process.kill) # Testet ska inte kunna hänga om processen aldrig startar
+    watchdog.start()
+    try:
+        for line in process.stderr:
+            if "Körs utan fönster" in line:
+                break
+        assert (spool / SPOOL_DONE_DIR).is_dir()
+        process.send_signal(signal.SIGTERM)
+        output = process.stderr.read()
+        assert process.wait(timeout=10) == 0
+    finally:
+        watchdog.cancel()
+        process.kill()
+    assert "fick SIGTERM" in output
+    assert "QtWidgets=False" in output
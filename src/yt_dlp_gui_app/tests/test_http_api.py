@@ -0,0 +1,159 @@
+import json
+import socket
+import threading
+import urllib.error
+import urllib.request
+import pytest
+from unittest.mock import MagicMock, patch
+from yt_dlp_gui_app.core.config import AppConfig
+from yt_dlp_gui_app.core.download_archive import DownloadArchive
+from yt_dlp_gui_app.core.http_api import HttpApiServer, HttpError, parse_request
+from yt_dlp_gui_app.core.info_cache import InfoCache
+from yt_dlp_gui_app.core.job_manager import JobManager
+from yt_dlp_gui_app.core.job_store import JobStore
+from yt_dlp_gui_app.core.log_store import JobLogStore
+from yt_dlp_gui_app.core.models import DownloadJob, JobPriority, JobStatus
+from yt_dlp_gui_app.core.negative_cache import NegativeCache
+from yt_dlp_gui_app.core.thumbnail_cache import ThumbnailCache
+
+@pytest.fixture
+def api(qapp, tmp_path):
+    """En HttpApiServer på en ledig port framför en JobManager vars jobb aldrig startar några processer."""
+    (tmp_path / "nedladdningar" / "musik").mkdir(parents=True)
+    config_manager = MagicMock()
+    config_manager.get_config.return_value = AppConfig(yt_dlp_path="/fake/yt-dlp", prefetch_metadata=False,
+                                                       expand_playlists=False, max_parallel_downloads=1,
+                                                       last_output_dir=str(tmp_path / "nedladdningar"), http_api_token="hemlig")
+    with patch('yt_dlp_gui_app.core.job_manager.YtDlpRunner'):
+        job_manager = JobManager(config_manager, job_store=JobStore(":memory:"), log_store=JobLogStore(str(tmp_path / "logs")),
+                                 info_cache=InfoCache(str(tmp_path / "info")), download_archive=DownloadArchive(str(tmp_path / "archive.txt")),
+                                 negative_cache=NegativeCache(str(tmp_path / "negative_cache.json")),
+                                 thumbnail_cache=ThumbnailCache(str(tmp_path / "thumbnails")))
+        server = HttpApiServer(job_manager, config_manager)
+        assert server.start(0)
+        yield server
+        server.stop()
+
+AUTH = {"Authorization": "Bearer hemlig", "Content-Type": "application/json"}
+
+def call(qtbot, server: HttpApiServer, method: str, path: str, body=None, headers=AUTH) -> tuple[int, dict]:
+    """Gör ett anrop från en annan tråd medan testets event-loop betjänar servern."""
+    result = {}
+
+    def run():
+        data = json.dumps(body).encode() if body is not None else None
+        request = urllib.request.Request(f"http://127.0.0.1:{server.port}{path}", data=data, method=method, headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=5) as response:
+                result["response"] = (response.status, json.loads(response.read()))
+        except urllib.error.HTTPError as e:
+            result["response"] = (e.code, json.loads(e.read()))
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    qtbot.waitUntil(lambda: not thread.is_alive(), timeout=5000)
+    return result["response"]
+
+def test_parse_request_waits_for_complete_body():
+    """Testar att en förfrågan tolkas först när hela kroppen har kommit och att för stora kroppar avvisas."""
+    head = b"POST /api/jobs/?x=1 HTTP/1.1\r\nContent-Length: 4\r\n\r\n"
+    assert parse_request(head + b"{}") is None
+    request = parse_request(head + b"{ }\n")
+    assert (request.method, request.path, request.query, request.body) == ("POST", "/api/jobs", {"x": "1"}, b"{ }\n")
+    with pytest.raises(HttpError) as error:
+        parse_request(b"POST / HTTP/1.1\r\nContent-Length: 99999999\r\n\r\n")
+    assert error.value.status == 413
+
+def test_submit_query_cancel_and_retry(api: HttpApiServer, qtbot):
+    """Testar bulkinlämning med alternativ och prioritet, frågor om jobb samt avbryt och försök igen."""
+    status, body = call(qtbot, api, "POST", "/api/jobs", {"urls": ["https://a.example/1", "https://a.example/2"],
+                                                          "priority": "urgent", "options": {"extract_audio": True},
+                                                          "args": ["--no-mtime"]})
+    assert status == 201 and len(body["job_ids"]) == 2
+    first, second = body["job_ids"]
+    job = api.job_manager.get_job(second)
+    assert job.priority == JobPriority.PRIORITY_URGENT
+    assert "-x" in job.args_list and job.args_list[-1] == "--no-mtime"
+
+    status, body = call(qtbot, api, "GET", "/api/jobs?container=queue")
+    assert status == 200 and [j["id"] for j in body["queue"]] == [first, second] and "history" not in body
+
+    status, body = call(qtbot, api, "POST", f"/api/jobs/{second}/cancel")
+    assert status == 202 and body["status"] == "STATUS_CANCELLED" and body["container"] == "history"
+
+    status, body = call(qtbot, api, "POST", f"/api/jobs/{second}/retry")
+    assert status == 202 and body["status"] == "STATUS_WAITING" and body["container"] == "queue"
+
+    status, body = call(qtbot, api, "DELETE", f"/api/jobs/{first}")
+    assert status == 400 # Jobbet körs och måste avbrytas först
+
+def test_errors_and_token(api: HttpApiServer, qtbot):
+    """Testar felkoder för okända jobb, ogiltiga inlämningar och token."""
+    assert call(qtbot, api, "GET", "/api/jobs/finns-inte")[0] == 404
+    assert call(qtbot, api, "POST", "/api/jobs", {"urls": []})[0] == 400
+    assert call(qtbot, api, "POST", "/api/jobs", {"urls": ["https://a.example/1"], "options": {"yt_dlp_path": "/bin/sh"}})[0] == 400
+    assert call(qtbot, api, "PUT", "/api/jobs")[0] == 405
+    assert call(qtbot, api, "GET", "/api/jobs", headers={})[0] == 401
+    assert call(qtbot, api, "GET", "/api/jobs", headers={"Authorization": "Bearer fel"})[0] == 401
+    api.config_manager.get_config().http_api_token = None
+    assert call(qtbot, api, "GET", "/api/jobs")[0] == 401 # Utan token är API:t stängt
+
+def test_browser_requests_and_free_form_args_are_rejected(api: HttpApiServer, qtbot):
+    """Testar att Origin, främmande Host, fel Content-Type och otillåtna yt-dlp-argument avvisas."""
+    submit = {"urls": ["https://a.example/1"]}
+    assert call(qtbot, api, "POST", "/api/jobs", submit, headers=AUTH | {"Origin": "https://evil.example"})[0] == 403
+    assert call(qtbot, api, "GET", "/api/jobs", headers=AUTH | {"Host": "evil.example:8765"})[0] == 403
+    assert call(qtbot, api, "GET", "/api/jobs", headers=AUTH | {"Host": "localhost:8765"})[0] == 200
+    assert call(qtbot, api, "POST", "/api/jobs", submit, headers=AUTH | {"Content-Type": "text/plain"})[0] == 415
+    status, body = call(qtbot, api, "POST", "/api/jobs", submit | {"args": ["--no-mtime", "--exec", "touch /tmp/x"]})
+    assert status == 400 and "--exec" in body["error"]
+    assert not api.job_manager.queue
+
+def test_output_dir_must_exist_inside_allowed_roots(api: HttpApiServer, qtbot, tmp_path):
+    """Testar att output_dir måste finnas och ligga i standardkatalogen eller i http_api_output_roots."""
+    submit = {"urls": ["https://a.example/1"]}
+    status, body = call(qtbot, api, "POST", "/api/jobs", submit | {"output_dir": str(tmp_path / "nedladdningar" / "musik")})
+    assert status == 201
+    assert api.job_manager.get_job(body["job_ids"][0]).output_path == str(tmp_path / "nedladdningar" / "musik")
+    assert call(qtbot, api, "POST", "/api/jobs", submit | {"output_dir": str(tmp_path / "finns-inte")})[0] == 400
+    assert call(qtbot, api, "POST", "/api/jobs", submit | {"output_dir": str(tmp_path / "nedladdningar" / "..")})[0] == 400
+    api.config_manager.get_config().http_api_output_roots = [str(tmp_path)]
+    assert call(qtbot, api, "POST", "/api/jobs", submit | {"output_dir": str(tmp_path)})[0] == 201
+
+def test_enabling_api_generates_token(api: HttpApiServer):
+    """Testar att en token skapas och sparas när API:t aktiveras utan en."""
+    config = api.config_manager.get_config()
+    config.http_api_enabled, config.http_api_port, config.http_api_token = True, api.port, None
+    api.apply_config()
+    assert config.http_api_token and len(config.http_api_token) >= 32
+    api.config_manager.save_config.assert_called_once()
+
+def test_event_stream_sends_batched_job_updates(api: HttpApiServer, qtbot):
+    """Testar att flera prenumeranter får ändrade jobb i en batch, där varje jobb bara förekommer en gång."""
+    job = DownloadJob(url="https://b.example/1", status=JobStatus.STATUS_RUNNING)
+    api.job_manager.registry.add(job, "queue")
+    received = [b"", b""]
+
+    def listen(index: int):
+        with socket.create_connection(("127.0.0.1", api.port), timeout=5) as client:
+            client.sendall(b"GET /api/events HTTP/1.1\r\nHost: localhost\r\nAuthorization: Bearer hemlig\r\n\r\n")
+            while b"event: jobs" not in received[index]:
+                chunk = client.recv(65536)
+                if not chunk:
+                    break
+                received[index] += chunk
+
+    threads = [threading.Thread(target=listen, args=(i,)) for i in range(2)]
+    for thread in threads:
+        thread.start()
+    qtbot.waitUntil(lambda: len(api._streams) == 2, timeout=5000)
+    for progress in (10.0, 20.0, 30.0):
+        job.progress = progress
+        api.job_manager.job_updated.emit(job.id)
+    qtbot.waitUntil(lambda: not any(thread.is_alive() for thread in threads), timeout=5000)
+    for data in received:
+        assert data.startswith(b"HTTP/1.1 200 OK") and b"text/event-stream" in data
+        assert b"event: counts" in data
+        payload = json.loads(data.split(b"event: jobs\ndata: ")[1].split(b"\n\n")[0])
+        assert [(j["id"], j["progress"]) for j in payload["jobs"]] == [(job.id, 30.0)]
+    qtbot.waitUntil(lambda: not api._streams, timeout=5000)
@@ -0,0 +1,42 @@
+import os
+import time
+from yt_dlp_gui_app.core.info_cache import InfoCache
+from yt_dlp_gui_app.core.url_utils import normalize_url
+
+def test_normalize_url():
+    """Testar att varianter av samma adress ger samma nyckel."""
+    assert normalize_url("https://youtu.be/abc?si=x") == normalize_url("https://www.youtube.com/watch?v=abc&feature=share")
+    assert normalize_url("https://www.youtube.com/shorts/abc") == "youtube:abc"
+    assert normalize_url("http://Example.com/a/?b=2&a=1&utm_source=x#frag") == "https://example.com/a?a=1&b=2"
+
+def test_ttl_and_invalidation(tmp_path):
+    """Testar att utgångna och ogiltigförklarade poster inte används."""
+    cache = InfoCache(str(tmp_path), ttl_seconds=60)
+    path = cache.put("https://youtu.be/abc", b'{"id": "abc"}')
+    assert cache.get("https://www.youtube.com/watch?v=abc") == path
+    assert cache.load("https://youtu.be/abc") == {"id": "abc"}
+
+    cache.invalidate("https://youtu.be/abc")
+    assert cache.get("https://youtu.be/abc") is None
+    assert not os.path.exists(path)
+
+    cache.put("https://example.com/v", b"{}")
+    cache.ttl_seconds = -1
+    assert cache.get("https://example.com/v") is None
+    assert len(cache) == 0
+
+def test_lru_eviction_survives_restart(tmp_path):
+    """Testar att de minst nyligen använda posterna tas bort först, även efter omstart."""
+    cache = InfoCache(str(tmp_path), max_bytes=25)
+    for name in "abc":
+        cache.put(f"https://example.com/{name}", b"0123456789")
+        time.sleep(0.01)
+    assert cache.get("https://example.com/a") is None
+    assert cache.get("https://example.com/b") and cache.get("https://example.com/c")
+
+    cache.get("https://example.com/b")
+    reopened = InfoCache(str(tmp_path), max_bytes=25)
+    assert reopened.total_bytes == 20
+    reopened.put("https://example.com/d", b"0123456789")
+    assert reopened.get("https://example.com/c") is None
+    assert reopened.get("https://example.com/b") is not None
@@ -0,0 +1,41 @@
+from yt_dlp_gui_app.core.job_groups import JobGroups, make_child_jobs
+from yt_dlp_gui_app.core.job_registry import JobRegistry
+from yt_dlp_gui_app.core.models import DownloadJob, JobStatus
+from yt_dlp_gui_app.core.url_utils import is_playlist_url
+
+def test_is_playlist_url():
+    """Testar igenkänningen av URL:er till spellistor och kanaler."""
+    assert is_playlist_url("https://www.youtube.com/playlist?list=PL123")
+    assert is_playlist_url("https://www.youtube.com/watch?v=abc&list=PL123")
+    assert is_playlist_url("https://www.youtube.com/@kanal/videos")
+    assert not is_playlist_url("https://www.youtube.com/watch?v=abc")
+    assert not is_playlist_url("url1")
+
+def test_group_progress_and_final_status():
+    """Testar att gruppens förlopp räknas ihop och att slutstatus sätts när alla barn är klara."""
+    parent = DownloadJob(url="lista", args_list=["-f", "best"], output_path="/tmp")
+    children = make_child_jobs(parent, [{"url": "a", "title": "A"}, {"url": "b"}])
+    assert [c.parent_id for c in children] == [parent.id, parent.id]
+    assert children[0].args_list == ["-f", "best"] and children[1].title == "N/A"
+
+    registry = JobRegistry()
+    groups = JobGroups()
+    registry.add(parent, JobRegistry.QUEUE)
+    for child in children:
+        registry.add(child, JobRegistry.QUEUE)
+    groups.add(parent.id, [c.id for c in children])
+
+    children[0].progress = 50.0
+    assert groups.summarize(parent.id, registry) == (25.0, None)
+
+    children[0].status = JobStatus.STATUS_COMPLETED
+    registry.move(children[0].id, JobRegistry.HISTORY)
+    assert groups.summarize(parent.id, registry) == (50.0, None)
+
+    children[1].status = JobStatus.STATUS_ERROR_YTDLP
+    registry.move(children[1].id, JobRegistry.HISTORY)
+    assert groups.summarize(parent.id, registry)[1] == JobStatus.STATUS_ERROR_PROCESS
+
+    groups.rebuild(registry.history)
+    assert groups.children(parent.id) == [c.id for c in children]
+    assert groups.summarize("tom", registry) == (0.0, JobStatus.STATUS_CANCELLED)
@@ -1,7 +1,19 @@
+import json
 import pytest
 from unittest.mock import MagicMock, patch
+from PyQt6.QtCore import QProcess
+from yt_dlp_gui_app.core.config import AppConfig
+from yt_dlp_gui_app.core.download_archive import DownloadArchive
+from yt_dlp_gui_app.core.info_cache import InfoCache
 from yt_dlp_gui_app.core.job_manager import JobManager
-from yt_dlp_gui_app.core.models import DownloadJob, JobStatus
+from yt_dlp_gui_app.core.job_store import JobStore
+from yt_dlp_gui_app.core.log_store import JobLogStore
+from yt_dlp_gui_app.core.negative_cache import NegativeCache
+from yt_dlp_gui_app.core.thumbnail_cache import ThumbnailCache
+from yt_dlp_gui_app.core.models import DownloadJob, JobPriority, JobStatus
+from yt_dlp_gui_app.core.output_parser import EventKind, OutputEvent, OutputParser, ProgressRecord
+from yt_dlp_gui_app.core.yt_dlp_runner import YtDlpRunner
+from yt_dlp_gui_app.core.yt_dlp_worker_pool import WorkerRunner
 
 @pytest.fixture
 def mock_config_manager():
@@ -9,12 +21,35 @@ def mock_config_manager():
     manager = MagicMock()
     manager.get_config.return_value.yt_dlp_path = "/fake/yt-dlp"
     manager.get_config.return_value.max_parallel_downloads = 2
+    manager.get_config.return_value.max_parallel_thumbnails = 2
+    manager.get_config.return_value.thumbnail_cache_max_mb = 32
+    manager.get_config.return_value.expand_playlists = True
+    manager.get_config.return_value.prefetch_metadata = False
+    manager.get_config.return_value.max_parallel_prefetches = 2
+    manager.get_config.return_value.skip_archived_downloads = True
+    manager.get_config.return_value.max_downloads_per_host = 0
+    manager.get_config.return_value.adaptive_concurrency = False
+    manager.get_config.return_value.adaptive_min_downloads = 1
+    manager.get_config.return_value.adaptive_max_downloads = 8
+    manager.get_config.return_value.host_download_limits = {}
+    manager.get_config.return_value.bandwidth_limit_kib = 0
+    manager.get_config.return_value.fair_share_by = "host"
+    manager.get_config.return_value.auto_retry = True
+    manager.get_config.return_value.retry_max_attempts = 2
+    manager.get_config.return_value.retry_base_delay_s = 5.0
+    manager.get_config.return_value.retry_max_delay_s = 60.0
+    manager.get_config.return_value.metrics_interval_s = 0
+    manager.get_config.return_value.metrics_dir = None
     return manager
 
 @pytest.fixture
-def job_manager(mock_config_manager, qapp):
+def job_manager(mock_config_manager, qapp, tmp_path):
     """Skapar en JobManager-instans för testning."""
-    return JobManager(config_manager=mock_config_manager)
+    return JobManager(config_manager=mock_config_manager, job_store=JobStore(":memory:"),
+                      log_store=JobLogStore(str(tmp_path / "logs")), info_cache=InfoCache(str(tmp_path / "info")),
+                      download_archive=DownloadArchive(str(tmp_path / "archive.txt")),
+                      negative_cache=NegativeCache(str(tmp_path / "negative_cache.json")),
+                      thumbnail_cache=ThumbnailCache(str(tmp_path / "thumbnails")))
 
 def test_add_job(job_manager: JobManager):
     """Testar att lägga till ett jobb i kön."""
@@ -26,6 +61,7 @@ def test_add_job(job_manager: JobManager):
 @patch('yt_dlp_gui_app.core.job_manager.YtDlpRunner')
 def test_start_next_jobs_in_queue(MockYtDlpRunner, job_manager: JobManager):
     """Testar att jobb startas från kön enligt max_parallel_downloads."""
+    MockYtDlpRunner.side_effect = lambda job, path, **kwargs: MagicMock(job=job)
     job1 = DownloadJob(url="url1")
     job2 = DownloadJob(url="url2")
     job3 = DownloadJob(url="url3")
@@ -68,3 +104,473 @@ def test_move_job_to_history(job_manager: JobManager):
     assert len(job_manager.history) == 1
     assert job_manager.history[0] == job
 
+def test_state_changes_are_persisted_per_job(job_manager: JobManager):
+    """Testar att ändrade jobb sparas i databasen utan en fullständig omskrivning."""
+    job = DownloadJob(url="url1")
+    job_manager.add_job(job)
+    assert job_manager.job_store.get_job(job.id).status == JobStatus.STATUS_WAITING
+
+    job.status = JobStatus.STATUS_COMPLETED
+    job_manager._move_job_to_history(job)
+    assert job_manager.job_store.find_by_status(JobStatus.STATUS_COMPLETED)[0].id == job.id
+
+    job_manager.remove_job(job.id)
+    assert job_manager.job_store.get_job(job.id) is None
+
+def test_load_jobs_migrates_legacy_json(job_manager: JobManager, tmp_path):
+    """Testar att en gammal jobs.json importeras till databasen en gång."""
+    legacy_path = tmp_path / "jobs.json"
+    queued = DownloadJob(url="url1", status=JobStatus.STATUS_RUNNING)
+    done = DownloadJob(url="url2", status=JobStatus.STATUS_COMPLETED)
+    legacy_done = dict(done.to_dict(), log="[download] 100%\n")
+    legacy_path.write_text(json.dumps({"queue": [queued.to_dict()], "history": [legacy_done]}), encoding="utf-8")
+
+    with patch.object(job_manager, 'get_jobs_path', return_value=str(legacy_path)), \
+         patch.object(job_manager, 'start_next_jobs_in_queue'):
+        job_manager.load_jobs()
+
+    assert [j.id for j in job_manager.queue] == [queued.id]
+    assert job_manager.queue[0].status == JobStatus.STATUS_WAITING
+    assert [j.id for j in job_manager.history] == [done.id]
+    assert not legacy_path.exists()
+    assert (tmp_path / "jobs.json.migrated").exists()
+    assert job_manager.job_store.find_by_url("url2")[0].id == done.id
+    assert job_manager.get_job_log(done.id) == "[download] 100%\n"
+    assert job_manager.history[0].log_ref == JobLogStore.log_ref_for(done.id)
+
+def test_output_is_written_to_log_store(job_manager: JobManager):
+    """Testar att processutdata hamnar i loggarkivet och inte i själva jobbet."""
+    job = DownloadJob(url="url1")
+    runner = MagicMock()
+    runner.job = job
+    job_manager.active_runners[job.id] = runner
+
+    job_manager._on_output_received(job.id, "[download] Destination: video.mp4\n")
+
+    assert "log" not in job.to_dict()
+    assert job.to_dict()["log_ref"] == JobLogStore.log_ref_for(job.id)
+    assert job_manager.get_job_log(job.id) == "[download] Destination: video.mp4\n"
+
+def test_log_tail_is_only_offered_while_job_runs(job_manager: JobManager):
+    """Testar att svansen från minnet bara ges för ett jobb som körs, utan att segmenten på disk läses."""
+    job = DownloadJob(url="url1")
+    job_manager.active_runners[job.id] = MagicMock(job=job)
+    job_manager._on_output_received(job.id, "[download] Destination: video.mp4\n")
+
+    with patch.object(job_manager.log_store, 'read') as read:
+        assert job_manager.get_job_log_tail(job.id) == "[download] Destination: video.mp4\n"
+    read.assert_not_called()
+    del job_manager.active_runners[job.id]
+    assert job_manager.get_job_log_tail(job.id) is None
+
+def test_parsed_events_update_job(job_manager: JobManager):
+    """Testar att tolkade förloppshändelser uppdaterar jobbets fält och fas."""
+    job = DownloadJob(url="url1", status=JobStatus.STATUS_RUNNING)
+    runner = MagicMock()
+    runner.job = job
+    job_manager.active_runners[job.id] = runner
+    parser = OutputParser()
+    _, events = parser.feed(
+        b"[download] Destination: video.f137.mp4\n"
+        b"[ytdlpgui-progress] downloading|500|1000|NA|250.0|2\n"
+        b'[Merger] Merging formats into "video.mp4"\n')
+
+    job_manager._on_events_parsed(job.id, events)
+
+    assert job.progress == 50.0
+    assert (job.downloaded_bytes, job.total_bytes, job.speed, job.eta) == (500, 1000, 250.0, 2)
+    assert job.final_filename == "video.mp4"
+    assert job.title == "video"
+    assert job.status == JobStatus.STATUS_MERGING
+
+@patch('yt_dlp_gui_app.core.job_manager.YtDlpRunner')
+def test_added_job_is_dispatched_without_polling(MockYtDlpRunner, job_manager: JobManager, qtbot):
+    """Testar att ett nytt jobb startas direkt i nästa varv av event-loopen."""
+    MockYtDlpRunner.side_effect = lambda job, path, **kwargs: MagicMock(job=job)
+    job = DownloadJob(url="url1")
+    job_manager.add_job(job)
+    assert job.status == JobStatus.STATUS_WAITING
+
+    qtbot.waitUntil(lambda: job.status == JobStatus.STATUS_STARTING, timeout=1000)
+    assert job_manager.dispatch_latency_ms < 10
+
+@patch('yt_dlp_gui_app.core.job_manager.YtDlpRunner')
+def test_finished_job_refills_slot(MockYtDlpRunner, job_manager: JobManager):
+    """Testar att en ledig plats fylls direkt när ett jobb blir klart."""
+    MockYtDlpRunner.side_effect = lambda job, path, **kwargs: MagicMock(job=job)
+    jobs = [DownloadJob(url=f"url{i}") for i in range(3)]
+    for job in jobs:
+        job_manager.add_job(job)
+    job_manager.start_next_jobs_in_queue()
+    assert jobs[2].status == JobStatus.STATUS_WAITING
+
+    job_manager._on_process_finished(jobs[0].id, 0, QProcess.ExitStatus.NormalExit)
+
+    assert jobs[0].status == JobStatus.STATUS_COMPLETED
+    assert jobs[2].status == JobStatus.STATUS_STARTING
+    assert set(job_manager.active_runners) == {jobs[1].id, jobs[2].id}
+
+@patch('yt_dlp_gui_app.core.job_manager.YtDlpRunner')
+def test_removed_or_cancelled_jobs_are_not_dispatched(MockYtDlpRunner, job_manager: JobManager):
+    """Testar att borttagna och avbrutna väntande jobb hoppas över vid utdelning."""
+    MockYtDlpRunner.side_effect = lambda job, path, **kwargs: MagicMock(job=job)
+    removed, cancelled, kept = DownloadJob(url="a"), DownloadJob(url="b"), DownloadJob(url="c")
+    for job in (removed, cancelled, kept):
+        job_manager.add_job(job)
+    job_manager.remove_job(removed.id)
+    job_manager.cancel_job(cancelled.id)
+
+    job_manager.start_next_jobs_in_queue()
+
+    assert list(job_manager.active_runners) == [kept.id]
+
+def test_prefetched_metadata_fills_waiting_job(job_manager: JobManager, mock_config_manager):
+    """Testar att förhämtad metadata fylls i för väntande jobb och att hämtningen avbryts vid start."""
+    mock_config_manager.get_config.return_value.prefetch_metadata = True
+    mock_config_manager.get_config.return_value.max_parallel_downloads = 0
+    job_manager.metadata_prefetcher = MagicMock()
+    job = DownloadJob(url="url1")
+    job_manager.add_job(job)
+    job_manager.metadata_prefetcher.submit.assert_called_once_with(job, "/fake/yt-dlp")
+
+    job_manager._on_metadata_ready(job.id, {"title": "Titel", "duration": "00:01:00",
+                                            "filesize_estimate": 1200, "format_id": "18"})
+    assert (job.title, job.duration, job.filesize_estimate, job.format_id) == ("Titel", "00:01:00", 1200, "18")
+
+    with patch('yt_dlp_gui_app.core.job_manager.YtDlpRunner'):
+        job_manager._start_job(job)
+    job_manager.metadata_prefetcher.cancel.assert_called_with(job.id)
+
+def test_playlist_is_expanded_into_child_jobs(job_manager: JobManager, mock_config_manager):
+    """Testar att en spellista delas upp i ett jobb per video och att gruppen avslutas med barnen."""
+    mock_config_manager.get_config.return_value.max_parallel_downloads = 0
+    job_manager.metadata_prefetcher = MagicMock()
+    parent = DownloadJob(url="https://www.youtube.com/playlist?list=PL1")
+    job_manager.add_job(parent)
+    assert parent.status == JobStatus.STATUS_EXPANDING
+    assert parent.id not in job_manager.ready_queue
+    job_manager.metadata_prefetcher.submit.assert_called_once_with(parent, "/fake/yt-dlp", first=True)
+
+    job_manager._on_metadata_ready(parent.id, {"title": "Lista", "entries": [
+        {"url": "https://example.com/1", "title": "Ett", "duration": "00:01:00"},
+        {"url": "https://example.com/2", "title": "Två", "duration": "00:02:00"}]})
+    assert parent.status == JobStatus.STATUS_GROUP
+    assert [job.title for job in job_manager.queue] == ["Lista", "Ett", "Två"]
+    children = job_manager.queue[1:]
+    assert all(child.id in job_manager.ready_queue for child in children)
+
+    children[0].status = JobStatus.STATUS_COMPLETED
+    job_manager._move_job_to_history(children[0])
+    assert parent.progress == 50.0
+    job_manager.cancel_job(parent.id)
+    assert job_manager.queue == []
+    assert job_manager.history[0] is parent
+    assert parent.status == JobStatus.STATUS_CANCELLED
+
+def test_playlist_selection_args_and_empty_playlists_are_not_expanded(job_manager: JobManager, mock_config_manager):
+    """Testar att --no-playlist och urval av poster hindrar expansion och att en tom spellista laddas ner som ett jobb."""
+    mock_config_manager.get_config.return_value.max_parallel_downloads = 0
+    job_manager.metadata_prefetcher = MagicMock()
+    mix = DownloadJob(url="https://www.youtube.com/watch?v=abc&list=RDabc", args_list=["--no-playlist"])
+    job_manager.add_job(mix)
+    assert mix.status == JobStatus.STATUS_WAITING and mix.id in job_manager.ready_queue
+
+    selected = DownloadJob(url="https://www.youtube.com/playlist?list=PL2", args_list=["--playlist-items", "1:3"])
+    job_manager.add_job(selected)
+    job_manager._on_metadata_ready(selected.id, {"title": "Lista", "entries": [{"url": "https://example.com/1"}]})
+    assert selected.status == JobStatus.STATUS_WAITING and len(job_manager.queue) == 2
+
+    empty = DownloadJob(url="https://www.youtube.com/playlist?list=PL3")
+    job_manager.add_job(empty)
+    assert empty.status == JobStatus.STATUS_EXPANDING
+    job_manager._on_metadata_ready(empty.id, {"title": "Tom", "entries": []})
+    assert empty.status == JobStatus.STATUS_WAITING and empty.id in job_manager.ready_queue
+    assert empty.id not in job_manager.groups and len(job_manager.queue) == 3
+
+def test_failed_expansion_downloads_whole_url(job_manager: JobManager, mock_config_manager):
+    """Testar att en spellista som inte kunde expanderas laddas ner som ett enda jobb."""
+    mock_config_manager.get_config.return_value.max_parallel_downloads = 0
+    job_manager.metadata_prefetcher = MagicMock()
+    job = DownloadJob(url="https://www.youtube.com/playlist?list=PL1")
+    job_manager.add_job(job)
+    job_manager._on_prefetch_failed(job.id, "ERROR")
+    assert job.status == JobStatus.STATUS_WAITING
+    assert job.id in job_manager.ready_queue
+
+def test_cached_info_json_is_used_and_invalidated_on_failure(job_manager: JobManager):
+    """Testar att ett jobb med cachad info-JSON startas med --load-info-json och att posten tas bort vid fel."""
+    job = DownloadJob(url="https://www.youtube.com/watch?v=abc")
+    path = job_manager.info_cache.put("https://youtu.be/abc", b'{"id": "abc"}')
+    with patch('yt_dlp_gui_app.core.job_manager.YtDlpRunner') as MockYtDlpRunner:
+        MockYtDlpRunner.return_value.job = job
+        job_manager.add_job(job)
+        job_manager.start_next_jobs_in_queue()
+        MockYtDlpRunner.assert_called_once_with(job, "/fake/yt-dlp", info_json_path=path, rate_limit=None)
+        job_manager._on_process_finished(job.id, 1, QProcess.ExitStatus.NormalExit)
+    assert job.status == JobStatus.STATUS_ERROR_PROCESS
+    assert job_manager.info_cache.get(job.url) is None
+
+def test_cached_info_json_is_not_used_with_extraction_args(job_manager: JobManager):
+    """Testar att ett jobb med cookies eller proxy extraherar själv i stället för att läsa anonymt hämtad info-JSON."""
+    job_manager.info_cache.put("https://youtu.be/abc", b'{"id": "abc"}')
+    job = DownloadJob(url="https://www.youtube.com/watch?v=abc", args_list=["--proxy", "http://proxy.example:3128"])
+    with patch('yt_dlp_gui_app.core.job_manager.YtDlpRunner') as MockYtDlpRunner:
+        MockYtDlpRunner.return_value.job = job
+        job_manager.add_job(job)
+        job_manager.start_next_jobs_in_queue()
+        MockYtDlpRunner.assert_called_once_with(job, "/fake/yt-dlp", info_json_path=None, rate_limit=None)
+
+def test_archived_video_is_not_started(job_manager: JobManager):
+    """Testar att en video i nedladdningsarkivet inte startar någon process, men att "Försök igen" laddar ner den."""
+    job = DownloadJob(url="https://youtu.be/abc", args_list=["-f", "best"], output_path="/tmp/video")
+    job_manager.download_archive.add(job_manager._archive_key(job))
+    with patch('yt_dlp_gui_app.core.job_manager.YtDlpRunner') as MockYtDlpRunner:
+        MockYtDlpRunner.side_effect = lambda job, path, **kwargs: MagicMock(job=job)
+        job_manager.add_job(job)
+        job_manager.start_next_jobs_in_queue()
+        MockYtDlpRunner.assert_not_called()
+        assert job.status == JobStatus.STATUS_ALREADY_DOWNLOADED
+        assert job_manager.history == [job]
+
+        job_manager.retry_job(job.id)
+        assert MockYtDlpRunner.call_count == 1 and job.id in job_manager.active_runners
+
+def test_archive_tells_output_variants_apart(job_manager: JobManager):
+    """Testar att samma video som ljud eller i en annan katalog varken hoppas över eller väntar på videojobbet."""
+    video = DownloadJob(url="https://youtu.be/abc", args_list=["-f", "best"], output_path="/tmp/video")
+    job_manager.download_archive.add(job_manager._archive_key(video))
+    audio = DownloadJob(url="https://www.youtube.com/watch?v=abc", args_list=["-f", "best", "-x"], output_path="/tmp/video")
+    elsewhere = DownloadJob(url="https://youtu.be/abc", args_list=["-f", "best"], output_path="/tmp/annan")
+    throttled = DownloadJob(url="https://youtu.be/abc", args_list=["-f", "best", "--limit-rate", "1M"], output_path="/tmp/video")
+    assert job_manager._archive_key(throttled) == job_manager._archive_key(video)
+    with patch('yt_dlp_gui_app.core.job_manager.YtDlpRunner') as MockYtDlpRunner:
+        MockYtDlpRunner.side_effect = lambda job, path, **kwargs: MagicMock(job=job)
+        job_manager.add_job(audio)
+        job_manager.add_job(elsewhere)
+        job_manager.start_next_jobs_in_queue()
+    assert set(job_manager.active_runners) == {audio.id, elsewhere.id}
+    assert not job_manager._coalesced
+
+def test_in_flight_duplicate_follows_running_job(job_manager: JobManager, tmp_path):
+    """Testar att en dubblett av ett körande jobb väntar på det och sedan arkiveras som nedladdad."""
+    first = DownloadJob(url="https://www.youtube.com/watch?v=abc")
+    second = DownloadJob(url="https://youtu.be/abc")
+    with patch('yt_dlp_gui_app.core.job_manager.YtDlpRunner') as MockYtDlpRunner:
+        MockYtDlpRunner.side_effect = lambda job, path, **kwargs: MagicMock(job=job)
+        job_manager.add_job(first)
+        job_manager.add_job(second)
+        job_manager.start_next_jobs_in_queue()
+        assert MockYtDlpRunner.call_count == 1
+        assert second.status == JobStatus.STATUS_WAITING
+
+        first.final_filename = "video.mp4"
+        job_manager._on_process_finished(first.id, 0, QProcess.ExitStatus.NormalExit)
+    assert second.status == JobStatus.STATUS_ALREADY_DOWNLOADED
+    assert second.final_filename == "video.mp4"
+    key = job_manager._archive_key(first)
+    assert key.startswith("youtube abc ") and key == job_manager._archive_key(second)
+    assert key in job_manager.download_archive
+    assert (tmp_path / "archive.txt").read_text() == f"{key}\n"
+
+    assert job_manager.rebuild_download_archive() == 1
+
+def test_worker_pool_backend_falls_back_to_subprocess(job_manager: JobManager):
+    """Testar att jobb körs i arbetsprocesserna om de är valda, och annars med yt-dlp-programmet."""
+    job_manager.config_manager.get_config.return_value.runner_backend = "worker_pool"
+    job = DownloadJob(url="https://example.com/v")
+    job_manager.worker_pool.available = True
+    assert isinstance(job_manager._create_runner(job, "/fake/yt-dlp", None), WorkerRunner)
+    job_manager.worker_pool.available = False
+    assert isinstance(job_manager._create_runner(job, "/fake/yt-dlp", None), YtDlpRunner)
+
+def test_per_host_limit_and_bandwidth_budget(job_manager: JobManager):
+    """Testar att en mättad webbplats hoppas över och att bandbreddsbudgeten delas mellan jobben."""
+    config = job_manager.config_manager.get_config.return_value
+    config.max_parallel_downloads = 3
+    config.max_downloads_per_host = 1
+    config.bandwidth_limit_kib = 3000
+    jobs = [DownloadJob(url="https://youtu.be/a"), DownloadJob(url="https://youtu.be/b"), DownloadJob(url="https://vimeo.com/1")]
+    with patch('yt_dlp_gui_app.core.job_manager.YtDlpRunner') as MockYtDlpRunner:
+        MockYtDlpRunner.side_effect = lambda job, path, **kwargs: MagicMock(job=job, rate_limit=kwargs["rate_limit"])
+        for job in jobs:
+            job_manager.add_job(job)
+        job_manager.start_next_jobs_in_queue()
+        assert set(job_manager.active_runners) == {jobs[0].id, jobs[2].id}
+        assert MockYtDlpRunner.call_args_list[0].kwargs["rate_limit"] == 1000 * 1024
+        job_manager.active_runners[jobs[0].id].set_rate_limit.assert_called_with(1500 * 1024)
+
+        job_manager._on_process_finished(jobs[0].id, 0, QProcess.ExitStatus.NormalExit)
+        assert jobs[1].id in job_manager.active_runners
+
+def test_default_config_uses_every_slot_for_one_host(job_manager: JobManager):
+    """Testar att standardinställningarna inte begränsar antalet samtidiga nedladdningar från samma webbplats."""
+    config = job_manager.config_manager.get_config.return_value
+    config.max_parallel_downloads = AppConfig.max_parallel_downloads
+    config.max_downloads_per_host = AppConfig.max_downloads_per_host
+    with patch('yt_dlp_gui_app.core.job_manager.YtDlpRunner') as MockYtDlpRunner:
+        MockYtDlpRunner.side_effect = lambda job, path, **kwargs: MagicMock(job=job)
+        for i in range(AppConfig.max_parallel_downloads + 1):
+            job_manager.add_job(DownloadJob(url=f"https://youtu.be/{i}"))
+        job_manager.start_next_jobs_in_queue()
+        assert len(job_manager.active_runners) == AppConfig.max_parallel_downloads
+
+def test_import_while_jobs_are_active(job_manager: JobManager, tmp_path):
+    """Testar att en import under pågående nedladdningar inte kraschar utdelningen, som läser de aktiva jobben."""
+    config = job_manager.config_manager.get_config.return_value
+    config.max_parallel_downloads = 6
+    config.max_downloads_per_host = 2
+    config.bandwidth_limit_kib = 600
+    imported = [DownloadJob(url=f"https://vimeo.com/{i}") for i in range(3)]
+    (tmp_path / "import.json").write_text(json.dumps({"queue": [job.to_dict() for job in imported], "history": []}))
+    with patch('yt_dlp_gui_app.core.job_manager.YtDlpRunner') as MockYtDlpRunner:
+        MockYtDlpRunner.side_effect = lambda job, path, **kwargs: MagicMock(job=job)
+        for i in range(5):
+            job_manager.add_job(DownloadJob(url=f"https://site{i}.example/v"))
+        job_manager.start_next_jobs_in_queue()
+        assert len(job_manager.active_runners) == 5
+
+        job_manager.import_jobs(str(tmp_path / "import.json"))
+        assert len(job_manager.active_runners) == 6
+        assert sum(runner.job.url.startswith("https://vimeo.com/") for runner in job_manager.active_runners.values()) == 1
+
+def test_adaptive_concurrency_sets_slots(job_manager: JobManager):
+    """Testar att automatiskt läge styr antalet platser och räknar avslutade jobb."""
+    job_manager.config_manager.get_config.return_value.adaptive_concurrency = True
+    job_manager.concurrency.limit = 1
+    jobs = [DownloadJob(url=f"url{i}") for i in range(3)]
+    with patch('yt_dlp_gui_app.core.job_manager.YtDlpRunner') as MockYtDlpRunner:
+        MockYtDlpRunner.side_effect = lambda job, path, **kwargs: MagicMock(job=job)
+        for job in jobs:
+            job_manager.add_job(job)
+        job_manager.start_next_jobs_in_queue()
+        assert len(job_manager.active_runners) == 1
+        jobs[0].speed = 2048.0
+        assert job_manager._sample_throughput() == (2048.0, 1, 2)
+
+        job_manager.concurrency.evaluate(*job_manager._sample_throughput())
+        assert job_manager.concurrency.limit == 2
+        job_manager.start_next_jobs_in_queue()
+        assert len(job_manager.active_runners) == 2
+
+        job_manager._on_process_finished(jobs[0].id, 1, QProcess.ExitStatus.NormalExit)
+    assert job_manager.concurrency._failed == 1
+
+def test_throughput_sample_after_import_during_downloads(job_manager: JobManager, tmp_path):
+    """Testar att hastigheten för aktiva jobb mäts även när en import har ersatt jobben i registret."""
+    (tmp_path / "import.json").write_text(json.dumps({"queue": [], "history": []}))
+    with patch('yt_dlp_gui_app.core.job_manager.YtDlpRunner') as MockYtDlpRunner:
+        MockYtDlpRunner.side_effect = lambda job, path, **kwargs: MagicMock(job=job)
+        job = DownloadJob(url="url1")
+        job_manager.add_job(job)
+        job_manager.start_next_jobs_in_queue()
+        job.speed = 1024.0
+        job_manager.import_jobs(str(tmp_path / "import.json"))
+        assert job_manager._sample_throughput() == (1024.0, 1, 0)
+
+def test_priority_and_manual_order_decide_dispatch(job_manager: JobManager):
+    """Testar att ändrad prioritet och omsortering av kön styr vilket jobb som startas härnäst."""
+    job_manager.config_manager.get_config.return_value.max_parallel_downloads = 1
+    jobs = [DownloadJob(url=f"https://example.com/{i}") for i in range(4)]
+    for job in jobs:
+        job_manager.add_job(job)
+    job_manager.set_priority([jobs[3].id], JobPriority.PRIORITY_URGENT)
+    assert jobs[3].priority == JobPriority.PRIORITY_URGENT
+    assert job_manager.job_store.load_jobs()[0][3].priority == JobPriority.PRIORITY_URGENT
+
+    job_manager.move_jobs([jobs[2].id], 0)
+    assert job_manager.queue == [jobs[2], jobs[0], jobs[1], jobs[3]]
+    assert [job.id for job in job_manager.job_store.load_jobs()[0]] == [job.id for job in job_manager.queue]
+    with patch('yt_dlp_gui_app.core.job_manager.YtDlpRunner') as MockYtDlpRunner:
+        MockYtDlpRunner.side_effect = lambda job, path, **kwargs: MagicMock(job=job)
+        started = []
+        for _ in range(3):
+            job_manager.start_next_jobs_in_queue()
+            started.extend(job_manager.active_runners)
+            job_manager._on_process_finished(started[-1], 0, QProcess.ExitStatus.NormalExit)
+    assert started == [jobs[3].id, jobs[2].id, jobs[0].id]
+
+def fail_with(job_manager: JobManager, job: DownloadJob, message: str) -> None:
+    job_manager._on_events_parsed(job.id, [OutputEvent(EventKind.ERROR, value=message)])
+    job_manager._on_process_finished(job.id, 1, QProcess.ExitStatus.NormalExit)
+
+def test_transient_failure_is_retried_with_host_backoff(job_manager: JobManager):
+    """Testar att ett tillfälligt fel schemalägger ett nytt försök och pausar webbplatsen under väntetiden."""
+    job = DownloadJob(url="https://vimeo.com/1")
+    other = DownloadJob(url="https://vimeo.com/2")
+    with patch('yt_dlp_gui_app.core.job_manager.YtDlpRunner') as MockYtDlpRunner:
+        MockYtDlpRunner.side_effect = lambda job, path, **kwargs: MagicMock(job=job)
+        job_manager.config_manager.get_config.return_value.max_parallel_downloads = 1
+        job_manager.add_job(job)
+        job_manager.add_job(other)
+        job_manager.start_next_jobs_in_queue()
+        fail_with(job_manager, job, "[vimeo] 1: Unable to download webpage: HTTP Error 429: Too Many Requests")
+
+        assert job.status == JobStatus.STATUS_RETRY_SCHEDULED
+        assert (job.attempts, job.last_error) == (1, "HTTP 429")
+        assert job in job_manager.queue and job_manager.retry_timer.isActive()
+        # Webbplatsen väntar, så nästa jobb mot den startas inte heller.
+        assert other.status == JobStatus.STATUS_WAITING and not job_manager.active_runners
+
+        job_manager.config_manager.get_config.return_value.max_parallel_downloads = 2
+        job_manager.host_backoff._until["vimeo.com"] = 0.0
+        job.retry_at = 0.0
+        job_manager._on_retry_timer()
+        job_manager.start_next_jobs_in_queue()
+        assert set(job_manager.active_runners) == {job.id, other.id}
+        fail_with(job_manager, job, "Read timed out")
+        assert job.status == JobStatus.STATUS_RETRY_SCHEDULED and job.attempts == 2
+
+        job.retry_at = 0.0
+        job_manager.host_backoff._until["vimeo.com"] = 0.0
+        job_manager._on_retry_timer()
+        job_manager.start_next_jobs_in_queue()
+        fail_with(job_manager, job, "Read timed out")
+    # Försöken är slut.
+    assert job.status == JobStatus.STATUS_ERROR_PROCESS and job in job_manager.history
+
+def test_permanent_failure_is_cached_and_not_restarted(job_manager: JobManager):
+    """Testar att ett permanent fel hamnar i cachen, stoppar nya jobb för videon och kan åsidosättas manuellt."""
+    job = DownloadJob(url="https://youtu.be/abc")
+    with patch('yt_dlp_gui_app.core.job_manager.YtDlpRunner') as MockYtDlpRunner:
+        MockYtDlpRunner.side_effect = lambda job, path, **kwargs: MagicMock(job=job)
+        job_manager.add_job(job)
+        job_manager.start_next_jobs_in_queue()
+        fail_with(job_manager, job, "[youtube] abc: Private video. Sign in if you've been granted access")
+        assert job.status == JobStatus.STATUS_ERROR_PERMANENT and job in job_manager.history
+        assert job_manager.negative_cache.reason_for("youtube abc") == "privat video"
+
+        again = DownloadJob(url="https://www.youtube.com/watch?v=abc")
+        job_manager.add_job(again)
+        job_manager.start_next_jobs_in_queue()
+        assert MockYtDlpRunner.call_count == 1
+        assert again.status == JobStatus.STATUS_ERROR_PERMANENT
+
+        job_manager.retry_job(job.id)
+        assert "youtube abc" not in job_manager.negative_cache
+        assert MockYtDlpRunner.call_count == 2
+
+def test_phase_timings_and_metrics_export(job_manager: JobManager, tmp_path):
+    """Testar att fastider och överföring mäts per jobb och att sammanställningen skrivs som Prometheus och JSON."""
+    job = DownloadJob(url="https://example.com/v")
+    with patch('yt_dlp_gui_app.core.job_manager.YtDlpRunner') as MockYtDlpRunner:
+        MockYtDlpRunner.side_effect = lambda job, path, **kwargs: MagicMock(job=job)
+        job_manager.add_job(job)
+        job_manager.start_next_jobs_in_queue()
+        progress = lambda status, done, speed: OutputEvent(EventKind.PROGRESS, progress=ProgressRecord(status, done, 100, speed))
+        job_manager._on_events_parsed(job.id, [progress("downloading", 60, 30.0), progress("finished", 100, 50.0),
+                                               progress("downloading", 10, 80.0), progress("finished", 40, None)])
+        job_manager._on_events_parsed(job.id, [OutputEvent(EventKind.MERGING)])
+        job_manager._on_process_finished(job.id, 0, QProcess.ExitStatus.NormalExit)
+
+    assert list(job.timings) == ["queued", "started", "first_byte", "download_done", "postprocess", "finished"]
+    assert (job.bytes_transferred, job.peak_speed) == (140, 80.0)
+    snapshot = job_manager.metrics_snapshot()
+    assert snapshot["jobs_finished"] == {"completed": 1}
+    assert snapshot["bytes_downloaded"] == 140 and snapshot["jobs_per_hour"] == 1
+    assert snapshot["queue_wait_seconds"]["p50"] is not None
+
+    job_manager.config_manager.get_config.return_value.metrics_dir = str(tmp_path / "metrics")
+    job_manager.export_metrics()
+    prom = (tmp_path / "metrics" / "metrics.prom").read_text(encoding="utf-8")
+    assert 'ytdlpgui_jobs_finished_total{status="completed"} 1' in prom
+    assert json.loads((tmp_path / "metrics" / "metrics.json").read_text())["bytes_downloaded"] == 140
@@ -0,0 +1,70 @@
+import random
+from yt_dlp_gui_app.core.job_registry import JobRegistry
+from yt_dlp_gui_app.core.models import DownloadJob
+
+def test_lookup_by_id_container_and_row():
+    """Testar att jobb, behållare och rad kan slås upp direkt via id."""
+    registry = JobRegistry()
+    jobs = [DownloadJob(url=f"url{i}") for i in range(3)]
+    for job in jobs:
+        registry.add(job, JobRegistry.QUEUE)
+
+    assert registry.get(jobs[1].id) is jobs[1]
+    assert registry.location_of(jobs[2].id) == (JobRegistry.QUEUE, 2)
+    assert registry.get("okänt") is None
+    assert registry.location_of("okänt") is None
+
+def test_rows_stay_consistent_through_moves_and_removals():
+    """Testar att radindexet följer med vid flytt, borttagning och insättning först."""
+    registry = JobRegistry()
+    jobs = [DownloadJob(url=f"url{i}") for i in range(4)]
+    for job in jobs:
+        registry.add(job, JobRegistry.QUEUE)
+    old = DownloadJob(url="old")
+    registry.add(old, JobRegistry.HISTORY)
+
+    registry.move(jobs[1].id, JobRegistry.HISTORY, 0)
+    registry.remove(jobs[0].id)
+
+    assert [j.id for j in registry.queue] == [jobs[2].id, jobs[3].id]
+    assert [j.id for j in registry.history] == [jobs[1].id, old.id]
+    for container, items in ((JobRegistry.QUEUE, registry.queue), (JobRegistry.HISTORY, registry.history)):
+        for row, job in enumerate(items):
+            assert registry.location_of(job.id) == (container, row)
+    assert jobs[0].id not in registry
+
+def test_clear_and_reset():
+    """Testar att rensning och återställning håller indexen i synk med listorna."""
+    registry = JobRegistry()
+    queued, done = DownloadJob(url="q"), DownloadJob(url="h")
+    registry.reset([queued], [done])
+    assert registry.clear(JobRegistry.HISTORY) == [done]
+    assert registry.get(done.id) is None
+    assert registry.location_of(queued.id) == (JobRegistry.QUEUE, 0)
+    assert len(registry) == 1
+
+def test_rows_match_lists_through_random_inserts_and_removals():
+    """Testar att raderna stämmer med listorna efter slumpade insättningar och borttagningar först, mitt i och sist."""
+    rng = random.Random(6)
+    registry = JobRegistry()
+    jobs = []
+    for step in range(2000):
+        container = rng.choice((JobRegistry.QUEUE, JobRegistry.HISTORY))
+        if jobs and rng.random() < 0.45:
+            job = rng.choice(jobs)
+            if rng.random() < 0.5:
+                registry.remove(job.id)
+                jobs.remove(job)
+            else:
+                registry.move(job.id, container, rng.choice((0, None, rng.randrange(len(jobs)))))
+        else:
+            job = DownloadJob(url=f"url{step}")
+            registry.add(job, container, rng.choice((0, None, rng.randrange(len(jobs) + 1))))
+            jobs.append(job)
+        for job in rng.sample(jobs, min(3, len(jobs))):
+            container = registry.container_of(job.id)
+            items = registry.queue if container == JobRegistry.QUEUE else registry.history
+            assert registry.row_of(job.id) == items.index(job)
+    for container, items in ((JobRegistry.QUEUE, registry.queue), (JobRegistry.HISTORY, registry.history)):
+        for row, job in enumerate(items):
+            assert registry.location_of(job.id) == (container, row)
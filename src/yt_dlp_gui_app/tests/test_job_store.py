@@ -0,0 +1,76 @@
+from yt_dlp_gui_app.core.job_store import JobStore
+from yt_dlp_gui_app.core.models import DownloadJob, JobStatus
+
+def test_save_and_load_preserves_order(tmp_path):
+    """Testar att kön läses äldst först och historiken nyast först."""
+    store = JobStore(str(tmp_path / "jobs.db"))
+    q1, q2 = DownloadJob(url="q1"), DownloadJob(url="q2")
+    h1, h2 = DownloadJob(url="h1"), DownloadJob(url="h2")
+    store.sync([q1, q2], [h2, h1])
+    store.close()
+
+    queue, history = JobStore(str(tmp_path / "jobs.db")).load_jobs()
+    assert [j.url for j in queue] == ["q1", "q2"]
+    assert [j.url for j in history] == ["h2", "h1"]
+
+def test_moved_job_ends_up_first_in_history():
+    """Testar att ett jobb som flyttas till historiken hamnar överst."""
+    store = JobStore(":memory:")
+    old, new = DownloadJob(url="old"), DownloadJob(url="new")
+    store.save_job(old, JobStore.HISTORY)
+    store.save_job(new, JobStore.QUEUE)
+    store.save_job(new, JobStore.HISTORY)
+    _, history = store.load_jobs()
+    assert [j.url for j in history] == ["new", "old"]
+
+def test_unchanged_jobs_are_not_rewritten():
+    """Testar att oförändrade rader hoppas över vid synkronisering."""
+    store = JobStore(":memory:")
+    job = DownloadJob(url="url1")
+    store.sync([job], [])
+    changes = store.conn.total_changes
+    store.sync([job], [])
+    assert store.conn.total_changes == changes
+
+    job.status = JobStatus.STATUS_RUNNING
+    store.sync([job], [])
+    assert store.conn.total_changes == changes + 1
+    assert store.find_by_status(JobStatus.STATUS_RUNNING)[0].id == job.id
+
+def test_clear_only_affects_container():
+    """Testar att rensning av historiken lämnar kön orörd."""
+    store = JobStore(":memory:")
+    store.sync([DownloadJob(url="q")], [DownloadJob(url="h")])
+    store.clear(JobStore.HISTORY)
+    queue, history = store.load_jobs()
+    assert [j.url for j in queue] == ["q"]
+    assert history == []
+
+def test_journal_is_replayed_after_crash(tmp_path):
+    """Testar att journalförda ändringar återställs även om de aldrig vikts in."""
+    db_path = str(tmp_path / "jobs.db")
+    store = JobStore(db_path)
+    queued, removed = DownloadJob(url="q"), DownloadJob(url="removed")
+    store.sync([queued, removed], [])
+    store.compact()
+    queued.status = JobStatus.STATUS_RUNNING
+    store.save_job(queued, JobStore.QUEUE)
+    store.delete_job(removed.id)
+    assert store.journal_length() == 2
+    # Simulera en krasch: anslutningen stängs utan att journalen viks in.
+    store.conn.close()
+
+    recovered = JobStore(db_path)
+    queue, _ = recovered.load_jobs()
+    assert [(j.id, j.status) for j in queue] == [(queued.id, JobStatus.STATUS_RUNNING)]
+    assert recovered.journal_length() == 0
+
+def test_background_compaction(tmp_path, qapp):
+    """Testar att komprimering i bakgrunden viker in journalen i ögonblicksbilden."""
+    from PyQt6.QtCore import QThreadPool
+    store = JobStore(str(tmp_path / "jobs.db"))
+    store.sync([DownloadJob(url="q")], [DownloadJob(url="h")])
+    store.compact_in_background()
+    QThreadPool.globalInstance().waitForDone()
+    assert store.journal_length() == 0
+    assert store.conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0] == 2
@@ -0,0 +1,77 @@
+import pytest
+from unittest.mock import MagicMock
+from PyQt6.QtCore import QModelIndex, Qt
+from yt_dlp_gui_app.core.job_registry import JobRegistry
+from yt_dlp_gui_app.core.models import DownloadJob, JobStatus
+from yt_dlp_gui_app.ui.job_table_model import JobTableModel, PROGRESS_ROLE
+
+@pytest.fixture
+def jobs():
+    return [DownloadJob(url=f"url{i}", title=f"Titel {i}") for i in range(3)]
+
+@pytest.fixture
+def model(jobs, qapp):
+    ui_bridge = MagicMock()
+    ui_bridge.get_queue.return_value = jobs
+    return JobTableModel(ui_bridge, JobRegistry.QUEUE)
+
+def test_data_is_read_from_jobs(model: JobTableModel, jobs):
+    """Testar att modellen läser cellvärden direkt från jobben."""
+    assert model.rowCount() == 3
+    assert model.data(model.index(1, 0)) == jobs[1].id
+    assert model.data(model.index(1, 1)) == "Titel 1"
+    assert model.data(model.index(1, model.progress_column), PROGRESS_ROLE) is None
+
+    jobs[1].status = JobStatus.STATUS_RUNNING
+    jobs[1].progress = 12.5
+    assert model.data(model.index(1, model.progress_column), PROGRESS_ROLE) == 12.5
+    assert model.data(model.index(1, 0), Qt.ItemDataRole.BackgroundRole) is not None
+
+def test_only_changed_cells_are_signalled(model: JobTableModel, jobs):
+    """Testar att dataChanged endast omfattar de celler som har ändrats."""
+    changes = []
+    model.dataChanged.connect(lambda top_left, bottom_right: changes.append(
+        (top_left.row(), top_left.column(), bottom_right.column())))
+    jobs[2].status = JobStatus.STATUS_RUNNING
+    model.job_updated(2)
+    assert changes == [(2, 0, model.columnCount() - 1)]
+
+    jobs[2].progress = 40.0
+    model.job_updated(2)
+    assert changes[-1] == (2, model.progress_column, model.progress_column)
+
+    model.job_updated(2)
+    assert len(changes) == 2
+
+def test_dropped_rows_are_moved_by_job_manager(model: JobTableModel, jobs):
+    """Testar att rader som dras i kön flyttas via UIBridge i stället för av vyn."""
+    assert model.data(model.index(0, model.headers.index("Prioritet"))) == "Normal"
+    mime = model.mimeData([model.index(2, 1), model.index(2, 3)])
+    assert not model.dropMimeData(mime, Qt.DropAction.MoveAction, 0, 0, QModelIndex())
+    model.ui_bridge.move_jobs.assert_called_once_with([jobs[2].id], 0)
+
+def test_registry_changes_are_signalled_as_row_changes(qapp):
+    """Testar att tillagda, flyttade och borttagna jobb ger radsignaler i stället för en omläsning av modellen."""
+    registry = JobRegistry()
+    ui_bridge = MagicMock()
+    ui_bridge.get_queue.side_effect = lambda: registry.queue
+    ui_bridge.add_registry_listener.side_effect = registry.add_listener
+    model = JobTableModel(ui_bridge, JobRegistry.QUEUE)
+    signals = []
+    model.modelReset.connect(lambda: signals.append("reset"))
+    model.rowsInserted.connect(lambda parent, first, last: signals.append(("inserted", first)))
+    model.rowsRemoved.connect(lambda parent, first, last: signals.append(("removed", first)))
+    model.rowsMoved.connect(lambda parent, start, end, destination, row: signals.append(("moved", start, row)))
+
+    jobs = [DownloadJob(url=f"url{i}") for i in range(3)]
+    for job in jobs:
+        registry.add(job, JobRegistry.QUEUE)
+    registry.move_before(jobs[0].id, None)
+    registry.move_before(jobs[0].id, jobs[1].id)
+    registry.move(jobs[2].id, JobRegistry.HISTORY, 0)
+    assert signals == [("inserted", 0), ("inserted", 1), ("inserted", 2), ("moved", 0, 3), ("moved", 2, 0), ("removed", 2)]
+    assert model.rowCount() == 2
+    assert [model.data(model.index(row, 0)) for row in range(2)] == [jobs[0].id, jobs[1].id]
+
+    registry.reset([jobs[1]], [])
+    assert signals[-1] == "reset" and model.rowCount() == 1
@@ -0,0 +1,31 @@
+from yt_dlp_gui_app.core.log_store import JobLogStore
+
+def test_log_is_split_into_compressed_segments(tmp_path):
+    """Testar att loggen skrivs i segment och kan läsas tillbaka i sin helhet."""
+    store = JobLogStore(str(tmp_path), segment_size=100)
+    lines = [f"[download] {i}.0% av 10MiB\n" for i in range(50)]
+    for line in lines:
+        store.append("job1", line)
+
+    assert (tmp_path / "job1.log.gz").exists()
+    assert store.read("job1") == "".join(lines)
+    store.close("job1")
+    assert store.read("job1") == "".join(lines)
+
+def test_tail_memory_is_bounded(tmp_path):
+    """Testar att svansen i minnet inte växer med loggens längd."""
+    store = JobLogStore(str(tmp_path), tail_chars=50)
+    for i in range(1000):
+        store.append("job1", f"rad {i}\n")
+    tail = store.tail("job1")
+    assert len(tail) <= 50 + len("rad 999\n")
+    assert tail.endswith("rad 999\n")
+
+def test_delete_removes_log(tmp_path):
+    """Testar att en borttagen logg försvinner från både minne och disk."""
+    store = JobLogStore(str(tmp_path))
+    store.append("job1", "text\n")
+    store.close("job1")
+    store.delete("job1")
+    assert store.read("job1") == ""
+    assert not (tmp_path / "job1.log.gz").exists()
@@ -0,0 +1,98 @@
+import stat
+import sys
+import pytest
+from yt_dlp_gui_app.core.info_cache import InfoCache
+from yt_dlp_gui_app.core.metadata_prefetcher import MetadataPrefetcher, extract_metadata, prefetch_args
+from yt_dlp_gui_app.core.models import DownloadJob
+
+INFO = {
+    "title": "Läten från fjällen", "duration": 3725.4, "format_id": "137+140",
+    "requested_formats": [{"filesize": 1000}, {"filesize_approx": 200}],
+}
+
+@pytest.fixture
+def fake_yt_dlp(tmp_path):
+    """Ett skript som beter sig som yt-dlp --dump-single-json och skriver sina argument till en fil."""
+    script = tmp_path / "yt-dlp"
+    script.write_text(
+        f"#!{sys.executable}\n"
+        "import json, sys\n"
+        f"open({str(tmp_path / 'calls')!r}, 'a').write(json.dumps(sys.argv[1:]) + '\\n')\n"
+        "if sys.argv[-1] == 'fel': sys.exit('ERROR: Unsupported URL')\n"
+        f"print(json.dumps({INFO!r}))\n", encoding="utf-8")
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    return str(script)
+
+def test_extract_metadata():
+    """Testar att titel, längd, storlek och format plockas ut ur info-JSON."""
+    assert extract_metadata(INFO) == {
+        "title": "Läten från fjällen", "duration": "01:02:05", "filesize_estimate": 1200, "format_id": "137+140",
+        "entries": None}
+    assert extract_metadata({"title": "t", "formats": []})["filesize_estimate"] is None
+
+def test_extract_playlist_entries():
+    """Testar att posterna i en platt extraherad spellista plockas ut."""
+    info = {"_type": "playlist", "title": "Lista", "entries": [
+        {"_type": "url", "url": "https://example.com/v1", "title": "Ett", "duration": 61},
+        {"_type": "url", "url": None},
+        {"_type": "playlist", "url": "https://example.com/lista2"},
+    ]}
+    assert extract_metadata(info)["entries"] == [
+        {"url": "https://example.com/v1", "title": "Ett", "duration": "00:01:01", "is_playlist": False},
+        {"url": "https://example.com/lista2", "title": None, "duration": None, "is_playlist": True},
+    ]
+
+def test_prefetch_args_follow_job_format_and_extraction_args():
+    """Testar att formatvalet och argumenten för inloggning och nätverk följer med, men inte utdata och efterbehandling."""
+    job = DownloadJob(url="https://example.com/v", args_list=[
+        "-f", "best", "--write-thumbnail", "--cookies", "kakor.txt", "-x", "--proxy=socks5://127.0.0.1:1080",
+        "--extractor-args", "youtube:player_client=web", "--geo-bypass", "-o", "%(title)s.%(ext)s", "--exec", "echo"])
+    args = prefetch_args(job)
+    assert args[-3:] == ["-f", "best", "https://example.com/v"]
+    assert args[4:-3] == ["--cookies", "kakor.txt", "--proxy=socks5://127.0.0.1:1080",
+                          "--extractor-args", "youtube:player_client=web", "--geo-bypass"]
+    assert "--skip-download" in args and not {"--write-thumbnail", "-x", "-o", "--exec"} & set(args)
+    assert "--no-playlist" in prefetch_args(DownloadJob(url="https://example.com/v", args_list=["--no-playlist"]))
+
+def test_prefetch_is_bounded(qtbot, fake_yt_dlp, tmp_path):
+    """Testar att hämtningar körs med ett eget tak och att resultat och fel rapporteras."""
+    prefetcher = MetadataPrefetcher(max_concurrent=1)
+    results, failures = {}, {}
+    prefetcher.metadata_ready.connect(lambda job_id, metadata: results.__setitem__(job_id, metadata))
+    prefetcher.prefetch_failed.connect(lambda job_id, error: failures.__setitem__(job_id, error))
+    jobs = [DownloadJob(url="https://example.com/a"), DownloadJob(url="fel"), DownloadJob(url="https://example.com/c")]
+    for job in jobs:
+        assert prefetcher.submit(job, fake_yt_dlp)
+    assert prefetcher.submit(jobs[0], fake_yt_dlp) is False
+    assert len(prefetcher.active) == 1 and prefetcher.pending_count() == 2
+
+    prefetcher.cancel(jobs[2].id)
+    qtbot.waitUntil(lambda: not prefetcher.active and not prefetcher.pending_count(), timeout=10000)
+    assert results[jobs[0].id]["title"] == "Läten från fjällen"
+    assert "Unsupported URL" in failures[jobs[1].id]
+    assert jobs[2].id not in results
+    assert len((tmp_path / "calls").read_text().splitlines()) == 2
+
+def test_cached_info_skips_yt_dlp(qtbot, fake_yt_dlp, tmp_path):
+    """Testar att en andra hämtning för samma URL besvaras från info-cachen utan att yt-dlp startas."""
+    prefetcher = MetadataPrefetcher(info_cache=InfoCache(str(tmp_path / "info")))
+    with qtbot.waitSignal(prefetcher.metadata_ready, timeout=10000):
+        prefetcher.submit(DownloadJob(url="https://youtu.be/abc"), fake_yt_dlp)
+    with qtbot.waitSignal(prefetcher.metadata_ready, timeout=1000) as blocker:
+        assert prefetcher.submit(DownloadJob(url="https://www.youtube.com/watch?v=abc"), fake_yt_dlp)
+    assert not prefetcher.active
+    assert blocker.args[1]["title"] == "Läten från fjällen"
+    assert len((tmp_path / "calls").read_text().splitlines()) == 1
+
+def test_info_cache_is_bypassed_with_extraction_args(qtbot, fake_yt_dlp, tmp_path):
+    """Testar att info-JSON som hämtats med cookies varken sparas eller besvarar hämtningar med cookies."""
+    info_cache = InfoCache(str(tmp_path / "info"))
+    prefetcher = MetadataPrefetcher(info_cache=info_cache)
+    with qtbot.waitSignal(prefetcher.metadata_ready, timeout=10000):
+        prefetcher.submit(DownloadJob(url="https://youtu.be/abc", args_list=["--cookies", "kakor.txt"]), fake_yt_dlp)
+    assert len(info_cache) == 0
+    with qtbot.waitSignal(prefetcher.metadata_ready, timeout=10000):
+        prefetcher.submit(DownloadJob(url="https://youtu.be/abc"), fake_yt_dlp)
+    with qtbot.waitSignal(prefetcher.metadata_ready, timeout=10000):
+        prefetcher.submit(DownloadJob(url="https://youtu.be/abc", args_list=["--cookies", "kakor.txt"]), fake_yt_dlp)
+    assert len((tmp_path / "calls").read_text().splitlines()) == 3
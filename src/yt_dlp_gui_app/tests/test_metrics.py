@@ -0,0 +1,38 @@
+from yt_dlp_gui_app.core.metrics import MetricsCollector, TransferTracker, percentile, to_prometheus
+from yt_dlp_gui_app.core.models import DownloadJob, JobStatus
+from yt_dlp_gui_app.core.output_parser import ProgressRecord
+
+def test_percentile():
+    """Testar percentiler med närmaste rang."""
+    values = list(range(1, 101))
+    assert (percentile(values, 0.5), percentile(values, 0.95)) == (50, 95)
+    assert percentile([7.0], 0.95) == 7.0 and percentile([], 0.5) is None
+
+def test_transfer_tracker_sums_files():
+    """Testar att byte summeras över flera filer, t.ex. video och ljud, och att högsta hastigheten sparas."""
+    tracker = TransferTracker()
+    for done, speed in ((50, 10.0), (100, 30.0), (5, 20.0), (20, None)):
+        tracker.update(ProgressRecord("downloading", downloaded_bytes=done, speed=speed))
+    assert (tracker.bytes_transferred, tracker.peak_speed) == (120, 30.0)
+
+def test_collector_aggregates():
+    """Testar jobb per timme, kötider och utnyttjandet av platserna."""
+    now = [1000.0]
+    metrics = MetricsCollector(clock=lambda: now[0])
+    metrics.update_slots(active=1, capacity=2)
+    for wait in (1.0, 2.0, 30.0):
+        job = DownloadJob(status=JobStatus.STATUS_COMPLETED, bytes_transferred=10,
+                          timings={"queued": 0.0, "started": wait, "finished": now[0]})
+        metrics.record_started(job)
+        metrics.record_finished(job)
+    now[0] = 1010.0
+    snapshot = metrics.snapshot(active=1, waiting=4)
+    assert snapshot["slot_utilization"] == 0.5
+    assert snapshot["queue_wait_seconds"] == {"p50": 2.0, "p95": 30.0}
+    assert (snapshot["jobs_per_hour"], snapshot["bytes_downloaded"]) == (3, 30)
+
+    now[0] = 5000.0
+    assert metrics.jobs_last_hour() == 0
+    prom = to_prometheus(metrics.snapshot(active=0, waiting=0))
+    assert 'ytdlpgui_queue_wait_seconds{quantile="0.95"} 30.0' in prom
+    assert "ytdlpgui_download_seconds{" not in prom
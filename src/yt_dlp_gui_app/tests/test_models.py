@@ -1,4 +1,4 @@
-from yt_dlp_gui_app.core.models import DownloadJob, JobStatus
+from yt_dlp_gui_app.core.models import DownloadJob, JobPriority, JobStatus
 
 def test_download_job_creation():
     """Testar att ett DownloadJob-objekt skapas med korrekta standardvärden."""
@@ -16,19 +16,22 @@ def test_job_serialization_deserialization():
         title="Test Video",
         status=JobStatus.STATUS_RUNNING,
         progress=50.5,
-        output_path="/tmp"
+        output_path="/tmp",
+        priority=JobPriority.PRIORITY_URGENT
     )
     job_dict = job.to_dict()
 
     assert job_dict["url"] == "http://example.com"
     assert job_dict["status"] == "STATUS_RUNNING"
     assert job_dict["progress"] == 50.5
+    assert job_dict["priority"] == "PRIORITY_URGENT"
 
     rehydrated_job = DownloadJob.from_dict(job_dict)
     assert rehydrated_job.url == job.url
     assert rehydrated_job.status == job.status
     assert rehydrated_job.progress == job.progress
     assert rehydrated_job.id == job.id
+    assert rehydrated_job.priority == JobPriority.PRIORITY_URGENT
 
 def test_job_deserialization_with_missing_keys():
     """Testar att deserialisering hanterar saknade nycklar med standardvärden."""
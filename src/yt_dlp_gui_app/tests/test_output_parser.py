@@ -0,0 +1,51 @@
+from yt_dlp_gui_app.core.output_parser import EventKind, OutputParser, parse_line
+
+def test_progress_template_record():
+    """Testar att en rad från --progress-template blir ett strukturerat förloppsvärde."""
+    event = parse_line("[ytdlpgui-progress] downloading|2500|NA|10000|1024.5|7")
+    assert event.kind == EventKind.PROGRESS
+    assert event.progress.downloaded_bytes == 2500
+    assert event.progress.total_bytes == 10000
+    assert event.progress.speed == 1024.5
+    assert event.progress.eta == 7
+    assert event.progress.percent == 25.0
+
+def test_legacy_text_lines():
+    """Testar att vanliga textrader från yt-dlp och ffmpeg fortfarande tolkas."""
+    assert parse_line("[download]  42.3% of 10.00MiB at 1.00MiB/s ETA 00:05").progress.percent == 42.3
+    assert parse_line("[ExtractAudio] Destination: låt.mp3").value == "låt.mp3"
+    assert parse_line("[info] Writing video thumbnail 0 to: video.webp").value == "video.webp"
+    assert parse_line("  Duration: 00:03:32.12, start: 0.000000").value == "00:03:32"
+    assert parse_line("[download] video.mp4 has already been downloaded").kind == EventKind.ALREADY_DOWNLOADED
+    assert parse_line("[youtube] abc: Downloading webpage") is None
+    assert parse_line("ERROR: [youtube] abc: Private video").value == "[youtube] abc: Private video"
+
+def test_lines_split_across_chunks_and_carriage_returns():
+    """Testar att rader som delas mellan läsningar och \\r-separerade rader tolkas en gång var."""
+    parser = OutputParser()
+    first_text, first_events = parser.feed(b"[download]  10.0% of 1MiB\r[download]  2")
+    second_text, second_events = parser.feed(b"0.0% of 1MiB\r")
+    tail_text, tail_events = parser.finish()
+    assert [e.progress.percent for e in first_events + second_events] == [10.0, 20.0]
+    assert first_text == "[download]  10.0% of 1MiB\n"
+    assert (tail_text, tail_events) == ("", [])
+
+def test_progress_template_lines_are_kept_out_of_log():
+    """Testar att de maskinläsbara förloppsraderna inte hamnar i loggen."""
+    text, events = OutputParser().feed(b"[ytdlpgui-progress] downloading|1|2|NA|NA|NA\n[youtube] abc: ok\n")
+    assert text == "[youtube] abc: ok\n"
+    assert len(events) == 1
+
+def test_progress_runs_are_coalesced_around_other_events():
+    """Testar att bara sista förloppet i varje följd blir en händelse och att ordningen mot andra händelser behålls."""
+    text, events = OutputParser().feed(
+        b"[ytdlpgui-progress] downloading|1|4|NA|NA|NA\n"
+        b"[ytdlpgui-progress] downloading|2|4|NA|NA|NA\n"
+        b"[download] Destination: a.mp4\n"
+        b"[ytdlpgui-progress] downloading|3|4|NA|NA|NA\n"
+        b"[download]  90.0% of 1MiB\n"
+        b"[ytdlpgui-progress] trasig\n"
+        b"[ytdlpgui-progress] finished|4|4|NA|NA|NA\n")
+    assert [(e.kind, e.value if e.progress is None else e.progress.percent) for e in events] == [
+        (EventKind.PROGRESS, 50.0), (EventKind.DESTINATION, "a.mp4"), (EventKind.PROGRESS, 100.0)]
+    assert text == "[download] Destination: a.mp4\n[download]  90.0% of 1MiB\n[ytdlpgui-progress] trasig\n"
@@ -0,0 +1,44 @@
+import time
+from yt_dlp_gui_app.core.negative_cache import NegativeCache
+from yt_dlp_gui_app.core.retry_policy import ErrorClass, HostBackoff, RetryPolicy, classify_error
+
+def test_classify_error():
+    """Testar att felrader från yt-dlp klassas som tillfälliga, permanenta eller okända."""
+    assert classify_error(["[youtube] abc: Unable to download API page: HTTP Error 429: Too Many Requests"]).error_class == ErrorClass.TRANSIENT
+    assert classify_error(["unable to download video data: HTTP Error 503: Service Unavailable"]).reason == "HTTP 503"
+    assert classify_error(["fragment 4 not found, unable to continue"]).error_class == ErrorClass.TRANSIENT
+    assert classify_error(["Unable to download webpage: <urlopen error timed out>"]).error_class == ErrorClass.TRANSIENT
+    assert classify_error(["[youtube] abc: Video unavailable"]).error_class == ErrorClass.PERMANENT
+    assert classify_error(["Unsupported URL: https://example.com"]).reason == "URL:en stöds inte"
+    # Ett permanent fel väger tyngre än ett följdfel som ser tillfälligt ut.
+    assert classify_error(["[youtube] abc: Private video", "Read timed out"]).error_class == ErrorClass.PERMANENT
+    assert classify_error(["något annat"]).error_class == ErrorClass.UNKNOWN
+    assert classify_error([]).error_class == ErrorClass.UNKNOWN
+
+def test_backoff_grows_with_jitter_and_resets_per_host():
+    """Testar att väntetiden fördubblas upp till taket, sprids slumpmässigt och nollställs per webbplats."""
+    policy = RetryPolicy(max_retries=5, base_delay=10.0, max_delay=60.0)
+    assert [policy.delay(n, lambda: 1.0) for n in (1, 2, 3, 4, 5)] == [10.0, 20.0, 40.0, 60.0, 60.0]
+    assert policy.delay(2, lambda: 0.0) == 10.0
+
+    now = [1000.0]
+    backoff = HostBackoff(clock=lambda: now[0])
+    assert 1005.0 <= backoff.failure("vimeo.com", policy) <= 1010.0
+    assert 1010.0 <= backoff.failure("vimeo.com", policy) <= 1020.0
+    assert backoff.blocked_hosts() == {"vimeo.com"}
+    now[0] = 1021.0
+    assert backoff.blocked_hosts() == set() and backoff.next_expiry() is None
+    backoff.success("vimeo.com")
+    assert backoff.failure("vimeo.com", policy) <= now[0] + 10.0
+
+def test_negative_cache_persists_and_expires(tmp_path):
+    """Testar att permanenta fel sparas till disk och att gamla poster slutar gälla."""
+    path = str(tmp_path / "negative.json")
+    cache = NegativeCache(path, ttl_seconds=3600)
+    cache.add("youtube abc", "privat video")
+    assert NegativeCache(path).reason_for("youtube abc") == "privat video"
+    assert "youtube def" not in cache
+
+    cache._entries["youtube abc"]["time"] = time.time() - 7200
+    assert "youtube abc" not in cache and len(cache) == 0
+    assert NegativeCache(path, ttl_seconds=3600).reason_for("youtube abc") is None
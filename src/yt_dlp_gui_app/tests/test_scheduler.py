@@ -0,0 +1,63 @@
+from yt_dlp_gui_app.core.models import DownloadJob, JobPriority, JobStatus
+from yt_dlp_gui_app.core.scheduler import ReadyQueue, bandwidth_share, format_host_limits, parse_host_limits
+from yt_dlp_gui_app.core.url_utils import host_key
+
+def test_host_key():
+    """Testar att URL:er grupperas per webbplats."""
+    assert host_key("https://youtu.be/abc") == "youtube.com"
+    assert host_key("https://m.youtube.com/watch?v=abc") == "youtube.com"
+    assert host_key("https://player.vimeo.com/video/1") == "vimeo.com"
+    assert host_key("https://www.bbc.co.uk/iplayer/x") == "bbc.co.uk"
+
+def test_ready_queue_skips_blocked_groups():
+    """Testar att jobb från blockerade grupper hoppas över utan att tappa sin plats i kön."""
+    queue = ReadyQueue(host_of=lambda job: host_key(job.url))
+    jobs = [DownloadJob(url=url) for url in
+            ("https://youtu.be/a", "https://youtu.be/b", "https://vimeo.com/1", "https://youtu.be/c")]
+    for job in jobs:
+        queue.push(job)
+    jobs[1].status = JobStatus.STATUS_CANCELLED
+
+    assert queue.pop_next({"youtube.com"}) is jobs[2]
+    assert queue.pop_next({"youtube.com"}) is None
+    assert queue.pop_next() is jobs[0]
+    assert queue.pop_next() is jobs[3]
+    assert queue.pop_next() is None and len(queue) == 0
+
+def test_urgent_job_starts_next_and_bulk_keeps_its_share():
+    """Testar att ett brådskande jobb går före tusentals bulkjobb utan att bulkjobben svälts ut."""
+    queue = ReadyQueue()
+    bulk = [DownloadJob(url=f"bulk{i}", priority=JobPriority.PRIORITY_BULK) for i in range(1000)]
+    for job in bulk:
+        queue.push(job)
+    assert queue.pop_next() is bulk[0]
+
+    urgent = [DownloadJob(url=f"urgent{i}", priority=JobPriority.PRIORITY_URGENT) for i in range(40)]
+    for job in urgent:
+        queue.push(job)
+    assert queue.pop_next() is urgent[0]
+
+    order = [queue.pop_next() for _ in range(34)]
+    # Vikterna 16 och 1 ger ungefär ett bulkjobb per sexton brådskande.
+    assert order.count(bulk[1]) + order.count(bulk[2]) == 2
+    assert [job for job in order if job.priority == JobPriority.PRIORITY_URGENT] == urgent[1:33]
+
+def test_fair_share_between_output_folders():
+    """Testar att två utdatamappar med samma prioritet turas om, oavsett köordning."""
+    queue = ReadyQueue(share_of=lambda job: job.output_path)
+    first = [DownloadJob(url=f"a{i}", output_path="/a") for i in range(5)]
+    second = [DownloadJob(url=f"b{i}", output_path="/b") for i in range(2)]
+    for job in first + second:
+        queue.push(job)
+    order = [queue.pop_next() for _ in range(7)]
+    assert order[:4] == [first[0], second[0], first[1], second[1]]
+    assert order[4:] == first[2:]
+
+def test_host_limits_and_bandwidth_share():
+    """Testar tolkningen av gränser per webbplats och delningen av bandbreddsbudgeten."""
+    limits = parse_host_limits("www.Vimeo.com=1; youtube.com = 3, trasig, x.se=a")
+    assert limits == {"vimeo.com": 1, "youtube.com": 3}
+    assert parse_host_limits(format_host_limits(limits)) == limits
+    assert bandwidth_share(0, 3) is None
+    assert bandwidth_share(3 * 1024 * 1024, 3) == 1024 * 1024
+    assert bandwidth_share(2048, 10) == 1024
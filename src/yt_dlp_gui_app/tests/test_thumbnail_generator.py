@@ -0,0 +1,90 @@
+import os
+import pytest
+from unittest.mock import patch
+from yt_dlp_gui_app.core.models import DownloadJob
+from yt_dlp_gui_app.core.thumbnail_cache import ThumbnailCache
+from yt_dlp_gui_app.core.thumbnail_generator import (
+    FALLBACK_TIMESTAMP, ThumbnailGenerator, build_ffmpeg_args, file_identity, parse_duration, pick_timestamp
+)
+
+def test_timestamp_follows_duration():
+    """Testar att tidpunkten väljs utifrån längden och att korta klipp inte hamnar efter slutet."""
+    assert parse_duration("01:02:03") == 3723
+    assert parse_duration("0:04") == 4
+    assert parse_duration("N/A") is None
+    assert pick_timestamp(None) == FALLBACK_TIMESTAMP
+    assert pick_timestamp(3723) == pytest.approx(372.3)
+    assert pick_timestamp(4) == 1.0
+    assert pick_timestamp(1.2) == 0.6
+
+def test_fast_args_seek_to_keyframe():
+    """Testar att snabbläget söker före -i och endast avkodar nyckelbildrutor."""
+    args = build_ffmpeg_args("in.mkv", "out.jpg", 12.5)
+    assert args[:6] == ['-skip_frame', 'nokey', '-ss', '12.5', '-i', 'in.mkv']
+    assert '-skip_frame' not in build_ffmpeg_args("in.mkv", "out.jpg", 12.5, keyframes_only=False)
+
+@pytest.fixture
+def video(tmp_path):
+    path = tmp_path / "video.mp4"
+    path.write_bytes(b"video")
+    return DownloadJob(url="url", output_path=str(tmp_path), final_filename="video.mp4", duration="00:00:30")
+
+def test_cache_hit_skips_ffmpeg(qtbot, video, tmp_path):
+    """Testar att en tidigare genererad miniatyr för samma fil återanvänds utan FFmpeg och kopieras bredvid videon."""
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    cached = cache_dir / f"{file_identity(os.path.join(video.output_path, video.final_filename))}.jpg"
+    cached.write_bytes(b"jpg")
+    generator = ThumbnailGenerator(video, "ffmpeg", cache=ThumbnailCache(str(cache_dir)))
+    with patch.object(generator.process, "start") as start, qtbot.waitSignal(generator.thumbnail_generated) as blocker:
+        generator.generate()
+    start.assert_not_called()
+    assert blocker.args == [video.id, str(tmp_path / "video.jpg")]
+    assert (tmp_path / "video.jpg").read_bytes() == b"jpg"
+
+def test_falls_back_to_full_decode(video, tmp_path):
+    """Testar att ett misslyckat snabbförsök görs om med full avkodning på den valda tidpunkten."""
+    generator = ThumbnailGenerator(video, "ffmpeg", cache=ThumbnailCache(str(tmp_path / "cache")))
+    with patch.object(generator.process, "start") as start:
+        generator.generate()
+        generator._on_finished(1, None)
+    first, second = (call.args[1] for call in start.call_args_list)
+    assert first[:4] == ['-skip_frame', 'nokey', '-ss', '3']
+    assert second[:2] == ['-ss', '3']
+    assert second[-1].startswith(str(tmp_path / "cache"))
+
+def test_generated_thumbnail_is_cached_and_written_next_to_video(qtbot, video, tmp_path):
+    """Testar att en genererad miniatyr läggs i cachen och att jobbet får sidofilen bredvid videon."""
+    cache = ThumbnailCache(str(tmp_path / "cache"))
+    generator = ThumbnailGenerator(video, "ffmpeg", cache=cache)
+    with patch.object(generator.process, "start") as start:
+        generator.generate()
+    with open(start.call_args.args[1][-1], "wb") as f:
+        f.write(b"jpg")
+    with qtbot.waitSignal(generator.thumbnail_generated) as blocker:
+        generator._on_finished(0, None)
+    assert blocker.args == [video.id, str(tmp_path / "video.jpg")]
+    assert len(cache) == 1 and cache.total_bytes == 3
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    """Testar att de minst nyligen använda miniatyrerna tas bort när cachen blir för stor."""
+    cache = ThumbnailCache(str(tmp_path / "cache"), max_bytes=10)
+    videos = []
+    for i in range(3):
+        video = tmp_path / f"video{i}.mp4"
+        video.write_bytes(b"video")
+        videos.append(str(video))
+    for video in videos[:2]:
+        path = cache.path_for(video)
+        with open(path, "wb") as f:
+            f.write(b"12345")
+        cache.put(path)
+    assert cache.get(videos[0]) # Används, så video1 är nu äldst
+    path = cache.path_for(videos[2])
+    with open(path, "wb") as f:
+        f.write(b"12345")
+    cache.put(path)
+    assert cache.get(videos[1]) is None
+    assert cache.get(videos[0]) and cache.get(videos[2])
+    assert cache.total_bytes == 10
+    assert len(os.listdir(tmp_path / "cache")) == 2
@@ -0,0 +1,82 @@
+import pytest
+from PyQt6.QtCore import QObject, pyqtSignal
+from yt_dlp_gui_app.core.models import DownloadJob
+from yt_dlp_gui_app.core.thumbnail_pool import PRIORITY_VISIBLE, ThumbnailPool
+
+class FakeGenerator(QObject):
+    thumbnail_generated = pyqtSignal(str, str)
+    generation_failed = pyqtSignal(str)
+    started = []
+
+    def __init__(self, job, ffmpeg_path):
+        super().__init__()
+        self.job = job
+        self.cancelled = False
+
+    def generate(self):
+        FakeGenerator.started.append(self)
+
+    def cancel(self):
+        self.cancelled = True
+
+    def finish(self):
+        self.thumbnail_generated.emit(self.job.id, f"{self.job.id}.jpg")
+
+@pytest.fixture
+def pool(qapp):
+    FakeGenerator.started = []
+    return ThumbnailPool(max_concurrent=2, generator_factory=FakeGenerator)
+
+def test_concurrency_is_capped(pool: ThumbnailPool):
+    """Testar att högst max_concurrent generatorer körs samtidigt."""
+    jobs = [DownloadJob(url=f"url{i}") for i in range(5)]
+    for job in jobs:
+        pool.submit(job, "ffmpeg")
+    assert len(pool.active) == 2
+    assert pool.pending_count() == 3
+
+    FakeGenerator.started[0].finish()
+    assert len(pool.active) == 2
+    assert [g.job.id for g in FakeGenerator.started] == [j.id for j in jobs[:3]]
+
+def test_duplicates_and_priority(pool: ThumbnailPool):
+    """Testar att upprepade begäranden slås ihop och att synliga rader går först."""
+    jobs = [DownloadJob(url=f"url{i}") for i in range(4)]
+    for job in jobs:
+        pool.submit(job, "ffmpeg")
+    assert pool.submit(jobs[0], "ffmpeg") is False
+    assert pool.submit(jobs[3], "ffmpeg", PRIORITY_VISIBLE) is False
+    assert pool.total == 4
+
+    FakeGenerator.started[0].finish()
+    assert FakeGenerator.started[-1].job is jobs[3]
+
+def test_cancel_and_progress(qtbot, pool: ThumbnailPool):
+    """Testar att avbrott tömmer kön och att förloppet räknas per omgång."""
+    progress = []
+    pool.progress_changed.connect(lambda done, total: progress.append((done, total)))
+    jobs = [DownloadJob(url=f"url{i}") for i in range(3)]
+    for job in jobs:
+        pool.submit(job, "ffmpeg")
+    FakeGenerator.started[0].finish()
+    assert progress[-1] == (1, 3)
+
+    with qtbot.assertNotEmitted(pool.generation_failed):
+        pool.cancel_all()
+    assert FakeGenerator.started[1].cancelled
+    assert len(pool.active) == 0 and pool.pending_count() == 0
+    assert progress[-1] == (3, 3)
+    assert (pool.done, pool.total) == (0, 0)
+
+def test_missing_ffmpeg_releases_slots(qtbot, tmp_path):
+    """Testar att en FFmpeg som inte kan startas ger misslyckade miniatyrer och frigör platserna i poolen."""
+    pool = ThumbnailPool(max_concurrent=2)
+    (tmp_path / "video.mp4").write_bytes(b"")
+    jobs = [DownloadJob(url=f"url{i}", output_path=str(tmp_path), final_filename="video.mp4") for i in range(5)]
+    failed = []
+    pool.generation_failed.connect(failed.append)
+    for job in jobs:
+        pool.submit(job, str(tmp_path / "finns-inte" / "ffmpeg"))
+    qtbot.waitUntil(lambda: len(failed) == 5, timeout=5000)
+    assert failed == [job.id for job in jobs]
+    assert not pool.active and pool.pending_count() == 0
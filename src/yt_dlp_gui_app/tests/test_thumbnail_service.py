@@ -0,0 +1,48 @@
+import os
+import pytest
+from PyQt6.QtGui import QColor, QImage
+from yt_dlp_gui_app.ui.thumbnail_service import ThumbnailService, variant_path
+
+def _make_image(path, width=1280, height=720):
+    image = QImage(width, height, QImage.Format.Format_RGB32)
+    image.fill(QColor("#336699"))
+    assert image.save(str(path))
+    return str(path)
+
+@pytest.fixture
+def service(qapp, tmp_path):
+    service = ThumbnailService(cache_dir=str(tmp_path / "cache"))
+    yield service
+    service.wait_for_done()
+
+def test_thumbnail_is_scaled_in_background(qtbot, service: ThumbnailService, tmp_path):
+    """Testar att miniatyren skalas i bakgrunden och att en förskalad variant sparas på disk."""
+    path = _make_image(tmp_path / "big.png")
+    with qtbot.waitSignal(service.thumbnail_ready, timeout=5000):
+        assert service.get(path) is None
+    pixmap = service.get(path)
+    assert (pixmap.width(), pixmap.height()) == (128, 72)
+    assert os.path.exists(variant_path(service.cache_dir, path))
+
+def test_lru_respects_byte_budget(qtbot, service: ThumbnailService, tmp_path):
+    """Testar att de äldsta miniatyrerna tas bort när byte-gränsen överskrids."""
+    service.max_bytes = 128 * 72 * 4 * 2
+    paths = [_make_image(tmp_path / f"{i}.png") for i in range(3)]
+    for path in paths:
+        with qtbot.waitSignal(service.thumbnail_ready, timeout=5000):
+            service.get(path)
+    assert service.cache_bytes <= service.max_bytes
+    with qtbot.assertNotEmitted(service.thumbnail_ready, wait=50):
+        assert service.get(paths[2]) is not None
+    with qtbot.waitSignal(service.thumbnail_ready, timeout=5000):
+        assert service.get(paths[0]) is None
+
+def test_missing_file_is_not_retried(qtbot, service: ThumbnailService, tmp_path):
+    """Testar att en saknad bild inte läses om vid varje ritning."""
+    path = str(tmp_path / "saknas.jpg")
+    service.get(path)
+    service.wait_for_done()
+    qtbot.wait(10)
+    service.get(path)
+    assert service.thread_pool.activeThreadCount() == 0
+    assert path in service._failed
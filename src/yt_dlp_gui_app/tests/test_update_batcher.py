@@ -0,0 +1,35 @@
+import pytest
+from yt_dlp_gui_app.core.update_batcher import JobUpdateBatcher
+
+@pytest.fixture
+def batcher(qapp):
+    return JobUpdateBatcher(rate_hz=50)
+
+def test_updates_are_coalesced(qtbot, batcher: JobUpdateBatcher):
+    """Testar att upprepade ändringar av samma jobb skickas som en batch."""
+    with qtbot.waitSignal(batcher.jobs_updated, timeout=1000) as blocker:
+        for _ in range(100):
+            batcher.mark_dirty("a")
+            batcher.mark_dirty("b")
+    assert blocker.args == [["a", "b"]]
+    assert batcher.pending() == []
+
+def test_paused_batcher_holds_updates(qtbot, batcher: JobUpdateBatcher):
+    """Testar att inga batcher skickas under paus och att de skickas direkt när pausen hävs."""
+    batches = []
+    batcher.jobs_updated.connect(batches.append)
+    batcher.set_paused(True)
+    batcher.mark_dirty("a")
+    qtbot.wait(60)
+    assert batches == []
+    assert batcher.pending() == ["a"]
+
+    batcher.set_paused(False)
+    assert batches == [["a"]]
+
+def test_rate_sets_flush_interval(batcher: JobUpdateBatcher):
+    """Testar att uppdateringstakten styr intervallet mellan utskicken."""
+    batcher.set_rate(10)
+    assert batcher.flush_timer.interval() == 100
+    batcher.set_rate(0)
+    assert batcher.flush_timer.interval() == 1000
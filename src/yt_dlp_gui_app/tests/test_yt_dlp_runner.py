@@ -3,6 +3,7 @@ from unittest.mock import MagicMock, patch
 from PyQt6.QtCore import QProcess
 from yt_dlp_gui_app.core.yt_dlp_runner import YtDlpRunner
 from yt_dlp_gui_app.core.models import DownloadJob, JobStatus
+from yt_dlp_gui_app.core.output_parser import PROGRESS_ARGS
 
 @pytest.fixture
 def job():
@@ -16,7 +17,14 @@ def runner(job, qapp):
 def test_start_process(mock_start, runner: YtDlpRunner):
     """Testar att QProcess.start anropas med rätt argument."""
     runner.start()
-    mock_start.assert_called_once_with("/fake/yt-dlp", ["-f", "best", "http://example.com"])
+    mock_start.assert_called_once_with("/fake/yt-dlp", PROGRESS_ARGS + ["-f", "best", "http://example.com"])
+
+@patch('PyQt6.QtCore.QProcess.start')
+def test_start_process_with_cached_info(mock_start, runner: YtDlpRunner):
+    """Testar att en cachad info-JSON ersätter URL:en med --load-info-json."""
+    runner.info_json_path = "/cache/abc.info.json"
+    runner.start()
+    mock_start.assert_called_once_with("/fake/yt-dlp", PROGRESS_ARGS + ["-f", "best", "--load-info-json", "/cache/abc.info.json"])
 
 def test_start_process_no_path(runner: YtDlpRunner):
     """Testar att start misslyckas om sökvägen till yt-dlp saknas."""
@@ -38,3 +46,20 @@ def test_cancel_process(mock_kill, runner: YtDlpRunner):
         runner.cancel()
         mock_kill.assert_called_once()
 
+def test_output_split_between_reads(runner: YtDlpRunner):
+    """Testar att rader och flerbytetecken som delas mellan två läsningar tolkas korrekt."""
+    output_slot, events_slot = MagicMock(), MagicMock()
+    runner.output_received.connect(output_slot)
+    runner.events_parsed.connect(events_slot)
+    data = "[download] Destination: Låt.mp4\n".encode("utf-8")
+    split = data.index("å".encode("utf-8")) + 1
+
+    with patch.object(runner.process, 'readAllStandardOutput', return_value=MagicMock(data=lambda: data[:split])):
+        runner._on_ready_read_stdout()
+    output_slot.assert_not_called()
+    with patch.object(runner.process, 'readAllStandardOutput', return_value=MagicMock(data=lambda: data[split:])):
+        runner._on_ready_read_stdout()
+
+    output_slot.assert_called_once_with(runner.job.id, "[download] Destination: Låt.mp4\n")
+    events = events_slot.call_args[0][1]
+    assert events[0].value == "Låt.mp4"
@@ -0,0 +1,133 @@
+import sys
+import pytest
+from PyQt6.QtCore import QProcess
+from yt_dlp_gui_app.core.models import DownloadJob
+from yt_dlp_gui_app.core.output_parser import EventKind
+from yt_dlp_gui_app.core.yt_dlp_worker_pool import WORKER_COMMAND, WorkerRunner, YtDlpWorkerPool, progress_event
+
+FAKE_YT_DLP = '''
+import time
+from types import SimpleNamespace
+
+class DownloadError(Exception):
+    pass
+
+version = SimpleNamespace(__version__="test")
+utils = SimpleNamespace(DownloadError=DownloadError)
+
+def parse_options(argv):
+    load = argv[argv.index("--load-info-json") + 1] if "--load-info-json" in argv else None
+    urls = [a for a in argv if not a.startswith("-") and a != load]
+    rate = int(argv[argv.index("--limit-rate") + 1]) if "--limit-rate" in argv else None
+    urls = [a for a in urls if a != str(rate)]
+    return None, SimpleNamespace(load_info_filename=load), urls, {"ratelimit": rate}
+
+class YoutubeDL:
+    def __init__(self, params):
+        self.params = params
+        self.initial_ratelimit = params.get("ratelimit")
+    def __enter__(self):
+        return self
+    def __exit__(self, *args):
+        pass
+    def download(self, urls):
+        logger = self.params["logger"]
+        if urls[0] == "sov":
+            time.sleep(30)
+        if urls[0] == "takt":
+            # En ny gräns kan komma före download(), därför jämförs med gränsen från argumenten.
+            while self.params.get("ratelimit") == self.initial_ratelimit:
+                time.sleep(0.01)
+            logger.debug(f"ratelimit {self.params['ratelimit']}")
+        if urls[0] == "fel":
+            logger.error("ERROR: Unsupported URL")
+            raise DownloadError("Unsupported URL")
+        logger.debug("[download] Destination: klipp.mp4")
+        print("utdata från en underprocess")
+        for hook in self.params["progress_hooks"]:
+            hook({"status": "downloading", "downloaded_bytes": 50, "total_bytes": 100, "speed": 10.0, "eta": 5, "info_dict": {}})
+        for hook in self.params["postprocessor_hooks"]:
+            hook({"status": "started", "postprocessor": "Merger", "info_dict": {}})
+        return 0
+'''
+
+@pytest.fixture
+def fake_yt_dlp(tmp_path, monkeypatch):
+    """Ett falskt yt_dlp-paket som arbetsprocesserna importerar i stället för det riktiga."""
+    package = tmp_path / "fake" / "yt_dlp"
+    package.mkdir(parents=True)
+    (package / "__init__.py").write_text(FAKE_YT_DLP, encoding="utf-8")
+    monkeypatch.setenv("PYTHONPATH", str(tmp_path / "fake"))
+
+@pytest.fixture
+def pool(qapp):
+    pool = YtDlpWorkerPool(max_workers=1, command=WORKER_COMMAND)
+    yield pool
+    pool.shutdown()
+
+def run(pool, job, rate_limit=None):
+    runner = WorkerRunner(job, pool, rate_limit=rate_limit)
+    finished, output, events = [], [], []
+    runner.process_finished.connect(lambda job_id, code, status: finished.append((code, status)))
+    runner.output_received.connect(lambda job_id, text: output.append(text))
+    runner.events_parsed.connect(lambda job_id, parsed: events.extend(parsed))
+    runner.start()
+    return runner, finished, output, events
+
+def test_progress_event():
+    """Testar att ett anrop från progress_hooks blir samma händelse som en förloppsrad."""
+    event = progress_event({"status": "downloading", "downloaded_bytes": 25, "total_bytes": None,
+                            "total_bytes_estimate": 200, "speed": 1.5, "eta": 3})
+    assert event.kind == EventKind.PROGRESS
+    assert (event.progress.percent, event.progress.total_bytes, event.progress.eta) == (12.5, 200, 3)
+    assert progress_event({"status": "finished"}).progress.percent == 100.0
+
+def test_jobs_reuse_worker(qtbot, fake_yt_dlp, pool, tmp_path):
+    """Testar att jobb körs i samma arbetsprocess och rapporterar utdata, förlopp och resultat."""
+    _, finished, output, events = run(pool, DownloadJob(url="https://example.com/a", output_path=str(tmp_path)))
+    qtbot.waitUntil(lambda: bool(finished), timeout=10000)
+    assert finished == [(0, QProcess.ExitStatus.NormalExit)]
+    assert [e.kind for e in events] == [EventKind.DESTINATION, EventKind.PROGRESS, EventKind.MERGING]
+    assert events[1].progress.percent == 50.0
+    assert any("utdata från en underprocess" in text for text in output)
+    worker = pool.workers[0]
+
+    _, finished, output, _ = run(pool, DownloadJob(url="fel"))
+    qtbot.waitUntil(lambda: bool(finished), timeout=10000)
+    assert finished == [(1, QProcess.ExitStatus.NormalExit)]
+    assert any("Unsupported URL" in text for text in output)
+    assert pool.workers == [worker]
+
+def test_rate_limit_changes_while_running(qtbot, fake_yt_dlp, pool):
+    """Testar att en ny hastighetsgräns når ett jobb som redan körs i en arbetsprocess."""
+    runner, finished, output, _ = run(pool, DownloadJob(url="takt"), rate_limit=1000)
+    assert "--limit-rate" in runner.request()["args"]
+    qtbot.waitUntil(lambda: bool(pool.workers) and pool.workers[0].runner is runner, timeout=10000)
+    runner.set_rate_limit(2000)
+    qtbot.waitUntil(lambda: bool(finished), timeout=10000)
+    assert any("ratelimit 2000" in text for text in output)
+
+def test_cancel_kills_worker(qtbot, fake_yt_dlp, pool):
+    """Testar att ett avbrutet jobb avslutar sin arbetsprocess, som ersätts för nästa jobb."""
+    runner, finished, _, _ = run(pool, DownloadJob(url="sov"))
+    qtbot.waitUntil(lambda: bool(pool.workers) and pool.workers[0].runner is runner, timeout=10000)
+    runner.cancel()
+    qtbot.waitUntil(lambda: bool(finished), timeout=10000)
+    assert finished[0][1] == QProcess.ExitStatus.CrashExit
+
+    _, finished, _, _ = run(pool, DownloadJob(url="https://example.com/b"))
+    qtbot.waitUntil(lambda: bool(finished), timeout=10000)
+    assert finished == [(0, QProcess.ExitStatus.NormalExit)]
+
+def test_missing_yt_dlp_fails_jobs(qtbot, tmp_path, monkeypatch):
+    """Testar att jobb misslyckas med FailedToStart när arbetsprocessen inte kan importera yt_dlp."""
+    monkeypatch.setenv("PYTHONPATH", str(tmp_path))
+    pool = YtDlpWorkerPool(max_workers=1, command=[sys.executable, "-S", WORKER_COMMAND[1]])
+    runner = WorkerRunner(DownloadJob(url="https://example.com/a"), pool)
+    errors = []
+    runner.error_occurred.connect(lambda job_id, error: errors.append(error))
+    runner.start()
+    qtbot.waitUntil(lambda: bool(errors), timeout=10000)
+    assert errors == [QProcess.ProcessError.FailedToStart]
+    assert not pool.available and "yt_dlp" in runner.error_string()
+    qtbot.waitUntil(lambda: not pool.workers, timeout=10000)
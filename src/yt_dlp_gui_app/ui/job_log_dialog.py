@@ -1,23 +1,79 @@
-from PyQt6.QtWidgets import QDialog, QVBoxLayout, QTextEdit, QDialogButtonBox
+from typing import Callable, Optional
+from PyQt6.QtCore import QTimer
+from PyQt6.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QTextEdit, QDialogButtonBox, QLabel, QPushButton
 from yt_dlp_gui_app.core.models import DownloadJob
 
 class JobLogDialog(QDialog):
-    """En enkel dialog för att visa den fullständiga loggen för ett jobb."""
+    """
+    En enkel dialog för att visa loggen för ett jobb.
+    För ett jobb som körs visas bara svansen från minnet, som uppdateras medan jobbet körs;
+    hela loggen läses från disk först när användaren ber om den eller när jobbet är klart.
+    """
+    REFRESH_INTERVAL_MS = 500
 
-    def __init__(self, job: DownloadJob, parent=None):
+    def __init__(self, job: DownloadJob, log_text: str, parent=None,
+                 live_tail: Optional[Callable[[], Optional[str]]] = None, load_full: Optional[Callable[[], str]] = None):
         super().__init__(parent)
         self.job = job
+        self.live_tail = live_tail
+        self.load_full = load_full
         self.setWindowTitle(f"Logg för: {job.title}")
         self.setGeometry(200, 200, 800, 600)
 
         self.layout = QVBoxLayout(self)
 
+        self.tail_row = QHBoxLayout()
+        self.tail_label = QLabel("Visar slutet av loggen medan jobbet körs.")
+        self.full_log_button = QPushButton("Visa hela loggen")
+        self.full_log_button.clicked.connect(self.show_full_log)
+        self.tail_row.addWidget(self.tail_label, 1)
+        self.tail_row.addWidget(self.full_log_button)
+        self.layout.addLayout(self.tail_row)
+
         self.log_view = QTextEdit()
         self.log_view.setReadOnly(True)
-        self.log_view.setText(job.log)
+        self.log_view.setPlainText(log_text)
         self.log_view.setFontFamily("monospace")
         self.layout.addWidget(self.log_view)
 
         self.button_box = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok)
         self.button_box.accepted.connect(self.accept)
         self.layout.addWidget(self.button_box)
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(self.REFRESH_INTERVAL_MS)
+        self.refresh_timer.timeout.connect(self.refresh_tail)
+        self._shown_tail = log_text
+        if live_tail:
+            self.log_view.moveCursor(self.log_view.textCursor().MoveOperation.End)
+            self.refresh_timer.start()
+        else:
+            self.tail_label.hide()
+            self.full_log_button.hide()
+
+    def refresh_tail(self) -> None:
+        """Hämtar svansen på nytt; när jobbet inte längre körs visas hela loggen i stället."""
+        tail = self.live_tail()
+        if tail is None:
+            self.show_full_log()
+            return
+        if tail == self._shown_tail:
+            return
+        self._shown_tail = tail
+        scrollbar = self.log_view.verticalScrollBar()
+        at_end = scrollbar.value() == scrollbar.maximum()
+        position = scrollbar.value()
+        self.log_view.setPlainText(tail)
+        scrollbar.setValue(scrollbar.maximum() if at_end else position)
+
+    def show_full_log(self) -> None:
+        """Slutar följa svansen och läser hela loggen."""
+        self.refresh_timer.stop()
+        self.tail_label.hide()
+        self.full_log_button.hide()
+        if self.load_full:
+            self.log_view.setPlainText(self.load_full())
+
+    def done(self, result: int) -> None:
+        self.refresh_timer.stop()
+        super().done(result)
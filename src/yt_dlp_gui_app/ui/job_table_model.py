@@ -0,0 +1,200 @@
+from typing import Any, Dict, List, Optional, Set, Tuple
+from PyQt6.QtCore import Qt, QAbstractTableModel, QMimeData, QModelIndex
+from PyQt6.QtGui import QColor, QPixmap
+from yt_dlp_gui_app.core.job_registry import JobRegistry, RegistryChange
+from yt_dlp_gui_app.core.models import PRIORITY_LABELS, DownloadJob, JobStatus
+from yt_dlp_gui_app.core.ui_bridge import UIBridge
+from yt_dlp_gui_app.ui.thumbnail_service import ThumbnailService
+
+# MIME-typ för jobb-id:n som dras för att sortera om kön.
+JOB_IDS_MIME_TYPE = "application/x-ytdlpgui-job-ids"
+
+# Roll som ProgressBarDelegate läser för att rita en förloppsindikator.
+PROGRESS_ROLE = Qt.ItemDataRole.UserRole + 1
+
+ACTIVE_STATUSES = (JobStatus.STATUS_RUNNING, JobStatus.STATUS_MERGING, JobStatus.STATUS_POSTPROCESSING, JobStatus.STATUS_GROUP)
+
+def status_color(status: JobStatus) -> QColor | None:
+    if status in (JobStatus.STATUS_COMPLETED, JobStatus.STATUS_ALREADY_DOWNLOADED): return QColor("#d4edda")
+    if status.name.startswith("STATUS_ERROR"): return QColor("#f8d7da")
+    if status == JobStatus.STATUS_RUNNING: return QColor("#cce5ff")
+    if status == JobStatus.STATUS_CANCELLED: return QColor("#fff3cd")
+    if status == JobStatus.STATUS_RETRY_SCHEDULED: return QColor("#ffe5cc")
+    return None
+
+class JobTableModel(QAbstractTableModel):
+    """
+    Tabellmodell som läser direkt från jobbregistret i stället för att kopiera varje jobb till QStandardItems.
+    Data tas fram först när vyn ritar en cell, så endast synliga rader kostar något.
+    Registret meddelar varje tillagd, borttagen eller flyttad rad, så vyn behåller markering och
+    rullning i stället för att läsa om hela tabellen.
+    """
+
+    def __init__(self, ui_bridge: UIBridge, container: str, parent=None, thumbnail_service: Optional[ThumbnailService] = None):
+        super().__init__(parent)
+        self.ui_bridge = ui_bridge
+        self.container = container
+        self.is_history = container == JobRegistry.HISTORY
+        self.headers = ["ID", "Titel", "Längd", "URL", "Status", "Framsteg", "Tillagd"]
+        if self.is_history:
+            self.headers.insert(1, "Miniatyr")
+        else:
+            self.headers.insert(self.headers.index("Status") + 1, "Prioritet")
+        self.progress_column = self.headers.index("Framsteg")
+        self.thumbnail_column = self.headers.index("Miniatyr") if self.is_history else -1
+        # Senast visade cellvärden för uppdaterade jobb, så att endast ändrade celler signaleras.
+        self._snapshots: Dict[str, Tuple] = {}
+        self.thumbnail_service = thumbnail_service
+        # Miniatyrer som läses in i bakgrunden, och vilka jobb som väntar på dem.
+        self._waiting_thumbnails: Dict[str, Set[str]] = {}
+        if thumbnail_service:
+            thumbnail_service.thumbnail_ready.connect(self._on_thumbnail_ready)
+        # Registret är redan ändrat när det meddelar, så vyn får antalet rader som modellen senast meddelat.
+        self._row_count = len(self._jobs())
+        ui_bridge.add_registry_listener(self._on_registry_changed)
+
+    def _jobs(self) -> List[DownloadJob]:
+        return self.ui_bridge.get_history() if self.is_history else self.ui_bridge.get_queue()
+
+    def job_at(self, row: int) -> DownloadJob | None:
+        jobs = self._jobs()
+        return jobs[row] if 0 <= row < min(self._row_count, len(jobs)) else None
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else self._row_count
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.headers)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.headers[section]
+        return None
+
+    def _display_values(self, job: DownloadJob) -> Tuple:
+        # Jobb från en expanderad spellista markeras så att de syns höra till gruppen ovanför.
+        title = f"↳ {job.title}" if job.parent_id else job.title
+        values = (
+            job.id, title, job.duration or "", job.url,
+            job.status.name.replace("STATUS_", "").replace("_", " ").title(),
+            f"{job.progress:.1f}%", job.added_time.split('.')[0].replace('T', ' '),
+        )
+        if self.is_history:
+            values = values[:1] + (job.thumbnail_path,) + values[1:]
+        else:
+            values = values[:5] + (PRIORITY_LABELS[job.priority],) + values[5:]
+        return values
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        job = self.job_at(index.row()) if index.isValid() else None
+        if job is None:
+            return None
+        column = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == self.thumbnail_column:
+                return None
+            return self._display_values(job)[column]
+        if role == PROGRESS_ROLE:
+            return job.progress if column == self.progress_column and job.status in ACTIVE_STATUSES else None
+        if role == Qt.ItemDataRole.DecorationRole and column == self.thumbnail_column:
+            return self._thumbnail(job)
+        if role == Qt.ItemDataRole.BackgroundRole:
+            return status_color(job.status)
+        if role == Qt.ItemDataRole.ForegroundRole and status_color(job.status):
+            return QColor("#000000")
+        return None
+
+    def flags(self, index: QModelIndex) -> Qt.ItemFlag:
+        flags = super().flags(index)
+        if self.is_history:
+            return flags
+        # Köade jobb kan dras till en ny plats i kön.
+        flags |= Qt.ItemFlag.ItemIsDropEnabled
+        if index.isValid():
+            flags |= Qt.ItemFlag.ItemIsDragEnabled
+        return flags
+
+    def supportedDropActions(self) -> Qt.DropAction:
+        return Qt.DropAction.MoveAction
+
+    def mimeTypes(self) -> List[str]:
+        return [JOB_IDS_MIME_TYPE]
+
+    def mimeData(self, indexes: List[QModelIndex]) -> QMimeData:
+        rows = sorted({index.row() for index in indexes})
+        job_ids = [job.id for job in (self.job_at(row) for row in rows) if job]
+        mime = QMimeData()
+        mime.setData(JOB_IDS_MIME_TYPE, "\n".join(job_ids).encode("utf-8"))
+        return mime
+
+    def dropMimeData(self, data: QMimeData, action: Qt.DropAction, row: int, column: int, parent: QModelIndex) -> bool:
+        if self.is_history or not data.hasFormat(JOB_IDS_MIME_TYPE):
+            return False
+        if row < 0:
+            row = parent.row() if parent.isValid() else self.rowCount()
+        job_ids = bytes(data.data(JOB_IDS_MIME_TYPE)).decode("utf-8").split("\n")
+        self.ui_bridge.move_jobs([job_id for job_id in job_ids if job_id], row)
+        # Flytten görs av JobManager, som signalerar queue_changed. Returneras True tar vyn bort
+        # källraderna själv efter en MoveAction.
+        return False
+
+    def _thumbnail(self, job: DownloadJob) -> QPixmap | None:
+        path = job.thumbnail_path
+        if not path or not self.thumbnail_service:
+            return None
+        pixmap = self.thumbnail_service.get(path)
+        if pixmap is None:
+            self._waiting_thumbnails.setdefault(path, set()).add(job.id)
+        return pixmap
+
+    def _on_thumbnail_ready(self, path: str) -> None:
+        for job_id in self._waiting_thumbnails.pop(path, ()):
+            location = self.ui_bridge.get_job_location(job_id)
+            if location and location[0] == self.container:
+                index = self.index(location[1], self.thumbnail_column)
+                self.dataChanged.emit(index, index, [Qt.ItemDataRole.DecorationRole])
+
+    def _on_registry_changed(self, change: RegistryChange) -> None:
+        if change.container != self.container:
+            return
+        if change.kind == JobRegistry.INSERTED:
+            self.beginInsertRows(QModelIndex(), change.row, change.row)
+            self._row_count += 1
+            self.endInsertRows()
+        elif change.kind == JobRegistry.REMOVED:
+            self.beginRemoveRows(QModelIndex(), change.row, change.row)
+            self._row_count -= 1
+            self._snapshots.pop(change.job_id, None)
+            self.endRemoveRows()
+        elif change.kind == JobRegistry.MOVED:
+            # Målraden räknas här före flytten, dvs. ett steg längre ner när raden flyttas nedåt.
+            destination = change.to_row + 1 if change.to_row > change.row else change.to_row
+            self.beginMoveRows(QModelIndex(), change.row, change.row, QModelIndex(), destination)
+            self.endMoveRows()
+        else:
+            self.refresh()
+
+    def refresh(self) -> None:
+        """Läser om hela tabellen, t.ex. efter att registret har ersatts vid inläsning eller import."""
+        self.beginResetModel()
+        self._row_count = len(self._jobs())
+        self._snapshots.clear()
+        self.endResetModel()
+
+    def job_updated(self, row: int) -> None:
+        """Signalerar dataChanged för de celler i raden vars värden faktiskt har ändrats."""
+        job = self.job_at(row)
+        if job is None:
+            return
+        values = self._display_values(job) + (job.status,)
+        previous = self._snapshots.get(job.id)
+        self._snapshots[job.id] = values
+        if previous and self.thumbnail_service and job.thumbnail_path and previous[self.thumbnail_column] != job.thumbnail_path:
+            self.thumbnail_service.invalidate(job.thumbnail_path)
+        if previous is None or previous[-1] != job.status:
+            # Ny rad eller ändrad status: färg och förloppsindikator påverkar hela raden.
+            changed = list(range(len(self.headers)))
+        else:
+            changed = [col for col in range(len(self.headers)) if values[col] != previous[col]]
+        if changed:
+            self.dataChanged.emit(self.index(row, min(changed)), self.index(row, max(changed)))
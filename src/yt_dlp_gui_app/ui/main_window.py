@@ -1,17 +1,23 @@
 import logging
 import os
-from PyQt6.QtCore import Qt, QModelIndex, QUrl
-from PyQt6.QtGui import QAction, QColor, QStandardItemModel, QStandardItem, QDesktopServices, QClipboard, QPixmap
+from PyQt6.QtCore import Qt, QEvent, QUrl
+from PyQt6.QtGui import QAction, QDesktopServices
 from PyQt6.QtWidgets import (
-    QApplication, QMainWindow, QWidget, QVBoxLayout, QTabWidget, QTableView,
-    QHeaderView, QLineEdit, QPushButton, QHBoxLayout, QProgressBar,
+    QAbstractItemView, QApplication, QMainWindow, QWidget, QVBoxLayout, QTabWidget, QTableView,
+    QHeaderView, QLineEdit, QPushButton, QHBoxLayout,
     QFileDialog, QMessageBox, QTextEdit, QMenu, QLabel, QStatusBar
 )
 from yt_dlp_gui_app.core.config import ConfigManager
-from yt_dlp_gui_app.core.models import DownloadJob, JobStatus
+from yt_dlp_gui_app.core.diagnostics import Diagnostics
+from yt_dlp_gui_app.core.job_registry import JobRegistry
+from yt_dlp_gui_app.core.models import PRIORITY_LABELS, JobPriority
+from yt_dlp_gui_app.core.thumbnail_pool import PRIORITY_NORMAL, PRIORITY_VISIBLE
 from yt_dlp_gui_app.core.ui_bridge import UIBridge
+from yt_dlp_gui_app.ui.job_table_model import JobTableModel
+from yt_dlp_gui_app.ui.progress_delegate import ProgressBarDelegate
 from yt_dlp_gui_app.ui.settings_dialog import SettingsDialog
 from yt_dlp_gui_app.ui.theme_manager import ThemeManager
+from yt_dlp_gui_app.ui.thumbnail_service import ThumbnailService
 from yt_dlp_gui_app.ui.url_input_lineedit import UrlInputLineEdit
 
 logger = logging.getLogger(__name__)
@@ -19,11 +25,14 @@ logger = logging.getLogger(__name__)
 class MainWindow(QMainWindow):
     """Applikationens huvudfönster."""
 
-    def __init__(self, ui_bridge: UIBridge, config_manager: ConfigManager):
+    def __init__(self, ui_bridge: UIBridge, config_manager: ConfigManager, diagnostics: Diagnostics | None = None):
         super().__init__()
         self.ui_bridge = ui_bridge
         self.config_manager = config_manager
+        self.diagnostics = diagnostics
         self.theme_manager = ThemeManager()
+        self.progress_delegate = ProgressBarDelegate(self)
+        self.thumbnail_service = ThumbnailService(parent=self)
         self.last_clipboard_url = ""
 
         self.setWindowTitle("YtDlpGUI")
@@ -63,17 +72,28 @@ class MainWindow(QMainWindow):
         self.queue_tab = QWidget()
         self.queue_layout = QVBoxLayout(self.queue_tab)
         self.queue_table = self._create_table_view()
-        self.queue_model = self._create_table_model(is_history=False)
+        self.queue_model = JobTableModel(self.ui_bridge, JobRegistry.QUEUE, self)
         self.queue_table.setModel(self.queue_model)
         self._setup_table_columns(self.queue_table, is_history=False)
+        # Jobb i kön kan dras till en ny plats; själva flytten görs av JobManager.
+        self.queue_table.setDragEnabled(True)
+        self.queue_table.setAcceptDrops(True)
+        self.queue_table.setDropIndicatorShown(True)
+        self.queue_table.setDragDropMode(QAbstractItemView.DragDropMode.InternalMove)
+        self.queue_table.setDefaultDropAction(Qt.DropAction.MoveAction)
         self.queue_layout.addWidget(self.queue_table)
         self.tabs.addTab(self.queue_tab, "Kö")
         self.history_tab = QWidget()
         self.history_layout = QVBoxLayout(self.history_tab)
+        thumbs_layout = QHBoxLayout()
         self.generate_thumbs_button = QPushButton("Generera valda miniatyrbilder")
-        self.history_layout.addWidget(self.generate_thumbs_button)
+        self.cancel_thumbs_button = QPushButton("Avbryt generering")
+        self.cancel_thumbs_button.setEnabled(False)
+        thumbs_layout.addWidget(self.generate_thumbs_button)
+        thumbs_layout.addWidget(self.cancel_thumbs_button)
+        self.history_layout.addLayout(thumbs_layout)
         self.history_table = self._create_table_view()
-        self.history_model = self._create_table_model(is_history=True)
+        self.history_model = JobTableModel(self.ui_bridge, JobRegistry.HISTORY, self, self.thumbnail_service)
         self.history_table.setModel(self.history_model)
         self._setup_table_columns(self.history_table, is_history=True)
         self.history_layout.addWidget(self.history_table)
@@ -92,6 +112,12 @@ class MainWindow(QMainWindow):
         self.active_label = QLabel("Aktiva: 0")
         self.queue_label = QLabel("I kö: 0")
         self.history_label = QLabel("Historik: 0")
+        self.thumbnail_progress_label = QLabel()
+        self.thumbnail_progress_label.hide()
+        self.concurrency_label = QLabel()
+        self.concurrency_label.hide()
+        self.status_bar.addPermanentWidget(self.thumbnail_progress_label)
+        self.status_bar.addPermanentWidget(self.concurrency_label)
         self.status_bar.addPermanentWidget(self.active_label)
         self.status_bar.addPermanentWidget(self.queue_label)
         self.status_bar.addPermanentWidget(self.history_label)
@@ -112,6 +138,25 @@ class MainWindow(QMainWindow):
         tools_menu = menu_bar.addMenu("Verktyg")
         self.settings_action = QAction("Inställningar", self)
         tools_menu.addAction(self.settings_action)
+        rebuild_archive_action = QAction("Bygg om nedladdningsarkiv från historiken", self)
+        rebuild_archive_action.triggered.connect(self._on_rebuild_archive)
+        tools_menu.addAction(rebuild_archive_action)
+        if self.diagnostics:
+            self._create_diagnostics_menu(tools_menu.addMenu("Diagnostik"))
+
+    def _create_diagnostics_menu(self, menu: QMenu) -> None:
+        self.profile_action = menu.addAction("Profilera med cProfile")
+        self.profile_action.setCheckable(True)
+        self.profile_action.setChecked(self.diagnostics.profiling)
+        self.profile_action.toggled.connect(self._on_profile_toggled)
+        self.tracemalloc_action = menu.addAction("Spåra minnesallokeringar med tracemalloc")
+        self.tracemalloc_action.setCheckable(True)
+        self.tracemalloc_action.setChecked(self.diagnostics.tracing_memory)
+        self.tracemalloc_action.toggled.connect(self._on_tracemalloc_toggled)
+        menu.addSeparator()
+        menu.addAction("Spara rapport över frysningar").triggered.connect(
+            lambda: self._show_report(self.diagnostics.write_stall_report()))
+        menu.addAction("Öppna mappen med rapporter").triggered.connect(self._open_reports_dir)
 
     def _create_table_view(self) -> QTableView:
         table = QTableView()
@@ -119,17 +164,11 @@ class MainWindow(QMainWindow):
         table.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
         table.setAlternatingRowColors(True)
         table.verticalHeader().setVisible(False)
+        # Fasta radhöjder gör att vyn inte behöver mäta varje rad i stora historiker.
+        table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
         table.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         return table
 
-    def _create_table_model(self, is_history: bool = False) -> QStandardItemModel:
-        headers = ["ID", "Titel", "Längd", "URL", "Status", "Framsteg", "Tillagd"]
-        if is_history:
-            headers.insert(1, "Miniatyr")
-        model = QStandardItemModel()
-        model.setHorizontalHeaderLabels(headers)
-        return model
-
     def _setup_table_columns(self, table: QTableView, is_history: bool = False) -> None:
         header = table.horizontalHeader()
         model = table.model() # Hämta modellen från tabellen
@@ -144,6 +183,8 @@ class MainWindow(QMainWindow):
         header.setSectionResizeMode(idx_map['Framsteg'], QHeaderView.ResizeMode.Interactive)
         header.setSectionResizeMode(idx_map['Tillagd'], QHeaderView.ResizeMode.ResizeToContents)
         
+        if not is_history:
+            header.setSectionResizeMode(idx_map['Prioritet'], QHeaderView.ResizeMode.ResizeToContents)
         if is_history:
             header.setSectionResizeMode(idx_map['Miniatyr'], QHeaderView.ResizeMode.Fixed)
             table.setColumnWidth(idx_map['Miniatyr'], 128)
@@ -151,20 +192,27 @@ class MainWindow(QMainWindow):
         
         table.setColumnHidden(idx_map['ID'], True)
         table.setColumnWidth(idx_map['Framsteg'], 120)
+        table.setItemDelegateForColumn(idx_map['Framsteg'], self.progress_delegate)
+        # Kolumnbredder mäts på ett urval rader i stället för hela modellen.
+        header.setResizeContentsPrecision(100)
 
     def _connect_signals(self) -> None:
         self.add_button.clicked.connect(self._on_add_clicked)
         self.browse_path_button.clicked.connect(self._on_browse_path)
         self.settings_action.triggered.connect(self._open_settings_dialog)
         self.generate_thumbs_button.clicked.connect(self._on_generate_thumbnails_clicked)
+        self.cancel_thumbs_button.clicked.connect(self.ui_bridge.cancel_thumbnail_generation)
+        self.history_table.verticalScrollBar().valueChanged.connect(self._prioritize_visible_thumbnails)
         self.queue_table.customContextMenuRequested.connect(self._open_queue_context_menu)
         self.history_table.customContextMenuRequested.connect(self._open_history_context_menu)
         self.ui_bridge.queue_changed.connect(self.update_queue_view)
         self.ui_bridge.history_changed.connect(self.update_history_view)
-        self.ui_bridge.job_updated.connect(self._on_job_updated)
+        self.ui_bridge.jobs_updated.connect(self._on_jobs_updated)
         self.ui_bridge.config_changed.connect(self._on_config_changed)
         self.ui_bridge.log_message.connect(self._on_log_message)
         self.ui_bridge.active_jobs_count_changed.connect(self._update_active_count)
+        self.ui_bridge.thumbnail_progress_changed.connect(self._update_thumbnail_progress)
+        self.ui_bridge.concurrency_changed.connect(self._update_concurrency_label)
 
     def _setup_clipboard_listener(self) -> None:
         self.clipboard = QApplication.clipboard()
@@ -172,83 +220,21 @@ class MainWindow(QMainWindow):
         logger.info("Klippbordslyssnare aktiverad.")
 
     def update_queue_view(self) -> None:
-        queue = self.ui_bridge.get_queue()
-        self.queue_model.removeRows(0, self.queue_model.rowCount())
-        for job in queue:
-            self._add_or_update_job_in_model(self.queue_model, self.queue_table, job)
-        self.queue_label.setText(f"I kö: {len(queue)}")
+        # Raderna har redan lagts till, flyttats eller tagits bort av modellen, så markeringen består.
+        self.queue_label.setText(f"I kö: {self.queue_model.rowCount()}")
 
     def update_history_view(self) -> None:
-        history = self.ui_bridge.get_history()
-        self.history_model.removeRows(0, self.history_model.rowCount())
-        for job in history:
-            self._add_or_update_job_in_model(self.history_model, self.history_table, job)
-        self.history_label.setText(f"Historik: {len(history)}")
-            
-    def _on_job_updated(self, job_id: str) -> None:
-        job = self.ui_bridge.get_job(job_id)
-        if job:
-            if self._find_row_by_job_id(self.queue_model, job_id) is not None:
-                self._add_or_update_job_in_model(self.queue_model, self.queue_table, job)
-            elif self._find_row_by_job_id(self.history_model, job_id) is not None:
-                 self._add_or_update_job_in_model(self.history_model, self.history_table, job)
-
-    def _add_or_update_job_in_model(self, model: QStandardItemModel, table: QTableView, job: DownloadJob) -> None:
-        row_index = self._find_row_by_job_id(model, job.id)
-        is_history = "Miniatyr" in [model.headerData(i, Qt.Orientation.Horizontal) for i in range(model.columnCount())]
-        
-        items = [
-            QStandardItem(job.id), QStandardItem(job.title), QStandardItem(job.duration or ""),
-            QStandardItem(job.url), QStandardItem(job.status.name.replace("STATUS_", "").replace("_", " ").title()),
-            QStandardItem(), QStandardItem(job.added_time.split('.')[0].replace('T', ' '))
-        ]
-        if is_history:
-            thumb_item = QStandardItem()
-            if job.thumbnail_path and os.path.exists(job.thumbnail_path):
-                pixmap = QPixmap(job.thumbnail_path)
-                if not pixmap.isNull():
-                    thumb_item.setData(pixmap.scaled(128, 72, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation), Qt.ItemDataRole.DecorationRole)
-            items.insert(1, thumb_item)
-        
-        status_color = self._get_status_color(job.status)
-        if status_color:
-            text_color = QColor("#000000")
-            for item in items:
-                item.setBackground(status_color)
-                if not item.data(Qt.ItemDataRole.DecorationRole):
-                     item.setForeground(text_color)
-        
-        if row_index is None:
-            model.appendRow(items)
-            row_index = model.rowCount() - 1
-        else:
-            for col, item in enumerate(items): model.setItem(row_index, col, item)
-        
-        progress_col_idx = 6 if is_history else 5
-        progress_bar = QProgressBar()
-        progress_bar.setValue(int(job.progress))
-        progress_bar.setTextVisible(True)
-        progress_bar.setFormat(f"{job.progress:.1f}%")
-        if status_color: progress_bar.setStyleSheet("color: #000000; text-align: center;")
-        else: progress_bar.setStyleSheet("text-align: center;")
-        if job.status == JobStatus.STATUS_RUNNING:
-            table.setIndexWidget(model.index(row_index, progress_col_idx), progress_bar)
-        else:
-            progress_item = model.item(row_index, progress_col_idx)
-            if progress_item: progress_item.setText(f"{job.progress:.1f}%")
-            table.setIndexWidget(model.index(row_index, progress_col_idx), None)
-
-    def _find_row_by_job_id(self, model: QStandardItemModel, job_id: str) -> int | None:
-        for row in range(model.rowCount()):
-            if model.item(row, 0).text() == job_id: return row
-        return None
+        self.history_label.setText(f"Historik: {self.history_model.rowCount()}")
 
-    def _get_status_color(self, status: JobStatus) -> QColor | None:
-        if status in (JobStatus.STATUS_COMPLETED, JobStatus.STATUS_ALREADY_DOWNLOADED): return QColor("#d4edda")
-        if status.name.startswith("STATUS_ERROR"): return QColor("#f8d7da")
-        if status == JobStatus.STATUS_RUNNING: return QColor("#cce5ff")
-        if status == JobStatus.STATUS_CANCELLED: return QColor("#fff3cd")
-        return None
+    def _on_jobs_updated(self, job_ids: list) -> None:
+        # Registret ger jobbens rader, så ingen tabell behöver genomsökas.
+        for job_id in job_ids:
+            location = self.ui_bridge.get_job_location(job_id)
+            if not location:
+                continue
+            container, row = location
+            model = self.queue_model if container == JobRegistry.QUEUE else self.history_model
+            model.job_updated(row)
 
     def _add_urls_to_queue(self, urls: str) -> None:
         if not urls: return
@@ -294,10 +280,36 @@ class MainWindow(QMainWindow):
             QMessageBox.information(self, "Inget valt", "Markera en eller flera rader i historiken för att generera miniatyrbilder.")
             return
         job_ids = [self.history_model.index(index.row(), 0).data() for index in selected_indexes]
+        visible_ids = set(self._visible_history_job_ids())
         for job_id in job_ids:
-            self.ui_bridge.trigger_thumbnail_generation(job_id)
+            priority = PRIORITY_VISIBLE if job_id in visible_ids else PRIORITY_NORMAL
+            self.ui_bridge.trigger_thumbnail_generation(job_id, priority)
         QMessageBox.information(self, "Startat", f"Har påbörjat generering av miniatyrbilder för {len(job_ids)} jobb.")
 
+    def _on_rebuild_archive(self) -> None:
+        count = self.ui_bridge.rebuild_download_archive()
+        QMessageBox.information(self, "Nedladdningsarkiv", f"Nedladdningsarkivet innehåller nu {count} videor från historiken.")
+
+    def _on_profile_toggled(self, enabled: bool) -> None:
+        if enabled:
+            self.diagnostics.start_profiling()
+        else:
+            self._show_report(self.diagnostics.stop_profiling())
+
+    def _on_tracemalloc_toggled(self, enabled: bool) -> None:
+        if enabled:
+            self.diagnostics.start_tracemalloc()
+        else:
+            self._show_report(self.diagnostics.stop_tracemalloc())
+
+    def _show_report(self, path: str | None) -> None:
+        if path:
+            self.status_bar.showMessage(f"Rapporten sparades i {path}", 10000)
+
+    def _open_reports_dir(self) -> None:
+        os.makedirs(self.diagnostics.reports_dir, exist_ok=True)
+        QDesktopServices.openUrl(QUrl.fromLocalFile(self.diagnostics.reports_dir))
+
     def _open_settings_dialog(self) -> None:
         dialog = SettingsDialog(self.config_manager, self)
         dialog.exec()
@@ -307,10 +319,39 @@ class MainWindow(QMainWindow):
         self.path_input.setText(self.config_manager.get_config().last_output_dir)
         self._update_theme()
         self.check_executables_path()
+        self._update_concurrency_label()
 
     def _update_active_count(self, count: int):
         self.active_label.setText(f"Aktiva: {count}")
 
+    def _update_concurrency_label(self, *args) -> None:
+        limit = self.ui_bridge.concurrency_limit()
+        self.concurrency_label.setVisible(limit is not None)
+        if limit is not None:
+            self.concurrency_label.setText(f"Platser: {limit} (auto)")
+            history = self.ui_bridge.concurrency_history()
+            self.concurrency_label.setToolTip("\n".join(history[-10:]) or "Inga ändringar ännu.")
+
+    def _update_thumbnail_progress(self, done: int, total: int) -> None:
+        running = total > 0 and done < total
+        self.thumbnail_progress_label.setText(f"Miniatyrer: {done}/{total}")
+        self.thumbnail_progress_label.setVisible(running)
+        self.cancel_thumbs_button.setEnabled(running)
+
+    def _visible_history_job_ids(self) -> list[str]:
+        viewport = self.history_table.viewport()
+        first = self.history_table.rowAt(0)
+        if first < 0:
+            return []
+        last = self.history_table.rowAt(viewport.height() - 1)
+        if last < 0:
+            last = self.history_model.rowCount() - 1
+        return [self.history_model.index(row, 0).data() for row in range(first, last + 1)]
+
+    def _prioritize_visible_thumbnails(self) -> None:
+        if self.cancel_thumbs_button.isEnabled():
+            self.ui_bridge.prioritize_thumbnails(self._visible_history_job_ids())
+
     def _update_theme(self) -> None:
         self.setStyleSheet(self.theme_manager.get_stylesheet(self.config_manager.get_config().theme))
 
@@ -342,8 +383,19 @@ class MainWindow(QMainWindow):
         cancel_action = menu.addAction("Avbryt")
         remove_action = menu.addAction("Ta bort")
         log_action = menu.addAction("Visa logg")
+        # Prioriteten ändras för alla markerade jobb.
+        job_ids = [self.queue_model.index(index.row(), 0).data() for index in self.queue_table.selectionModel().selectedRows()]
+        job = self.ui_bridge.get_job(job_id)
+        priority_menu = menu.addMenu("Prioritet")
+        priority_actions = {}
+        for priority in JobPriority:
+            priority_action = priority_menu.addAction(PRIORITY_LABELS[priority])
+            priority_action.setCheckable(True)
+            priority_action.setChecked(job is not None and job.priority == priority)
+            priority_actions[priority_action] = priority
         action = menu.exec(self.queue_table.viewport().mapToGlobal(position))
-        if action == cancel_action: self.ui_bridge.cancel_job(job_id)
+        if action in priority_actions: self.ui_bridge.set_priority(job_ids, priority_actions[action])
+        elif action == cancel_action: self.ui_bridge.cancel_job(job_id)
         elif action == remove_action: self.ui_bridge.remove_job(job_id)
         elif action == log_action: self._show_job_log(job_id)
 
@@ -383,10 +435,32 @@ class MainWindow(QMainWindow):
         from yt_dlp_gui_app.ui.job_log_dialog import JobLogDialog
         job = self.ui_bridge.get_job(job_id)
         if job:
-            dialog = JobLogDialog(job, self)
+            load_full = lambda: self.ui_bridge.get_job_log(job_id)
+            tail = self.ui_bridge.get_job_log_tail(job_id)
+            if tail is None:
+                # Loggen läses från disk först när dialogen öppnas.
+                dialog = JobLogDialog(job, load_full(), self)
+            else:
+                # Medan jobbet körs visas svansen från minnet; segmenten på disk läses först på begäran.
+                dialog = JobLogDialog(job, tail, self, live_tail=lambda: self.ui_bridge.get_job_log_tail(job_id),
+                                      load_full=load_full)
             dialog.exec()
 
+    def changeEvent(self, event) -> None:
+        if event.type() == QEvent.Type.WindowStateChange:
+            self.ui_bridge.set_updates_paused(self.isMinimized() or not self.isVisible())
+        super().changeEvent(event)
+
+    def showEvent(self, event) -> None:
+        self.ui_bridge.set_updates_paused(self.isMinimized())
+        super().showEvent(event)
+
+    def hideEvent(self, event) -> None:
+        self.ui_bridge.set_updates_paused(True)
+        super().hideEvent(event)
+
     def closeEvent(self, event) -> None:
         logger.info("Stänger fönstret, sparar jobb...")
         self.ui_bridge.job_manager.save_jobs()
+        self.ui_bridge.job_manager.shutdown()
         event.accept()
@@ -0,0 +1,27 @@
+from PyQt6.QtCore import Qt, QModelIndex
+from PyQt6.QtGui import QPainter
+from PyQt6.QtWidgets import QApplication, QStyle, QStyledItemDelegate, QStyleOptionProgressBar, QStyleOptionViewItem
+from yt_dlp_gui_app.ui.job_table_model import PROGRESS_ROLE
+
+class ProgressBarDelegate(QStyledItemDelegate):
+    """
+    Ritar en förloppsindikator direkt i cellen i stället för att skapa en QProgressBar-widget per rad.
+    Celler utan värde för PROGRESS_ROLE ritas som vanlig text.
+    """
+
+    def paint(self, painter: QPainter, option: QStyleOptionViewItem, index: QModelIndex) -> None:
+        progress = index.data(PROGRESS_ROLE)
+        if progress is None:
+            super().paint(painter, option, index)
+            return
+        bar = QStyleOptionProgressBar()
+        bar.rect = option.rect.adjusted(2, 2, -2, -2)
+        bar.minimum = 0
+        bar.maximum = 100
+        bar.progress = int(progress)
+        bar.text = f"{progress:.1f}%"
+        bar.textVisible = True
+        bar.textAlignment = Qt.AlignmentFlag.AlignCenter
+        bar.state = option.state | QStyle.StateFlag.State_Horizontal
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawControl(QStyle.ControlElement.CE_ProgressBar, bar, painter, option.widget)
@@ -5,6 +5,7 @@ from PyQt6.QtWidgets import (
     QTabWidget, QWidget, QCheckBox
 )
 from yt_dlp_gui_app.core.config import ConfigManager
+from yt_dlp_gui_app.core.scheduler import format_host_limits, parse_host_limits
 
 class SettingsDialog(QDialog):
     """En dialog för att ändra applikationens inställningar."""
@@ -60,6 +61,111 @@ class SettingsDialog(QDialog):
         self.max_downloads_spinbox.setMaximum(20)
         layout.addRow("Max parallella nedladdningar:", self.max_downloads_spinbox)
 
+        self.adaptive_check = QCheckBox("Anpassa antalet nedladdningar automatiskt efter hastighet och fel")
+        layout.addRow(self.adaptive_check)
+        self.adaptive_min_spinbox = QSpinBox()
+        self.adaptive_min_spinbox.setRange(1, 20)
+        self.adaptive_max_spinbox = QSpinBox()
+        self.adaptive_max_spinbox.setRange(1, 20)
+        adaptive_layout = QHBoxLayout()
+        adaptive_layout.addWidget(self.adaptive_min_spinbox)
+        adaptive_layout.addWidget(self.adaptive_max_spinbox)
+        layout.addRow("Automatiskt läge, minst och högst:", adaptive_layout)
+        self.adaptive_check.toggled.connect(self.adaptive_min_spinbox.setEnabled)
+        self.adaptive_check.toggled.connect(self.adaptive_max_spinbox.setEnabled)
+
+        self.max_per_host_spinbox = QSpinBox()
+        self.max_per_host_spinbox.setMinimum(0)
+        self.max_per_host_spinbox.setMaximum(20)
+        self.max_per_host_spinbox.setSpecialValueText("Ingen gräns")
+        layout.addRow("Max samtidiga nedladdningar per webbplats:", self.max_per_host_spinbox)
+
+        self.host_limits_edit = QLineEdit()
+        self.host_limits_edit.setPlaceholderText("vimeo.com=1, youtube.com=3")
+        layout.addRow("Gränser för enskilda webbplatser:", self.host_limits_edit)
+
+        self.bandwidth_spinbox = QSpinBox()
+        self.bandwidth_spinbox.setMinimum(0)
+        self.bandwidth_spinbox.setMaximum(10_000_000)
+        self.bandwidth_spinbox.setSingleStep(256)
+        self.bandwidth_spinbox.setSuffix(" KiB/s")
+        self.bandwidth_spinbox.setSpecialValueText("Obegränsad")
+        layout.addRow("Total bandbredd (delas mellan jobben):", self.bandwidth_spinbox)
+
+        self.fair_share_combo = QComboBox()
+        self.fair_share_combo.addItem("Webbplats", "host")
+        self.fair_share_combo.addItem("Utdatamapp", "output_path")
+        self.fair_share_combo.addItem("Ingen", "none")
+        layout.addRow("Fördela nedladdningar rättvist per:", self.fair_share_combo)
+
+        self.auto_retry_check = QCheckBox("Försök igen automatiskt efter tillfälliga fel (t.ex. HTTP 429, tidsgräns)")
+        layout.addRow(self.auto_retry_check)
+        self.retry_attempts_spinbox = QSpinBox()
+        self.retry_attempts_spinbox.setRange(1, 20)
+        self.retry_base_delay_spinbox = QSpinBox()
+        self.retry_base_delay_spinbox.setRange(1, 3600)
+        self.retry_base_delay_spinbox.setSuffix(" s")
+        self.retry_max_delay_spinbox = QSpinBox()
+        self.retry_max_delay_spinbox.setRange(1, 86400)
+        self.retry_max_delay_spinbox.setSuffix(" s")
+        retry_layout = QHBoxLayout()
+        retry_layout.addWidget(self.retry_attempts_spinbox)
+        retry_layout.addWidget(self.retry_base_delay_spinbox)
+        retry_layout.addWidget(self.retry_max_delay_spinbox)
+        layout.addRow("Antal försök, första och längsta väntetid:", retry_layout)
+        for widget in (self.retry_attempts_spinbox, self.retry_base_delay_spinbox, self.retry_max_delay_spinbox):
+            self.auto_retry_check.toggled.connect(widget.setEnabled)
+
+        self.runner_backend_combo = QComboBox()
+        self.runner_backend_combo.addItem("Starta yt-dlp för varje jobb", "subprocess")
+        self.runner_backend_combo.addItem("Återanvända Python-processer (kräver paketet yt_dlp)", "worker_pool")
+        layout.addRow("Körning av nedladdningar:", self.runner_backend_combo)
+
+        self.max_thumbnails_spinbox = QSpinBox()
+        self.max_thumbnails_spinbox.setMinimum(1)
+        self.max_thumbnails_spinbox.setMaximum(16)
+        layout.addRow("Max parallella miniatyrgenereringar:", self.max_thumbnails_spinbox)
+
+        self.expand_playlists_check = QCheckBox("Dela upp spellistor och kanaler i ett jobb per video")
+        layout.addRow(self.expand_playlists_check)
+        self.prefetch_metadata_check = QCheckBox("Hämta titel och längd för köade jobb i förväg")
+        layout.addRow(self.prefetch_metadata_check)
+        self.max_prefetches_spinbox = QSpinBox()
+        self.max_prefetches_spinbox.setMinimum(1)
+        self.max_prefetches_spinbox.setMaximum(16)
+        layout.addRow("Max parallella metadatahämtningar:", self.max_prefetches_spinbox)
+        self.prefetch_metadata_check.toggled.connect(self.max_prefetches_spinbox.setEnabled)
+
+        self.metrics_interval_spinbox = QSpinBox()
+        self.metrics_interval_spinbox.setRange(0, 3600)
+        self.metrics_interval_spinbox.setSuffix(" s")
+        self.metrics_interval_spinbox.setSpecialValueText("Av")
+        self.metrics_dir_edit = QLineEdit()
+        self.metrics_dir_edit.setPlaceholderText("Programmets datakatalog")
+        metrics_layout = QHBoxLayout()
+        metrics_layout.addWidget(self.metrics_interval_spinbox)
+        metrics_layout.addWidget(self.metrics_dir_edit)
+        layout.addRow("Exportera mätvärden (Prometheus/JSON) var:", metrics_layout)
+
+        self.http_api_check = QCheckBox("Aktivera")
+        self.http_api_port_spinbox = QSpinBox()
+        self.http_api_port_spinbox.setRange(1024, 65535)
+        self.http_api_token_edit = QLineEdit()
+        self.http_api_token_edit.setPlaceholderText("Token (skapas automatiskt)")
+        http_api_layout = QHBoxLayout()
+        http_api_layout.addWidget(self.http_api_check)
+        http_api_layout.addWidget(self.http_api_port_spinbox)
+        http_api_layout.addWidget(self.http_api_token_edit)
+        layout.addRow("Lokalt HTTP-API (127.0.0.1):", http_api_layout)
+        self.http_api_check.toggled.connect(self.http_api_port_spinbox.setEnabled)
+        self.http_api_check.toggled.connect(self.http_api_token_edit.setEnabled)
+
+        self.ui_update_hz_spinbox = QSpinBox()
+        self.ui_update_hz_spinbox.setMinimum(1)
+        self.ui_update_hz_spinbox.setMaximum(60)
+        self.ui_update_hz_spinbox.setSuffix(" Hz")
+        layout.addRow("Uppdateringstakt för listor:", self.ui_update_hz_spinbox)
+
         self.theme_combobox = QComboBox()
         self.theme_combobox.addItems(["default", "dark", "synthwave", "matrix", "dracula"])
         layout.addRow("Tema:", self.theme_combobox)
@@ -101,6 +207,35 @@ class SettingsDialog(QDialog):
         self.ffmpeg_path_edit.setText(config.ffmpeg_path or "") # NY RAD
         self.default_args_edit.setText(shlex.join(config.default_args))
         self.max_downloads_spinbox.setValue(config.max_parallel_downloads)
+        self.adaptive_check.setChecked(config.adaptive_concurrency)
+        self.adaptive_min_spinbox.setValue(config.adaptive_min_downloads)
+        self.adaptive_max_spinbox.setValue(config.adaptive_max_downloads)
+        self.adaptive_min_spinbox.setEnabled(config.adaptive_concurrency)
+        self.adaptive_max_spinbox.setEnabled(config.adaptive_concurrency)
+        self.max_per_host_spinbox.setValue(config.max_downloads_per_host)
+        self.host_limits_edit.setText(format_host_limits(config.host_download_limits))
+        self.bandwidth_spinbox.setValue(config.bandwidth_limit_kib)
+        self.fair_share_combo.setCurrentIndex(max(0, self.fair_share_combo.findData(config.fair_share_by)))
+        self.runner_backend_combo.setCurrentIndex(max(0, self.runner_backend_combo.findData(config.runner_backend)))
+        self.auto_retry_check.setChecked(config.auto_retry)
+        self.retry_attempts_spinbox.setValue(config.retry_max_attempts)
+        self.retry_base_delay_spinbox.setValue(int(config.retry_base_delay_s))
+        self.retry_max_delay_spinbox.setValue(int(config.retry_max_delay_s))
+        for widget in (self.retry_attempts_spinbox, self.retry_base_delay_spinbox, self.retry_max_delay_spinbox):
+            widget.setEnabled(config.auto_retry)
+        self.max_thumbnails_spinbox.setValue(config.max_parallel_thumbnails)
+        self.expand_playlists_check.setChecked(config.expand_playlists)
+        self.prefetch_metadata_check.setChecked(config.prefetch_metadata)
+        self.max_prefetches_spinbox.setValue(config.max_parallel_prefetches)
+        self.max_prefetches_spinbox.setEnabled(config.prefetch_metadata)
+        self.metrics_interval_spinbox.setValue(config.metrics_interval_s)
+        self.metrics_dir_edit.setText(config.metrics_dir or "")
+        self.http_api_check.setChecked(config.http_api_enabled)
+        self.http_api_port_spinbox.setValue(config.http_api_port)
+        self.http_api_token_edit.setText(config.http_api_token or "")
+        self.http_api_port_spinbox.setEnabled(config.http_api_enabled)
+        self.http_api_token_edit.setEnabled(config.http_api_enabled)
+        self.ui_update_hz_spinbox.setValue(config.ui_update_hz)
         self.theme_combobox.setCurrentText(config.theme)
         self.format_edit.setText(config.download_format)
         self.extract_audio_check.setChecked(config.extract_audio)
@@ -118,6 +253,28 @@ class SettingsDialog(QDialog):
         config.ffmpeg_path = self.ffmpeg_path_edit.text() # NY RAD
         config.default_args = shlex.split(self.default_args_edit.text())
         config.max_parallel_downloads = self.max_downloads_spinbox.value()
+        config.adaptive_concurrency = self.adaptive_check.isChecked()
+        config.adaptive_min_downloads = min(self.adaptive_min_spinbox.value(), self.adaptive_max_spinbox.value())
+        config.adaptive_max_downloads = max(self.adaptive_min_spinbox.value(), self.adaptive_max_spinbox.value())
+        config.max_downloads_per_host = self.max_per_host_spinbox.value()
+        config.host_download_limits = parse_host_limits(self.host_limits_edit.text())
+        config.bandwidth_limit_kib = self.bandwidth_spinbox.value()
+        config.fair_share_by = self.fair_share_combo.currentData()
+        config.runner_backend = self.runner_backend_combo.currentData()
+        config.auto_retry = self.auto_retry_check.isChecked()
+        config.retry_max_attempts = self.retry_attempts_spinbox.value()
+        config.retry_base_delay_s = float(self.retry_base_delay_spinbox.value())
+        config.retry_max_delay_s = float(max(self.retry_base_delay_spinbox.value(), self.retry_max_delay_spinbox.value()))
+        config.max_parallel_thumbnails = self.max_thumbnails_spinbox.value()
+        config.expand_playlists = self.expand_playlists_check.isChecked()
+        config.prefetch_metadata = self.prefetch_metadata_check.isChecked()
+        config.max_parallel_prefetches = self.max_prefetches_spinbox.value()
+        config.metrics_interval_s = self.metrics_interval_spinbox.value()
+        config.metrics_dir = self.metrics_dir_edit.text().strip() or None
+        config.http_api_enabled = self.http_api_check.isChecked()
+        config.http_api_port = self.http_api_port_spinbox.value()
+        config.http_api_token = self.http_api_token_edit.text().strip() or None
+        config.ui_update_hz = self.ui_update_hz_spinbox.value()
         config.theme = self.theme_combobox.currentText()
         config.download_format = self.format_edit.text()
         config.extract_audio = self.extract_audio_check.isChecked()
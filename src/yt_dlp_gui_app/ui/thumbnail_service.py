@@ -0,0 +1,134 @@
+import hashlib
+import logging
+import os
+from collections import OrderedDict
+from typing import Optional, Set
+from PyQt6.QtCore import QObject, QRunnable, QSize, QStandardPaths, QThreadPool, Qt, pyqtSignal
+from PyQt6.QtGui import QImage, QImageReader, QPixmap
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_SIZE = QSize(128, 72)
+
+def variant_path(cache_dir: str, path: str) -> Optional[str]:
+    """Returnerar sökvägen till den förskalade varianten av en bild, nyckad på sökväg och ändringstid."""
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    key = hashlib.sha1(f"{os.path.abspath(path)}|{mtime}".encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir, f"{key}.png")
+
+def load_scaled_image(path: str, cache_dir: str) -> Optional[QImage]:
+    """
+    Läser en förskalad variant från disk, eller avkodar och skalar originalet och sparar varianten.
+    Körs i en arbetstråd, därför används QImage och inte QPixmap.
+    """
+    cached = variant_path(cache_dir, path)
+    if cached is None:
+        return None
+    if os.path.exists(cached):
+        image = QImage(cached)
+        if not image.isNull():
+            return image
+    reader = QImageReader(path)
+    size = reader.size()
+    if size.isValid():
+        # Låter avkodaren skala redan vid läsningen, vilket är betydligt billigare för stora JPEG-bilder.
+        reader.setScaledSize(size.scaled(THUMBNAIL_SIZE, Qt.AspectRatioMode.KeepAspectRatio))
+    image = reader.read()
+    if image.isNull():
+        logger.warning(f"Kunde inte läsa miniatyren {path}: {reader.errorString()}")
+        return None
+    if image.width() > THUMBNAIL_SIZE.width() or image.height() > THUMBNAIL_SIZE.height():
+        image = image.scaled(THUMBNAIL_SIZE, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{cached}.tmp"
+        if image.save(tmp_path, "PNG"):
+            os.replace(tmp_path, cached)
+    except OSError as e:
+        logger.warning(f"Kunde inte spara förskalad miniatyr för {path}: {e}")
+    return image
+
+class _LoadTask(QRunnable):
+    def __init__(self, service: "ThumbnailService", path: str):
+        super().__init__()
+        self.service = service
+        self.path = path
+        self.cache_dir = service.cache_dir
+
+    def run(self) -> None:
+        image = load_scaled_image(self.path, self.cache_dir)
+        # Signalen levereras köad till GUI-tråden där QPixmap får skapas.
+        self.service._image_loaded.emit(self.path, image if image is not None else QImage())
+
+class ThumbnailService(QObject):
+    """
+    Tillhandahåller skalade miniatyrer utan att avkoda bilder i GUI-tråden.
+    Bilder avkodas och skalas i en QThreadPool, hålls i en LRU-cache med en gräns i byte
+    och sparas som förskalade varianter på disk så att originalen inte behöver avkodas igen.
+    """
+    thumbnail_ready = pyqtSignal(str)
+    _image_loaded = pyqtSignal(str, QImage)
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = 32 * 1024 * 1024,
+                 max_threads: int = 2, parent: QObject | None = None):
+        super().__init__(parent)
+        if cache_dir is None:
+            app_data_path = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.AppDataLocation)
+            cache_dir = os.path.join(app_data_path, "thumbnails")
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._cache: "OrderedDict[str, QPixmap]" = OrderedDict()
+        self._cache_bytes = 0
+        self._pending: Set[str] = set()
+        self._failed: Set[str] = set()
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(max_threads)
+        self._image_loaded.connect(self._on_image_loaded)
+
+    @property
+    def cache_bytes(self) -> int:
+        return self._cache_bytes
+
+    def get(self, path: Optional[str]) -> Optional[QPixmap]:
+        """Returnerar en cachad miniatyr, eller None och startar inläsning i bakgrunden."""
+        if not path:
+            return None
+        pixmap = self._cache.get(path)
+        if pixmap is not None:
+            self._cache.move_to_end(path)
+            return pixmap
+        if path not in self._pending and path not in self._failed:
+            self._pending.add(path)
+            self.thread_pool.start(_LoadTask(self, path))
+        return None
+
+    def invalidate(self, path: str) -> None:
+        """Glömmer en miniatyr, t.ex. när bilden har genererats på nytt."""
+        pixmap = self._cache.pop(path, None)
+        if pixmap is not None:
+            self._cache_bytes -= self._pixmap_bytes(pixmap)
+        self._failed.discard(path)
+
+    def wait_for_done(self, msecs: int = -1) -> bool:
+        return self.thread_pool.waitForDone(msecs)
+
+    @staticmethod
+    def _pixmap_bytes(pixmap: QPixmap) -> int:
+        return pixmap.width() * pixmap.height() * max(1, pixmap.depth() // 8)
+
+    def _on_image_loaded(self, path: str, image: QImage) -> None:
+        self._pending.discard(path)
+        if image.isNull():
+            self._failed.add(path)
+            return
+        pixmap = QPixmap.fromImage(image)
+        self.invalidate(path)
+        self._cache[path] = pixmap
+        self._cache_bytes += self._pixmap_bytes(pixmap)
+        while self._cache_bytes > self.max_bytes and len(self._cache) > 1:
+            _, evicted = self._cache.popitem(last=False)
+            self._cache_bytes -= self._pixmap_bytes(evicted)
+        self.thumbnail_ready.emit(path)